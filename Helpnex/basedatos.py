@@ -0,0 +1,186 @@
+"""
+Configuración de DATABASES a partir de variables de entorno.
+
+HELPNEX_DB=postgresql (por defecto) o sqlite. El valor por defecto necesita un
+servidor PostgreSQL en localhost:5432; sin él, HELPNEX_DB=sqlite (ver README.md).
+
+PostgreSQL:
+    HELPNEX_DB_NOMBRE, HELPNEX_DB_USUARIO, HELPNEX_DB_CLAVE, HELPNEX_DB_HOST, HELPNEX_DB_PUERTO
+    HELPNEX_DB_CONN_MAX_AGE  segundos que se reutiliza una conexión (por defecto 60; 0 = una por petición)
+    HELPNEX_DB_POOL          "min,max" activa el pool de psycopg 3 (p. ej. "2,10"). Con pool
+                             la conexión vuelve al pool al terminar cada petición
+                             (CONN_MAX_AGE pasa a 0, Django no admite ambas cosas).
+    HELPNEX_DB_POOL_ESPERA   segundos que una petición espera una conexión libre (por defecto 10)
+
+SQLite (desarrollo, tests y benchmarks sin servidor):
+    HELPNEX_SQLITE_RUTA      archivo de la base (por defecto db.sqlite3 en la raíz)
+
+Réplicas de solo lectura (las usa monitoring/replicas.py):
+    HELPNEX_DB_REPLICAS      PostgreSQL: "host" o "host:puerto" de cada réplica, separados por
+                             comas; mismo nombre, usuario y clave que la primaria
+    HELPNEX_SQLITE_REPLICAS  SQLite: archivos copia de la primaria separados por comas
+                             (manage.py sincronizar_replicas los actualiza)
+    Quedan como 'replica1', 'replica2'... En los tests son espejo de default.
+
+Hospitales (cada uno con sus propias tablas de monitoring, ver monitoring/hospitales.py):
+    HELPNEX_SQLITE_HOSPITALES  SQLite: "clave=archivo" separados por comas,
+                               p. ej. "norte=/datos/norte.sqlite3,sur=/datos/sur.sqlite3"
+    HELPNEX_DB_HOSPITALES      PostgreSQL: "clave=base" o "clave=base@host[:puerto]" separados
+                               por comas; mismo usuario y clave que la primaria
+    Quedan como 'hospital_norte', 'hospital_sur'... En los tests cada uno tiene su
+    propia base de prueba. Usuarios y sesiones siguen en la primaria.
+
+En todos los casos se verifica la conexión antes de reutilizarla (CONN_HEALTH_CHECKS).
+"""
+import os
+
+# WAL permite leer mientras otro proceso escribe; synchronous=NORMAL es seguro
+# con WAL y evita un fsync por commit; busy_timeout espera el bloqueo en vez
+# de fallar con "database is locked".
+PRAGMAS_SQLITE = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA foreign_keys=ON',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-64000',       # 64 MB de caché de páginas por conexión
+    'PRAGMA mmap_size=268435456',     # 256 MB leídos por mmap
+)
+
+
+PREFIJO_REPLICA = 'replica'
+PREFIJO_HOSPITAL = 'hospital_'
+
+
+def _entero(entorno, nombre, defecto):
+    valor = entorno.get(nombre)
+    return int(valor) if valor not in (None, '') else defecto
+
+
+def _sqlite(entorno, base_dir):
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': entorno.get('HELPNEX_SQLITE_RUTA') or base_dir / 'db.sqlite3',
+        'CONN_MAX_AGE': _entero(entorno, 'HELPNEX_DB_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': '; '.join(PRAGMAS_SQLITE),
+            # Las escrituras toman el bloqueo al empezar la transacción: sin
+            # esto, dos transacciones que leen y luego escriben chocan y una
+            # falla de inmediato aunque haya busy_timeout.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    }
+
+
+def _postgresql(entorno):
+    configuracion = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': entorno.get('HELPNEX_DB_NOMBRE', 'helpnex_db'),
+        'USER': entorno.get('HELPNEX_DB_USUARIO', 'postgres'),
+        'PASSWORD': entorno.get('HELPNEX_DB_CLAVE', 'root'),
+        'HOST': entorno.get('HELPNEX_DB_HOST', 'localhost'),
+        'PORT': entorno.get('HELPNEX_DB_PUERTO', '5432'),
+        'CONN_MAX_AGE': _entero(entorno, 'HELPNEX_DB_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    pool = entorno.get('HELPNEX_DB_POOL')
+    if pool:
+        minimo, _, maximo = pool.partition(',')
+        configuracion['CONN_MAX_AGE'] = 0
+        configuracion['OPTIONS']['pool'] = {
+            'min_size': int(minimo),
+            'max_size': int(maximo or minimo),
+            'timeout': _entero(entorno, 'HELPNEX_DB_POOL_ESPERA', 10),
+            'name': 'helpnex',
+        }
+    return configuracion
+
+
+def _lista(entorno, nombre):
+    return [valor.strip() for valor in entorno.get(nombre, '').split(',') if valor.strip()]
+
+
+def _replica(primaria, **cambios):
+    replica = {**primaria, **cambios}
+    replica['OPTIONS'] = dict(primaria['OPTIONS'])
+    # En los tests no se crea otra base: la réplica lee la de default
+    replica['TEST'] = {'MIRROR': 'default'}
+    return replica
+
+
+def _replicas_sqlite(entorno, primaria):
+    return [_replica(primaria, NAME=ruta) for ruta in _lista(entorno, 'HELPNEX_SQLITE_REPLICAS')]
+
+
+def _replicas_postgresql(entorno, primaria):
+    replicas = []
+    for direccion in _lista(entorno, 'HELPNEX_DB_REPLICAS'):
+        host, _, puerto = direccion.partition(':')
+        replicas.append(_replica(primaria, HOST=host, PORT=puerto or primaria['PORT']))
+    return replicas
+
+
+def alias_replicas(databases):
+    return [alias for alias in databases if alias.startswith(PREFIJO_REPLICA)]
+
+
+def _pares(entorno, nombre):
+    pares = []
+    for valor in _lista(entorno, nombre):
+        clave, separador, destino = (parte.strip() for parte in valor.partition('='))
+        if not separador or not clave or not destino:
+            raise ValueError(f"{nombre}: se esperaba clave=destino, no '{valor}'")
+        pares.append((clave, destino))
+    return pares
+
+
+def _hospital(primaria, **cambios):
+    hospital = {**primaria, **cambios}
+    hospital['OPTIONS'] = dict(primaria['OPTIONS'])
+    return hospital
+
+
+def _hospitales_sqlite(entorno, primaria):
+    return [(clave, _hospital(primaria, NAME=ruta)) for clave, ruta in _pares(entorno, 'HELPNEX_SQLITE_HOSPITALES')]
+
+
+def _hospitales_postgresql(entorno, primaria):
+    hospitales = []
+    for clave, destino in _pares(entorno, 'HELPNEX_DB_HOSPITALES'):
+        nombre, _, direccion = destino.partition('@')
+        host, _, puerto = direccion.partition(':')
+        hospitales.append((clave, _hospital(
+            primaria, NAME=nombre, HOST=host or primaria['HOST'], PORT=puerto or primaria['PORT']
+        )))
+    return hospitales
+
+
+def alias_hospitales(databases):
+    """{clave: alias} de los hospitales configurados."""
+    return {alias[len(PREFIJO_HOSPITAL):]: alias for alias in databases if alias.startswith(PREFIJO_HOSPITAL)}
+
+
+def bases_de_datos(entorno=os.environ, base_dir=None):
+    motor = entorno.get('HELPNEX_DB', 'postgresql').lower()
+    if motor == 'sqlite':
+        primaria = _sqlite(entorno, base_dir)
+        replicas = _replicas_sqlite(entorno, primaria)
+        hospitales = _hospitales_sqlite(entorno, primaria)
+    elif motor in ('postgresql', 'postgres'):
+        primaria = _postgresql(entorno)
+        replicas = _replicas_postgresql(entorno, primaria)
+        hospitales = _hospitales_postgresql(entorno, primaria)
+    else:
+        raise ValueError(f"HELPNEX_DB no reconocido: {motor} (postgresql o sqlite)")
+    bases = {'default': primaria}
+    for numero, replica in enumerate(replicas, start=1):
+        bases[f'{PREFIJO_REPLICA}{numero}'] = replica
+    for clave, hospital in hospitales:
+        bases[f'{PREFIJO_HOSPITAL}{clave}'] = hospital
+    for alias, base in bases.items():
+        if alias != 'default' and 'pool' in base['OPTIONS']:
+            base['OPTIONS']['pool'] = {**base['OPTIONS']['pool'], 'name': f'helpnex-{alias}'}
+    return bases
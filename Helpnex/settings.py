@@ -7,6 +7,8 @@ Generated by 'django-admin startproject' using Django 5.2.7.
 from pathlib import Path
 import os
 
+from .basedatos import bases_de_datos
+
 # --- RUTAS BASE ---
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -30,6 +32,8 @@ INSTALLED_APPS = [
 # --- MIDDLEWARE ---
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'monitoring.replicas.ReplicasMiddleware',
+    'monitoring.hospitales.HospitalesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -42,12 +46,19 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'Helpnex.urls'
 
 # --- TEMPLATES ---
+# Cargador en caché explícito: cada plantilla se compila una vez por proceso.
+# Con runserver el autoreload lo vacía al editar una plantilla.
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [ BASE_DIR / 'monitoring' / 'templates' ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -61,17 +72,62 @@ TEMPLATES = [
 WSGI_APPLICATION = 'Helpnex.wsgi.application'
 
 # --- BASE DE DATOS ---
-DATABASES = {
+# Se elige con variables de entorno (ver Helpnex/basedatos.py):
+#   HELPNEX_DB=sqlite python manage.py test   -> sin servidor de base de datos
+DATABASES = bases_de_datos(os.environ, BASE_DIR)
+
+# Datos de cada hospital en su base y lecturas pesadas en réplicas, si hay
+# (ver monitoring/hospitales.py y monitoring/replicas.py)
+DATABASE_ROUTERS = ['monitoring.hospitales.EnrutadorHospitales', 'monitoring.replicas.EnrutadorReplicas']
+REPLICAS_RETRASO_MAXIMO = 5      # segundos; una réplica más atrasada no se usa
+REPLICAS_PEGAJOSO_SEGUNDOS = 10  # tras escribir, el navegador lee de la primaria
+REPLICAS_COMPROBAR_SEGUNDOS = 5  # cada cuánto se vuelve a medir el retraso
+
+# --- CACHÉ ---
+# Memoria local por proceso; en producción con varios workers conviene un
+# backend compartido (Redis/Memcached) para que la invalidación llegue a todos.
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'helpnex_db',
-        'USER': 'postgres',
-        'PASSWORD': 'root',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'helpnex',
+        # Las claves de monitoring llevan el hospital activo (ver monitoring/hospitales.py)
+        'KEY_FUNCTION': 'monitoring.hospitales.clave_cache',
     }
 }
+ANALITICA_CACHE_SEGUNDOS = 3600
+FRAGMENTOS_CACHE_SEGUNDOS = 3600  # fragmentos del panel admin y página de análisis (claves por versión)
+ZONAS_CACHE_LARGO = 3  # autocompletado de zonas: textos de hasta 3 caracteres en caché
+ZONAS_CACHE_SEGUNDOS = 300
 
+# --- SERIES DE OCUPACIÓN (manage.py muestrear_ocupacion) ---
+SERIES_INTERVALO_SEGUNDOS = 60
+SERIES_PROFUNDIDAD_MAXIMA = 2  # zonas muestreadas: edificios, plantas y pasillos
+SERIES_RETENCION_DIAS = {'minuto': 2, 'hora': 90, 'dia': 5 * 365}
+
+# --- REPARTO DE PERSONAL (analisis/reparto/ y manage.py repartir_personal) ---
+REPARTO_PROFUNDIDAD = 1  # zonas que reciben personal: 0 edificios, 1 plantas
+REPARTO_PACIENTES_POR_EMPLEADO = {'Enfermero/a': 6, 'Auxiliar': 10, 'Médico/a': 15}
+REPARTO_PESOS_ENFERMEDAD = {'cardiaca': 1.5, 'respiratoria': 1.5, 'neurologica': 1.3, 'diabetes': 1.2}  # el resto, 1
+
+# --- AVISOS A CONTACTOS (manage.py despachar_notificaciones) ---
+# TransporteArchivo escribe en NOTIFICACIONES_ARCHIVO; en producción, una
+# clase propia con enviar(mensaje) que hable con el proveedor de correo/SMS
+NOTIFICACIONES_TRANSPORTE = 'monitoring.notificaciones.TransporteConsola'
+NOTIFICACIONES_ARCHIVO = BASE_DIR / 'notificaciones.jsonl'
+NOTIFICACIONES_LIMITES = {'correo': 20, 'sms': 5}  # envíos por segundo y canal
+NOTIFICACIONES_INTENTOS = 5
+NOTIFICACIONES_ESPERA_SEGUNDOS = 30  # primer reintento; se duplica en cada fallo
+NOTIFICACIONES_INTERVALO_SEGUNDOS = 5
+
+# --- API REST ---
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+    'DEFAULT_PAGINATION_CLASS': 'monitoring.paginacion.PaginacionCursor',
+}
 
 # --- VALIDADORES DE CONTRASEÑA ---
 AUTH_PASSWORD_VALIDATORS = [
@@ -0,0 +1,180 @@
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from django.utils import timezone # type: ignore
+
+from .camas import liberar_camas, mover_clientes
+from .eventos import difusor
+from .hospitales import al_confirmar, atomica, conexion_activa
+from .models import Zona, Cliente, Contacto, Empleado
+from .movimientos import registrar_traslados
+from .versiones import incrementar_version
+
+
+# ------------------------------
+# ACCIONES MASIVAS DEL PANEL
+# ------------------------------
+# Las filas marcadas en el panel se cambian con unos pocos UPDATE/DELETE sobre
+# todo el lote, en una transacción y tocando solo las columnas afectadas: sin
+# get_object_or_404 ni save() por fila. Las filas que ya tienen el valor pedido
+# no se cuentan ni se escriben. Como UPDATE y DELETE de querysets no disparan
+# señales por fila (los DELETE van sin ellas a propósito), aquí se hace lo que
+# harían signals.py: camas, historial, versiones de caché y aviso a pantallas.
+
+MAXIMO_SELECCION = 5000
+
+ACCIONES = {
+    'clientes': {
+        'zona': "Reasignar zona",
+        'enfermedad': "Cambiar tipo de enfermedad",
+        'eliminar': "Eliminar",
+    },
+    'empleados': {
+        'zona': "Reasignar zona",
+        'activar': "Activar",
+        'desactivar': "Desactivar",
+        'eliminar': "Eliminar",
+    },
+}
+
+
+@dataclass
+class ResultadoAccion:
+    accion: str
+    seleccionados: int
+    afectados: int = 0
+    segundos: float = 0.0
+
+
+def leer_ids(valores):
+    ids = {int(valor) for valor in valores}
+    if not ids:
+        raise ValueError("No hay filas seleccionadas.")
+    if len(ids) > MAXIMO_SELECCION:
+        raise ValueError(f"Máximo {MAXIMO_SELECCION} filas por acción.")
+    return sorted(ids)
+
+
+def zona_por_nombre(nombre):
+    """Id de la zona con ese nombre; None si viene vacío (sin zona)."""
+    if not nombre:
+        return None
+    zona_id = Zona.objects.filter(nombre=nombre).values_list('id', flat=True).first()
+    if zona_id is None:
+        raise ValueError(f"No existe la zona '{nombre}'.")
+    return zona_id
+
+
+def _borrar(modelo, campo, ids):
+    """
+    DELETE de las filas de `modelo` con `campo` en `ids` (base activa), sin
+    cargarlas ni enviar señales: QuerySet.delete() las recorrería para
+    signals.py, que volvería a liberar las camas y a anotar las salidas.
+    """
+    conexion = conexion_activa()
+    nombre = conexion.ops.quote_name
+    columna = modelo._meta.get_field(campo).column
+    marcas = ', '.join(['%s'] * len(ids))
+    with conexion.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {nombre(modelo._meta.db_table)} WHERE {nombre(columna)} IN ({marcas})', ids)
+        return cursor.rowcount
+
+
+# ------------------------------
+# CLIENTES
+# ------------------------------
+def cambiar_enfermedad(ids, tipo_enfermedad):
+    if tipo_enfermedad not in dict(Cliente.TIPO_ENFERMEDAD):
+        raise ValueError(f"Tipo de enfermedad desconocido: '{tipo_enfermedad}'.")
+    with atomica():
+        cambiados = (
+            Cliente.objects.filter(pk__in=ids).exclude(tipo_enfermedad=tipo_enfermedad)
+            .update(tipo_enfermedad=tipo_enfermedad)
+        )
+        if cambiados:
+            al_confirmar(lambda: incrementar_version('cliente'))
+    return cambiados
+
+
+@atomica
+def eliminar_clientes(ids):
+    """Devuelve las camas, cierra las estancias y borra contactos y clientes con un DELETE por tabla."""
+    filas = list(
+        Cliente.objects.select_for_update().filter(pk__in=ids).values_list('id', 'zona_asignada_id', 'en_zona_desde')
+    )
+    if not filas:
+        return 0
+    ocupados = [fila for fila in filas if fila[1] is not None]
+    anteriores = Counter(zona_id for _, zona_id, _ in ocupados)
+    liberar_camas(anteriores)
+    registrar_traslados(ocupados, None, timezone.now())
+
+    ids = [cliente_id for cliente_id, _, _ in filas]
+    # Los contactos (CASCADE) antes que sus clientes
+    _borrar(Contacto, 'cliente', ids)
+    borrados = _borrar(Cliente, 'id', ids)
+    al_confirmar(lambda: incrementar_version('zona', 'cliente', 'contacto'))
+    difusor.notificar_al_confirmar(*anteriores)
+    return borrados
+
+
+# ------------------------------
+# EMPLEADOS
+# ------------------------------
+def _cambiar_empleados(ids, **cambios):
+    """UPDATE de las filas que aún no tienen `cambios`; avisa a las zonas de antes y de después."""
+    campo, valor = next(iter(cambios.items()))
+    with atomica():
+        filas = list(
+            Empleado.objects.select_for_update().filter(pk__in=ids).exclude(**cambios)
+            .values_list('id', 'zona_asignada_id')
+        )
+        if not filas:
+            return 0
+        Empleado.objects.filter(pk__in=[empleado_id for empleado_id, _ in filas]).update(**cambios)
+        al_confirmar(lambda: incrementar_version('empleado'))
+        zonas = {zona_id for _, zona_id in filas}
+        if campo == 'zona_asignada':
+            zonas.add(valor)
+        difusor.notificar_al_confirmar(*(zona_id for zona_id in zonas if zona_id is not None))
+    return len(filas)
+
+
+@atomica
+def eliminar_empleados(ids):
+    zonas = set(Empleado.objects.filter(pk__in=ids).values_list('zona_asignada_id', flat=True))
+    borrados = _borrar(Empleado, 'id', ids)
+    if borrados:
+        al_confirmar(lambda: incrementar_version('empleado'))
+        difusor.notificar_al_confirmar(*(zona_id for zona_id in zonas if zona_id is not None))
+    return borrados
+
+
+def aplicar_accion(seccion, accion, valores_ids, zona='', tipo_enfermedad=''):
+    """
+    Ejecuta una acción del panel sobre las filas marcadas (`valores_ids`, tal
+    como llegan del formulario). `zona` es un nombre de zona (vacío: sin zona).
+    Lanza ValueError si la acción o sus datos no son válidos y
+    SinCamasDisponibles si la zona no tiene camas para todos los clientes.
+    """
+    if accion not in ACCIONES.get(seccion, {}):
+        raise ValueError(f"Acción desconocida: '{accion}'.")
+    ids = leer_ids(valores_ids)
+    inicio = time.perf_counter()
+
+    if seccion == 'clientes':
+        if accion == 'zona':
+            afectados = mover_clientes(ids, zona_por_nombre(zona))
+        elif accion == 'enfermedad':
+            afectados = cambiar_enfermedad(ids, tipo_enfermedad)
+        else:
+            afectados = eliminar_clientes(ids)
+    elif accion == 'zona':
+        afectados = _cambiar_empleados(ids, zona_asignada=zona_por_nombre(zona))
+    elif accion in ('activar', 'desactivar'):
+        afectados = _cambiar_empleados(ids, activo=accion == 'activar')
+    else:
+        afectados = eliminar_empleados(ids)
+
+    return ResultadoAccion(accion, len(ids), afectados, time.perf_counter() - inicio)
@@ -0,0 +1,221 @@
+import asyncio
+from collections import Counter
+
+from asgiref.sync import sync_to_async # type: ignore
+from django.conf import settings # type: ignore
+from django.core.cache import cache # type: ignore
+from django.db import close_old_connections # type: ignore
+from django.db.models import Count, Sum # type: ignore
+from django.db.models.functions import Coalesce # type: ignore
+
+from .hospitales import aen_todas, al_confirmar, conexion_activa
+from .models import Zona, Cliente, Empleado
+from .replicas import en_primaria
+from .versiones import obtener_versiones, aobtener_versiones
+
+
+# ------------------------------
+# RESUMEN DEL DASHBOARD
+# ------------------------------
+# Todas las métricas de main/analisis salen de tres consultas: un GROUP BY
+# (zona, enfermedad) sobre clientes, otro (zona, cargo) sobre empleados y un
+# COUNT de zonas. El resultado se guarda en caché bajo una clave que incluye
+# las versiones de los modelos, así que cualquier escritura lo invalida.
+
+MODELOS_RESUMEN = ('zona', 'cliente', 'empleado')
+CLAVE_RESUMEN = 'monitoring:analitica:resumen'
+CLAVE_ACIERTOS = 'monitoring:analitica:aciertos'
+CLAVE_FALLOS = 'monitoring:analitica:fallos'
+
+
+def _ordenado(contador):
+    return dict(sorted(contador.items(), key=lambda par: -par[1]))
+
+
+def _filas_clientes():
+    return list(
+        Cliente.objects.values_list('zona_asignada__nombre', 'tipo_enfermedad')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def _filas_empleados():
+    return list(
+        Empleado.objects.values_list('zona_asignada__nombre', 'cargo')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def _total_zonas():
+    # Una sola consulta para el número de zonas y las camas (propias de cada zona)
+    return Zona.objects.aggregate(
+        zonas=Count('id'), camas=Coalesce(Sum('total_camas'), 0), ocupadas=Coalesce(Sum('camas_ocupadas'), 0),
+    )
+
+
+def _armar_resumen(filas_clientes, filas_empleados, totales_zonas):
+    clientes_zona = Counter()
+    clientes_enfermedad = Counter()
+    for zona, enfermedad, total in filas_clientes:
+        clientes_zona[zona or 'Sin zona'] += total
+        clientes_enfermedad[enfermedad or 'No especificado'] += total
+
+    empleados_zona = Counter()
+    empleados_cargo = Counter()
+    for zona, cargo, total in filas_empleados:
+        empleados_zona[zona or 'Sin zona'] += total
+        empleados_cargo[cargo] += total
+
+    return {
+        'total_zonas': totales_zonas['zonas'],
+        'camas_totales': totales_zonas['camas'],
+        'camas_ocupadas': totales_zonas['ocupadas'],
+        'total_clientes': sum(clientes_zona.values()),
+        'total_empleados': sum(empleados_zona.values()),
+        'clientes_por_zona': _ordenado(clientes_zona),
+        'clientes_por_enfermedad': _ordenado(clientes_enfermedad),
+        'empleados_por_zona': _ordenado(empleados_zona),
+        'empleados_por_cargo': _ordenado(empleados_cargo),
+    }
+
+
+CONSULTAS_RESUMEN = (_filas_clientes, _filas_empleados, _total_zonas)
+
+
+def calcular_resumen():
+    """Calcula el resumen directamente desde la base de datos."""
+    return _armar_resumen(*(consulta() for consulta in CONSULTAS_RESUMEN))
+
+
+def _clave_resumen(versiones):
+    return CLAVE_RESUMEN + ':' + ':'.join(str(versiones[m]) for m in MODELOS_RESUMEN)
+
+
+def _contar(clave):
+    cache.add(clave, 0, timeout=None)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        pass
+
+
+def obtener_resumen():
+    """Resumen desde caché; si la versión cambió se recalcula una sola vez."""
+    clave = _clave_resumen(obtener_versiones(*MODELOS_RESUMEN))
+    resumen = cache.get(clave)
+    if resumen is not None:
+        _contar(CLAVE_ACIERTOS)
+        return resumen
+
+    _contar(CLAVE_FALLOS)
+    with en_primaria():
+        resumen = calcular_resumen()
+    # Solo se guarda lo que llegó a confirmarse: si la transacción actual
+    # se revierte, el resumen calculado con sus filas se descarta
+    al_confirmar(lambda: cache.set(
+        clave, resumen, timeout=getattr(settings, 'ANALITICA_CACHE_SEGUNDOS', 3600)
+    ))
+    return resumen
+
+
+# ------------------------------
+# VERSIÓN ASÍNCRONA (vistas ASGI)
+# ------------------------------
+# Las tres consultas son independientes: cada una corre en un hilo del pool
+# con su propia conexión y se esperan juntas, así la latencia de un fallo de
+# caché es la de la consulta más lenta y no la suma. Mientras esperan, el
+# event loop sigue atendiendo otras peticiones.
+
+def _en_hilo(consulta):
+    def ejecutar():
+        # Estos hilos no pasan por request_started/finished: se aplican aquí
+        # CONN_MAX_AGE y los health checks a su conexión
+        close_old_connections()
+        try:
+            return consulta()
+        finally:
+            close_old_connections()
+    return sync_to_async(ejecutar, thread_sensitive=False)
+
+
+def _en_transaccion():
+    return conexion_activa().in_atomic_block
+
+
+async def acalcular_resumen():
+    filas = await asyncio.gather(*(_en_hilo(consulta)() for consulta in CONSULTAS_RESUMEN))
+    return _armar_resumen(*filas)
+
+
+async def _acontar(clave):
+    await cache.aadd(clave, 0, timeout=None)
+    try:
+        await cache.aincr(clave)
+    except ValueError:
+        pass
+
+
+async def aobtener_resumen():
+    """Como obtener_resumen(), sin bloquear el event loop."""
+    clave = _clave_resumen(await aobtener_versiones(*MODELOS_RESUMEN))
+    resumen = await cache.aget(clave)
+    if resumen is not None:
+        await _acontar(CLAVE_ACIERTOS)
+        return resumen
+
+    # Dentro de una transacción abierta (p. ej. en TestCase) las conexiones de
+    # otros hilos no ven sus filas: se calcula en el hilo de la transacción
+    if await sync_to_async(_en_transaccion)():
+        return await sync_to_async(obtener_resumen)()
+
+    await _acontar(CLAVE_FALLOS)
+    with en_primaria():
+        resumen = await acalcular_resumen()
+    await cache.aset(clave, resumen, timeout=getattr(settings, 'ANALITICA_CACHE_SEGUNDOS', 3600))
+    return resumen
+
+
+# ------------------------------
+# RESUMEN DE TODOS LOS HOSPITALES
+# ------------------------------
+# Con los datos repartidos por hospital (ver hospitales.py) cada base tiene su
+# resumen en caché; el global los pide todos a la vez y los suma, así que un
+# fallo tarda lo que el hospital más lento y no la suma de todos.
+
+TOTALES_RESUMEN = ('total_zonas', 'camas_totales', 'camas_ocupadas', 'total_clientes', 'total_empleados')
+AGRUPACIONES_RESUMEN = ('clientes_por_zona', 'clientes_por_enfermedad', 'empleados_por_zona', 'empleados_por_cargo')
+
+
+def combinar_resumenes(resumenes):
+    """Un resumen con la misma forma que sus partes: totales sumados y agrupaciones fusionadas."""
+    combinado = {clave: sum(resumen[clave] for resumen in resumenes) for clave in TOTALES_RESUMEN}
+    for clave in AGRUPACIONES_RESUMEN:
+        contador = Counter()
+        for resumen in resumenes:
+            contador.update(resumen[clave])
+        combinado[clave] = _ordenado(contador)
+    return combinado
+
+
+async def aobtener_resumen_global():
+    """Devuelve (resumen combinado, {alias: resumen de esa base})."""
+    por_base = await aen_todas(aobtener_resumen)
+    return combinar_resumenes(list(por_base.values())), por_base
+
+
+def estadisticas_cache():
+    valores = cache.get_many([CLAVE_ACIERTOS, CLAVE_FALLOS])
+    aciertos = valores.get(CLAVE_ACIERTOS, 0)
+    fallos = valores.get(CLAVE_FALLOS, 0)
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'tasa_aciertos': round(aciertos / total, 4) if total else 0.0,
+    }
+
+
+def reiniciar_estadisticas():
+    cache.delete_many([CLAVE_ACIERTOS, CLAVE_FALLOS])
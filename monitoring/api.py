@@ -0,0 +1,306 @@
+import hashlib
+from collections import defaultdict
+
+from django.utils.http import parse_etags # type: ignore
+from rest_framework import permissions, status, viewsets # type: ignore
+from rest_framework.decorators import action # type: ignore
+from rest_framework.exceptions import APIException, ValidationError # type: ignore
+from rest_framework.response import Response # type: ignore
+
+from .camas import asignar_cliente, mover_clientes, trasladar_cliente, SinCamasDisponibles
+from .eventos import difusor
+from .hospitales import al_confirmar, atomica
+from .identificadores import completar_identificadores, nuevo_identificador
+from .jerarquia import reconstruir_jerarquia
+from .models import Zona, Cliente, Contacto, Empleado
+from .paginacion import PaginacionCursor
+from .serializers import ZonaSerializer, ClienteSerializer, ContactoSerializer, EmpleadoSerializer
+from .versiones import obtener_versiones, incrementar_version
+
+
+# ------------------------------
+# API REST
+# ------------------------------
+MAXIMO_MASIVO = 5000
+
+
+class LecturaOAdmin(permissions.BasePermission):
+    """Cualquier usuario autenticado lee; solo los superusuarios escriben (como el panel)."""
+
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        return request.method in permissions.SAFE_METHODS or request.user.is_superuser
+
+
+class Conflicto(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Conflicto con el estado actual."
+    default_code = 'conflicto'
+
+
+# ------------------------------
+# ETAG A PARTIR DE LAS VERSIONES
+# ------------------------------
+class ETagMixin:
+    """
+    El ETag se arma con la URL y las versiones de los modelos que aparecen en
+    la respuesta (ver versiones.py). Si el cliente manda el mismo ETag en
+    If-None-Match se responde 304 sin consultar la base.
+    """
+    modelos_etag = ()
+
+    def _etag(self, request):
+        versiones = obtener_versiones(*self.modelos_etag)
+        base = '|'.join(
+            [request.get_full_path(), request.accepted_renderer.format or '']
+            + [f'{modelo}:{versiones[modelo]}' for modelo in self.modelos_etag]
+        )
+        return '"%s"' % hashlib.md5(base.encode(), usedforsecurity=False).hexdigest()
+
+    def _con_etag(self, request, generar):
+        etag = self._etag(request)
+        pedidos = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in pedidos or '*' in pedidos:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        respuesta = generar()
+        respuesta['ETag'] = etag
+        return respuesta
+
+    def list(self, request, *args, **kwargs):
+        return self._con_etag(request, lambda: super(ETagMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._con_etag(request, lambda: super(ETagMixin, self).retrieve(request, *args, **kwargs))
+
+
+# ------------------------------
+# ALTAS Y CAMBIOS MASIVOS
+# ------------------------------
+class MasivoMixin:
+    """
+    POST <recurso>/masivo/  -> lista de objetos a crear (bulk_create)
+    PATCH <recurso>/masivo/ -> lista de {id, campos...} a modificar (bulk_update)
+
+    La unicidad y las claves foráneas se verifican con una consulta por campo
+    para todo el lote, y todo el lote va en una transacción.
+    """
+    campos_unicos = ('identificador',)
+    claves_foraneas = {}
+
+    def _lista(self, request):
+        datos = request.data
+        if not isinstance(datos, list) or not datos:
+            raise ValidationError("Se espera una lista no vacía de objetos.")
+        if len(datos) > MAXIMO_MASIVO:
+            raise ValidationError(f"Máximo {MAXIMO_MASIVO} objetos por petición.")
+        return datos
+
+    def _serializar_lote(self, datos, instancias=None):
+        contexto = {**self.get_serializer_context(), 'masivo': True}
+        clase = self.get_serializer_class()
+        if instancias is None:
+            serializer = clase(data=datos, many=True, context=contexto)
+            serializer.is_valid(raise_exception=True)
+            return serializer.validated_data
+        validados, errores = [], []
+        for fila in datos:
+            serializer = clase(instancias[fila['id']], data=fila, partial=True, context=contexto)
+            errores.append({} if serializer.is_valid() else serializer.errors)
+            validados.append(serializer.validated_data if not errores[-1] else None)
+        if any(errores):
+            raise ValidationError(errores)
+        return validados
+
+    def _verificar_lote(self, validados, excluir_ids=()):
+        modelo = self.get_queryset().model
+        for campo in self.campos_unicos:
+            valores = [v[campo] for v in validados if campo in v]
+            if len(valores) != len(set(valores)):
+                raise ValidationError({campo: "Hay valores repetidos dentro del lote."})
+            usados = set(
+                modelo.objects.filter(**{f'{campo}__in': valores})
+                .exclude(pk__in=excluir_ids)
+                .values_list(campo, flat=True)
+            )
+            if usados:
+                raise ValidationError({campo: f"Ya existen: {sorted(usados)[:10]}"})
+        for campo, relacionado in self.claves_foraneas.items():
+            ids = {v[f'{campo}_id'] for v in validados if v.get(f'{campo}_id') is not None}
+            faltan = ids - set(relacionado.objects.filter(pk__in=ids).values_list('pk', flat=True))
+            if faltan:
+                raise ValidationError({campo: f"No existen: {sorted(faltan)[:10]}"})
+
+    def _antes_de_crear(self, objetos):
+        completar_identificadores(objetos)
+
+    def _despues_de_masivo(self, objetos, validados):
+        pass
+
+    @action(detail=False, methods=['post', 'patch'], url_path='masivo')
+    def masivo(self, request):
+        datos = self._lista(request)
+        modelo = self.get_queryset().model
+
+        if request.method == 'POST':
+            validados = self._serializar_lote(datos)
+            self._verificar_lote(validados)
+            objetos = [modelo(**v) for v in validados]
+            self._antes_de_crear(objetos)
+            with atomica():
+                creados = modelo.objects.bulk_create(objetos, batch_size=1000)
+                self._despues_de_masivo(creados, validados)
+            self._invalidar()
+            return Response({'creados': len(creados), 'ids': [o.pk for o in creados]},
+                            status=status.HTTP_201_CREATED)
+
+        if any(not isinstance(fila, dict) or 'id' not in fila for fila in datos):
+            raise ValidationError("Cada objeto debe incluir su id.")
+        instancias = modelo.objects.in_bulk([fila['id'] for fila in datos])
+        faltan = [fila['id'] for fila in datos if fila['id'] not in instancias]
+        if faltan:
+            raise ValidationError({'id': f"No existen: {faltan[:10]}"})
+
+        validados = self._serializar_lote(datos, instancias)
+        self._verificar_lote(validados, excluir_ids=list(instancias))
+        campos = set()
+        objetos = []
+        for fila, cambios in zip(datos, validados):
+            objeto = instancias[fila['id']]
+            for campo, valor in cambios.items():
+                setattr(objeto, campo, valor)
+            campos.update(cambios)
+            objetos.append(objeto)
+        with atomica():
+            campos_directos = [c for c in campos if c not in self._campos_con_servicio()]
+            if campos_directos:
+                modelo.objects.bulk_update(objetos, campos_directos, batch_size=1000)
+            self._despues_de_masivo(objetos, validados)
+        self._invalidar()
+        return Response({'actualizados': len(objetos)})
+
+    def _campos_con_servicio(self):
+        return ()
+
+    def _invalidar(self):
+        al_confirmar(lambda: incrementar_version(*self.modelos_etag))
+        # Sin zonas concretas: las pantallas reciben al menos el nuevo resumen
+        difusor.notificar_al_confirmar()
+
+
+# ------------------------------
+# VIEWSETS
+# ------------------------------
+class BaseViewSet(ETagMixin, MasivoMixin, viewsets.ModelViewSet):
+    permission_classes = [LecturaOAdmin]
+    pagination_class = PaginacionCursor
+
+    def perform_create(self, serializer):
+        extra = {} if serializer.validated_data.get('identificador') else {'identificador': nuevo_identificador()}
+        serializer.save(**extra)
+
+
+class ZonaViewSet(BaseViewSet):
+    queryset = Zona.objects.all()
+    serializer_class = ZonaSerializer
+    modelos_etag = ('zona',)
+    campos_unicos = ('identificador', 'nombre')
+    claves_foraneas = {'zona_padre': Zona}
+    campos_jerarquia = ('zona_padre_id', 'total_camas')
+
+    @atomica
+    def perform_update(self, serializer):
+        # save() escribe todas las columnas: ocupación y acumulados se releen con
+        # la fila bloqueada para no pisar los ingresos llegados tras la lectura.
+        # Los cambios de camas suben a los ancestros por las señales (jerarquia.py)
+        zona = serializer.instance
+        actuales = (
+            Zona.objects.select_for_update().filter(pk=zona.pk)
+            .values('camas_ocupadas', 'total_camas_subarbol', 'camas_ocupadas_subarbol').get()
+        )
+        for campo, valor in actuales.items():
+            setattr(zona, campo, valor)
+        total = serializer.validated_data.get('total_camas')
+        if total is not None and total < zona.camas_ocupadas:
+            raise Conflicto(f"Hay {zona.camas_ocupadas} camas ocupadas: no puede haber menos camas.")
+        serializer.save()
+
+    def _despues_de_masivo(self, objetos, validados):
+        # bulk_create/bulk_update no disparan señales: se rehacen solo los árboles
+        # de las zonas nuevas o con otro padre u otras camas, y los de sus padres
+        zona_ids = set()
+        for objeto, cambios in zip(objetos, validados):
+            if not objeto.ruta or any(campo in cambios for campo in self.campos_jerarquia):
+                zona_ids.update(i for i in (objeto.pk, objeto.zona_padre_id) if i is not None)
+        if zona_ids:
+            reconstruir_jerarquia(zona_ids)
+
+
+class ClienteViewSet(BaseViewSet):
+    queryset = Cliente.objects.select_related('zona_asignada')
+    serializer_class = ClienteSerializer
+    modelos_etag = ('cliente', 'zona')
+    campos_unicos = ('identificador', 'documento')
+    claves_foraneas = {'zona_asignada': Zona}
+
+    # La zona de un cliente solo cambia a través del servicio de camas
+    def _campos_con_servicio(self):
+        return ('zona_asignada_id',)
+
+    def _asignar(self, cliente_id, zona_id, inicial=False):
+        try:
+            if inicial:
+                asignar_cliente(cliente_id, zona_id)
+            else:
+                trasladar_cliente(cliente_id, zona_id)
+        except SinCamasDisponibles as error:
+            raise Conflicto(str(error))
+
+    @atomica
+    def perform_create(self, serializer):
+        zona = serializer.validated_data.pop('zona_asignada', None)
+        super().perform_create(serializer)
+        if zona is not None:
+            self._asignar(serializer.instance.id, zona.id, inicial=True)
+            serializer.instance.refresh_from_db()
+
+    @atomica
+    def perform_update(self, serializer):
+        cambia_zona = 'zona_asignada' in serializer.validated_data
+        zona = serializer.validated_data.pop('zona_asignada', None)
+        serializer.save()
+        if cambia_zona:
+            self._asignar(serializer.instance.id, zona.id if zona else None)
+            serializer.instance.refresh_from_db()
+
+    def _despues_de_masivo(self, objetos, validados):
+        # Un traslado en bloque por zona de destino (como las acciones del panel)
+        por_zona = defaultdict(list)
+        for objeto, cambios in zip(objetos, validados):
+            if 'zona_asignada_id' in cambios:
+                por_zona[cambios['zona_asignada_id']].append(objeto.id)
+        for zona_id, cliente_ids in por_zona.items():
+            try:
+                mover_clientes(cliente_ids, zona_id)
+            except SinCamasDisponibles as error:
+                raise Conflicto(str(error))
+
+    def _antes_de_crear(self, objetos):
+        super()._antes_de_crear(objetos)
+        # Se crean sin zona; _despues_de_masivo las asigna ocupando cama
+        for objeto in objetos:
+            objeto.zona_asignada_id = None
+
+
+class ContactoViewSet(BaseViewSet):
+    queryset = Contacto.objects.all()
+    serializer_class = ContactoSerializer
+    modelos_etag = ('contacto',)
+    claves_foraneas = {'cliente': Cliente}
+
+
+class EmpleadoViewSet(BaseViewSet):
+    queryset = Empleado.objects.select_related('zona_asignada')
+    serializer_class = EmpleadoSerializer
+    modelos_etag = ('empleado', 'zona')
+    claves_foraneas = {'zona_asignada': Zona}
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _asegurar_busqueda(sender, using, **kwargs):
+    from .busqueda import asegurar_indice
+    asegurar_indice(using)
 
 
 class MonitoringConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'monitoring'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registra los receptores)
+        post_migrate.connect(_asegurar_busqueda, sender=self)
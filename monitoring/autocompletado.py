@@ -0,0 +1,150 @@
+import hashlib
+import re
+
+from django.conf import settings # type: ignore
+from django.core.cache import cache # type: ignore
+from django.db.models import Q # type: ignore
+from django.db.models.functions import Lower # type: ignore
+
+from .jerarquia import ids_en_ruta
+from .models import Zona
+from .replicas import en_primaria
+from .versiones import obtener_versiones
+
+
+# ------------------------------
+# AUTOCOMPLETADO DE ZONAS
+# ------------------------------
+# Los formularios ya no cargan todas las zonas en un <select>: piden las que
+# empiezan por lo escrito. El prefijo se busca como rango sobre el índice
+# lower(nombre) (zona_nombre_minusculas_idx), así que cada consulta lee solo
+# las filas que devuelve, en cualquier motor. `LIKE 'x%'` no sirve aquí: en
+# SQLite no usa el índice y en PostgreSQL necesitaría otra clase de operador.
+#
+# Con separadores ("edificio a › planta 2 › hab 1") cada tramo es el prefijo
+# de un ancestro: se resuelven de izquierda a derecha y el último se busca
+# dentro de sus subárboles. Un último tramo vacío ("planta 2 ›") lista las
+# subzonas directas.
+#
+# Los prefijos cortos son los más repetidos y los que más filas candidatas
+# tienen: se guardan en caché bajo la versión de zonas (ver versiones.py),
+# calculados en la primaria (ver replicas.py).
+
+SEPARADOR = ' › '
+SEPARADORES = re.compile(r'\s*[›>/]\s*')
+PREFIJO_CACHE = 'monitoring:zonas:'
+LIMITE_DEFECTO = 10
+LIMITE_MAXIMO = 50
+# Ancestros candidatos por tramo: un prefijo ambiguo no multiplica la búsqueda
+CANDIDATOS_POR_TRAMO = 20
+
+
+def largo_en_cache():
+    """Textos de hasta este largo se guardan en caché."""
+    return getattr(settings, 'ZONAS_CACHE_LARGO', 3)
+
+
+def segundos_cache():
+    return getattr(settings, 'ZONAS_CACHE_SEGUNDOS', 300)
+
+
+def _siguiente(prefijo):
+    """Menor texto mayor que todos los que empiezan por `prefijo`."""
+    return prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+def _por_prefijo(prefijo, rutas=None):
+    """Zonas cuyo nombre empieza por `prefijo` (sin mayúsculas), en el orden del índice."""
+    zonas = Zona.objects.annotate(nombre_minusculas=Lower('nombre'))
+    if prefijo:
+        # El rango recorre el índice; istartswith descarta lo que la colación
+        # del motor pudiera colar en el rango
+        zonas = zonas.filter(
+            nombre_minusculas__gte=prefijo, nombre_minusculas__lt=_siguiente(prefijo), nombre__istartswith=prefijo
+        )
+    if rutas is not None:
+        zonas = zonas.filter(_en_subarboles(rutas)) if rutas else zonas.none()
+    return zonas.order_by('nombre_minusculas', 'id')
+
+
+def _en_subarboles(rutas):
+    """Descendientes (sin la propia zona) de cualquiera de las rutas."""
+    condicion = Q()
+    for ruta in rutas:
+        condicion |= Q(ruta__startswith=ruta) & ~Q(ruta=ruta)
+    return condicion
+
+
+def _tramos(texto):
+    return [tramo.lower() for tramo in SEPARADORES.split(texto.strip())]
+
+
+def sugerir_zonas(texto, limite=LIMITE_DEFECTO):
+    """
+    Hasta `limite` zonas para lo escrito, cada una con su ruta legible
+    ("Edificio A › Planta 2 › Hab 12") y sus camas libres (None si la zona
+    no lleva control de camas). Consultas: una por tramo, más los nombres de
+    los ancestros; ninguna si viene de caché.
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    tramos = _tramos(texto)
+    if not any(tramos):
+        return []
+
+    if len(texto.strip()) > largo_en_cache():
+        return _buscar(tramos, limite)
+
+    version = obtener_versiones('zona')['zona']
+    resumen = hashlib.md5(SEPARADOR.join(tramos).encode(), usedforsecurity=False).hexdigest()
+    clave = f'{PREFIJO_CACHE}{version}:{limite}:{resumen}'
+    sugerencias = cache.get(clave)
+    if sugerencias is None:
+        with en_primaria():
+            sugerencias = _buscar(tramos, limite)
+        cache.set(clave, sugerencias, timeout=segundos_cache())
+    return sugerencias
+
+
+def _buscar(tramos, limite):
+    rutas = None
+    for tramo in tramos[:-1]:
+        rutas = list(_por_prefijo(tramo, rutas).values_list('ruta', flat=True)[:CANDIDATOS_POR_TRAMO])
+    if tramos[-1]:
+        zonas = _por_prefijo(tramos[-1], rutas)
+    else:
+        # "planta 2 ›": las subzonas directas de los ancestros encontrados
+        padres = [ids_en_ruta(ruta)[-1] for ruta in rutas or []]
+        zonas = Zona.objects.filter(zona_padre_id__in=padres).order_by('nombre', 'id')
+    zonas = list(zonas.values('id', 'nombre', 'tipo', 'ruta', 'total_camas', 'camas_ocupadas')[:limite])
+    return _con_rutas(zonas)
+
+
+def _con_rutas(zonas):
+    """Añade la ruta con nombres; los de todos los ancestros salen de una consulta."""
+    ancestros = {i for zona in zonas for i in ids_en_ruta(zona['ruta'])[:-1]}
+    nombres = dict(Zona.objects.filter(id__in=ancestros).values_list('id', 'nombre')) if ancestros else {}
+    tipos = dict(Zona.TIPOS_ZONA)
+    return [
+        {
+            'id': zona['id'],
+            'nombre': zona['nombre'],
+            'tipo': tipos.get(zona['tipo'], ''),
+            'ruta': SEPARADOR.join(
+                [nombres[i] for i in ids_en_ruta(zona['ruta'])[:-1] if i in nombres] + [zona['nombre']]
+            ),
+            'camas_libres': (
+                max(zona['total_camas'] - zona['camas_ocupadas'], 0) if zona['total_camas'] else None
+            ),
+        }
+        for zona in zonas
+    ]
+
+
+def ruta_de(zona):
+    """Ruta legible de una zona ya cargada (para mostrar la zona actual en un formulario)."""
+    if zona is None:
+        return ''
+    return _con_rutas([{
+        'id': zona.id, 'nombre': zona.nombre, 'tipo': zona.tipo, 'ruta': zona.ruta,
+        'total_camas': zona.total_camas, 'camas_ocupadas': zona.camas_ocupadas,
+    }])[0]['ruta']
@@ -0,0 +1,296 @@
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from asgiref.sync import sync_to_async # type: ignore
+from django.contrib.auth.models import User # type: ignore
+from django.core.handlers.asgi import ASGIHandler # type: ignore
+from django.core.handlers.wsgi import WSGIHandler # type: ignore
+from django.db import connection, transaction # type: ignore
+from django.test import Client # type: ignore
+
+from .identificadores import Asignador
+from .models import Secuencia
+from .versiones import incrementar_version
+
+
+# ------------------------------
+# BENCHMARKS
+# ------------------------------
+# Cada escenario es una función que recibe un cliente HTTP ya autenticado y
+# devuelve una lista de (nombre, función que hace una petición). Se miden
+# con la pila completa de Django (middleware, vistas y plantillas), sin red.
+
+ESCENARIOS = {}
+
+
+def escenario(nombre):
+    def registrar(funcion):
+        ESCENARIOS[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def cliente_autenticado(usuario=None):
+    consulta = User.objects.filter(is_superuser=True)
+    if usuario:
+        consulta = consulta.filter(username=usuario)
+    admin = consulta.order_by('id').first()
+    if admin is None:
+        raise LookupError("Se necesita un superusuario para los benchmarks (createsuperuser).")
+    cliente = Client(HTTP_HOST='localhost')
+    cliente.force_login(admin)
+    return cliente
+
+
+def _resultado(tiempos, total):
+    tiempos = sorted(tiempos)
+    return {
+        'peticiones': len(tiempos),
+        'por_segundo': len(tiempos) / total if total else 0.0,
+        'p50_ms': statistics.median(tiempos) * 1000,
+        'p99_ms': tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))] * 1000,
+    }
+
+
+def medir(peticion, repeticiones, calentamiento=3):
+    for _ in range(calentamiento):
+        peticion()
+    tiempos = []
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        peticion()
+        tiempos.append(time.perf_counter() - t0)
+    return _resultado(tiempos, time.perf_counter() - inicio)
+
+
+def _verificar(respuesta, *codigos):
+    if respuesta.status_code not in codigos:
+        raise RuntimeError(f"Respuesta inesperada {respuesta.status_code}")
+    # Consumir el cuerpo también cuenta (respuestas en streaming)
+    if respuesta.streaming:
+        for _ in respuesta.streaming_content:
+            pass
+    return respuesta
+
+
+@escenario('api')
+def escenario_api(cliente, tamano=100):
+    """Listado de clientes: API REST (JSON, con y sin ETag) frente al panel HTML."""
+    url_api = f'/api/clientes/?page_size={tamano}'
+    etag = _verificar(cliente.get(url_api), 200).get('ETag')
+    return [
+        ('panel HTML', lambda: _verificar(cliente.get(f'/panel/?por_pagina={tamano}'), 200)),
+        ('API JSON', lambda: _verificar(cliente.get(url_api), 200)),
+        ('API JSON ?fields=', lambda: _verificar(cliente.get(url_api + '&fields=nombre,documento'), 200)),
+        ('API 304 (ETag)', lambda: _verificar(cliente.get(url_api, HTTP_IF_NONE_MATCH=etag), 304)),
+    ]
+
+
+# ------------------------------
+# CARGA CONCURRENTE: WSGI FRENTE A ASGI
+# ------------------------------
+# Un escenario concurrente devuelve (nombre, url, preparar): la misma URL se
+# pide `repeticiones` veces con `concurrencia` peticiones en vuelo, primero
+# con el WSGIHandler de Django (un hilo por petición en curso, como gunicorn
+# con threads) y luego con el ASGIHandler (un solo event loop, como uvicorn).
+# No se usa el Client de tests: aquí cuentan las señales de inicio y fin de
+# petición, que cierran o reutilizan las conexiones. `preparar` se llama
+# antes de cada petición, p. ej. para forzar un fallo de caché.
+
+ESCENARIOS_CONCURRENTES = {}
+
+
+def escenario_concurrente(nombre):
+    def registrar(funcion):
+        ESCENARIOS_CONCURRENTES[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def _cookie(cliente):
+    return '; '.join(f'{m.key}={m.coded_value}' for m in cliente.cookies.values())
+
+
+def medir_wsgi(cliente, url, repeticiones, concurrencia, preparar=None):
+    """WSGIHandler real (con request_started/finished), un hilo por petición en curso."""
+    aplicacion = WSGIHandler()
+    ruta, _, consulta = url.partition('?')
+    cookie = _cookie(cliente)
+
+    def peticion(_):
+        if preparar:
+            preparar()
+        entorno = {'PATH_INFO': ruta, 'QUERY_STRING': consulta, 'HTTP_HOST': 'localhost', 'HTTP_COOKIE': cookie}
+        setup_testing_defaults(entorno)
+        estados = []
+        t0 = time.perf_counter()
+        cuerpo = aplicacion(entorno, lambda estado, cabeceras: estados.append(estado))
+        try:
+            for _ in cuerpo:
+                pass
+        finally:
+            cuerpo.close()
+        if not estados[0].startswith('200'):
+            raise RuntimeError(f"Respuesta inesperada {estados[0]}")
+        return time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=concurrencia) as hilos:
+        list(hilos.map(peticion, range(concurrencia)))  # calentamiento
+        inicio = time.perf_counter()
+        tiempos = list(hilos.map(peticion, range(repeticiones)))
+    return _resultado(tiempos, time.perf_counter() - inicio)
+
+
+def medir_asgi(cliente, url, repeticiones, concurrencia, preparar=None):
+    """ASGIHandler real en un solo event loop, con `concurrencia` peticiones en vuelo."""
+    aplicacion = ASGIHandler()
+    ruta, _, consulta = url.partition('?')
+    alcance = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': ruta, 'query_string': consulta.encode(),
+        'headers': [(b'host', b'localhost'), (b'cookie', _cookie(cliente).encode())],
+        'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+    }
+    preparar_async = sync_to_async(preparar) if preparar else None
+
+    async def peticion(limite):
+        async with limite:
+            if preparar_async:
+                await preparar_async()
+            enviado, estados = False, []
+
+            async def recibir():
+                nonlocal enviado
+                if not enviado:
+                    enviado = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await asyncio.Event().wait()  # el cliente nunca se desconecta
+
+            async def enviar(mensaje):
+                if mensaje['type'] == 'http.response.start':
+                    estados.append(mensaje['status'])
+
+            t0 = time.perf_counter()
+            await aplicacion(dict(alcance), recibir, enviar)
+            if estados[0] != 200:
+                raise RuntimeError(f"Respuesta inesperada {estados[0]}")
+            return time.perf_counter() - t0
+
+    async def carga(cantidad):
+        limite = asyncio.Semaphore(concurrencia)
+        return await asyncio.gather(*(peticion(limite) for _ in range(cantidad)))
+
+    async def principal():
+        await carga(concurrencia)  # calentamiento
+        inicio = time.perf_counter()
+        tiempos = await carga(repeticiones)
+        return _resultado(tiempos, time.perf_counter() - inicio)
+
+    return asyncio.run(principal())
+
+
+SERVIDORES = {'WSGI': medir_wsgi, 'ASGI': medir_asgi}
+
+
+@escenario_concurrente('dashboard')
+def escenario_dashboard():
+    """main y analisis con el resumen en caché y recalculándolo en cada petición."""
+    def invalidar():
+        incrementar_version('cliente')
+    return [
+        ('main (caché)', '/main/', None),
+        ('analisis (caché)', '/analisis/', None),
+        ('analisis (sin caché)', '/analisis/', invalidar),
+    ]
+
+
+# ------------------------------
+# IDENTIFICADORES: INSERCIÓN Y LOCALIDAD DEL ÍNDICE
+# ------------------------------
+# Inserta `filas` identificadores de cada estrategia en una tabla temporal con
+# la misma forma que las reales (id + identificador VARCHAR(512) UNIQUE) y
+# mide filas/s y cómo queda el índice único:
+#   al_final  inserciones cuya clave es mayor que todas las anteriores (van
+#             a la última hoja del índice, sin partir páginas intermedias)
+#   paginas   páginas del índice al terminar; llenado = espacio usado en ellas
+#             (solo SQLite, con dbstat)
+# Las colisiones se cuentan antes de insertar y se descartan.
+
+TABLA_BENCHMARK = 'benchmark_identificadores'
+SECUENCIA_BENCHMARK = 'benchmark'
+
+
+def _uuid_corto(cantidad):
+    return [str(uuid.uuid4())[:8] for _ in range(cantidad)]
+
+
+def _uuid_hex(cantidad):
+    return [uuid.uuid4().hex for _ in range(cantidad)]
+
+
+def _secuencia(cantidad):
+    return Asignador(SECUENCIA_BENCHMARK).reservar(cantidad)
+
+
+ESTRATEGIAS_IDENTIFICADOR = {
+    'uuid4()[:8] (antes)': _uuid_corto,
+    'uuid4().hex (antes)': _uuid_hex,
+    'secuencia (ahora)': _secuencia,
+}
+
+
+def _estadisticas_indice(cursor, indice):
+    if connection.vendor == 'sqlite':
+        cursor.execute("SELECT count(*), sum(pgsize), sum(unused) FROM dbstat('temp') WHERE name = %s", [indice])
+        paginas, bytes_totales, libres = cursor.fetchone()
+        return paginas, 1 - libres / bytes_totales if bytes_totales else None
+    if connection.vendor == 'postgresql':
+        cursor.execute("SELECT pg_relation_size(%s::regclass) / current_setting('block_size')::int", [indice])
+        return cursor.fetchone()[0], None
+    return None, None
+
+
+def medir_identificadores(estrategia, filas, lote=500):
+    identificadores = ESTRATEGIAS_IDENTIFICADOR[estrategia](filas)
+    unicos = list(dict.fromkeys(identificadores))
+
+    al_final, maximo = 0, None
+    for identificador in unicos:
+        if maximo is None or identificador > maximo:
+            al_final += 1
+            maximo = identificador
+
+    indice = f'{TABLA_BENCHMARK}_idx'
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLA_BENCHMARK}')
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {TABLA_BENCHMARK} '
+            f'(id {"SERIAL" if connection.vendor == "postgresql" else "INTEGER"} PRIMARY KEY, '
+            f'identificador VARCHAR(512) NOT NULL)'
+        )
+        cursor.execute(f'CREATE UNIQUE INDEX {indice} ON {TABLA_BENCHMARK} (identificador)')
+        inicio = time.perf_counter()
+        for desde in range(0, len(unicos), lote):
+            with transaction.atomic():
+                cursor.executemany(
+                    f'INSERT INTO {TABLA_BENCHMARK} (identificador) VALUES (%s)',
+                    [(i,) for i in unicos[desde:desde + lote]],
+                )
+        segundos = time.perf_counter() - inicio
+        paginas, llenado = _estadisticas_indice(cursor, indice)
+        cursor.execute(f'DROP TABLE {TABLA_BENCHMARK}')
+    Secuencia.objects.filter(nombre=SECUENCIA_BENCHMARK).delete()
+
+    return {
+        'filas_por_segundo': len(unicos) / segundos if segundos else 0.0,
+        'colisiones': len(identificadores) - len(unicos),
+        'al_final': al_final / len(unicos) if unicos else 0.0,
+        'paginas': paginas,
+        'llenado': llenado,
+        'longitud': max(map(len, unicos)) if unicos else 0,
+    }
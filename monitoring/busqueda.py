@@ -0,0 +1,170 @@
+import logging
+import re
+import unicodedata
+
+from django.db import connections, router, transaction, DatabaseError # type: ignore
+from django.db.models import Q # type: ignore
+
+from .models import Cliente
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------
+# BÚSQUEDA DE PACIENTES
+# ------------------------------
+# Índice sobre nombre, apellidos y documento, sin distinguir acentos:
+#   - SQLite: tabla virtual FTS5 (unicode61 remove_diacritics) mantenida con
+#     triggers, así también cubre bulk_create y UPDATE masivos.
+#   - PostgreSQL: índice GIN de trigramas sobre el texto sin acentos
+#     (pg_trgm + unaccent), que da prefijos y coincidencias aproximadas.
+#   - Otros motores: icontains sobre cada campo (sin índice).
+# asegurar_indice() es idempotente y se ejecuta tras cada migrate (apps.py):
+# en SQLite, rehacer la tabla de clientes en una migración borra sus triggers.
+
+TABLA = Cliente._meta.db_table
+TABLA_FTS = f'{TABLA}_fts'
+LIMITE_DEFECTO = 20
+LIMITE_MAXIMO = 100
+DESPLAZAMIENTO_MAXIMO = 1000
+UMBRAL_SIMILITUD = 0.3
+
+_SQL_SQLITE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5(
+        nombre, apellido1, apellido2, documento,
+        content='{TABLA}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, nombre, apellido1, apellido2, documento)
+        VALUES (new.id, new.nombre, new.apellido1, new.apellido2, new.documento);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre, apellido1, apellido2, documento)
+        VALUES ('delete', old.id, old.nombre, old.apellido1, old.apellido2, old.documento);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au AFTER UPDATE OF nombre, apellido1, apellido2, documento
+        ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre, apellido1, apellido2, documento)
+        VALUES ('delete', old.id, old.nombre, old.apellido1, old.apellido2, old.documento);
+        INSERT INTO {TABLA_FTS}(rowid, nombre, apellido1, apellido2, documento)
+        VALUES (new.id, new.nombre, new.apellido1, new.apellido2, new.documento);
+    END""",
+]
+
+_EXPRESION_PG = (
+    "monitoring_sin_acentos(lower(nombre || ' ' || apellido1 || ' ' || "
+    "coalesce(apellido2, '') || ' ' || documento))"
+)
+
+_SQL_POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() no es IMMUTABLE: el envoltorio permite usarlo en un índice
+    """CREATE OR REPLACE FUNCTION monitoring_sin_acentos(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent', $1) $$""",
+    f"CREATE INDEX IF NOT EXISTS {TABLA}_busqueda_trgm ON {TABLA} USING gin ({_EXPRESION_PG} gin_trgm_ops)",
+]
+
+
+def normalizar(texto):
+    """minúsculas y sin acentos, igual que el índice."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower().strip()
+
+
+def terminos(texto):
+    return re.findall(r'\w+', normalizar(texto))
+
+
+def asegurar_indice(using='default'):
+    """Crea el índice de búsqueda si falta. Devuelve True si quedó disponible."""
+    conexion = connections[using]
+    try:
+        with conexion.cursor() as cursor:
+            if conexion.vendor == 'sqlite':
+                cursor.execute(
+                    "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                    [f'{TABLA_FTS}_%'],
+                )
+                faltaban_triggers = cursor.fetchone()[0] < 3
+                for sentencia in _SQL_SQLITE:
+                    cursor.execute(sentencia)
+                if faltaban_triggers:
+                    cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')")
+                return True
+            if conexion.vendor == 'postgresql':
+                for sentencia in _SQL_POSTGRES:
+                    cursor.execute(sentencia)
+                return True
+    except DatabaseError as error:
+        # Sin permisos para CREATE EXTENSION, o SQLite sin FTS5
+        logger.warning("No se pudo crear el índice de búsqueda de clientes: %s", error)
+    return False
+
+
+def _ids_sqlite(conexion, palabras, limite, desplazamiento):
+    consulta = ' '.join(f'"{p}"*' for p in palabras)
+    with conexion.cursor() as cursor:
+        # bm25 con más peso para apellidos y documento que para el nombre
+        cursor.execute(
+            f"SELECT rowid, bm25({TABLA_FTS}, 1.0, 2.0, 1.5, 3.0) AS rango FROM {TABLA_FTS} "
+            f"WHERE {TABLA_FTS} MATCH %s ORDER BY rango LIMIT %s OFFSET %s",
+            [consulta, limite, desplazamiento],
+        )
+        return [(fila[0], -fila[1]) for fila in cursor.fetchall()]
+
+
+def _ids_postgres(conexion, palabras, limite, desplazamiento):
+    texto = ' '.join(palabras)
+    # SET LOCAL solo vale dentro de una transacción
+    with transaction.atomic(using=conexion.alias), conexion.cursor() as cursor:
+        cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                       [str(UMBRAL_SIMILITUD)])
+        cursor.execute(
+            f"SELECT id, word_similarity(%s, {_EXPRESION_PG}) AS rango FROM {TABLA} "
+            f"WHERE %s <%% {_EXPRESION_PG} "
+            f"ORDER BY rango DESC, id LIMIT %s OFFSET %s",
+            [texto, texto, limite, desplazamiento],
+        )
+        return cursor.fetchall()
+
+
+def _ids_generico(palabras, limite, desplazamiento):
+    filtro = Q()
+    for palabra in palabras:
+        filtro &= (
+            Q(nombre__icontains=palabra) | Q(apellido1__icontains=palabra)
+            | Q(apellido2__icontains=palabra) | Q(documento__icontains=palabra)
+        )
+    ids = Cliente.objects.filter(filtro).order_by('apellido1', 'id').values_list('id', flat=True)
+    return [(cid, 0.0) for cid in ids[desplazamiento:desplazamiento + limite]]
+
+
+def buscar_clientes(texto, limite=LIMITE_DEFECTO, desplazamiento=0, using=None):
+    """
+    Devuelve [(cliente, rango)] ordenados por relevancia. La zona del cliente
+    viene en la misma consulta. Sin `using`, la base que elija el enrutador.
+    """
+    palabras = terminos(texto)
+    if not palabras:
+        return []
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    desplazamiento = max(0, min(desplazamiento, DESPLAZAMIENTO_MAXIMO))
+
+    using = using or router.db_for_read(Cliente)
+    conexion = connections[using]
+    try:
+        if conexion.vendor == 'sqlite':
+            ids = _ids_sqlite(conexion, palabras, limite, desplazamiento)
+        elif conexion.vendor == 'postgresql':
+            ids = _ids_postgres(conexion, palabras, limite, desplazamiento)
+        else:
+            ids = _ids_generico(palabras, limite, desplazamiento)
+    except DatabaseError as error:
+        logger.warning("Búsqueda indexada no disponible, se usa icontains: %s", error)
+        ids = _ids_generico(palabras, limite, desplazamiento)
+
+    clientes = Cliente.objects.using(using).select_related('zona_asignada').in_bulk([cid for cid, _ in ids])
+    return [(clientes[cid], rango) for cid, rango in ids if cid in clientes]
@@ -0,0 +1,222 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Case, F, When # type: ignore
+from django.utils import timezone # type: ignore
+
+from .eventos import difusor
+from .hospitales import al_confirmar, atomica
+from .jerarquia import ids_en_ruta, propagar_ocupacion_al_confirmar
+from .models import Zona, Cliente
+from .movimientos import registrar_movimiento, registrar_traslados
+from .notificaciones import encolar, encolar_traslados
+from .versiones import incrementar_version
+
+
+# ------------------------------
+# ASIGNACIÓN DE CAMAS
+# ------------------------------
+# La ocupación se cambia con UPDATE condicionales (camas_ocupadas < total_camas)
+# dentro de una transacción corta, así dos ingresos simultáneos nunca superan
+# la capacidad aunque lean el mismo valor. Las zonas con total_camas = 0 no
+# llevan control de camas: se puede asignar a ellas sin tocar los contadores.
+# Los acumulados del subárbol (camas_ocupadas_subarbol) de los ancestros se
+# actualizan después del COMMIT, fuera de la transacción del ingreso (ver
+# jerarquia.py): ingresos en zonas distintas de un edificio no se esperan.
+
+class SinCamasDisponibles(Exception):
+    """La zona (o el subárbol) no tiene camas libres."""
+
+
+def _ocupar(zona_id):
+    """Suma una cama ocupada si la zona lleva control de camas. Devuelve ruta, total_camas y critica."""
+    zona = Zona.objects.filter(pk=zona_id).values('ruta', 'total_camas', 'critica').first()
+    if zona is None:
+        raise Zona.DoesNotExist(f"No existe la zona {zona_id}.")
+    if zona['total_camas'] == 0:
+        return zona
+
+    ocupada = Zona.objects.filter(pk=zona_id, camas_ocupadas__lt=F('total_camas')).update(
+        camas_ocupadas=F('camas_ocupadas') + 1
+    )
+    if not ocupada:
+        raise SinCamasDisponibles(f"La zona {zona_id} no tiene camas libres.")
+    propagar_ocupacion_al_confirmar(dict.fromkeys(ids_en_ruta(zona['ruta']), 1))
+    return zona
+
+
+def _desocupar(zona_id):
+    ruta = (
+        Zona.objects.filter(pk=zona_id, total_camas__gt=0).values_list('ruta', flat=True).first()
+    )
+    if ruta is None:
+        return
+    liberada = Zona.objects.filter(pk=zona_id, camas_ocupadas__gt=0).update(
+        camas_ocupadas=F('camas_ocupadas') - 1
+    )
+    if liberada:
+        propagar_ocupacion_al_confirmar(dict.fromkeys(ids_en_ruta(ruta), -1))
+
+
+def _restar(por_zona, campo):
+    """Un UPDATE que resta a cada zona su cantidad; las zonas con la misma cantidad comparten WHEN."""
+    por_cantidad = defaultdict(list)
+    for zona_id, cantidad in por_zona.items():
+        por_cantidad[cantidad].append(zona_id)
+    Zona.objects.filter(pk__in=list(por_zona)).update(**{campo: Case(
+        *[When(pk__in=ids, then=F(campo) - cantidad) for cantidad, ids in por_cantidad.items()],
+        default=F(campo),
+        output_field=Zona._meta.get_field(campo),
+    )})
+
+
+def liberar_camas(por_zona):
+    """
+    Libera {zona_id: cantidad} camas de varias zonas a la vez: las bloquea en
+    una consulta y actualiza su ocupación con un UPDATE; los acumulados de los
+    ancestros se suman tras el COMMIT.
+    """
+    zonas = (
+        Zona.objects.select_for_update()
+        .filter(pk__in=list(por_zona), total_camas__gt=0, camas_ocupadas__gt=0)
+        .values_list('id', 'ruta', 'camas_ocupadas')
+    )
+    liberadas, por_ancestro = {}, Counter()
+    for zona_id, ruta, ocupadas in zonas:
+        liberadas[zona_id] = min(por_zona[zona_id], ocupadas)
+        for ancestro_id in ids_en_ruta(ruta):
+            por_ancestro[ancestro_id] += liberadas[zona_id]
+    if liberadas:
+        _restar(liberadas, 'camas_ocupadas')
+        propagar_ocupacion_al_confirmar({zona_id: -cantidad for zona_id, cantidad in por_ancestro.items()})
+
+
+def _invalidar(*zona_ids):
+    al_confirmar(lambda: incrementar_version('zona', 'cliente'))
+    difusor.notificar_al_confirmar(*zona_ids)
+
+
+@atomica
+def mover_cliente(cliente_id, zona_id):
+    """
+    Deja al cliente en `zona_id` (o sin zona si es None) liberando la cama
+    anterior y ocupando la nueva en la misma transacción, que también anota
+    el movimiento en el historial y encola el aviso a los contactos.
+    """
+    filas = list(
+        Cliente.objects.select_for_update()
+        .filter(pk=cliente_id)
+        .values_list('zona_asignada_id', 'en_zona_desde')
+    )
+    if not filas:
+        raise Cliente.DoesNotExist(f"No existe el cliente {cliente_id}.")
+    zona_actual, en_zona_desde = filas[0]
+    if zona_actual == zona_id:
+        return zona_id
+
+    # Primero se ocupa la nueva: si no hay cama, no se pierde la anterior
+    critica = zona_id is not None and _ocupar(zona_id)['critica']
+    if zona_actual is not None:
+        _desocupar(zona_actual)
+
+    ahora = timezone.now()
+    Cliente.objects.filter(pk=cliente_id).update(
+        zona_asignada=zona_id, en_zona_desde=ahora if zona_id is not None else None
+    )
+    registrar_movimiento(cliente_id, zona_actual, zona_id, en_zona_desde, ahora)
+    encolar(cliente_id, zona_actual, zona_id, critica, ahora)
+    _invalidar(zona_actual, zona_id)
+    return zona_id
+
+
+@atomica
+def mover_clientes(cliente_ids, zona_id):
+    """
+    mover_cliente() para un lote: todos pasan a `zona_id` (o quedan sin zona)
+    o ninguno si no hay camas para todos. La nueva zona se ocupa con un solo
+    UPDATE condicional, las anteriores se liberan por zona y el historial y
+    los avisos se insertan en bloque. Devuelve cuántos cambiaron de zona.
+    """
+    filas = [
+        fila for fila in
+        Cliente.objects.select_for_update()
+        .filter(pk__in=cliente_ids)
+        .values_list('id', 'zona_asignada_id', 'en_zona_desde')
+        if fila[1] != zona_id
+    ]
+    if not filas:
+        return 0
+
+    critica = False
+    if zona_id is not None:
+        zona = Zona.objects.filter(pk=zona_id).values('ruta', 'total_camas', 'critica').first()
+        if zona is None:
+            raise Zona.DoesNotExist(f"No existe la zona {zona_id}.")
+        critica = zona['critica']
+        if zona['total_camas']:
+            ocupadas = Zona.objects.filter(
+                pk=zona_id, camas_ocupadas__lte=F('total_camas') - len(filas)
+            ).update(camas_ocupadas=F('camas_ocupadas') + len(filas))
+            if not ocupadas:
+                raise SinCamasDisponibles(f"La zona {zona_id} no tiene {len(filas)} camas libres.")
+            propagar_ocupacion_al_confirmar(dict.fromkeys(ids_en_ruta(zona['ruta']), len(filas)))
+    anteriores = Counter(anterior for _, anterior, _ in filas if anterior is not None)
+    liberar_camas(anteriores)
+
+    ahora = timezone.now()
+    Cliente.objects.filter(pk__in=[cliente_id for cliente_id, _, _ in filas]).update(
+        zona_asignada=zona_id, en_zona_desde=ahora if zona_id is not None else None
+    )
+    registrar_traslados(filas, zona_id, ahora)
+    encolar_traslados(filas, zona_id, critica, ahora)
+    _invalidar(zona_id, *anteriores)
+    return len(filas)
+
+
+def asignar_cliente(cliente_id, zona_id):
+    return mover_cliente(cliente_id, zona_id)
+
+
+def trasladar_cliente(cliente_id, zona_id):
+    return mover_cliente(cliente_id, zona_id)
+
+
+def liberar_cliente(cliente_id):
+    return mover_cliente(cliente_id, None)
+
+
+def liberar_cama(zona_id):
+    """Devuelve la cama de un cliente que ya no existe (ver signals.py)."""
+    with atomica():
+        _desocupar(zona_id)
+        _invalidar(zona_id)
+
+
+@atomica
+def asignar_cama_libre(cliente_id, zona_raiz_id):
+    """
+    Asigna al cliente cualquier zona con camas libres dentro del subárbol de
+    `zona_raiz_id`. Las filas bloqueadas por otros ingresos se saltan
+    (SKIP LOCKED), así los ingresos concurrentes no hacen cola en la misma cama.
+    Devuelve el id de la zona asignada.
+    """
+    ruta_raiz = Zona.objects.filter(pk=zona_raiz_id).values_list('ruta', flat=True).first()
+    if ruta_raiz is None:
+        raise Zona.DoesNotExist(f"No existe la zona {zona_raiz_id}.")
+
+    candidatas = (
+        Zona.objects.select_for_update(skip_locked=True)
+        .filter(ruta__startswith=ruta_raiz, total_camas__gt=0, camas_ocupadas__lt=F('total_camas'))
+        .order_by('ruta')
+        .values_list('id', flat=True)
+    )
+    # Se bloquea una sola fila por intento; si otro ingreso ocupó la última
+    # cama entre la lectura y el UPDATE, esa zona ya no aparece en la siguiente
+    while True:
+        zona_id = candidatas.first()
+        if zona_id is None:
+            raise SinCamasDisponibles(f"No hay camas libres bajo la zona {zona_raiz_id}.")
+        try:
+            with atomica():
+                return mover_cliente(cliente_id, zona_id)
+        except SinCamasDisponibles:
+            continue
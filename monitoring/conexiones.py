@@ -0,0 +1,59 @@
+from django.db import connections # type: ignore
+
+
+# ------------------------------
+# ESTADO DE LAS CONEXIONES
+# ------------------------------
+# Resume cómo se reutilizan las conexiones de cada base configurada: conexión
+# persistente (CONN_MAX_AGE), pool de psycopg 3 con sus contadores, o los
+# PRAGMA efectivos en SQLite.
+
+PRAGMAS_INFORMADOS = ('journal_mode', 'synchronous', 'busy_timeout', 'foreign_keys', 'cache_size', 'mmap_size')
+
+
+def _estadisticas_pool(conexion):
+    pool = getattr(conexion, 'pool', None)
+    if pool is None:
+        return None
+    # get_stats() no reinicia los contadores (pop_stats() sí)
+    estadisticas = pool.get_stats()
+    return {
+        'minimo': pool.min_size,
+        'maximo': pool.max_size,
+        'abiertas': estadisticas.get('pool_size', 0),
+        'disponibles': estadisticas.get('pool_available', 0),
+        'esperando': estadisticas.get('requests_waiting', 0),
+        'peticiones': estadisticas.get('requests_num', 0),
+        'esperas_ms': estadisticas.get('requests_wait_ms', 0),
+        'errores': estadisticas.get('requests_errors', 0) + estadisticas.get('connections_errors', 0),
+        'descartadas': estadisticas.get('connections_lost', 0),
+    }
+
+
+def _pragmas(conexion):
+    with conexion.cursor() as cursor:
+        valores = {}
+        for pragma in PRAGMAS_INFORMADOS:
+            cursor.execute(f'PRAGMA {pragma}')
+            fila = cursor.fetchone()  # mmap_size no devuelve nada en bases en memoria
+            valores[pragma] = fila[0] if fila else None
+        return valores
+
+
+def estado_conexiones():
+    estado = {}
+    for alias in connections:
+        conexion = connections[alias]
+        ajustes = conexion.settings_dict
+        datos = {
+            'motor': conexion.vendor,
+            'conn_max_age': ajustes['CONN_MAX_AGE'],
+            'health_checks': ajustes['CONN_HEALTH_CHECKS'],
+            'abierta': conexion.connection is not None,
+        }
+        if conexion.vendor == 'postgresql':
+            datos['pool'] = _estadisticas_pool(conexion)
+        elif conexion.vendor == 'sqlite':
+            datos['pragmas'] = _pragmas(conexion)
+        estado[alias] = datos
+    return estado
@@ -0,0 +1,288 @@
+import asyncio
+import json
+import queue
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async # type: ignore
+from django.db import DEFAULT_DB_ALIAS, connections # type: ignore
+from django.db.models import Q # type: ignore
+
+from .analitica import obtener_resumen, aobtener_resumen
+from .hospitales import al_confirmar, base_activa, en_base
+from .jerarquia import ids_en_ruta
+from .models import Zona
+
+
+# ------------------------------
+# OCUPACIÓN EN VIVO (SERVER-SENT EVENTS)
+# ------------------------------
+# Un único difusor por proceso. Las escrituras (señales, servicio de camas,
+# API masiva) solo avisan qué zonas tocaron, tras el COMMIT. El difusor junta
+# los avisos de una ráfaga (ESPERA segundos), y entonces, una sola vez para
+# todas las pantallas:
+#   - lee los contadores de esas zonas y de sus ancestros (una consulta),
+#   - toma el resumen del dashboard (caché versionada) y lo compara con el
+#     último enviado,
+#   - serializa cada evento una vez y lo reparte a las colas de los
+#     suscriptores, filtrando por subárbol con la ruta materializada.
+# Así 200 pantallas abiertas cuestan lo mismo que una, más el reparto.
+#
+# Eventos:
+#   resumen    {clave: valor} solo de lo que cambió; en los diccionarios
+#              {clave: {categoría: valor o null si desapareció}}
+#   ocupacion  {zonas: [{id, nombre, ruta, total_camas, camas_ocupadas, ...}]}
+#
+# Solo se ven los cambios hechos en este proceso; con varios workers, cada
+# uno difunde los suyos (un backend pub/sub compartido quedaría fuera de esto).
+#
+# Con hospitales (hospitales.py) los ids de zona se repiten entre bases: los
+# avisos pendientes, el último resumen y las suscripciones van por base, y cada
+# ráfaga se emite dentro de en_base() de la suya (el hilo del temporizador no
+# hereda el hospital activo).
+
+ESPERA = 0.25          # segundos que se agrupan avisos antes de emitir
+PING = 15              # segundos sin eventos antes de mandar un comentario (mantiene viva la conexión)
+CAPACIDAD_COLA = 200   # eventos pendientes por suscriptor; si se llena, se corta y el navegador reconecta
+CAMPOS_ZONA = (
+    'id', 'nombre', 'ruta', 'zona_padre_id', 'total_camas', 'camas_ocupadas',
+    'total_camas_subarbol', 'camas_ocupadas_subarbol',
+)
+
+
+def mensaje_sse(evento, datos):
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+def diferencia_resumen(anterior, actual):
+    """Solo las claves (y categorías) que cambiaron. Sin resumen anterior, todo."""
+    if anterior is None:
+        return dict(actual)
+    cambios = {}
+    for clave, valor in actual.items():
+        previo = anterior.get(clave)
+        if isinstance(valor, dict) and isinstance(previo, dict):
+            delta = {k: v for k, v in valor.items() if previo.get(k) != v}
+            delta.update({k: None for k in previo if k not in valor})
+            if delta:
+                cambios[clave] = delta
+        elif valor != previo:
+            cambios[clave] = valor
+    return cambios
+
+
+def zonas_con_ancestros(zona_ids):
+    """Contadores de las zonas indicadas y de todos sus ancestros."""
+    rutas = Zona.objects.filter(pk__in=zona_ids).values_list('ruta', flat=True)
+    ids = {zid for ruta in rutas for zid in ids_en_ruta(ruta)}
+    return list(Zona.objects.filter(pk__in=ids).order_by('ruta').values(*CAMPOS_ZONA))
+
+
+def zonas_de_pantalla(ruta=''):
+    """Lo que muestra una pantalla al conectarse: la zona raíz y sus hijas (o las raíces)."""
+    if not ruta:
+        filtro = Q(zona_padre__isnull=True)
+    else:
+        raiz = ids_en_ruta(ruta)[-1]
+        filtro = Q(pk=raiz) | Q(zona_padre_id=raiz)
+    return list(Zona.objects.filter(filtro).order_by('ruta').values(*CAMPOS_ZONA))
+
+
+# ------------------------------
+# SUSCRIPCIONES
+# ------------------------------
+class Suscripcion:
+    """Base: `ruta` limita los eventos de ocupación al subárbol ('' = todo) de la base `base`."""
+
+    def __init__(self, ruta='', base=DEFAULT_DB_ALIAS):
+        self.ruta = ruta
+        self.base = base
+        self.cortada = False
+
+    def acepta(self, base, ruta):
+        return base == self.base and (ruta is None or ruta.startswith(self.ruta))
+
+
+class SuscripcionAsincrona(Suscripcion):
+    """Para ASGI: una asyncio.Queue alimentada desde cualquier hilo."""
+
+    def __init__(self, ruta='', base=DEFAULT_DB_ALIAS):
+        super().__init__(ruta, base)
+        self.loop = asyncio.get_running_loop()
+        self.cola = asyncio.Queue(CAPACIDAD_COLA)
+
+    def entregar(self, texto):
+        self.loop.call_soon_threadsafe(self._poner, texto)
+
+    def _poner(self, texto):
+        if self.cortada:
+            return
+        try:
+            self.cola.put_nowait(texto)
+        except asyncio.QueueFull:
+            self._cortar()
+
+    def _cortar(self):
+        # Cliente demasiado lento: se vacía la cola y se cierra el flujo
+        self.cortada = True
+        while not self.cola.empty():
+            self.cola.get_nowait()
+        self.cola.put_nowait(None)
+
+    async def siguiente(self, espera):
+        try:
+            return await asyncio.wait_for(self.cola.get(), espera)
+        except asyncio.TimeoutError:
+            return ''
+
+
+class SuscripcionSincrona(Suscripcion):
+    """Para WSGI: ocupa el hilo del worker mientras la pantalla sigue abierta."""
+
+    def __init__(self, ruta='', base=DEFAULT_DB_ALIAS):
+        super().__init__(ruta, base)
+        self.cola = queue.Queue(CAPACIDAD_COLA)
+
+    def entregar(self, texto):
+        if self.cortada:
+            return
+        try:
+            self.cola.put_nowait(texto)
+        except queue.Full:
+            self.cortada = True
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait(None)
+
+    def siguiente(self, espera):
+        try:
+            return self.cola.get(timeout=espera)
+        except queue.Empty:
+            return ''
+
+
+# ------------------------------
+# DIFUSOR
+# ------------------------------
+class Difusor:
+    def __init__(self, espera=ESPERA):
+        self.espera = espera
+        self._candado = threading.Lock()
+        self._suscripciones = set()
+        self._zonas_pendientes = defaultdict(set)  # {base: ids}
+        self._temporizador = None
+        self._ultimo_resumen = {}                  # {base: resumen enviado}
+
+    @property
+    def suscriptores(self):
+        return len(self._suscripciones)
+
+    def suscribir(self, suscripcion):
+        with self._candado:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion):
+        with self._candado:
+            self._suscripciones.discard(suscripcion)
+            if not any(s.base == suscripcion.base for s in self._suscripciones):
+                self._ultimo_resumen.pop(suscripcion.base, None)
+
+    # --- Lado de las escrituras ---
+    def notificar(self, zona_ids=(), base=None):
+        """Registra un cambio ya confirmado en `base` (la activa si falta). Sin suscriptores no hace nada."""
+        if not self._suscripciones:
+            return
+        base = base or base_activa()
+        with self._candado:
+            self._zonas_pendientes[base].update(z for z in zona_ids if z is not None)
+            if self._temporizador is None:
+                self._temporizador = threading.Timer(self.espera, self._emitir)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+
+    def notificar_al_confirmar(self, *zona_ids):
+        if self._suscripciones:
+            base = base_activa()
+            al_confirmar(lambda: self.notificar(zona_ids, base))
+
+    def _emitir(self):
+        with self._candado:
+            pendientes, self._zonas_pendientes = self._zonas_pendientes, defaultdict(set)
+            self._temporizador = None
+        try:
+            for base, zona_ids in pendientes.items():
+                with en_base(base):
+                    self.emitir(zona_ids)
+        finally:
+            # El hilo del temporizador termina aquí: su conexión no debe quedar abierta
+            connections.close_all()
+
+    def emitir(self, zona_ids):
+        """Calcula los eventos de una ráfaga de cambios en la base activa y los reparte."""
+        base = base_activa()
+        if zona_ids:
+            for zona in zonas_con_ancestros(zona_ids):
+                self.publicar('ocupacion', {'zonas': [zona]}, ruta=zona['ruta'], base=base)
+        resumen = obtener_resumen()
+        cambios = diferencia_resumen(self._ultimo_resumen.get(base), resumen)
+        self._ultimo_resumen[base] = resumen
+        if cambios:
+            self.publicar('resumen', cambios, base=base)
+
+    def publicar(self, evento, datos, ruta=None, base=DEFAULT_DB_ALIAS):
+        texto = mensaje_sse(evento, datos)  # una sola serialización para todos
+        with self._candado:
+            destinatarios = [s for s in self._suscripciones if s.acepta(base, ruta)]
+        for suscripcion in destinatarios:
+            try:
+                suscripcion.entregar(texto)
+            except RuntimeError:
+                # El event loop de la suscripción ya se cerró
+                self.desuscribir(suscripcion)
+
+    # --- Lado de las pantallas ---
+    # En ambos flujos la suscripción se crea antes de leer el estado inicial:
+    # un cambio que llegue entre medio no se pierde (los eventos llevan
+    # valores absolutos, recibirlo dos veces no hace daño). `base` es la del
+    # hospital de la pantalla: el generador no corre en el contexto de la vista.
+    def _inicio(self, base, resumen, zonas):
+        self._ultimo_resumen.setdefault(base, resumen)
+        return [
+            'retry: 3000\n\n',
+            mensaje_sse('resumen', resumen),
+            mensaje_sse('ocupacion', {'zonas': zonas}),
+        ]
+
+    async def flujo_asincrono(self, ruta, base=DEFAULT_DB_ALIAS):
+        suscripcion = self.suscribir(SuscripcionAsincrona(ruta, base))
+        try:
+            with en_base(base):
+                resumen = await aobtener_resumen()
+                zonas = await sync_to_async(zonas_de_pantalla)(ruta)
+            for texto in self._inicio(base, resumen, zonas):
+                yield texto
+            while True:
+                texto = await suscripcion.siguiente(PING)
+                if texto is None:
+                    return
+                yield texto or ': ping\n\n'
+        finally:
+            self.desuscribir(suscripcion)
+
+    def flujo_sincrono(self, ruta, base=DEFAULT_DB_ALIAS):
+        suscripcion = self.suscribir(SuscripcionSincrona(ruta, base))
+        try:
+            with en_base(base):
+                inicio = self._inicio(base, obtener_resumen(), zonas_de_pantalla(ruta))
+            yield from inicio
+            while True:
+                texto = suscripcion.siguiente(PING)
+                if texto is None:
+                    return
+                yield texto or ': ping\n\n'
+        finally:
+            self.desuscribir(suscripcion)
+
+
+difusor = Difusor()
@@ -0,0 +1,120 @@
+import csv
+import json
+
+from django.db.models import Prefetch # type: ignore
+
+from .models import Zona, Cliente, Contacto
+
+
+# ------------------------------
+# EXPORTACIÓN EN STREAMING (CSV / JSONL)
+# ------------------------------
+# Los clientes se recorren con iterator(chunk_size): en PostgreSQL es un
+# cursor del lado del servidor, y la zona (JOIN) y los contactos (prefetch)
+# se cargan por bloque. Cada fila se serializa y se entrega apenas se genera,
+# así la memoria depende del tamaño del bloque y no del de la tabla.
+
+BLOQUE_DEFECTO = 2000
+
+COLUMNAS = [
+    'identificador', 'nombre', 'apellido1', 'apellido2', 'documento', 'tipo_documento',
+    'telefono', 'correo', 'fecha_nacimiento', 'alta', 'tipo_enfermedad',
+    'zona_identificador', 'zona_nombre', 'contactos',
+]
+
+
+def _booleano(valor):
+    if valor in (None, ''):
+        return None
+    if isinstance(valor, bool):
+        return valor
+    return str(valor).strip().lower() in ('1', 'true', 'si', 'sí', 't')
+
+
+def filtrar_clientes(zona=None, tipo_enfermedad=None, alta=None):
+    """
+    Queryset de clientes con los filtros resueltos en SQL. `zona` (id) incluye
+    todo su subárbol gracias a la ruta materializada.
+    """
+    clientes = Cliente.objects.all()
+    if zona:
+        ruta = Zona.objects.filter(pk=zona).values_list('ruta', flat=True).first()
+        if ruta is None:
+            return Cliente.objects.none()
+        clientes = clientes.filter(zona_asignada__ruta__startswith=ruta)
+    if tipo_enfermedad:
+        clientes = clientes.filter(tipo_enfermedad=tipo_enfermedad)
+    alta = _booleano(alta)
+    if alta is not None:
+        clientes = clientes.filter(alta=alta)
+    return clientes
+
+
+def iterar_clientes(clientes, bloque=BLOQUE_DEFECTO):
+    """Genera un dict por cliente, con zona y contactos, leyendo por bloques."""
+    contactos = Prefetch(
+        'contactos',
+        queryset=Contacto.objects.only('cliente_id', 'nombre', 'apellido1', 'relacion', 'telefono', 'correo'),
+    )
+    consulta = (
+        clientes.select_related('zona_asignada')
+        .prefetch_related(contactos)
+        .order_by('id')
+    )
+    for cliente in consulta.iterator(chunk_size=bloque):
+        zona = cliente.zona_asignada
+        yield {
+            'identificador': cliente.identificador,
+            'nombre': cliente.nombre,
+            'apellido1': cliente.apellido1,
+            'apellido2': cliente.apellido2 or '',
+            'documento': cliente.documento,
+            'tipo_documento': cliente.tipo_documento,
+            'telefono': cliente.telefono or '',
+            'correo': cliente.correo or '',
+            'fecha_nacimiento': cliente.fecha_nacimiento.isoformat() if cliente.fecha_nacimiento else '',
+            'alta': cliente.alta,
+            'tipo_enfermedad': cliente.tipo_enfermedad,
+            'zona_identificador': zona.identificador if zona else '',
+            'zona_nombre': zona.nombre if zona else '',
+            'contactos': [
+                {
+                    'nombre': c.nombre,
+                    'apellido1': c.apellido1,
+                    'relacion': c.get_relacion_display(),
+                    'telefono': c.telefono or '',
+                    'correo': c.correo or '',
+                }
+                for c in cliente.contactos.all()
+            ],
+        }
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def lineas_csv(filas):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(COLUMNAS)
+    for fila in filas:
+        fila = dict(fila)
+        fila['contactos'] = '; '.join(
+            f"{c['nombre']} {c['apellido1']} ({c['relacion']}) {c['telefono']}".strip()
+            for c in fila['contactos']
+        )
+        yield escritor.writerow([fila[columna] for columna in COLUMNAS])
+
+
+def lineas_jsonl(filas):
+    for fila in filas:
+        yield json.dumps(fila, ensure_ascii=False) + '\n'
+
+
+FORMATOS = {
+    'csv': (lineas_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (lineas_jsonl, 'application/x-ndjson; charset=utf-8'),
+}
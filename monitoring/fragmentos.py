@@ -0,0 +1,91 @@
+import hashlib
+
+from asgiref.sync import sync_to_async # type: ignore
+from django.conf import settings # type: ignore
+from django.core.cache import cache # type: ignore
+
+from .hospitales import conexion_activa
+from .replicas import en_primaria
+from .versiones import obtener_versiones, aobtener_versiones
+
+
+# ------------------------------
+# CACHÉ DE FRAGMENTOS Y PÁGINAS
+# ------------------------------
+# El HTML renderizado se guarda bajo claves que incluyen las versiones de los
+# modelos que muestra (ver versiones.py): al guardar o eliminar, la versión
+# sube y la clave vieja simplemente deja de pedirse. Nada se borra a mano.
+#
+# Los fragmentos se generan por partes: si salen de caché, las consultas de
+# sus filas nunca se ejecutan. Si no, se generan leyendo de la primaria.
+
+PREFIJO_PAGINA = 'monitoring:pagina:'
+PREFIJO_FRAGMENTO = 'monitoring:fragmento:'
+
+# Sección del panel admin -> modelos cuyo cambio la invalida
+SECCIONES_PANEL = {
+    'clientes': ('cliente', 'zona'),
+    'zonas': ('zona',),
+    'empleados': ('empleado', 'zona'),
+}
+
+
+def segundos_cache():
+    return getattr(settings, 'FRAGMENTOS_CACHE_SEGUNDOS', 3600)
+
+
+def firma_versiones(versiones, modelos):
+    return '.'.join(str(versiones[m]) for m in modelos)
+
+
+def clave_seccion(seccion, consulta):
+    """Clave del HTML de una sección del panel para unos parámetros (orden, cursor, filtros)."""
+    modelos = SECCIONES_PANEL[seccion]
+    version = firma_versiones(obtener_versiones(*modelos), modelos)
+    resumen = hashlib.md5(consulta.encode(), usedforsecurity=False).hexdigest()
+    return f'{PREFIJO_FRAGMENTO}panel:{seccion}:{version}:{resumen}'
+
+
+def fragmento_en_cache(clave, generar):
+    """
+    Entrega las partes del fragmento a medida que `generar()` las produce y
+    guarda el HTML completo al terminar. Si estaba en caché, sale de una vez.
+    Un flujo interrumpido (el navegador cerró la conexión) no se guarda.
+    """
+    guardado = cache.get(clave)
+    if guardado is not None:
+        yield guardado
+        return
+    partes = []
+    iterador = iter(generar())
+    while True:
+        # Sin yield dentro del contexto: cada parte se pide en el de quien itera
+        with en_primaria():
+            parte = next(iterador, None)
+        if parte is None:
+            break
+        partes.append(parte)
+        yield parte
+    cache.set(clave, ''.join(partes), timeout=segundos_cache())
+
+
+def _en_transaccion():
+    return conexion_activa().in_atomic_block
+
+
+async def apagina_en_cache(nombre, modelos, variante, generar):
+    """
+    Devuelve el HTML de una página completa desde caché o lo genera con
+    `await generar()` (que devuelve bytes). `variante` separa lo que cambia
+    según el usuario (p. ej. el menú de superusuario).
+    """
+    versiones = await aobtener_versiones(*modelos)
+    clave = f'{PREFIJO_PAGINA}{nombre}:{variante}:{firma_versiones(versiones, modelos)}'
+    contenido = await cache.aget(clave)
+    if contenido is None:
+        with en_primaria():
+            contenido = await generar()
+        # Lo renderizado dentro de una transacción abierta podría revertirse
+        if not await sync_to_async(_en_transaccion)():
+            await cache.aset(clave, contenido, timeout=segundos_cache())
+    return contenido
@@ -0,0 +1,249 @@
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+
+from .busqueda import normalizar
+from .hospitales import atomica
+from .jerarquia import reconstruir_jerarquia
+from .models import Zona, Cliente, Contacto, Empleado
+from .versiones import incrementar_version
+
+
+# ------------------------------
+# GENERACIÓN DE DATOS SINTÉTICOS
+# ------------------------------
+# Arma un hospital completo (árbol de zonas, pacientes, contactos y personal)
+# a partir de una semilla: con la misma semilla y los mismos parámetros se
+# obtienen exactamente los mismos datos. Todo se inserta con bulk_create por
+# lotes, así que la memoria depende del lote y del número de camas, no del
+# número de pacientes.
+
+LOTE_DEFECTO = 2000
+
+# Orden de los niveles del árbol: Edificio → Planta → Pasillo → Habitación → Cama
+NIVELES = [(1, 'Edificio'), (2, 'Planta'), (3, 'Pasillo'), (4, 'Habitación'), (5, 'Cama')]
+CAMAS_POR_HOJA = 4  # si el árbol no llega hasta el nivel Cama, cada hoja es una sala con varias camas
+
+ESCALAS = {
+    '1k': {'pacientes': 1_000, 'ramas': (2, 3, 2, 5, 2), 'empleados': 100},
+    '100k': {'pacientes': 100_000, 'ramas': (4, 6, 4, 10, 2), 'empleados': 2_000},
+    '1m': {'pacientes': 1_000_000, 'ramas': (10, 8, 5, 12, 3), 'empleados': 15_000},
+}
+
+NOMBRES = [
+    'José', 'María', 'Antonio', 'Carmen', 'Manuel', 'Ana', 'Francisco', 'Laura', 'David', 'Isabel',
+    'Juan', 'Lucía', 'Javier', 'Marta', 'Daniel', 'Elena', 'Carlos', 'Pilar', 'Miguel', 'Sara',
+    'Rafael', 'Paula', 'Pedro', 'Cristina', 'Ángel', 'Raquel', 'Alejandro', 'Rosa', 'Fernando', 'Nuria',
+]
+APELLIDOS = [
+    'García', 'Rodríguez', 'González', 'Fernández', 'López', 'Martínez', 'Sánchez', 'Pérez', 'Gómez',
+    'Martín', 'Jiménez', 'Ruiz', 'Hernández', 'Díaz', 'Moreno', 'Muñoz', 'Álvarez', 'Romero', 'Alonso',
+    'Gutiérrez', 'Navarro', 'Torres', 'Domínguez', 'Vázquez', 'Ramos', 'Gil', 'Ramírez', 'Serrano',
+    'Blanco', 'Molina', 'Morales', 'Suárez', 'Ortega', 'Delgado', 'Castro', 'Ortiz', 'Rubio', 'Núñez',
+]
+# Mezcla de enfermedades (pesos relativos)
+ENFERMEDADES = [
+    ('ninguna', 35), ('cardiaca', 20), ('respiratoria', 15),
+    ('neurologica', 10), ('diabetes', 12), ('otra', 8),
+]
+CARGOS = [
+    ('Enfermero/a', 40), ('Auxiliar', 25), ('Médico/a', 20), ('Celador/a', 8),
+    ('Fisioterapeuta', 4), ('Supervisor/a', 3),
+]
+NACIMIENTO_MINIMO = date(1930, 1, 1)
+DIAS_NACIMIENTO = (date(2010, 12, 31) - NACIMIENTO_MINIMO).days
+
+
+@dataclass
+class ResultadoGeneracion:
+    zonas: int = 0
+    camas: int = 0
+    pacientes: int = 0
+    ingresados: int = 0
+    contactos: int = 0
+    empleados: int = 0
+    segundos: float = 0.0
+
+
+class Generador:
+    """
+    Generador reproducible. `prefijo` entra en identificadores, nombres de zona
+    y documentos, de modo que se pueden cargar varios hospitales en la misma base.
+    """
+
+    def __init__(self, semilla=1, prefijo=None, ramas=ESCALAS['1k']['ramas'], pacientes=1_000,
+                 empleados=100, contactos=2, ocupacion=0.85, lote=LOTE_DEFECTO):
+        if not 1 <= len(ramas) <= len(NIVELES):
+            raise ValueError(f"La profundidad del árbol debe estar entre 1 y {len(NIVELES)}.")
+        if any(r < 1 for r in ramas):
+            raise ValueError("Cada nivel debe tener al menos una rama.")
+        if not 0 <= ocupacion <= 1:
+            raise ValueError("La ocupación debe estar entre 0 y 1.")
+        self.semilla = semilla
+        self.prefijo = prefijo or f'g{semilla}'
+        self.ramas = tuple(ramas)
+        self.pacientes = pacientes
+        self.empleados = empleados
+        self.contactos = contactos
+        self.ocupacion = ocupacion
+        self.lote = lote
+        self.resultado = ResultadoGeneracion()
+
+    def ya_existe(self):
+        return Zona.objects.filter(identificador__startswith=f'{self.prefijo}-').exists()
+
+    def generar(self, informar=None):
+        inicio = time.perf_counter()
+        # Un generador independiente por entidad: cambiar el número de
+        # empleados no altera los pacientes generados con la misma semilla
+        camas = self._zonas(random.Random(f'{self.semilla}:zonas'))
+        self._pacientes(random.Random(f'{self.semilla}:pacientes'), camas, informar, inicio)
+        self._empleados(random.Random(f'{self.semilla}:empleados'))
+
+        # bulk_create no dispara señales: jerarquía y versiones a mano
+        reconstruir_jerarquia()
+        incrementar_version('zona', 'cliente', 'contacto', 'empleado')
+        self.resultado.segundos = time.perf_counter() - inicio
+        return self.resultado
+
+    # ------------------------------
+    # ZONAS
+    # ------------------------------
+    def _zonas(self, rng):
+        """Crea el árbol nivel por nivel y devuelve la lista de plazas de cama (una por cama)."""
+        padres = [(None, '')]
+        hojas = []
+        for nivel, ramas in enumerate(self.ramas):
+            tipo, etiqueta = NIVELES[nivel]
+            es_hoja = nivel == len(self.ramas) - 1
+            nuevas = []
+            for padre_id, camino in padres:
+                for n in range(1, ramas + 1):
+                    sub = f'{camino}.{n}' if camino else str(n)
+                    nuevas.append(Zona(
+                        identificador=f'{self.prefijo}-z{sub}',
+                        nombre=f'{etiqueta} {sub} {self.prefijo}',
+                        tipo=tipo,
+                        zona_padre_id=padre_id,
+                        total_camas=(1 if tipo == 5 else CAMAS_POR_HOJA) if es_hoja else 0,
+                        # alguna habitación fuera de servicio, para tener datos variados
+                        bloqueada=tipo == 4 and rng.random() < 0.02,
+                    ))
+            with atomica():
+                creadas = Zona.objects.bulk_create(nuevas, batch_size=self.lote)
+            self.resultado.zonas += len(creadas)
+            padres = [(z.id, z.identificador.split('-z', 1)[1]) for z in creadas]
+            if es_hoja:
+                hojas = creadas
+
+        camas = [zona.id for zona in hojas for _ in range(zona.total_camas)]
+        self.resultado.camas = len(camas)
+        return camas
+
+    # ------------------------------
+    # PACIENTES Y CONTACTOS
+    # ------------------------------
+    def _persona(self, rng):
+        return rng.choice(NOMBRES), rng.choice(APELLIDOS), rng.choice(APELLIDOS)
+
+    def _correo(self, nombre, apellido, numero):
+        return f'{normalizar(nombre)}.{normalizar(apellido)}{numero}@example.com'.replace(' ', '')
+
+    def _pacientes(self, rng, camas, informar, inicio):
+        enfermedades, pesos = zip(*ENFERMEDADES)
+        ingresados = min(round(len(camas) * self.ocupacion), self.pacientes)
+        rng.shuffle(camas)
+        # Qué pacientes están ingresados y en qué cama: {número de paciente: zona}
+        asignacion = dict(zip(sorted(rng.sample(range(self.pacientes), ingresados)), camas))
+        ocupadas = {}
+
+        for desde in range(0, self.pacientes, self.lote):
+            clientes, contactos_por_cliente = [], []
+            for numero in range(desde, min(desde + self.lote, self.pacientes)):
+                nombre, apellido1, apellido2 = self._persona(rng)
+                zona_id = asignacion.get(numero)
+                clientes.append(Cliente(
+                    identificador=f'{self.prefijo}-c{numero}',
+                    nombre=nombre,
+                    apellido1=apellido1,
+                    apellido2=apellido2,
+                    documento=f'{self.prefijo}{numero:08d}',
+                    tipo_documento=1 if rng.random() < 0.9 else 2,
+                    telefono=f'6{rng.randrange(10 ** 8):08d}',
+                    correo=self._correo(nombre, apellido1, numero) if rng.random() < 0.7 else None,
+                    fecha_nacimiento=NACIMIENTO_MINIMO + timedelta(days=rng.randrange(DIAS_NACIMIENTO)),
+                    alta=zona_id is None,
+                    tipo_enfermedad=rng.choices(enfermedades, pesos)[0],
+                    zona_asignada_id=zona_id,
+                ))
+                if zona_id is not None:
+                    ocupadas[zona_id] = ocupadas.get(zona_id, 0) + 1
+                contactos_por_cliente.append(rng.randint(0, self.contactos))
+
+            with atomica():
+                creados = Cliente.objects.bulk_create(clientes, batch_size=self.lote)
+                contactos = [
+                    self._contacto(rng, cliente, n)
+                    for cliente, cantidad in zip(creados, contactos_por_cliente)
+                    for n in range(cantidad)
+                ]
+                Contacto.objects.bulk_create(contactos, batch_size=self.lote)
+
+            self.resultado.pacientes += len(creados)
+            self.resultado.contactos += len(contactos)
+            if informar:
+                self.resultado.segundos = time.perf_counter() - inicio
+                informar(self.resultado)
+
+        with atomica():
+            Zona.objects.bulk_update(
+                [Zona(id=zona_id, camas_ocupadas=n) for zona_id, n in ocupadas.items()],
+                ['camas_ocupadas'], batch_size=self.lote,
+            )
+        self.resultado.ingresados = ingresados
+
+    def _contacto(self, rng, cliente, n):
+        nombre, _, apellido2 = self._persona(rng)
+        relacion = rng.choice(Contacto.RELACIONES)[0]
+        # Los familiares directos comparten el primer apellido
+        apellido1 = cliente.apellido1 if relacion in (2, 4, 5, 8) else rng.choice(APELLIDOS)
+        return Contacto(
+            identificador=f'{cliente.identificador}-k{n}',
+            cliente=cliente,
+            nombre=nombre,
+            apellido1=apellido1,
+            apellido2=apellido2,
+            relacion=relacion,
+            telefono=f'6{rng.randrange(10 ** 8):08d}',
+            correo=self._correo(nombre, apellido1, cliente.id) if rng.random() < 0.4 else None,
+        )
+
+    # ------------------------------
+    # PERSONAL
+    # ------------------------------
+    def _empleados(self, rng):
+        cargos, pesos = zip(*CARGOS)
+        # El personal se reparte por las zonas de segundo nivel (plantas), o
+        # por los edificios si el árbol tiene un solo nivel
+        nivel = NIVELES[min(1, len(self.ramas) - 1)][0]
+        zonas = list(
+            Zona.objects.filter(identificador__startswith=f'{self.prefijo}-', tipo=nivel)
+            .order_by('id').values_list('id', flat=True)
+        )
+        for desde in range(0, self.empleados, self.lote):
+            empleados = []
+            for numero in range(desde, min(desde + self.lote, self.empleados)):
+                nombre, apellido1, _ = self._persona(rng)
+                empleados.append(Empleado(
+                    identificador=f'{self.prefijo}-e{numero}',
+                    nombre=nombre,
+                    apellido1=apellido1,
+                    cargo=rng.choices(cargos, pesos)[0],
+                    activo=rng.random() < 0.95,
+                    zona_asignada_id=rng.choice(zonas) if zonas and rng.random() < 0.9 else None,
+                ))
+            with atomica():
+                Empleado.objects.bulk_create(empleados, batch_size=self.lote)
+            self.resultado.empleados += len(empleados)
@@ -0,0 +1,241 @@
+import asyncio
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings # type: ignore
+from django.core.management.base import BaseCommand, CommandError # type: ignore
+from django.db import DEFAULT_DB_ALIAS, connections, transaction # type: ignore
+from django.utils.deprecation import MiddlewareMixin # type: ignore
+
+from Helpnex.basedatos import PREFIJO_HOSPITAL, alias_hospitales
+
+
+# ------------------------------
+# DATOS REPARTIDOS POR HOSPITAL
+# ------------------------------
+# Con HELPNEX_*_HOSPITALES cada hospital tiene su propia base
+# ('hospital_<clave>') con todas las tablas de monitoring: sus edificios (zonas
+# raíz) con su árbol, y los pacientes, contactos, personal, historial y avisos
+# que cuelgan de ellos. Usuarios y sesiones siguen en 'default', igual que la
+# secuencia de identificadores para que no se repitan entre hospitales.
+#
+# El hospital activo es una variable de contexto: la fija el middleware (cookie
+# que se elige con ?hospital=<clave>), en_hospital() en código y --hospital en
+# los comandos. El enrutador manda ahí las consultas de monitoring; sin hospital
+# activo van a 'default' como siempre (y ahí siguen las réplicas). Los
+# servicios abren sus transacciones con atomica() y al_confirmar(), que van a
+# la base activa y no siempre a 'default'.
+#
+# Las claves de caché 'monitoring:' llevan el hospital (clave_cache, la
+# KEY_FUNCTION de CACHES): versiones, resumen y fragmentos no se mezclan.
+# El inicio sin hospital elegido suma los resúmenes de todas las bases,
+# pedidos a la vez (ver analitica.aobtener_resumen_global).
+
+COOKIE_HOSPITAL = 'helpnex_hospital'
+PARAMETRO_HOSPITAL = 'hospital'
+APPS_POR_HOSPITAL = {'monitoring'}
+# Modelos de monitoring que viven solo en 'default'
+MODELOS_GLOBALES = {'secuencia'}
+PREFIJO_CACHE = 'monitoring:'
+
+# Alias de la base activa; None es 'default'
+_base = ContextVar('helpnex_hospital', default=None)
+
+
+class HospitalDesconocido(Exception):
+    """La clave no corresponde a ningún hospital configurado."""
+
+
+def hospitales():
+    return alias_hospitales(settings.DATABASES)
+
+
+def bases():
+    """Todas las bases con datos de monitoring: la primaria y la de cada hospital."""
+    return [DEFAULT_DB_ALIAS, *hospitales().values()]
+
+
+def alias_de(clave):
+    """Alias de la base de un hospital; None (la primaria) si la clave viene vacía."""
+    if not clave:
+        return None
+    configurados = hospitales()
+    if clave not in configurados:
+        disponibles = ', '.join(configurados) or 'ninguno'
+        raise HospitalDesconocido(f"No existe el hospital '{clave}' (configurados: {disponibles}).")
+    return configurados[clave]
+
+
+def base_activa():
+    return _base.get() or DEFAULT_DB_ALIAS
+
+
+def hospital_activo():
+    """Clave del hospital activo; None si se trabaja sobre la primaria."""
+    alias = _base.get()
+    return alias[len(PREFIJO_HOSPITAL):] if alias else None
+
+
+@contextmanager
+def en_base(alias):
+    anterior = _base.set(None if alias == DEFAULT_DB_ALIAS else alias)
+    try:
+        yield
+    finally:
+        _base.reset(anterior)
+
+
+def en_hospital(clave):
+    """Contexto con `clave` como hospital activo (vacía: la primaria)."""
+    return en_base(alias_de(clave))
+
+
+# ------------------------------
+# TRANSACCIONES EN LA BASE ACTIVA
+# ------------------------------
+def atomica(funcion=None):
+    """
+    transaction.atomic() sobre la base activa, que se elige al entrar y no al
+    importar: sirve como decorador (@atomica) y como contexto (with atomica()).
+    """
+    if funcion is None:
+        return transaction.atomic(using=base_activa())
+
+    @functools.wraps(funcion)
+    def envuelta(*args, **kwargs):
+        with transaction.atomic(using=base_activa()):
+            return funcion(*args, **kwargs)
+    return envuelta
+
+
+def al_confirmar(funcion):
+    transaction.on_commit(funcion, using=base_activa())
+
+
+def conexion_activa():
+    return connections[base_activa()]
+
+
+# ------------------------------
+# REPARTO DE CONSULTAS
+# ------------------------------
+class EnrutadorHospitales:
+    """DATABASE_ROUTERS (antes que el de réplicas): base de cada consulta de monitoring."""
+
+    def _base(self, model, hints):
+        if model._meta.app_label not in APPS_POR_HOSPITAL:
+            return None
+        if model._meta.model_name in MODELOS_GLOBALES:
+            return DEFAULT_DB_ALIAS
+        # Lo relacionado con una fila leída de un hospital se busca en ese hospital
+        instancia = hints.get('instance')
+        if instancia is not None and instancia._state.db in hospitales().values():
+            return instancia._state.db
+        return _base.get()
+
+    def db_for_read(self, model, **hints):
+        return self._base(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._base(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        alias = {obj1._state.db, obj2._state.db}
+        if alias & set(hospitales().values()):
+            return len(alias) == 1
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in hospitales().values():
+            return app_label in APPS_POR_HOSPITAL
+        return None
+
+
+def clave_cache(clave, prefijo, version):
+    """KEY_FUNCTION de CACHES: la de Django, con el hospital delante de las claves de monitoring."""
+    alias = _base.get()
+    if alias and clave.startswith(PREFIJO_CACHE):
+        clave = f'{alias}:{clave}'
+    return f'{prefijo}:{version}:{clave}'
+
+
+async def aen_todas(funcion):
+    """
+    Espera `funcion()` (una corrutina) una vez por base, todas a la vez y cada
+    una con su base activa. Devuelve {alias: resultado} en el orden de bases().
+    """
+    async def en(alias):
+        # Cada tarea de gather corre en su propia copia del contexto
+        with en_base(alias):
+            return await funcion()
+
+    aliases = bases()
+    resultados = await asyncio.gather(*(en(alias) for alias in aliases))
+    return dict(zip(aliases, resultados))
+
+
+# ------------------------------
+# MIDDLEWARE
+# ------------------------------
+def _en_base_al_generar(contenido, alias):
+    """Itera una respuesta en streaming con la base del hospital activa (se genera tras la vista)."""
+    iterador = iter(contenido)
+    while True:
+        anterior = _base.set(alias)
+        try:
+            parte = next(iterador)
+        except StopIteration:
+            return
+        finally:
+            _base.reset(anterior)
+        yield parte
+
+
+class HospitalesMiddleware(MiddlewareMixin):
+    """Activa el hospital elegido (?hospital=<clave>, recordado en una cookie)."""
+
+    def process_request(self, request):
+        _base.set(None)
+        if not hospitales():
+            return None
+        clave = request.GET.get(PARAMETRO_HOSPITAL, request.COOKIES.get(COOKIE_HOSPITAL))
+        try:
+            _base.set(alias_de(clave))
+        except HospitalDesconocido:
+            pass
+        return None
+
+    def process_response(self, request, response):
+        if PARAMETRO_HOSPITAL in request.GET and hospitales():
+            clave = hospital_activo()
+            if clave:
+                response.set_cookie(COOKIE_HOSPITAL, clave, httponly=True, samesite='Lax')
+            else:
+                response.delete_cookie(COOKIE_HOSPITAL)
+        alias = _base.get()
+        if alias and response.streaming and not response.is_async:
+            response.streaming_content = _en_base_al_generar(response.streaming_content, alias)
+        _base.set(None)
+        return response
+
+
+# ------------------------------
+# COMANDOS
+# ------------------------------
+class ComandoPorHospital(BaseCommand):
+    """Comando con --hospital: todo lo que hace va a la base de ese hospital."""
+
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        parser.add_argument('--hospital', default='',
+                            help="Clave del hospital sobre el que trabajar (por defecto, la base primaria).")
+        return parser
+
+    def execute(self, *args, **options):
+        try:
+            contexto = en_hospital(options.get('hospital'))
+        except HospitalDesconocido as error:
+            raise CommandError(str(error))
+        with contexto:
+            return super().execute(*args, **options)
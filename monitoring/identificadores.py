@@ -0,0 +1,141 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections, router, transaction # type: ignore
+from django.db.models import F # type: ignore
+
+from .models import Secuencia
+
+
+# ------------------------------
+# IDENTIFICADORES
+# ------------------------------
+# Todos los `identificador` que crea la aplicación salen de aquí. Son números
+# de una secuencia en la base, escritos en base 32 (Crockford) con ancho fijo:
+#   - únicos sin depender del azar: dos procesos nunca reciben el mismo número,
+#   - crecientes en el tiempo: el orden de texto es el de creación, así que
+#     las inserciones caen al final del índice único y no lo fragmentan,
+#   - cortos: 10 caracteres alcanzan para 2^50 identificadores.
+#
+# Cada proceso reserva un bloque de números con un solo UPDATE y los entrega
+# desde memoria. Las cargas masivas piden de una vez lo que van a insertar.
+#
+# La reserva no puede ir dentro de la transacción de quien pide el número: la
+# fila de la secuencia quedaría bloqueada hasta su COMMIT (todas las altas en
+# cola detrás de una) y, si se revirtiera, el contador volvería atrás con el
+# bloque ya en memoria. Con una transacción abierta, el bloque se reserva en
+# otra conexión que confirma al momento; si la transacción se revierte quedan
+# huecos, nunca repetidos. SQLite es la excepción: tiene un solo escritor y la
+# otra conexión esperaría al COMMIT, así que ahí se pide un número cada vez
+# dentro de la transacción (que ya tiene la base entera para ella).
+# La secuencia vive en una sola base (la primaria aunque haya hospitales):
+# transacción y comprobaciones van a la conexión de esa base.
+
+ALFABETO = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+LONGITUD = 10
+BLOQUE = 64
+SECUENCIA = 'identificador'
+
+
+def codificar(numero):
+    if not 0 < numero < len(ALFABETO) ** LONGITUD:
+        raise ValueError(f"Número fuera de rango: {numero}")
+    caracteres = []
+    for _ in range(LONGITUD):
+        numero, resto = divmod(numero, len(ALFABETO))
+        caracteres.append(ALFABETO[resto])
+    return ''.join(reversed(caracteres))
+
+
+def decodificar(texto):
+    numero = 0
+    for caracter in texto.upper():
+        numero = numero * len(ALFABETO) + ALFABETO.index(caracter)
+    return numero
+
+
+def base_secuencia():
+    return router.db_for_write(Secuencia)
+
+
+def reservar_numeros(cantidad, nombre=SECUENCIA):
+    """Avanza la secuencia `cantidad` números y devuelve el primero reservado."""
+    base = base_secuencia()
+    secuencias = Secuencia.objects.using(base)
+    with transaction.atomic(using=base):
+        actualizadas = secuencias.filter(nombre=nombre).update(valor=F('valor') + cantidad)
+        if not actualizadas:
+            secuencias.get_or_create(nombre=nombre)
+            secuencias.filter(nombre=nombre).update(valor=F('valor') + cantidad)
+        # La fila queda bloqueada por el UPDATE hasta el COMMIT: nadie más la movió
+        ultimo = secuencias.filter(nombre=nombre).values_list('valor', flat=True).get()
+    return ultimo - cantidad + 1
+
+
+def _reservar_y_cerrar(cantidad, nombre):
+    try:
+        return reservar_numeros(cantidad, nombre)
+    finally:
+        connections[base_secuencia()].close()
+
+
+def _reservar_aparte(cantidad, nombre):
+    """reservar_numeros en un hilo propio, y con él una conexión propia."""
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='helpnex-secuencia') as ejecutor:
+        return ejecutor.submit(_reservar_y_cerrar, cantidad, nombre).result()
+
+
+def _conexion_aparte(conexion):
+    """Si hay que reservar en otra conexión para no alargar la transacción abierta."""
+    return conexion.in_atomic_block and conexion.vendor != 'sqlite'
+
+
+class Asignador:
+    """Entrega identificadores desde un bloque reservado por proceso."""
+
+    def __init__(self, nombre=SECUENCIA, bloque=BLOQUE):
+        self.nombre = nombre
+        self.bloque = bloque
+        self._candado = threading.Lock()
+        self._siguiente = 0
+        self._limite = 0  # exclusivo
+
+    def _reservar(self, cantidad):
+        conexion = connections[base_secuencia()]
+        if _conexion_aparte(conexion):
+            return _reservar_aparte(cantidad, self.nombre)
+        return reservar_numeros(cantidad, self.nombre)
+
+    def siguiente(self):
+        conexion = connections[base_secuencia()]
+        if conexion.in_atomic_block and not _conexion_aparte(conexion):
+            return codificar(reservar_numeros(1, self.nombre))
+        with self._candado:
+            if self._siguiente >= self._limite:
+                self._siguiente = self._reservar(self.bloque)
+                self._limite = self._siguiente + self.bloque
+            numero = self._siguiente
+            self._siguiente += 1
+        return codificar(numero)
+
+    def reservar(self, cantidad):
+        """Identificadores consecutivos para una carga masiva (un solo UPDATE)."""
+        if cantidad <= 0:
+            return []
+        inicio = self._reservar(cantidad)
+        return [codificar(numero) for numero in range(inicio, inicio + cantidad)]
+
+
+asignador = Asignador()
+
+
+def nuevo_identificador():
+    return asignador.siguiente()
+
+
+def completar_identificadores(objetos):
+    """Asigna identificador a los objetos que no traen uno, con una sola reserva."""
+    faltantes = [objeto for objeto in objetos if not objeto.identificador]
+    for objeto, identificador in zip(faltantes, asignador.reservar(len(faltantes))):
+        objeto.identificador = identificador
+    return objetos
@@ -0,0 +1,339 @@
+import csv
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import islice
+
+from django.db.models import F # type: ignore
+from django.utils import timezone # type: ignore
+
+from .hospitales import atomica
+from .identificadores import completar_identificadores
+from .jerarquia import reconstruir_jerarquia
+from .models import Zona, Cliente, Empleado
+from .movimientos import registrar_ingresos
+from .notificaciones import encolar_ingresos
+from .versiones import incrementar_version
+
+
+# ------------------------------
+# IMPORTACIÓN MASIVA (CSV / JSONL)
+# ------------------------------
+# Las filas se leen de a una y se insertan por lotes con bulk_create, cada
+# lote en su propia transacción. Las referencias a zonas se resuelven con un
+# diccionario que se arma una sola vez al empezar, así la memoria depende del
+# número de zonas y del tamaño del lote, no del tamaño del archivo.
+
+LOTE_DEFECTO = 2000
+VERDADEROS = {'1', 'true', 'si', 'sí', 'yes', 't', 'x'}
+
+
+@dataclass
+class ResultadoImportacion:
+    procesadas: int = 0
+    insertadas: int = 0
+    rechazadas: int = 0
+    segundos: float = 0.0
+    padres_desconocidos: int = 0
+    motivos: dict = field(default_factory=dict)
+
+    @property
+    def filas_por_segundo(self):
+        return self.procesadas / self.segundos if self.segundos else 0.0
+
+
+class FilaInvalida(ValueError):
+    """La fila no se puede importar; el mensaje explica el motivo."""
+
+
+def leer_filas(ruta, formato=None):
+    """Generador de dicts desde un archivo CSV o JSONL (una fila en memoria a la vez)."""
+    formato = formato or ('jsonl' if str(ruta).endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        if formato == 'csv':
+            yield from csv.DictReader(archivo)
+            return
+        for numero, linea in enumerate(archivo, start=1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                yield json.loads(linea)
+            except json.JSONDecodeError:
+                yield {'__error__': f"JSON inválido en la línea {numero}"}
+
+
+# ------------------------------
+# RESOLUCIÓN DE ZONAS EN MEMORIA
+# ------------------------------
+class IndiceZonas:
+    """identificador/nombre -> id, y camas libres de las zonas que controlan camas."""
+
+    def __init__(self):
+        self.ids = {}
+        self.libres = {}
+        for zid, identificador, nombre, total, ocupadas in Zona.objects.values_list(
+            'id', 'identificador', 'nombre', 'total_camas', 'camas_ocupadas'
+        ).iterator(chunk_size=5000):
+            self.agregar(zid, identificador, nombre, total, ocupadas)
+
+    def agregar(self, zid, identificador, nombre, total=0, ocupadas=0):
+        self.ids[identificador] = zid
+        self.ids[nombre] = zid
+        if total:
+            self.libres[zid] = total - ocupadas
+
+    def resolver(self, referencia):
+        if not referencia:
+            return None
+        zid = self.ids.get(str(referencia).strip())
+        if zid is None:
+            raise FilaInvalida(f"zona desconocida: {referencia}")
+        return zid
+
+    def reservar_cama(self, zid):
+        if zid is None or zid not in self.libres:
+            return
+        if self.libres[zid] <= 0:
+            raise FilaInvalida("la zona no tiene camas libres")
+        self.libres[zid] -= 1
+
+
+def _texto(fila, campo, obligatorio=False, maximo=50):
+    valor = fila.get(campo)
+    valor = '' if valor is None else str(valor).strip()
+    if obligatorio and not valor:
+        raise FilaInvalida(f"falta {campo}")
+    if len(valor) > maximo:
+        raise FilaInvalida(f"{campo} supera {maximo} caracteres")
+    return valor or None
+
+
+def _booleano(valor, defecto=True):
+    if valor in (None, ''):
+        return defecto
+    if isinstance(valor, bool):
+        return valor
+    return str(valor).strip().lower() in VERDADEROS
+
+
+def _identificador(fila):
+    # Sin identificador en el archivo se asigna al insertar el lote (una reserva por lote)
+    return _texto(fila, 'identificador', maximo=512)
+
+
+# ------------------------------
+# CONSTRUCTORES POR MODELO
+# ------------------------------
+def construir_zona(fila, indice):
+    tipos = dict(Zona.TIPOS_ZONA)
+    tipo = int(fila.get('tipo') or 7)
+    if tipo not in tipos:
+        raise FilaInvalida(f"tipo de zona inválido: {tipo}")
+    return Zona(
+        identificador=_identificador(fila),
+        nombre=_texto(fila, 'nombre', obligatorio=True),
+        tipo=tipo,
+        bloqueada=_booleano(fila.get('bloqueada'), defecto=False),
+        critica=_booleano(fila.get('critica'), defecto=False),
+        total_camas=int(fila.get('total_camas') or 0),
+    ), _texto(fila, 'zona_padre', maximo=512)
+
+
+def construir_cliente(fila, indice):
+    enfermedades = dict(Cliente.TIPO_ENFERMEDAD)
+    enfermedad = _texto(fila, 'tipo_enfermedad', maximo=20) or 'ninguna'
+    if enfermedad not in enfermedades:
+        raise FilaInvalida(f"tipo_enfermedad inválido: {enfermedad}")
+    nacimiento = _texto(fila, 'fecha_nacimiento', maximo=10)
+    zona_id = indice.resolver(fila.get('zona'))
+    return Cliente(
+        identificador=_identificador(fila),
+        nombre=_texto(fila, 'nombre', obligatorio=True),
+        apellido1=_texto(fila, 'apellido1', obligatorio=True),
+        apellido2=_texto(fila, 'apellido2'),
+        documento=_texto(fila, 'documento', obligatorio=True),
+        tipo_documento=int(fila.get('tipo_documento') or 2),
+        telefono=_texto(fila, 'telefono'),
+        correo=_texto(fila, 'correo', maximo=254),
+        fecha_nacimiento=date.fromisoformat(nacimiento) if nacimiento else None,
+        alta=_booleano(fila.get('alta')),
+        tipo_enfermedad=enfermedad,
+        zona_asignada_id=zona_id,
+    ), None
+
+
+def construir_empleado(fila, indice):
+    return Empleado(
+        identificador=_identificador(fila),
+        nombre=_texto(fila, 'nombre', obligatorio=True),
+        apellido1=_texto(fila, 'apellido1', obligatorio=True),
+        cargo=_texto(fila, 'cargo', obligatorio=True, maximo=100),
+        activo=_booleano(fila.get('activo')),
+        zona_asignada_id=indice.resolver(fila.get('zona')),
+    ), None
+
+
+MODELOS = {
+    'zonas': (Zona, construir_zona, ('identificador', 'nombre')),
+    'clientes': (Cliente, construir_cliente, ('identificador', 'documento')),
+    'empleados': (Empleado, construir_empleado, ('identificador',)),
+}
+
+
+def _lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+def _existentes(modelo, campos_unicos, objetos):
+    """Valores ya usados en la base para los campos únicos del lote (una consulta por campo)."""
+    return {
+        campo: set(modelo.objects.filter(
+            **{f'{campo}__in': [getattr(o, campo) for o in objetos]}
+        ).values_list(campo, flat=True))
+        for campo in campos_unicos
+    }
+
+
+def importar(nombre_modelo, filas, lote=LOTE_DEFECTO, rechazar=None, informar=None):
+    """
+    Importa `filas` (iterable de dicts) en lotes. `rechazar(fila, motivo)` recibe
+    cada fila descartada e `informar(resultado)` se llama después de cada lote.
+    """
+    modelo, construir, campos_unicos = MODELOS[nombre_modelo]
+    indice = IndiceZonas()
+    resultado = ResultadoImportacion()
+    padres_pendientes = []
+    inicio = time.perf_counter()
+
+    def descartar(fila, motivo):
+        resultado.rechazadas += 1
+        clave = motivo.split(':')[0]
+        resultado.motivos[clave] = resultado.motivos.get(clave, 0) + 1
+        if rechazar:
+            rechazar(fila, motivo)
+
+    for filas_lote in _lotes(filas, lote):
+        candidatos = []
+        for fila in filas_lote:
+            resultado.procesadas += 1
+            if '__error__' in fila:
+                descartar(fila, fila['__error__'])
+                continue
+            try:
+                objeto, padre = construir(fila, indice)
+            except (FilaInvalida, ValueError, TypeError) as error:
+                descartar(fila, str(error))
+                continue
+            candidatos.append((fila, objeto, padre))
+
+        # Únicos: contra la base (una consulta por campo) y dentro del propio lote
+        existentes = _existentes(modelo, campos_unicos, [o for _, o, _ in candidatos])
+        validos = []
+        for fila, objeto, padre in candidatos:
+            repetido = next(
+                (c for c in campos_unicos if getattr(objeto, c) is not None and getattr(objeto, c) in existentes[c]),
+                None,
+            )
+            if repetido:
+                descartar(fila, f"{repetido} duplicado: {getattr(objeto, repetido)}")
+                continue
+            zona_id = getattr(objeto, 'zona_asignada_id', None)
+            if modelo is Cliente:
+                try:
+                    indice.reservar_cama(zona_id)
+                except FilaInvalida as error:
+                    descartar(fila, str(error))
+                    continue
+            for campo in campos_unicos:
+                existentes[campo].add(getattr(objeto, campo))
+            validos.append((fila, objeto, padre))
+
+        completar_identificadores([o for _, o, _ in validos])
+        ahora = timezone.now()
+        if modelo is Cliente:
+            for _, objeto, _ in validos:
+                objeto.en_zona_desde = ahora if objeto.zona_asignada_id is not None else None
+        with atomica():
+            if modelo is Cliente:
+                # Las camas se ocupan antes de insertar: quien se quede sin cama no entra
+                sin_cama = set(map(id, _ocupar_camas([o for _, o, _ in validos], indice)))
+                for fila, objeto, _ in validos:
+                    if id(objeto) in sin_cama:
+                        descartar(fila, "la zona no tiene camas libres")
+                validos = [valido for valido in validos if id(valido[1]) not in sin_cama]
+            creados = modelo.objects.bulk_create([o for _, o, _ in validos], batch_size=lote)
+            if modelo is Zona:
+                for zona, (_, _, padre) in zip(creados, validos):
+                    indice.agregar(zona.id, zona.identificador, zona.nombre, zona.total_camas)
+                    if padre:
+                        padres_pendientes.append((zona.id, padre))
+            elif modelo is Cliente:
+                registrar_ingresos(creados, ahora, lote)
+                encolar_ingresos(creados, ahora, lote)
+        resultado.insertadas += len(validos)
+        resultado.segundos = time.perf_counter() - inicio
+        if informar:
+            informar(resultado)
+
+    if modelo is Zona:
+        resultado.padres_desconocidos = _enlazar_padres(padres_pendientes, indice, lote)
+    if modelo in (Zona, Cliente):
+        # bulk_create no dispara señales: rutas y acumulados se recalculan al final
+        reconstruir_jerarquia()
+    incrementar_version('zona', modelo._meta.model_name)
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def _sumar_ocupadas(zona_id, cantidad):
+    # Condicional, como en camas.py: nunca más ocupadas que camas
+    return Zona.objects.filter(pk=zona_id, camas_ocupadas__lte=F('total_camas') - cantidad).update(
+        camas_ocupadas=F('camas_ocupadas') + cantidad
+    )
+
+
+def _ocupar_camas(clientes, indice):
+    """
+    Ocupa las camas del lote con un UPDATE por zona. Los ingresos llegados
+    desde que se armó el índice pueden haber llenado una zona: entonces se
+    ocupan las que queden y se devuelven los clientes que se quedan sin cama.
+    """
+    por_zona = defaultdict(list)
+    for cliente in clientes:
+        if cliente.zona_asignada_id is not None:
+            por_zona[cliente.zona_asignada_id].append(cliente)
+    sin_cama = []
+    for zona_id, grupo in por_zona.items():
+        if _sumar_ocupadas(zona_id, len(grupo)):
+            continue
+        actual = Zona.objects.select_for_update().filter(pk=zona_id).values_list('total_camas', 'camas_ocupadas').first()
+        if actual is None or not actual[0]:
+            continue  # sin control de camas
+        libres = max(actual[0] - actual[1], 0)
+        if libres:
+            _sumar_ocupadas(zona_id, libres)
+        indice.libres[zona_id] = 0
+        sin_cama.extend(grupo[libres:])
+    return sin_cama
+
+
+def _enlazar_padres(pendientes, indice, lote):
+    """
+    Las zonas padre pueden venir después en el archivo: se enlazan al final.
+    Devuelve cuántas referencias no se pudieron resolver.
+    """
+    enlaces, desconocidos = [], 0
+    for zona_id, referencia in pendientes:
+        padre_id = indice.ids.get(referencia)
+        if padre_id is None or padre_id == zona_id:
+            desconocidos += 1
+            continue
+        enlaces.append(Zona(id=zona_id, zona_padre_id=padre_id))
+    with atomica():
+        Zona.objects.bulk_update(enlaces, ['zona_padre'], batch_size=lote)
+    return desconocidos
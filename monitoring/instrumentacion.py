@@ -0,0 +1,128 @@
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager, ExitStack
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import connections # type: ignore
+
+
+# ------------------------------
+# INSTRUMENTACIÓN DE CONSULTAS
+# ------------------------------
+# Registra cada consulta SQL (con su duración) que se ejecuta dentro de un
+# bloque, en todas las conexiones, y agrupa las repetidas por su "firma": el
+# SQL sin literales y con las listas IN colapsadas. Una firma que aparece
+# muchas veces en una sola petición suele ser un N+1.
+
+_NUMEROS = re.compile(r'\b\d+\b')
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_LISTAS_IN = re.compile(r'\bIN \((?:\s*(?:%s|\?|\d+)\s*,?)+\)', re.IGNORECASE)
+_ESPACIOS = re.compile(r'\s+')
+
+
+def firma(sql):
+    sql = _CADENAS.sub('?', sql)
+    sql = _LISTAS_IN.sub('IN (...)', sql)
+    sql = _NUMEROS.sub('?', sql)
+    return _ESPACIOS.sub(' ', sql).strip()
+
+
+@dataclass
+class Consulta:
+    sql: str
+    segundos: float
+    alias: str
+
+
+@dataclass
+class Medicion:
+    consultas: list = field(default_factory=list)
+    segundos: float = 0.0
+
+    @property
+    def cantidad(self):
+        return len(self.consultas)
+
+    @property
+    def milisegundos(self):
+        return self.segundos * 1000
+
+    def duplicadas(self):
+        """[(firma, veces)] de las consultas que se repiten, de más a menos."""
+        conteo = Counter(firma(c.sql) for c in self.consultas)
+        return [(sql, veces) for sql, veces in conteo.most_common() if veces > 1]
+
+    def informe(self, titulo=''):
+        lineas = [f"{titulo}: {self.cantidad} consultas, {self.milisegundos:.1f} ms".lstrip(': ')]
+        for sql, veces in self.duplicadas():
+            lineas.append(f"  x{veces}  {sql[:200]}")
+        return '\n'.join(lineas)
+
+
+@contextmanager
+def medir_consultas(aliases=None):
+    """
+    with medir_consultas() as medicion: ...
+    Funciona sin DEBUG=True (usa execute_wrapper, no connection.queries).
+    """
+    medicion = Medicion()
+
+    def registrar(alias):
+        def envoltorio(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                medicion.consultas.append(Consulta(sql, time.perf_counter() - inicio, alias))
+        return envoltorio
+
+    with ExitStack() as pila:
+        for alias in aliases or connections:
+            pila.enter_context(connections[alias].execute_wrapper(registrar(alias)))
+        inicio = time.perf_counter()
+        try:
+            yield medicion
+        finally:
+            medicion.segundos = time.perf_counter() - inicio
+
+
+# ------------------------------
+# PRESUPUESTOS EN LOS TESTS
+# ------------------------------
+class PresupuestoMixin:
+    """
+    Para TestCase: assertPresupuesto(url, consultas=N, ms=M) hace la petición con
+    self.client y falla si supera el número de consultas, las consultas
+    repetidas permitidas o el tiempo. El mensaje incluye las firmas repetidas.
+
+    El tiempo se multiplica por PRESUPUESTO_FACTOR_TIEMPO (variable de entorno)
+    para máquinas lentas o CI compartido.
+    """
+    factor_tiempo = float(os.environ.get('PRESUPUESTO_FACTOR_TIEMPO', '1'))
+
+    def medir_peticion(self, url, metodo='get', datos=None, fragmentos=None, **extra):
+        """`fragmentos` limita lo que se lee de un flujo que no termina (SSE)."""
+        with medir_consultas() as medicion:
+            respuesta = getattr(self.client, metodo)(url, datos or {}, **extra)
+            # En streaming el trabajo ocurre al consumir el cuerpo
+            if respuesta.streaming:
+                for _ in islice(respuesta.streaming_content, fragmentos):
+                    pass
+                respuesta.close()
+        return respuesta, medicion
+
+    def assertPresupuesto(self, url, consultas, ms=None, duplicadas=0, metodo='get', datos=None,
+                          estado=None, fragmentos=None, **extra):
+        respuesta, medicion = self.medir_peticion(url, metodo, datos, fragmentos, **extra)
+        informe = medicion.informe(f"{metodo.upper()} {url}")
+        if estado is not None:
+            self.assertEqual(respuesta.status_code, estado, informe)
+        self.assertLessEqual(medicion.cantidad, consultas, f"Demasiadas consultas.\n{informe}")
+        repetidas = sum(veces - 1 for _, veces in medicion.duplicadas())
+        self.assertLessEqual(repetidas, duplicadas, f"Consultas repetidas (¿N+1?).\n{informe}")
+        if ms is not None:
+            self.assertLessEqual(medicion.milisegundos, ms * self.factor_tiempo, f"Demasiado lenta.\n{informe}")
+        return respuesta, medicion
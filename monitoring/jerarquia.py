@@ -0,0 +1,245 @@
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.core.exceptions import ValidationError # type: ignore
+from django.db import DatabaseError # type: ignore
+from django.db.models import Case, F, Q, Value, When # type: ignore
+from django.db.models.functions import Concat, Substr # type: ignore
+
+from .hospitales import al_confirmar, atomica, base_activa
+from .models import Zona
+
+
+# ------------------------------
+# JERARQUÍA DE ZONAS (RUTA MATERIALIZADA)
+# ------------------------------
+# Cada zona guarda su ruta de ids desde la raíz ('/1/4/9/'), su profundidad
+# y la suma de camas de todo su subárbol. Así:
+#   - subárbol:   ruta LIKE '/1/4/%'      (una consulta sobre el índice de ruta)
+#   - ancestros:  id IN (1, 4)            (ids sacados de la propia ruta)
+#   - ocupación:  total_camas_subarbol / camas_ocupadas_subarbol ya sumados
+# Los receptores de signals.py llaman a estas funciones al guardar y eliminar.
+#
+# La ocupación que cambian ingresos y altas no sube a los ancestros dentro de
+# su transacción: todos los ingresos de un edificio harían cola en la fila de
+# la zona raíz hasta el COMMIT del anterior. Tras el COMMIT, cada transacción
+# deja sus deltas en una cola del proceso y aplicar_ocupacion_pendiente() los
+# suma todos con un UPDATE por base, fuera de cualquier transacción. Si el
+# UPDATE falla (bloqueo, deadlock) los deltas esperan al siguiente intento.
+# Los acumulados van un instante por detrás de camas_ocupadas; si el proceso
+# cae con deltas en la cola, reconstruir_jerarquia() los recalcula.
+
+logger = logging.getLogger(__name__)
+
+# {alias: Counter({zona_id: delta})} confirmados y aún sin aplicar
+_ocupacion_pendiente = defaultdict(Counter)
+_candado_ocupacion = threading.Lock()
+
+# Un save(update_fields=...) sin ninguno de estos no mueve la zona ni sus camas
+CAMPOS_JERARQUIA = frozenset({'zona_padre', 'zona_padre_id', 'total_camas', 'camas_ocupadas'})
+
+def ruta_de(zona_id, ruta_padre=None):
+    return f'{ruta_padre or "/"}{zona_id}/'
+
+
+def ids_en_ruta(ruta):
+    return [int(parte) for parte in ruta.strip('/').split('/') if parte]
+
+
+def propagar_camas(ids, delta_total=0, delta_ocupadas=0):
+    """Suma los deltas a los acumulados del subárbol de las zonas indicadas."""
+    if not ids or (delta_total == 0 and delta_ocupadas == 0):
+        return
+    Zona.objects.filter(id__in=ids).update(
+        total_camas_subarbol=F('total_camas_subarbol') + delta_total,
+        camas_ocupadas_subarbol=F('camas_ocupadas_subarbol') + delta_ocupadas,
+    )
+
+
+def _sumar_ocupacion(alias, por_zona):
+    """Un UPDATE que suma a cada zona su delta; las zonas con el mismo delta comparten WHEN."""
+    por_delta = defaultdict(list)
+    for zona_id, delta in por_zona.items():
+        por_delta[delta].append(zona_id)
+    Zona.objects.using(alias).filter(pk__in=list(por_zona)).update(camas_ocupadas_subarbol=Case(
+        *[When(pk__in=ids, then=F('camas_ocupadas_subarbol') + delta) for delta, ids in por_delta.items()],
+        default=F('camas_ocupadas_subarbol'),
+        output_field=Zona._meta.get_field('camas_ocupadas_subarbol'),
+    ))
+
+
+def aplicar_ocupacion_pendiente():
+    """Aplica los deltas de ocupación confirmados; los que fallen vuelven a la cola."""
+    with _candado_ocupacion:
+        pendientes = {alias: deltas for alias, deltas in _ocupacion_pendiente.items()}
+        _ocupacion_pendiente.clear()
+    for alias, deltas in pendientes.items():
+        deltas = {zona_id: delta for zona_id, delta in deltas.items() if delta}
+        if not deltas:
+            continue
+        try:
+            _sumar_ocupacion(alias, deltas)
+        except DatabaseError as error:
+            logger.warning("No se pudo aplicar la ocupación acumulada (%s); se reintenta después: %s", alias, error)
+            with _candado_ocupacion:
+                _ocupacion_pendiente[alias].update(deltas)
+
+
+def propagar_ocupacion_al_confirmar(por_zona):
+    """
+    Suma {zona_id: delta} al camas_ocupadas_subarbol de esas zonas después del
+    COMMIT de la transacción en curso (nada si se revierte).
+    """
+    if not por_zona:
+        return
+    alias = base_activa()
+
+    def encolar():
+        with _candado_ocupacion:
+            _ocupacion_pendiente[alias].update(por_zona)
+        aplicar_ocupacion_pendiente()
+    al_confirmar(encolar)
+
+
+def estado_anterior(zona):
+    """Lo que hace falta saber de la fila antes de guardarla (None si es nueva)."""
+    if zona.pk is None:
+        return None
+    return (
+        Zona.objects.filter(pk=zona.pk)
+        .values('zona_padre_id', 'ruta', 'profundidad', 'total_camas', 'camas_ocupadas',
+                'total_camas_subarbol', 'camas_ocupadas_subarbol')
+        .first()
+    )
+
+
+def validar_padre(zona):
+    """Impide que una zona quede colgando de sí misma o de su propio subárbol."""
+    if zona.zona_padre_id is None or zona.pk is None:
+        return
+    if zona.zona_padre_id == zona.pk:
+        raise ValidationError("Una zona no puede ser su propia zona padre.")
+    ruta_padre = Zona.objects.filter(pk=zona.zona_padre_id).values_list('ruta', flat=True).first()
+    if ruta_padre and f'/{zona.pk}/' in ruta_padre:
+        raise ValidationError("La zona padre no puede pertenecer al subárbol de la zona.")
+
+
+@atomica
+def sincronizar_zona(zona, anterior):
+    """Actualiza ruta, profundidad y acumulados tras guardar `zona`."""
+    padre = (
+        Zona.objects.filter(pk=zona.zona_padre_id).values('ruta', 'profundidad').first()
+        if zona.zona_padre_id else None
+    )
+    ruta_nueva = ruta_de(zona.pk, padre['ruta'] if padre else None)
+    profundidad_nueva = padre['profundidad'] + 1 if padre else 0
+
+    if anterior is None or not anterior['ruta']:
+        # Zona nueva: su subárbol es ella misma
+        Zona.objects.filter(pk=zona.pk).update(
+            ruta=ruta_nueva,
+            profundidad=profundidad_nueva,
+            total_camas_subarbol=zona.total_camas,
+            camas_ocupadas_subarbol=zona.camas_ocupadas,
+        )
+        propagar_camas(ids_en_ruta(ruta_nueva)[:-1], zona.total_camas, zona.camas_ocupadas)
+        zona.ruta, zona.profundidad = ruta_nueva, profundidad_nueva
+        zona.total_camas_subarbol, zona.camas_ocupadas_subarbol = zona.total_camas, zona.camas_ocupadas
+        return
+
+    # Cambios en las camas propias: afectan a la zona y a todos sus ancestros
+    delta_total = zona.total_camas - anterior['total_camas']
+    delta_ocupadas = zona.camas_ocupadas - anterior['camas_ocupadas']
+    propagar_camas(ids_en_ruta(anterior['ruta']), delta_total, delta_ocupadas)
+
+    subarbol_total = anterior['total_camas_subarbol'] + delta_total
+    subarbol_ocupadas = anterior['camas_ocupadas_subarbol'] + delta_ocupadas
+
+    ruta_vieja = anterior['ruta']
+    if ruta_nueva != ruta_vieja:
+        # Reubicación: solo se reescriben las filas del subárbol movido
+        Zona.objects.filter(ruta__startswith=ruta_vieja).update(
+            ruta=Concat(Value(ruta_nueva), Substr('ruta', len(ruta_vieja) + 1)),
+            profundidad=F('profundidad') + (profundidad_nueva - anterior['profundidad']),
+        )
+        propagar_camas(ids_en_ruta(ruta_vieja)[:-1], -subarbol_total, -subarbol_ocupadas)
+        propagar_camas(ids_en_ruta(ruta_nueva)[:-1], subarbol_total, subarbol_ocupadas)
+
+    zona.ruta, zona.profundidad = ruta_nueva, profundidad_nueva
+    zona.total_camas_subarbol, zona.camas_ocupadas_subarbol = subarbol_total, subarbol_ocupadas
+
+
+@atomica
+def desvincular_zona(anterior):
+    """
+    Tras eliminar una zona sus hijas quedan sin padre (SET_NULL) y pasan a ser
+    raíces: se recorta la ruta de sus subárboles y se descuenta el subárbol
+    completo de los ancestros. `anterior` es el estado leído antes de borrar.
+    """
+    if anterior is None or not anterior['ruta']:
+        return
+    ruta = anterior['ruta']
+    propagar_camas(
+        ids_en_ruta(ruta)[:-1], -anterior['total_camas_subarbol'], -anterior['camas_ocupadas_subarbol']
+    )
+    Zona.objects.filter(ruta__startswith=ruta).update(
+        ruta=Concat(Value('/'), Substr('ruta', len(ruta) + 1)),
+        profundidad=F('profundidad') - (anterior['profundidad'] + 1),
+    )
+
+
+@atomica
+def reconstruir_jerarquia(zona_ids=None):
+    """
+    Recalcula rutas, profundidades y acumulados de todas las zonas en memoria
+    y los escribe con bulk_update. Se usa tras cargas masivas (bulk_create no
+    dispara señales) o para reparar datos.
+
+    Con `zona_ids` solo se rehacen los árboles (desde su raíz) donde están esas
+    zonas, más ellas mismas si aún no tienen ruta. Para zonas nuevas o que
+    cambian de padre hay que incluir también los padres: así entran los
+    árboles de origen y de destino, y ninguna zona de fuera cambia.
+    """
+    zonas = Zona.objects.all()
+    if zona_ids is not None:
+        rutas_actuales = Zona.objects.filter(pk__in=list(zona_ids)).values_list('ruta', flat=True)
+        raices = {ids_en_ruta(ruta)[0] for ruta in rutas_actuales if ruta}
+        filtro = Q(pk__in=list(zona_ids))
+        for raiz in raices:
+            filtro |= Q(ruta__startswith=f'/{raiz}/')
+        zonas = zonas.filter(filtro)
+    filas = list(zonas.values_list('id', 'zona_padre_id', 'total_camas', 'camas_ocupadas'))
+    padres = {zid: padre for zid, padre, _, _ in filas}
+    # Los acumulados salen de camas_ocupadas: lo que quedara en la cola ya está contado
+    with _candado_ocupacion:
+        cola = _ocupacion_pendiente[base_activa()]
+        for zid in padres:
+            cola.pop(zid, None)
+    hijos = {}
+    for zid, padre, _, _ in filas:
+        hijos.setdefault(padre if padre in padres else None, []).append(zid)
+
+    rutas, profundidades = {}, {}
+    pendientes = [(zid, '/', 0) for zid in hijos.get(None, [])]
+    while pendientes:
+        zid, ruta_padre, profundidad = pendientes.pop()
+        rutas[zid] = ruta_de(zid, ruta_padre)
+        profundidades[zid] = profundidad
+        pendientes.extend((hijo, rutas[zid], profundidad + 1) for hijo in hijos.get(zid, []))
+
+    totales = {zid: [0, 0] for zid in padres}
+    for zid, _, total, ocupadas in filas:
+        for ancestro in ids_en_ruta(rutas.get(zid, '')):
+            totales[ancestro][0] += total
+            totales[ancestro][1] += ocupadas
+
+    zonas = [
+        Zona(id=zid, ruta=rutas.get(zid, ''), profundidad=profundidades.get(zid, 0),
+             total_camas_subarbol=totales[zid][0], camas_ocupadas_subarbol=totales[zid][1])
+        for zid in padres
+    ]
+    Zona.objects.bulk_update(
+        zonas, ['ruta', 'profundidad', 'total_camas_subarbol', 'camas_ocupadas_subarbol'], batch_size=1000
+    )
+    return len(zonas)
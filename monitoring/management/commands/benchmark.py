@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError # type: ignore
+
+from monitoring.benchmarks import (
+    ESCENARIOS, ESCENARIOS_CONCURRENTES, ESTRATEGIAS_IDENTIFICADOR, SERVIDORES, cliente_autenticado, medir,
+    medir_identificadores,
+)
+
+
+class Command(BaseCommand):
+    help = "Mide peticiones por segundo y latencia (p50/p99) de un escenario contra la base configurada."
+
+    def add_arguments(self, parser):
+        parser.add_argument('escenario', choices=sorted(ESCENARIOS) + sorted(ESCENARIOS_CONCURRENTES) + ['identificadores'])
+        parser.add_argument('--repeticiones', type=int, default=200)
+        parser.add_argument('--concurrencia', type=int, default=16,
+                            help="Peticiones simultáneas en los escenarios concurrentes (WSGI frente a ASGI).")
+        parser.add_argument('--usuario', help="Superusuario con el que se hacen las peticiones.")
+        parser.add_argument('--filas', type=int, default=50000,
+                            help="Identificadores insertados por estrategia (escenario identificadores).")
+
+    def handle(self, *args, **options):
+        if options['escenario'] == 'identificadores':
+            self._identificadores(options['filas'])
+            return
+
+        try:
+            cliente = cliente_autenticado(options['usuario'])
+        except LookupError as error:
+            raise CommandError(str(error))
+
+        if options['escenario'] in ESCENARIOS_CONCURRENTES:
+            self._concurrente(cliente, options)
+            return
+
+        self.stdout.write(f"{'caso':<24}{'pet/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for nombre, peticion in ESCENARIOS[options['escenario']](cliente):
+            r = medir(peticion, options['repeticiones'])
+            self.stdout.write(f"{nombre:<24}{r['por_segundo']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+
+    def _concurrente(self, cliente, options):
+        if options['concurrencia'] < 1:
+            raise CommandError("--concurrencia debe ser mayor que 0.")
+        self.stdout.write(f"Concurrencia: {options['concurrencia']}")
+        self.stdout.write(f"{'caso':<24}{'servidor':>9}{'pet/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for nombre, url, preparar in ESCENARIOS_CONCURRENTES[options['escenario']]():
+            for servidor, medir_servidor in SERVIDORES.items():
+                r = medir_servidor(cliente, url, options['repeticiones'], options['concurrencia'], preparar)
+                self.stdout.write(
+                    f"{nombre:<24}{servidor:>9}{r['por_segundo']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                )
+
+    def _identificadores(self, filas):
+        if filas < 1:
+            raise CommandError("--filas debe ser mayor que 0.")
+        self.stdout.write(f"Filas por estrategia: {filas}")
+        self.stdout.write(
+            f"{'estrategia':<22}{'filas/s':>10}{'colisiones':>12}{'al final':>10}{'páginas':>9}{'llenado':>9}{'long':>6}"
+        )
+        for estrategia in ESTRATEGIAS_IDENTIFICADOR:
+            r = medir_identificadores(estrategia, filas)
+            llenado = f"{r['llenado']:.0%}" if r['llenado'] is not None else '-'
+            paginas = r['paginas'] if r['paginas'] is not None else '-'
+            self.stdout.write(
+                f"{estrategia:<22}{r['filas_por_segundo']:>10.0f}{r['colisiones']:>12}{r['al_final']:>10.1%}"
+                f"{paginas:>9}{llenado:>9}{r['longitud']:>6}"
+            )
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings # type: ignore
+from django.db import close_old_connections # type: ignore
+
+from monitoring.hospitales import ComandoPorHospital
+from monitoring.notificaciones import despachar_lote
+
+
+class Command(ComandoPorHospital):
+    help = (
+        "Envía a los contactos los avisos pendientes (traslados, altas e ingresos "
+        "en zonas críticas) por lotes, con un pool de hilos por canal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help="Vacía la cola y termina (para cron).")
+        parser.add_argument('--lote', type=int, default=200, help="Notificaciones por lote.")
+        parser.add_argument('--hilos', type=int, default=4, help="Hilos de envío por canal.")
+
+    def handle(self, *args, **options):
+        intervalo = getattr(settings, 'NOTIFICACIONES_INTERVALO_SEGUNDOS', 5)
+        totales = [0, 0, 0]
+        while True:
+            inicio = time.monotonic()
+            resultado = despachar_lote(options['lote'], options['hilos'])
+            totales = [t + r for t, r in zip(totales, resultado)]
+            if any(resultado) and options['verbosity'] >= 2:
+                self.stdout.write(
+                    f"  {resultado[0]} enviadas, {resultado[1]} a reintentar, {resultado[2]} fallidas "
+                    f"en {time.monotonic() - inicio:.2f} s"
+                )
+            # Un lote lleno indica que quedan más: se sigue sin esperar
+            if sum(resultado) == options['lote']:
+                continue
+            if options['una_vez']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Enviadas: {totales[0]}. A reintentar: {totales[1]}. Fallidas: {totales[2]}."
+                ))
+                return
+            close_old_connections()
+            time.sleep(intervalo)
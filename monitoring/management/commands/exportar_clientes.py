@@ -0,0 +1,50 @@
+from functools import partial
+
+from django.core.management.base import CommandError # type: ignore
+
+from monitoring.exportacion import filtrar_clientes, iterar_clientes, FORMATOS, BLOQUE_DEFECTO
+from monitoring.hospitales import ComandoPorHospital
+
+
+class Command(ComandoPorHospital):
+    help = "Exporta clientes (con zona y contactos) a CSV o JSONL sin cargarlos en memoria."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', nargs='?', default='-',
+                            help="Ruta de salida; '-' (por defecto) escribe en la salida estándar.")
+        parser.add_argument('--formato', choices=sorted(FORMATOS), default='csv')
+        parser.add_argument('--zona', type=int, help="Id de zona: exporta todo su subárbol.")
+        parser.add_argument('--tipo-enfermedad')
+        parser.add_argument('--alta', choices=['si', 'no'])
+        parser.add_argument('--bloque', type=int, default=BLOQUE_DEFECTO)
+
+    def handle(self, *args, **options):
+        if options['bloque'] < 1:
+            raise CommandError("--bloque debe ser mayor que 0.")
+        generar, _ = FORMATOS[options['formato']]
+        clientes = filtrar_clientes(
+            zona=options['zona'],
+            tipo_enfermedad=options['tipo_enfermedad'],
+            alta=options['alta'],
+        )
+
+        # Con '-' se escribe en self.stdout (call_command(stdout=...) lo recoge)
+        if options['archivo'] == '-':
+            archivo = None
+            escribir = partial(self.stdout.write, ending='')
+        else:
+            archivo = open(options['archivo'], 'w', newline='', encoding='utf-8')
+            escribir = archivo.write
+        filas = 0
+        try:
+            for linea in generar(iterar_clientes(clientes, bloque=options['bloque'])):
+                escribir(linea)
+                filas += 1
+        finally:
+            if archivo is not None:
+                archivo.close()
+
+        if options['archivo'] != '-':
+            if options['formato'] == 'csv':
+                filas -= 1  # cabecera
+            self.stdout.write(self.style.SUCCESS(f"Exportados {filas} clientes a {options['archivo']}."))
@@ -0,0 +1,69 @@
+from django.core.management.base import CommandError # type: ignore
+
+from monitoring.generacion import Generador, ESCALAS, LOTE_DEFECTO
+from monitoring.hospitales import ComandoPorHospital
+
+
+def _ramas(valor):
+    try:
+        return tuple(int(parte) for parte in valor.split(','))
+    except ValueError:
+        raise CommandError("--ramas espera enteros separados por comas, p. ej. 4,6,4,10,2.")
+
+
+class Command(ComandoPorHospital):
+    help = (
+        "Genera un hospital sintético reproducible (zonas, pacientes, contactos y personal) "
+        "a la escala indicada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', choices=list(ESCALAS), default='1k',
+                            help="Tamaño de partida; las demás opciones lo ajustan.")
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--prefijo',
+                            help="Prefijo de identificadores y documentos (por defecto g<semilla>).")
+        parser.add_argument('--pacientes', type=int)
+        parser.add_argument('--ramas',
+                            help="Hijos por nivel, desde Edificio hacia Cama (1 a 5 niveles), p. ej. 4,6,4,10,2.")
+        parser.add_argument('--empleados', type=int)
+        parser.add_argument('--contactos', type=int, default=2, help="Máximo de contactos por paciente.")
+        parser.add_argument('--ocupacion', type=float, default=0.85, help="Fracción de camas ocupadas.")
+        parser.add_argument('--lote', type=int, default=LOTE_DEFECTO)
+
+    def handle(self, *args, **options):
+        escala = ESCALAS[options['escala']]
+        try:
+            generador = Generador(
+                semilla=options['semilla'],
+                prefijo=options['prefijo'],
+                ramas=_ramas(options['ramas']) if options['ramas'] else escala['ramas'],
+                pacientes=options['pacientes'] if options['pacientes'] is not None else escala['pacientes'],
+                empleados=options['empleados'] if options['empleados'] is not None else escala['empleados'],
+                contactos=options['contactos'],
+                ocupacion=options['ocupacion'],
+                lote=options['lote'],
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        if generador.pacientes < 0 or generador.empleados < 0 or generador.lote < 1:
+            raise CommandError("Pacientes y empleados no pueden ser negativos y --lote debe ser mayor que 0.")
+        if generador.ya_existe():
+            raise CommandError(
+                f"Ya hay datos generados con el prefijo '{generador.prefijo}'. "
+                "Usa otra semilla o --prefijo, o vacía la base con flush."
+            )
+
+        def informar(resultado):
+            self.stdout.write(
+                f"  {resultado.pacientes} pacientes | {resultado.contactos} contactos | "
+                f"{resultado.pacientes / resultado.segundos if resultado.segundos else 0:.0f} pacientes/s"
+            )
+
+        resultado = generador.generar(informar=informar if options['verbosity'] >= 2 else None)
+        self.stdout.write(self.style.SUCCESS(
+            f"Hospital '{generador.prefijo}' generado en {resultado.segundos:.1f} s: "
+            f"{resultado.zonas} zonas, {resultado.camas} camas, {resultado.pacientes} pacientes "
+            f"({resultado.ingresados} ingresados), {resultado.contactos} contactos, "
+            f"{resultado.empleados} empleados."
+        ))
@@ -0,0 +1,64 @@
+import csv
+import json
+
+from django.core.management.base import CommandError # type: ignore
+
+from monitoring.hospitales import ComandoPorHospital
+from monitoring.importacion import importar, leer_filas, LOTE_DEFECTO, MODELOS
+
+
+class Command(ComandoPorHospital):
+    help = "Importa zonas, clientes o empleados desde un archivo CSV o JSONL por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('modelo', choices=sorted(MODELOS))
+        parser.add_argument('archivo')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'],
+                            help="Por defecto se deduce de la extensión del archivo.")
+        parser.add_argument('--lote', type=int, default=LOTE_DEFECTO,
+                            help="Filas por bulk_create y por transacción.")
+        parser.add_argument('--rechazos',
+                            help="CSV donde se escriben las filas rechazadas con su motivo.")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0.")
+
+        salida_rechazos = open(options['rechazos'], 'w', newline='', encoding='utf-8') if options['rechazos'] else None
+        escritor = csv.writer(salida_rechazos) if salida_rechazos else None
+
+        def rechazar(fila, motivo):
+            if escritor:
+                escritor.writerow([motivo, json.dumps(fila, ensure_ascii=False, default=str)])
+
+        def informar(resultado):
+            self.stdout.write(
+                f"  {resultado.procesadas} filas | {resultado.insertadas} insertadas | "
+                f"{resultado.rechazadas} rechazadas | {resultado.filas_por_segundo:.0f} filas/s"
+            )
+
+        try:
+            resultado = importar(
+                options['modelo'],
+                leer_filas(options['archivo'], options['formato']),
+                lote=options['lote'],
+                rechazar=rechazar,
+                informar=informar if options['verbosity'] >= 1 else None,
+            )
+        except FileNotFoundError:
+            raise CommandError(f"No existe el archivo {options['archivo']}.")
+        finally:
+            if salida_rechazos:
+                salida_rechazos.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación terminada: {resultado.insertadas} de {resultado.procesadas} filas en "
+            f"{resultado.segundos:.1f} s ({resultado.filas_por_segundo:.0f} filas/s)."
+        ))
+        if resultado.rechazadas:
+            detalle = ", ".join(f"{motivo}: {n}" for motivo, n in sorted(resultado.motivos.items()))
+            self.stdout.write(self.style.WARNING(f"Rechazadas {resultado.rechazadas} ({detalle})."))
+        if resultado.padres_desconocidos:
+            self.stdout.write(self.style.WARNING(
+                f"{resultado.padres_desconocidos} zonas quedaron sin padre (referencia desconocida)."
+            ))
@@ -0,0 +1,37 @@
+import time
+
+from django.db import close_old_connections # type: ignore
+
+from monitoring.hospitales import ComandoPorHospital
+from monitoring.series import ciclo, consolidar, purgar, intervalo_segundos
+
+
+class Command(ComandoPorHospital):
+    help = (
+        "Toma muestras de ocupación por zona y pacientes por enfermedad cada "
+        "SERIES_INTERVALO_SEGUNDOS y las consolida en niveles de hora y día."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help="Un solo ciclo (para cron).")
+        parser.add_argument('--consolidar', action='store_true',
+                            help="Solo consolida y purga lo existente, sin tomar muestra.")
+
+    def handle(self, *args, **options):
+        if options['consolidar']:
+            escritas, borradas = consolidar(), purgar()
+            self.stdout.write(self.style.SUCCESS(f"Consolidado: {escritas}. Purgado: {borradas}."))
+            return
+
+        intervalo = intervalo_segundos()
+        while True:
+            inicio = time.monotonic()
+            series = ciclo()
+            if options['verbosity'] >= 2:
+                self.stdout.write(f"  {series} series muestreadas en {time.monotonic() - inicio:.2f} s")
+            if options['una_vez']:
+                self.stdout.write(self.style.SUCCESS(f"Muestra tomada: {series} series."))
+                return
+            close_old_connections()
+            # Alineado al intervalo: el ciclo no desplaza las muestras siguientes
+            time.sleep(max(intervalo - (time.monotonic() - inicio), 0))
@@ -0,0 +1,12 @@
+from monitoring.hospitales import ComandoPorHospital
+from monitoring.jerarquia import reconstruir_jerarquia
+from monitoring.versiones import incrementar_version
+
+
+class Command(ComandoPorHospital):
+    help = "Recalcula ruta, profundidad y camas acumuladas de todas las zonas."
+
+    def handle(self, *args, **options):
+        total = reconstruir_jerarquia()
+        incrementar_version('zona')
+        self.stdout.write(self.style.SUCCESS(f"Jerarquía reconstruida: {total} zonas."))
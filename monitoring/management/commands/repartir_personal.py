@@ -0,0 +1,35 @@
+import time
+
+from monitoring.hospitales import ComandoPorHospital
+from monitoring.reparto import aplicar_reparto, calcular_reparto
+
+
+class Command(ComandoPorHospital):
+    help = (
+        "Calcula el reparto de personal por unidad según la carga de pacientes y "
+        "los ratios de REPARTO_PACIENTES_POR_EMPLEADO; con --aplicar mueve al personal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aplicar', action='store_true', help="Aplica los traslados propuestos.")
+        parser.add_argument('--profundidad', type=int, help="Profundidad de las unidades (REPARTO_PROFUNDIDAD).")
+        parser.add_argument('--mostrar', type=int, default=10, help="Unidades más desequilibradas a listar.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        plan = calcular_reparto(options['profundidad'])
+        segundos = time.perf_counter() - inicio
+
+        for cargo, (actuales, objetivo) in plan.cargos.items():
+            self.stdout.write(f"  {cargo}: {sum(actuales)} en unidades, objetivo {sum(objetivo)}")
+        for fila in plan.resumen(options['mostrar']):
+            personal = ', '.join(
+                f"{cargo} {valores['actuales']}→{valores['objetivo']}" for cargo, valores in fila['personal'].items()
+            )
+            self.stdout.write(f"  {fila['nombre']} ({fila['pacientes']} pacientes, carga {fila['carga']}): {personal}")
+        self.stdout.write(
+            f"{len(plan.movimientos)} traslados propuestos en {len(plan.unidades)} unidades ({segundos:.2f} s)."
+        )
+
+        if options['aplicar']:
+            self.stdout.write(self.style.SUCCESS(f"Trasladados: {aplicar_reparto(plan)}."))
@@ -0,0 +1,30 @@
+from django.core.management.base import CommandError # type: ignore
+
+from monitoring.hospitales import ComandoPorHospital
+from monitoring.respaldo import RespaldoInvalido, respaldar
+
+
+class Command(ComandoPorHospital):
+    help = (
+        "Vuelca zonas, pacientes, contactos, empleados e historial en un directorio de partes "
+        "JSON Lines comprimidas, independiente del motor (se restaura con manage.py restaurar)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('destino', help="Directorio del respaldo (se crea si no existe).")
+        parser.add_argument('--hilos', type=int, help="Tablas volcadas a la vez (por defecto, todas).")
+
+    def handle(self, *args, **options):
+        if options['hilos'] is not None and options['hilos'] < 1:
+            raise CommandError("--hilos debe ser mayor que 0.")
+        try:
+            manifiesto = respaldar(options['destino'], hilos=options['hilos'])
+        except RespaldoInvalido as error:
+            raise CommandError(str(error))
+
+        for etiqueta, tabla in manifiesto['tablas'].items():
+            self.stdout.write(f"  {etiqueta:<28}{tabla['filas']:>10} filas{len(tabla['partes']):>5} partes")
+        total = sum(tabla['filas'] for tabla in manifiesto['tablas'].values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Respaldo en {options['destino']}: {total} filas en {manifiesto['segundos']:.1f} s."
+        ))
@@ -0,0 +1,46 @@
+from django.core.management.base import CommandError # type: ignore
+from django.db import IntegrityError # type: ignore
+
+from monitoring.hospitales import ComandoPorHospital
+from monitoring.respaldo import RespaldoInvalido, restaurar, restauraciones_anteriores
+
+
+class Command(ComandoPorHospital):
+    help = (
+        "Restaura un respaldo de manage.py respaldar: una tabla por hilo, con índices y claves "
+        "foráneas comprobados al final. Informa el tiempo y lo compara con restauraciones anteriores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('origen', help="Directorio del respaldo.")
+        parser.add_argument('--hilos', type=int, help="Tablas cargadas a la vez (por defecto, todas las posibles).")
+        parser.add_argument('--reemplazar', action='store_true',
+                            help="Borra los datos actuales de esas tablas antes de cargar.")
+
+    def handle(self, *args, **options):
+        if options['hilos'] is not None and options['hilos'] < 1:
+            raise CommandError("--hilos debe ser mayor que 0.")
+        anteriores = restauraciones_anteriores(options['origen'])
+
+        def informar(etiqueta, filas, segundos):
+            self.stdout.write(
+                f"  {etiqueta:<28}{filas:>10} filas{segundos:>8.1f} s{filas / segundos if segundos else 0:>10.0f} filas/s"
+            )
+
+        try:
+            resumen = restaurar(
+                options['origen'], hilos=options['hilos'], reemplazar=options['reemplazar'],
+                informar=informar if options['verbosity'] >= 1 else None,
+            )
+        except (RespaldoInvalido, IntegrityError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Restaurado: {resumen['filas']} filas en {resumen['segundos']:.1f} s "
+            f"({resumen['filas'] / resumen['segundos'] if resumen['segundos'] else 0:.0f} filas/s)."
+        ))
+        if anteriores:
+            previo = anteriores[-1]
+            self.stdout.write(
+                f"Restauración anterior ({previo['fecha']}, {previo['motor']}): {previo['segundos']:.1f} s."
+            )
@@ -0,0 +1,49 @@
+import json
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+from django.conf import settings # type: ignore
+from django.core.management.base import BaseCommand, CommandError # type: ignore
+from django.db import connections # type: ignore
+
+from Helpnex.basedatos import alias_replicas
+from monitoring.replicas import SUFIJO_SINCRONIZACION
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia la base SQLite primaria en cada réplica de HELPNEX_SQLITE_REPLICAS "
+        "(desarrollo: prueba local de las lecturas en réplica). Con PostgreSQL la "
+        "replicación es la del servidor y este comando no hace nada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cada', type=float, help="Repite la copia cada N segundos.")
+
+    def handle(self, *args, **options):
+        primaria = connections['default']
+        if primaria.vendor != 'sqlite':
+            raise CommandError("Solo para SQLite: en PostgreSQL las réplicas se alimentan por streaming.")
+        replicas = alias_replicas(settings.DATABASES)
+        if not replicas:
+            raise CommandError("No hay réplicas configuradas (HELPNEX_SQLITE_REPLICAS).")
+
+        while True:
+            for alias in replicas:
+                ruta = connections[alias].settings_dict['NAME']
+                segundos = self.copiar(primaria.settings_dict['NAME'], ruta)
+                self.stdout.write(f"  {alias} ({ruta}) copiada en {segundos:.2f} s")
+            if not options['cada']:
+                return
+            time.sleep(options['cada'])
+
+    def copiar(self, origen, destino):
+        # Lo escrito después de este instante no entra en la copia: es la marca de retraso
+        inicio = time.time()
+        with closing(sqlite3.connect(origen)) as fuente, closing(sqlite3.connect(destino)) as copia:
+            # La API de backup copia página a página respetando los bloqueos de ambas
+            fuente.backup(copia)
+        Path(f'{destino}{SUFIJO_SINCRONIZACION}').write_text(json.dumps({'inicio': inicio}))
+        return time.time() - inicio
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError # type: ignore
+from django.db import IntegrityError # type: ignore
+
+from monitoring.hospitales import HospitalDesconocido
+from monitoring.models import Zona
+from monitoring.traspaso import traspasar_edificio, LOTE_DEFECTO
+
+
+class Command(BaseCommand):
+    help = (
+        "Lleva un edificio (zona raíz) con sus zonas, pacientes, contactos, personal, "
+        "historial y avisos a la base de otro hospital (ver HELPNEX_*_HOSPITALES)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('identificador', help="Identificador de la zona raíz del edificio.")
+        parser.add_argument('--hospital', default='', help="Hospital de destino (por defecto, la base primaria).")
+        parser.add_argument('--desde', default='', help="Hospital de origen (por defecto, la base primaria).")
+        parser.add_argument('--lote', type=int, default=LOTE_DEFECTO, help="Filas por bulk_create.")
+
+    def handle(self, *args, **options):
+        try:
+            resultado = traspasar_edificio(
+                options['identificador'], options['hospital'], desde=options['desde'], lote=options['lote']
+            )
+        except HospitalDesconocido as error:
+            raise CommandError(str(error))
+        except Zona.DoesNotExist:
+            raise CommandError(f"No hay ningún edificio (zona raíz) '{options['identificador']}' en el origen.")
+        except (ValueError, IntegrityError) as error:
+            raise CommandError(f"No se traspasó nada: {error}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Traspasado en {resultado.segundos:.2f} s: {resultado.zonas} zonas, {resultado.clientes} pacientes, "
+            f"{resultado.contactos} contactos, {resultado.empleados} empleados, "
+            f"{resultado.movimientos} movimientos y {resultado.notificaciones} avisos."
+        ))
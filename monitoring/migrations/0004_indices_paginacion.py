@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0003_cliente_tipo_enfermedad_empleado_zona_asignada'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['nombre', 'id'], name='cliente_nombre_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['apellido1', 'id'], name='cliente_apellido1_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['tipo_enfermedad', 'id'], name='cliente_enfermedad_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='empleado',
+            index=models.Index(fields=['nombre', 'id'], name='empleado_nombre_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='empleado',
+            index=models.Index(fields=['apellido1', 'id'], name='empleado_apellido1_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='empleado',
+            index=models.Index(fields=['cargo', 'id'], name='empleado_cargo_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zona',
+            index=models.Index(fields=['tipo', 'id'], name='zona_tipo_id_idx'),
+        ),
+    ]
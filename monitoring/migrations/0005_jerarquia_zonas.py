@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:07
+
+from django.db import migrations, models
+
+
+def construir_rutas(apps, schema_editor):
+    # Misma lógica que jerarquia.reconstruir_jerarquia(), con el modelo histórico
+    Zona = apps.get_model('monitoring', 'Zona')
+    filas = list(Zona.objects.values_list('id', 'zona_padre_id', 'total_camas', 'camas_ocupadas'))
+    padres = {zid: padre for zid, padre, _, _ in filas}
+    hijos = {}
+    for zid, padre, _, _ in filas:
+        hijos.setdefault(padre if padre in padres else None, []).append(zid)
+
+    rutas, profundidades = {}, {}
+    pendientes = [(zid, '/', 0) for zid in hijos.get(None, [])]
+    while pendientes:
+        zid, ruta_padre, profundidad = pendientes.pop()
+        rutas[zid] = f'{ruta_padre}{zid}/'
+        profundidades[zid] = profundidad
+        pendientes.extend((hijo, rutas[zid], profundidad + 1) for hijo in hijos.get(zid, []))
+
+    totales = {zid: [0, 0] for zid in padres}
+    for zid, _, total, ocupadas in filas:
+        for ancestro in rutas.get(zid, '').strip('/').split('/'):
+            if ancestro:
+                totales[int(ancestro)][0] += total
+                totales[int(ancestro)][1] += ocupadas
+
+    Zona.objects.bulk_update(
+        [Zona(id=zid, ruta=rutas.get(zid, ''), profundidad=profundidades.get(zid, 0),
+              total_camas_subarbol=totales[zid][0], camas_ocupadas_subarbol=totales[zid][1])
+         for zid in padres],
+        ['ruta', 'profundidad', 'total_camas_subarbol', 'camas_ocupadas_subarbol'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0004_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zona',
+            name='camas_ocupadas_subarbol',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='zona',
+            name='profundidad',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='zona',
+            name='ruta',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='zona',
+            name='total_camas_subarbol',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(construir_rutas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:50
+
+from django.db import migrations, models
+
+
+def crear_secuencia(apps, schema_editor):
+    # La fila existe desde el principio: reservar un bloque es un solo UPDATE
+    apps.get_model('monitoring', 'Secuencia').objects.get_or_create(nombre='identificador')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0005_jerarquia_zonas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Secuencia',
+            fields=[
+                ('nombre', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('valor', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(crear_secuencia, migrations.RunPython.noop),
+    ]
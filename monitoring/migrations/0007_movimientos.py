@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0006_secuencia_identificadores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='en_zona_desde',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='Movimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('desde', models.DateTimeField(null=True)),
+                ('momento', models.DateTimeField()),
+                ('nivel', models.SmallIntegerField(null=True)),
+                ('cliente', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='movimientos', to='monitoring.cliente')),
+                ('zona_anterior', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='monitoring.zona')),
+                ('zona_nueva', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='monitoring.zona')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['nivel', 'desde', 'zona_anterior'], name='movimiento_nivel_desde_idx'), models.Index(fields=['cliente', 'momento'], name='movimiento_cliente_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0007_movimientos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MuestraSerie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('serie', models.CharField(max_length=64)),
+                ('nivel', models.SmallIntegerField(choices=[(1, 'Minuto'), (2, 'Hora'), (3, 'Día')])),
+                ('instante', models.DateTimeField()),
+                ('muestras', models.PositiveIntegerField(default=1)),
+                ('suma', models.FloatField()),
+                ('minimo', models.FloatField()),
+                ('maximo', models.FloatField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['nivel', 'instante'], name='muestra_nivel_instante_idx')],
+                'constraints': [models.UniqueConstraint(fields=('serie', 'nivel', 'instante'), name='muestra_serie_unica')],
+            },
+        ),
+    ]
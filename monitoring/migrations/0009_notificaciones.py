@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0008_series_ocupacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zona',
+            name='critica',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='Notificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('evento', models.CharField(choices=[('traslado', 'Traslado'), ('alta', 'Alta'), ('zona_critica', 'Ingreso en zona crítica')], max_length=20)),
+                ('creada', models.DateTimeField()),
+                ('estado', models.SmallIntegerField(choices=[(1, 'Pendiente'), (2, 'En curso'), (3, 'Enviada'), (4, 'Fallida')], default=1)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('proximo_intento', models.DateTimeField()),
+                ('entregados', models.JSONField(default=list)),
+                ('error', models.TextField(blank=True, default='')),
+                ('cliente', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='monitoring.cliente')),
+                ('zona_anterior', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='monitoring.zona')),
+                ('zona_nueva', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='monitoring.zona')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='notificacion_cola_idx')],
+            },
+        ),
+    ]
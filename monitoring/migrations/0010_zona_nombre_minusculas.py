@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:51
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0009_notificaciones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='zona',
+            index=models.Index(django.db.models.functions.text.Lower('nombre'), models.F('id'), name='zona_nombre_minusculas_idx'),
+        ),
+    ]
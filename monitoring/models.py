@@ -1,4 +1,21 @@
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models
+from django.db.models.functions import Lower
+
+from .hospitales import alias_de
+
+
+# ────────────────────────────────
+# 🔹 GESTOR POR HOSPITAL
+# ────────────────────────────────
+class PorHospitalManager(models.Manager):
+    """
+    Las consultas van a la base del hospital activo (lo decide el enrutador,
+    ver hospitales.py); en_hospital() consulta otro sin cambiar el activo.
+    """
+
+    def en_hospital(self, clave):
+        return self.get_queryset().using(alias_de(clave) or DEFAULT_DB_ALIAS)
+
 
 # ────────────────────────────────
 # 🔹 MODELO: ZONA
@@ -19,14 +36,46 @@ class Zona(models.Model):
     tipo = models.IntegerField(choices=TIPOS_ZONA, default=7)
     zona_padre = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='subzonas')
     bloqueada = models.BooleanField(default=False)
+    # Ingresar o trasladar a un paciente aquí avisa a sus contactos (ver notificaciones.py)
+    critica = models.BooleanField(default=False)
 
     # Campos extra opcionales para análisis
     total_camas = models.PositiveIntegerField(default=0)
     camas_ocupadas = models.PositiveIntegerField(default=0)
 
+    # Jerarquía materializada (la mantiene jerarquia.py al guardar/eliminar)
+    ruta = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False)
+    profundidad = models.PositiveSmallIntegerField(default=0, editable=False)
+    total_camas_subarbol = models.PositiveIntegerField(default=0, editable=False)
+    camas_ocupadas_subarbol = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PorHospitalManager()
+
+    class Meta:
+        # Índices (campo, id) para la paginación por clave del panel admin
+        indexes = [
+            models.Index(fields=['tipo', 'id'], name='zona_tipo_id_idx'),
+            # Prefijos del autocompletado (rangos sobre lower(nombre), ver autocompletado.py)
+            models.Index(Lower('nombre'), 'id', name='zona_nombre_minusculas_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nombre} ({self.get_tipo_display()})"
 
+    def descendientes(self, incluir_propia=False):
+        """Todo el subárbol en una consulta sobre el índice de ruta."""
+        subarbol = Zona.objects.filter(ruta__startswith=self.ruta)
+        return subarbol if incluir_propia else subarbol.exclude(pk=self.pk)
+
+    def ancestros(self):
+        """Desde la raíz hasta el padre directo."""
+        ids = [int(parte) for parte in self.ruta.strip('/').split('/')[:-1] if parte]
+        return Zona.objects.filter(id__in=ids).order_by('profundidad')
+
+    @property
+    def camas_libres_subarbol(self):
+        return max(self.total_camas_subarbol - self.camas_ocupadas_subarbol, 0)
+
 
 # ────────────────────────────────
 # 🔹 MODELO: CLIENTE
@@ -57,6 +106,8 @@ class Cliente(models.Model):
     fecha_nacimiento = models.DateField(blank=True, null=True)
     alta = models.BooleanField(default=True)
     zona_asignada = models.ForeignKey('Zona', null=True, blank=True, on_delete=models.SET_NULL, related_name='clientes')
+    # Desde cuándo está en zona_asignada (None: sin zona o asignado antes del registro de movimientos)
+    en_zona_desde = models.DateTimeField(null=True, blank=True, editable=False)
 
     # ➕ Nuevo campo: tipo de enfermedad
     tipo_enfermedad = models.CharField(
@@ -65,6 +116,15 @@ class Cliente(models.Model):
         default='ninguna'
     )
 
+    objects = PorHospitalManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['nombre', 'id'], name='cliente_nombre_id_idx'),
+            models.Index(fields=['apellido1', 'id'], name='cliente_apellido1_id_idx'),
+            models.Index(fields=['tipo_enfermedad', 'id'], name='cliente_enfermedad_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nombre} {self.apellido1}"
 
@@ -93,6 +153,8 @@ class Contacto(models.Model):
     telefono = models.CharField(max_length=50, blank=True, null=True)
     correo = models.EmailField(blank=True, null=True)
 
+    objects = PorHospitalManager()
+
     def __str__(self):
         return f"{self.nombre} ({self.get_relacion_display()})"
 
@@ -116,6 +178,179 @@ class Empleado(models.Model):
         related_name='empleados_asignados'
     )
 
+    objects = PorHospitalManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['nombre', 'id'], name='empleado_nombre_id_idx'),
+            models.Index(fields=['apellido1', 'id'], name='empleado_apellido1_id_idx'),
+            models.Index(fields=['cargo', 'id'], name='empleado_cargo_id_idx'),
+        ]
+
     def __str__(self):
         zona = f" - {self.zona_asignada.nombre}" if self.zona_asignada else ""
         return f"{self.nombre} {self.apellido1} - {self.cargo}{zona}"
+
+
+# ────────────────────────────────
+# 🔹 MODELO: SECUENCIA (identificadores)
+# ────────────────────────────────
+class Secuencia(models.Model):
+    """Último número entregado por cada secuencia (ver identificadores.py)."""
+    nombre = models.CharField(max_length=50, primary_key=True)
+    valor = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.nombre}: {self.valor}"
+
+
+# ────────────────────────────────
+# 🔹 MODELO: MOVIMIENTO (historial de ocupación)
+# ────────────────────────────────
+class SoloInsercionQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise TypeError("El registro de movimientos solo admite inserciones.")
+
+    def delete(self):
+        raise TypeError("El registro de movimientos solo admite inserciones.")
+
+
+class Movimiento(models.Model):
+    """
+    Cambio de zona de un cliente. Cada fila cierra la estancia en
+    `zona_anterior` (de `desde` a `momento`) y abre la de `zona_nueva`.
+    Solo se insertan filas (ver movimientos.py); las claves foráneas no llevan
+    restricción para que el historial sobreviva a clientes y zonas eliminados.
+    """
+    # Nivel de las estancias cuyo inicio no se conoce (anteriores al registro)
+    NIVEL_DESCONOCIDO = -1
+
+    cliente = models.ForeignKey(
+        Cliente, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='movimientos'
+    )
+    zona_anterior = models.ForeignKey(
+        Zona, null=True, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+'
+    )
+    zona_nueva = models.ForeignKey(
+        Zona, null=True, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+'
+    )
+    desde = models.DateTimeField(null=True)
+    momento = models.DateTimeField()
+    # Duración de la estancia cerrada: dura como mucho 2**nivel minutos.
+    # None si no cierra ninguna (el cliente no tenía zona)
+    nivel = models.SmallIntegerField(null=True)
+
+    objects = PorHospitalManager.from_queryset(SoloInsercionQuerySet)()
+
+    class Meta:
+        indexes = [
+            # Estancias que cubren un instante: un rango de `desde` por nivel
+            models.Index(fields=['nivel', 'desde', 'zona_anterior'], name='movimiento_nivel_desde_idx'),
+            models.Index(fields=['cliente', 'momento'], name='movimiento_cliente_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError("El registro de movimientos solo admite inserciones.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("El registro de movimientos solo admite inserciones.")
+
+    def __str__(self):
+        return f"{self.cliente_id}: {self.zona_anterior_id} -> {self.zona_nueva_id} ({self.momento})"
+
+
+# ────────────────────────────────
+# 🔹 MODELO: MUESTRA DE SERIE (tendencias)
+# ────────────────────────────────
+class MuestraSerie(models.Model):
+    """
+    Valor agregado de una serie (ocupación de una zona, pacientes por
+    enfermedad...) en un intervalo de la resolución `nivel`. Guarda suma y
+    número de muestras para que los niveles superiores se calculen sumando.
+    """
+    MINUTO, HORA, DIA = 1, 2, 3
+    NIVELES = [
+        (MINUTO, 'Minuto'),
+        (HORA, 'Hora'),
+        (DIA, 'Día'),
+    ]
+
+    serie = models.CharField(max_length=64)
+    nivel = models.SmallIntegerField(choices=NIVELES)
+    instante = models.DateTimeField()  # inicio del intervalo
+    muestras = models.PositiveIntegerField(default=1)
+    suma = models.FloatField()
+    minimo = models.FloatField()
+    maximo = models.FloatField()
+
+    objects = PorHospitalManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['serie', 'nivel', 'instante'], name='muestra_serie_unica'),
+        ]
+        indexes = [
+            # Purga por antigüedad de cada nivel
+            models.Index(fields=['nivel', 'instante'], name='muestra_nivel_instante_idx'),
+        ]
+
+    @property
+    def media(self):
+        return self.suma / self.muestras if self.muestras else 0
+
+    def __str__(self):
+        return f"{self.serie} [{self.get_nivel_display()}] {self.instante}: {self.media:.1f}"
+
+
+# ────────────────────────────────
+# 🔹 MODELO: NOTIFICACIÓN (bandeja de salida)
+# ────────────────────────────────
+class Notificacion(models.Model):
+    """
+    Aviso pendiente para los contactos de un cliente. Se inserta en la misma
+    transacción que el cambio que lo provoca y lo envía despachar_notificaciones.
+    """
+    EVENTOS = [
+        ('traslado', 'Traslado'),
+        ('alta', 'Alta'),
+        ('zona_critica', 'Ingreso en zona crítica'),
+    ]
+    PENDIENTE, EN_CURSO, ENVIADA, FALLIDA = 1, 2, 3, 4
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_CURSO, 'En curso'),
+        (ENVIADA, 'Enviada'),
+        (FALLIDA, 'Fallida'),
+    ]
+
+    evento = models.CharField(max_length=20, choices=EVENTOS)
+    # Sin restricción: el aviso sobrevive aunque el cliente o las zonas se eliminen
+    cliente = models.ForeignKey(
+        Cliente, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+'
+    )
+    zona_anterior = models.ForeignKey(
+        Zona, null=True, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+'
+    )
+    zona_nueva = models.ForeignKey(
+        Zona, null=True, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+'
+    )
+    creada = models.DateTimeField()
+    estado = models.SmallIntegerField(choices=ESTADOS, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField()
+    # Destinos ("canal:dirección") que ya recibieron el aviso: un reintento no los repite
+    entregados = models.JSONField(default=list)
+    error = models.TextField(blank=True, default='')
+
+    objects = PorHospitalManager()
+
+    class Meta:
+        indexes = [
+            # Lo que el despachador toma en cada lote
+            models.Index(fields=['estado', 'proximo_intento'], name='notificacion_cola_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_evento_display()} de {self.cliente_id} ({self.get_estado_display()})"
@@ -0,0 +1,141 @@
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.db.models import Q # type: ignore
+from django.utils import timezone # type: ignore
+
+from .models import Zona, Cliente, Movimiento
+
+
+# ------------------------------
+# HISTORIAL DE MOVIMIENTOS
+# ------------------------------
+# Cada cambio de zona inserta una fila en Movimiento dentro de la misma
+# transacción que lo produce (camas.mover_cliente, importaciones y bajas).
+# Una fila cierra la estancia en zona_anterior, que va de `desde` a `momento`.
+# Las estancias abiertas no están en el historial: son Cliente.zona_asignada
+# con Cliente.en_zona_desde.
+#
+# Para encontrar las estancias que cubren un instante T sin recorrer todo el
+# historial, cada fila guarda el nivel de su duración (como mucho 2**nivel
+# minutos). Una estancia de nivel L que sigue abierta en T empezó después de
+# T - 2**L: basta un rango de `desde` por nivel sobre el índice (nivel, desde),
+# y cada rango solo toca estancias de su duración cercanas a T.
+
+# 2**25 minutos son más de 60 años: ninguna estancia pasa de ahí
+MAX_NIVEL = 25
+
+
+@dataclass
+class Estancia:
+    cliente_id: int
+    zona_id: int
+    desde: datetime | None  # None: empezó antes de que existiera el registro
+    hasta: datetime | None  # None: sigue abierta
+
+
+def nivel_de(desde, momento):
+    """Nivel de una estancia: el menor L con duración <= 2**L minutos."""
+    if desde is None:
+        return Movimiento.NIVEL_DESCONOCIDO
+    minutos = max(math.ceil((momento - desde).total_seconds() / 60), 1)
+    return (minutos - 1).bit_length()
+
+
+def nuevo_movimiento(cliente_id, anterior, nueva, desde, momento):
+    """Fila sin guardar; `desde` es cuándo entró en `anterior`."""
+    return Movimiento(
+        cliente_id=cliente_id,
+        zona_anterior_id=anterior,
+        zona_nueva_id=nueva,
+        desde=desde if anterior is not None else None,
+        momento=momento,
+        nivel=nivel_de(desde, momento) if anterior is not None else None,
+    )
+
+
+def registrar_movimiento(cliente_id, anterior, nueva, desde, momento=None):
+    """Anota un cambio de zona. Debe llamarse dentro de la transacción del cambio."""
+    movimiento = nuevo_movimiento(cliente_id, anterior, nueva, desde, momento or timezone.now())
+    movimiento.save()
+    return movimiento
+
+
+def registrar_ingresos(clientes, momento, lote=1000):
+    """Ingresos de clientes recién creados en bloque (importaciones)."""
+    Movimiento.objects.bulk_create(
+        [
+            nuevo_movimiento(cliente.id, None, cliente.zona_asignada_id, None, momento)
+            for cliente in clientes
+            if cliente.zona_asignada_id is not None
+        ],
+        batch_size=lote,
+    )
+
+
+def registrar_traslados(filas, nueva, momento, lote=1000):
+    """Cambios a `nueva` de varios clientes, `filas` de (cliente_id, zona_anterior, desde)."""
+    Movimiento.objects.bulk_create(
+        [nuevo_movimiento(cliente_id, anterior, nueva, desde, momento) for cliente_id, anterior, desde in filas],
+        batch_size=lote,
+    )
+
+
+def registrar_salidas_de_zona(zona_id, momento=None):
+    """
+    Cierra las estancias de los clientes de una zona que se va a eliminar
+    (la FK pasa a NULL sin señales). Se llama desde pre_delete.
+    """
+    momento = momento or timezone.now()
+    ocupantes = list(Cliente.objects.filter(zona_asignada_id=zona_id).values_list('id', 'en_zona_desde'))
+    if not ocupantes:
+        return
+    Movimiento.objects.bulk_create(
+        [nuevo_movimiento(cliente_id, zona_id, None, desde, momento) for cliente_id, desde in ocupantes]
+    )
+    Cliente.objects.filter(zona_asignada_id=zona_id).update(en_zona_desde=None)
+
+
+# ------------------------------
+# CONSULTAS
+# ------------------------------
+def _subarbol(ruta):
+    return Zona.objects.filter(ruta__startswith=ruta).values('id')
+
+
+def _cerradas(inicio, fin, ruta):
+    """Movimientos cuya estancia en zona_anterior se solapa con [inicio, fin]."""
+    rangos = Q(nivel=Movimiento.NIVEL_DESCONOCIDO)
+    for nivel in range(MAX_NIVEL + 1):
+        rangos |= Q(nivel=nivel, desde__gt=inicio - timedelta(minutes=2 ** nivel), desde__lte=fin)
+    movimientos = Movimiento.objects.filter(rangos, momento__gt=inicio)
+    if ruta:
+        movimientos = movimientos.filter(zona_anterior__in=_subarbol(ruta))
+    return movimientos.values_list('cliente_id', 'zona_anterior_id', 'desde', 'momento')
+
+
+def _abiertas(fin, ruta):
+    """Clientes que siguen en su zona y ya estaban en ella en `fin`."""
+    clientes = Cliente.objects.filter(Q(en_zona_desde__lte=fin) | Q(en_zona_desde__isnull=True))
+    if ruta:
+        clientes = clientes.filter(zona_asignada__in=_subarbol(ruta))
+    else:
+        clientes = clientes.filter(zona_asignada__isnull=False)
+    return clientes.values_list('id', 'zona_asignada_id', 'en_zona_desde')
+
+
+def estancias(inicio, fin, ruta=''):
+    """
+    Estancias en el subárbol de `ruta` (todas si está vacía) que se solapan
+    con [inicio, fin], ordenadas por cliente y entrada. Dos consultas.
+    """
+    resultado = [Estancia(*fila) for fila in _cerradas(inicio, fin, ruta)]
+    resultado += [Estancia(*fila, None) for fila in _abiertas(fin, ruta)]
+    resultado.sort(key=lambda e: (e.cliente_id, e.desde is not None, e.desde or inicio))
+    return resultado
+
+
+def ocupacion_en(momento, ruta=''):
+    """Quién estaba en el subárbol de `ruta` en `momento`."""
+    return estancias(momento, momento, ruta)
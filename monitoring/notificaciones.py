@@ -0,0 +1,303 @@
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+
+from django.conf import settings # type: ignore
+from django.utils import timezone # type: ignore
+from django.utils.module_loading import import_string # type: ignore
+
+from .hospitales import atomica
+from .models import Zona, Cliente, Contacto, Notificacion
+
+
+# ------------------------------
+# NOTIFICACIONES A CONTACTOS
+# ------------------------------
+# Los cambios que interesan a la familia (traslado, alta, ingreso en zona
+# crítica) insertan una fila en Notificacion dentro de su propia transacción:
+# si el cambio se revierte, el aviso también. despachar_lote() toma las
+# pendientes por lotes, carga contactos, clientes y zonas de todo el lote en
+# tres consultas y envía los mensajes con un pool de hilos por canal, cada uno
+# con su límite de envíos por segundo. Lo que falla se reintenta con espera
+# creciente sin repetir los destinos que ya lo recibieron.
+
+TEXTOS = {
+    'traslado': "{cliente} ha sido trasladado/a de {anterior} a {nueva}.",
+    'alta': "{cliente} ha sido dado/a de alta de {anterior}.",
+    'zona_critica': "{cliente} ha ingresado en {nueva}, zona de cuidados críticos.",
+}
+
+
+def limites():
+    """Envíos por segundo de cada canal; sin entrada, sin límite."""
+    return getattr(settings, 'NOTIFICACIONES_LIMITES', {})
+
+
+def max_intentos():
+    return getattr(settings, 'NOTIFICACIONES_INTENTOS', 5)
+
+
+def espera_reintento(intentos):
+    base = getattr(settings, 'NOTIFICACIONES_ESPERA_SEGUNDOS', 30)
+    return timedelta(seconds=base * 2 ** (intentos - 1))
+
+
+def plazo_envio():
+    """Tras este tiempo en curso se da por perdido el proceso que la tomó y se vuelve a tomar."""
+    return timedelta(seconds=getattr(settings, 'NOTIFICACIONES_PLAZO_SEGUNDOS', 300))
+
+
+# ------------------------------
+# ENCOLADO
+# ------------------------------
+def evento_de(anterior, nueva, critica):
+    """Evento que provoca un cambio de zona, o None si no se avisa (ingresos normales)."""
+    if nueva is not None and critica:
+        return 'zona_critica'
+    if anterior is None:
+        return None
+    return 'traslado' if nueva is not None else 'alta'
+
+
+def _nueva(evento, cliente_id, anterior, nueva, momento):
+    return Notificacion(
+        evento=evento, cliente_id=cliente_id, zona_anterior_id=anterior, zona_nueva_id=nueva,
+        creada=momento, proximo_intento=momento,
+    )
+
+
+def encolar(cliente_id, anterior, nueva, critica, momento=None):
+    """Encola el aviso de un cambio de zona. Debe llamarse dentro de la transacción del cambio."""
+    evento = evento_de(anterior, nueva, critica)
+    if evento is None:
+        return None
+    notificacion = _nueva(evento, cliente_id, anterior, nueva, momento or timezone.now())
+    notificacion.save()
+    return notificacion
+
+
+def encolar_ingresos(clientes, momento, lote=1000):
+    """Avisos de clientes recién creados en zonas críticas (importaciones). Una consulta."""
+    zonas = {c.zona_asignada_id for c in clientes if c.zona_asignada_id is not None}
+    if not zonas:
+        return
+    criticas = set(Zona.objects.filter(pk__in=zonas, critica=True).values_list('id', flat=True))
+    Notificacion.objects.bulk_create(
+        [
+            _nueva('zona_critica', c.id, None, c.zona_asignada_id, momento)
+            for c in clientes
+            if c.zona_asignada_id in criticas
+        ],
+        batch_size=lote,
+    )
+
+
+def encolar_traslados(filas, nueva, critica, momento, lote=1000):
+    """Avisos de un cambio en bloque a `nueva`, `filas` de (cliente_id, zona_anterior, ...)."""
+    avisos = []
+    for cliente_id, anterior, *_ in filas:
+        evento = evento_de(anterior, nueva, critica)
+        if evento is not None:
+            avisos.append(_nueva(evento, cliente_id, anterior, nueva, momento))
+    Notificacion.objects.bulk_create(avisos, batch_size=lote)
+
+
+# ------------------------------
+# TRANSPORTES
+# ------------------------------
+@dataclass
+class Mensaje:
+    notificacion_id: int
+    canal: str
+    destino: str
+    asunto: str
+    texto: str
+
+    @property
+    def clave(self):
+        return f"{self.canal}:{self.destino}"
+
+
+class Transporte:
+    """Entrega un mensaje o lanza una excepción. Se llama desde varios hilos a la vez."""
+
+    def enviar(self, mensaje):
+        raise NotImplementedError
+
+
+class TransporteConsola(Transporte):
+    """Escribe cada mensaje en la salida estándar (desarrollo)."""
+
+    def __init__(self, salida=None):
+        self.salida = salida or sys.stdout
+        self._cerrojo = threading.Lock()
+
+    def enviar(self, mensaje):
+        with self._cerrojo:
+            self.salida.write(f"[{mensaje.canal} → {mensaje.destino}] {mensaje.asunto}: {mensaje.texto}\n")
+
+
+class TransporteArchivo(Transporte):
+    """Añade cada mensaje como una línea JSON a NOTIFICACIONES_ARCHIVO."""
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or settings.NOTIFICACIONES_ARCHIVO
+        self._cerrojo = threading.Lock()
+
+    def enviar(self, mensaje):
+        linea = json.dumps(asdict(mensaje), ensure_ascii=False) + '\n'
+        with self._cerrojo, open(self.ruta, 'a', encoding='utf-8') as archivo:
+            archivo.write(linea)
+
+
+def transporte_configurado():
+    ruta = getattr(settings, 'NOTIFICACIONES_TRANSPORTE', 'monitoring.notificaciones.TransporteConsola')
+    return import_string(ruta)()
+
+
+class LimiteTasa:
+    """
+    Cubeta de fichas compartida por los hilos de un canal. Cada envío reserva
+    una ficha; si no quedan, el hilo duerme lo que falta para la suya.
+    """
+
+    def __init__(self, por_segundo):
+        self.por_segundo = por_segundo
+        self._fichas = float(max(por_segundo, 1))
+        self._ultimo = time.monotonic()
+        self._cerrojo = threading.Lock()
+
+    def esperar(self):
+        with self._cerrojo:
+            ahora = time.monotonic()
+            capacidad = max(self.por_segundo, 1)
+            self._fichas = min(capacidad, self._fichas + (ahora - self._ultimo) * self.por_segundo) - 1
+            self._ultimo = ahora
+            espera = -self._fichas / self.por_segundo if self._fichas < 0 else 0
+        if espera:
+            time.sleep(espera)
+
+
+# ------------------------------
+# DESPACHO
+# ------------------------------
+def tomar_pendientes(lote, momento):
+    """
+    Marca como en curso hasta `lote` notificaciones vencidas y las devuelve.
+    Las filas que otro despachador tiene bloqueadas se saltan (SKIP LOCKED).
+    """
+    with atomica():
+        ids = list(
+            Notificacion.objects.select_for_update(skip_locked=True)
+            .filter(estado__in=[Notificacion.PENDIENTE, Notificacion.EN_CURSO], proximo_intento__lte=momento)
+            .order_by('proximo_intento')
+            .values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            return []
+        Notificacion.objects.filter(pk__in=ids).update(
+            estado=Notificacion.EN_CURSO, proximo_intento=momento + plazo_envio()
+        )
+    return list(Notificacion.objects.filter(pk__in=ids).order_by('id'))
+
+
+def construir_mensajes(notificaciones):
+    """Mensajes por enviar de un lote. Tres consultas, sea cual sea su tamaño."""
+    clientes = {n.cliente_id for n in notificaciones}
+    zonas = {z for n in notificaciones for z in (n.zona_anterior_id, n.zona_nueva_id) if z is not None}
+    nombres_cliente = {
+        id_: f"{nombre} {apellido1}"
+        for id_, nombre, apellido1 in Cliente.objects.filter(pk__in=clientes).values_list('id', 'nombre', 'apellido1')
+    }
+    nombres_zona = dict(Zona.objects.filter(pk__in=zonas).values_list('id', 'nombre'))
+    destinos = defaultdict(list)
+    for cliente_id, correo, telefono in Contacto.objects.filter(cliente_id__in=clientes).values_list(
+        'cliente_id', 'correo', 'telefono'
+    ):
+        if correo:
+            destinos[cliente_id].append(('correo', correo))
+        if telefono:
+            destinos[cliente_id].append(('sms', telefono))
+
+    mensajes = []
+    for n in notificaciones:
+        cliente = nombres_cliente.get(n.cliente_id, f"El paciente {n.cliente_id}")
+        texto = TEXTOS[n.evento].format(
+            cliente=cliente,
+            anterior=nombres_zona.get(n.zona_anterior_id, "su zona"),
+            nueva=nombres_zona.get(n.zona_nueva_id, "otra zona"),
+        )
+        asunto = f"Helpnex: {n.get_evento_display()} de {cliente}"
+        for canal, destino in destinos[n.cliente_id]:
+            mensaje = Mensaje(n.id, canal, destino, asunto, texto)
+            if mensaje.clave not in n.entregados:
+                mensajes.append(mensaje)
+    return mensajes
+
+
+def _enviar_por_canal(mensajes, transporte, hilos):
+    """Error de cada mensaje (None si se entregó), en su orden. Un pool y un límite por canal."""
+    canales = {mensaje.canal for mensaje in mensajes}
+
+    def enviar(mensaje, limite):
+        if limite:
+            limite.esperar()
+        try:
+            transporte.enviar(mensaje)
+        except Exception as error:
+            return f"{mensaje.clave}: {error}"
+        return None
+
+    pools = {canal: ThreadPoolExecutor(max_workers=hilos) for canal in canales}
+    tasas = {canal: LimiteTasa(limites()[canal]) for canal in canales if limites().get(canal)}
+    try:
+        futuros = [pools[m.canal].submit(enviar, m, tasas.get(m.canal)) for m in mensajes]
+        return [futuro.result() for futuro in futuros]
+    finally:
+        for pool in pools.values():
+            pool.shutdown()
+
+
+def despachar_lote(lote=200, hilos=4, transporte=None, momento=None):
+    """
+    Envía un lote de notificaciones pendientes. Devuelve (enviadas, reintentos, fallidas).
+    Las filas se actualizan al final con un solo bulk_update.
+    """
+    momento = momento or timezone.now()
+    notificaciones = tomar_pendientes(lote, momento)
+    if not notificaciones:
+        return 0, 0, 0
+    mensajes = construir_mensajes(notificaciones)
+    resultados = _enviar_por_canal(mensajes, transporte or transporte_configurado(), hilos)
+
+    por_id = {n.id: n for n in notificaciones}
+    errores = defaultdict(list)
+    for mensaje, error in zip(mensajes, resultados):
+        if error is None:
+            por_id[mensaje.notificacion_id].entregados.append(mensaje.clave)
+        else:
+            errores[mensaje.notificacion_id].append(error)
+
+    enviadas = reintentos = fallidas = 0
+    for n in notificaciones:
+        if n.id not in errores:
+            n.estado, n.error = Notificacion.ENVIADA, ''
+            enviadas += 1
+            continue
+        n.intentos += 1
+        n.error = '\n'.join(errores[n.id])
+        if n.intentos >= max_intentos():
+            n.estado = Notificacion.FALLIDA
+            fallidas += 1
+        else:
+            n.estado, n.proximo_intento = Notificacion.PENDIENTE, momento + espera_reintento(n.intentos)
+            reintentos += 1
+    Notificacion.objects.bulk_update(
+        notificaciones, ['estado', 'intentos', 'proximo_intento', 'entregados', 'error']
+    )
+    return enviadas, reintentos, fallidas
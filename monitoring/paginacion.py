@@ -0,0 +1,126 @@
+import base64
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError # type: ignore
+from django.db.models import Q # type: ignore
+from rest_framework.pagination import CursorPagination # type: ignore
+
+
+# ------------------------------
+# PAGINACIÓN POR CLAVE (KEYSET)
+# ------------------------------
+# En vez de OFFSET (que recorre todas las filas anteriores) se filtra a partir
+# de la última fila vista: WHERE (campo, id) > (valor, ultimo_id). Con un
+# índice sobre (campo, id) el costo de cada página es constante.
+
+POR_PAGINA_DEFECTO = 50
+POR_PAGINA_MAXIMO = 200
+
+
+@dataclass
+class PaginaKeyset:
+    filas: list = field(default_factory=list)
+    cursor_siguiente: str | None = None
+    cursor_anterior: str | None = None
+
+    @property
+    def hay_siguiente(self):
+        return self.cursor_siguiente is not None
+
+    @property
+    def hay_anterior(self):
+        return self.cursor_anterior is not None
+
+
+def codificar_cursor(valor, pk):
+    datos = json.dumps([valor, pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(datos).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, campo=None):
+    """
+    Devuelve (valor, pk) o None si el cursor no es válido. Con `campo` (el
+    del modelo por el que se ordena) el valor se convierte a su tipo: un
+    cursor manipulado no llega al filtro.
+    """
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valor, pk = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if campo is not None:
+            valor = campo.to_python(valor)
+            if valor is None:
+                return None
+        return valor, int(pk)
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def leer_por_pagina(valor):
+    try:
+        por_pagina = int(valor)
+    except (TypeError, ValueError):
+        return POR_PAGINA_DEFECTO
+    return max(1, min(por_pagina, POR_PAGINA_MAXIMO))
+
+
+def paginar_keyset(queryset, campo='id', descendente=False, despues=None, antes=None,
+                   por_pagina=POR_PAGINA_DEFECTO):
+    """
+    Devuelve una PaginaKeyset ordenada por (campo, id).
+
+    `despues` avanza a partir de la última fila de la página anterior y
+    `antes` retrocede a partir de la primera. `campo` no puede ser nulo.
+    """
+    campo_modelo = queryset.model._meta.get_field(campo)
+    siguiente = decodificar_cursor(despues, campo_modelo)
+    cursor = siguiente or decodificar_cursor(antes, campo_modelo)
+    hacia_atras = cursor is not None and siguiente is None
+
+    # Al retroceder se invierte el orden y luego se da vuelta la página
+    ascendente = descendente == hacia_atras
+    op = 'gt' if ascendente else 'lt'
+
+    if cursor is not None:
+        valor, pk = cursor
+        if campo == 'id':
+            queryset = queryset.filter(**{f'id__{op}': pk})
+        else:
+            queryset = queryset.filter(
+                Q(**{f'{campo}__{op}': valor}) | Q(**{campo: valor, f'id__{op}': pk})
+            )
+
+    prefijo = '' if ascendente else '-'
+    orden = [prefijo + 'id'] if campo == 'id' else [prefijo + campo, prefijo + 'id']
+    filas = list(queryset.order_by(*orden)[:por_pagina + 1])
+
+    hay_mas = len(filas) > por_pagina
+    filas = filas[:por_pagina]
+    if hacia_atras:
+        filas.reverse()
+
+    pagina = PaginaKeyset(filas=filas)
+    if not filas:
+        return pagina
+
+    if hacia_atras:
+        tiene_siguiente, tiene_anterior = True, hay_mas
+    else:
+        tiene_siguiente, tiene_anterior = hay_mas, cursor is not None
+
+    primera, ultima = filas[0], filas[-1]
+    if tiene_siguiente:
+        pagina.cursor_siguiente = codificar_cursor(getattr(ultima, campo), ultima.pk)
+    if tiene_anterior:
+        pagina.cursor_anterior = codificar_cursor(getattr(primera, campo), primera.pk)
+    return pagina
+
+
+class PaginacionCursor(CursorPagination):
+    """La misma idea para la API REST: cursor opaco sobre el id."""
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -0,0 +1,197 @@
+import math
+from array import array
+from dataclasses import dataclass, field
+
+from django.conf import settings # type: ignore
+from django.db.models import Count # type: ignore
+
+from .eventos import difusor
+from .hospitales import al_confirmar, atomica
+from .jerarquia import ids_en_ruta
+from .models import Zona, Cliente, Empleado
+from .versiones import incrementar_version
+
+
+# ------------------------------
+# REPARTO DE PERSONAL
+# ------------------------------
+# El personal se asigna a las zonas de REPARTO_PROFUNDIDAD (plantas por
+# defecto): cada una es una "unidad" que suma los pacientes de su subárbol,
+# ponderados por enfermedad. Para cada cargo con ratio objetivo se calcula
+# cuántos empleados necesita cada unidad (carga / pacientes por empleado,
+# hacia arriba); si no hay personal para todas, el disponible se reparte en
+# proporción a esa necesidad. Solo se mueve lo imprescindible: las unidades
+# que no llegan reciben primero al personal sin zona y luego el sobrante de
+# otras unidades, emparejadas por ruta para que los traslados queden cerca.
+#
+# Tres consultas (zonas, GROUP BY de pacientes y personal) y el cálculo en
+# arrays indexados por unidad: no hay consultas por zona ni por empleado.
+
+PESO_POR_DEFECTO = 1.0
+
+
+def profundidad_reparto():
+    return getattr(settings, 'REPARTO_PROFUNDIDAD', 1)
+
+
+def ratios():
+    """Pacientes (ponderados) por empleado de cada cargo; los cargos sin ratio no se reparten."""
+    return getattr(settings, 'REPARTO_PACIENTES_POR_EMPLEADO', {})
+
+
+def pesos_enfermedad():
+    return getattr(settings, 'REPARTO_PESOS_ENFERMEDAD', {})
+
+
+@dataclass
+class PlanReparto:
+    # Unidades ordenadas por ruta: (zona_id, nombre)
+    unidades: list
+    pacientes: array
+    carga: array
+    # cargo -> (empleados actuales, objetivo) por unidad
+    cargos: dict = field(default_factory=dict)
+    # (empleado_id, zona_anterior_id, zona_nueva_id)
+    movimientos: list = field(default_factory=list)
+
+    def desequilibrio(self, i):
+        """Empleados que le sobran o le faltan a la unidad `i`, sumando todos los cargos."""
+        return sum(abs(objetivo[i] - actuales[i]) for actuales, objetivo in self.cargos.values())
+
+    def resumen(self, limite=None):
+        """
+        Filas por unidad para mostrar (pacientes, carga y actuales/objetivo por
+        cargo), de la más desequilibrada a la que menos; `limite` las recorta.
+        """
+        orden = sorted(range(len(self.unidades)), key=lambda i: -self.desequilibrio(i))[:limite]
+        return [
+            {
+                'zona': self.unidades[i][0],
+                'nombre': self.unidades[i][1],
+                'pacientes': self.pacientes[i],
+                'carga': round(self.carga[i], 2),
+                'personal': {
+                    cargo: {'actuales': actuales[i], 'objetivo': objetivo[i]}
+                    for cargo, (actuales, objetivo) in self.cargos.items()
+                },
+            }
+            for i in orden
+        ]
+
+
+def repartir(total, pesos):
+    """Reparte `total` enteros en proporción a `pesos` (mayores restos)."""
+    suma = sum(pesos)
+    if not suma or not total:
+        return array('l', [0] * len(pesos))
+    cuotas = [total * peso / suma for peso in pesos]
+    resultado = array('l', (int(cuota) for cuota in cuotas))
+    sobrantes = total - sum(resultado)
+    for i in sorted(range(len(cuotas)), key=lambda i: resultado[i] - cuotas[i])[:sobrantes]:
+        resultado[i] += 1
+    return resultado
+
+
+def objetivos(carga, ratio, disponibles):
+    """Empleados por unidad para cubrir `carga` con `ratio`, sin pasar de `disponibles` en total."""
+    # El margen evita que 12.000000001 / 6 pida un empleado de más
+    necesidad = array('l', (math.ceil(c / ratio - 1e-9) for c in carga))
+    if sum(necesidad) <= disponibles:
+        return necesidad
+    return repartir(disponibles, necesidad)
+
+
+def _unidades(profundidad):
+    """(unidades [(id, nombre)] por ruta, {zona_id: índice de su unidad}). Una consulta."""
+    unidades, indice_unidad, pendientes = [], {}, []
+    zonas = Zona.objects.filter(profundidad__gte=profundidad).order_by('ruta').values_list(
+        'id', 'nombre', 'ruta', 'profundidad'
+    )
+    for zona_id, nombre, ruta, nivel in zonas:
+        if nivel == profundidad:
+            indice_unidad[zona_id] = len(unidades)
+            unidades.append((zona_id, nombre))
+        else:
+            pendientes.append((zona_id, ruta))
+    for zona_id, ruta in pendientes:
+        ids = ids_en_ruta(ruta)
+        if len(ids) > profundidad and ids[profundidad] in indice_unidad:
+            indice_unidad[zona_id] = indice_unidad[ids[profundidad]]
+    return unidades, indice_unidad
+
+
+def calcular_reparto(profundidad=None):
+    profundidad = profundidad_reparto() if profundidad is None else profundidad
+    unidades, indice_unidad = _unidades(profundidad)
+    plan = PlanReparto(unidades, array('l', [0] * len(unidades)), array('d', [0.0] * len(unidades)))
+
+    pesos = pesos_enfermedad()
+    filas = (
+        Cliente.objects.filter(zona_asignada__isnull=False)
+        .values_list('zona_asignada', 'tipo_enfermedad')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for zona_id, enfermedad, total in filas:
+        i = indice_unidad.get(zona_id)
+        if i is not None:
+            plan.pacientes[i] += total
+            plan.carga[i] += total * pesos.get(enfermedad, PESO_POR_DEFECTO)
+
+    # Personal por cargo: en cada unidad, o libre (sin zona). El asignado a
+    # zonas por encima de las unidades (p. ej. un edificio) no se toca
+    por_cargo = {cargo: ([[] for _ in unidades], []) for cargo in ratios()}
+    empleados = (
+        Empleado.objects.filter(activo=True, cargo__in=list(por_cargo))
+        .order_by('id').values_list('id', 'cargo', 'zona_asignada')
+    )
+    for empleado_id, cargo, zona_id in empleados:
+        en_unidades, libres = por_cargo[cargo]
+        if zona_id is None:
+            libres.append((empleado_id, None))
+        elif zona_id in indice_unidad:
+            en_unidades[indice_unidad[zona_id]].append((empleado_id, zona_id))
+
+    for cargo, (en_unidades, libres) in por_cargo.items():
+        actuales = array('l', (len(grupo) for grupo in en_unidades))
+        objetivo = objetivos(plan.carga, ratios()[cargo], sum(actuales) + len(libres))
+        plan.cargos[cargo] = (actuales, objetivo)
+
+        # Sobrantes de cada unidad: los de alta más reciente se mueven antes
+        donantes = list(libres)
+        for i, grupo in enumerate(en_unidades):
+            if actuales[i] > objetivo[i]:
+                donantes += reversed(grupo[objetivo[i]:])
+        receptores = [
+            unidades[i][0] for i in range(len(unidades)) for _ in range(objetivo[i] - actuales[i])
+        ]
+        plan.movimientos += [
+            (empleado_id, anterior, nueva) for (empleado_id, anterior), nueva in zip(donantes, receptores)
+        ]
+    return plan
+
+
+def aplicar_reparto(plan):
+    """
+    Aplica los movimientos del plan con un solo bulk_update. Los empleados que
+    cambiaron de zona desde el cálculo se dejan como están. Devuelve cuántos se movieron.
+    """
+    destinos = {empleado_id: (anterior, nueva) for empleado_id, anterior, nueva in plan.movimientos}
+    with atomica():
+        vigentes = (
+            Empleado.objects.select_for_update()
+            .filter(pk__in=list(destinos), activo=True)
+            .values_list('id', 'zona_asignada')
+        )
+        cambios = [
+            Empleado(pk=empleado_id, zona_asignada_id=destinos[empleado_id][1])
+            for empleado_id, zona_id in vigentes
+            if zona_id == destinos[empleado_id][0]
+        ]
+        if not cambios:
+            return 0
+        Empleado.objects.bulk_update(cambios, ['zona_asignada'])
+        # bulk_update no dispara señales: se invalida y se avisa aquí
+        al_confirmar(lambda: incrementar_version('empleado'))
+        difusor.notificar_al_confirmar(*{z for par in destinos.values() for z in par if z is not None})
+    return len(cambios)
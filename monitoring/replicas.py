@@ -0,0 +1,229 @@
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings # type: ignore
+from django.db import DatabaseError, connections # type: ignore
+from django.utils.deprecation import MiddlewareMixin # type: ignore
+
+from Helpnex.basedatos import alias_replicas
+
+
+# ------------------------------
+# LECTURAS EN RÉPLICAS
+# ------------------------------
+# Las vistas de solo lectura pesadas (dashboard, análisis, panel, exportación
+# y listados de la API) leen los modelos de monitoring de una réplica; todo lo
+# demás va a la primaria ('default'):
+#   - las escrituras, y cualquier lectura posterior en la misma petición;
+#   - las lecturas dentro de una transacción abierta;
+#   - las peticiones que no son GET/HEAD;
+#   - durante REPLICAS_PEGAJOSO_SEGUNDOS tras una escritura del mismo
+#     navegador (cookie), para que vea lo que acaba de guardar;
+#   - sesiones y usuarios siempre (un login recién hecho aún no está en la réplica).
+# Solo se usan réplicas con un retraso de hasta REPLICAS_RETRASO_MAXIMO
+# segundos; se mide cada REPLICAS_COMPROBAR_SEGUNDOS y, si ninguna cumple,
+# se lee de la primaria.
+#
+# Lo que se guarda en caché bajo la versión actual de los modelos (resumen,
+# fragmentos, páginas, autocompletado) se calcula siempre en la primaria
+# (en_primaria): una réplica atrasada dejaría datos viejos bajo una clave
+# que promete los actuales. Los aciertos no consultan ninguna base.
+
+COOKIE_PRIMARIA = 'helpnex_primaria'
+APPS_EN_REPLICA = {'monitoring'}
+METODOS_LECTURA = ('GET', 'HEAD')
+
+# Archivo junto a cada réplica SQLite con el momento de su última copia
+SUFIJO_SINCRONIZACION = '.sincronizada'
+
+_en_replica = ContextVar('helpnex_en_replica', default=False)
+_escribio = ContextVar('helpnex_escribio', default=False)
+
+
+def retraso_maximo():
+    return getattr(settings, 'REPLICAS_RETRASO_MAXIMO', 5)
+
+
+def pegajoso_segundos():
+    return getattr(settings, 'REPLICAS_PEGAJOSO_SEGUNDOS', 10)
+
+
+def intervalo_comprobacion():
+    return getattr(settings, 'REPLICAS_COMPROBAR_SEGUNDOS', 5)
+
+
+def lectura_en_replica(vista):
+    """Marca una vista de solo lectura cuyas consultas pueden ir a una réplica."""
+    vista.lectura_en_replica = True
+    return vista
+
+
+def _es_listado_api(vista):
+    # Las vistas de un ViewSet llevan la acción de cada método
+    return (getattr(vista, 'actions', None) or {}).get('get') == 'list'
+
+
+# ------------------------------
+# RETRASO DE LAS RÉPLICAS
+# ------------------------------
+SQL_RETRASO_POSTGRESQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+def _ultima_escritura_sqlite(ruta):
+    # Con WAL lo último escrito puede estar aún en el archivo -wal
+    return max(
+        (os.path.getmtime(archivo) for archivo in (ruta, f'{ruta}-wal') if os.path.exists(archivo)),
+        default=0.0,
+    )
+
+
+def retraso_sqlite(primaria, replica, ahora=None):
+    """
+    Segundos de retraso de una copia SQLite: cero si la primaria no cambió
+    desde la última sincronización, y si cambió, lo que lleva sin copiarse.
+    """
+    ahora = ahora or time.time()
+    marca = Path(f'{replica}{SUFIJO_SINCRONIZACION}')
+    if not marca.exists():
+        return float('inf')
+    copiada = json.loads(marca.read_text())['inicio']
+    if _ultima_escritura_sqlite(primaria) <= copiada:
+        return 0.0
+    return max(ahora - copiada, 0.0)
+
+
+def medir_retraso(alias):
+    """Retraso de la réplica en segundos; infinito si no responde."""
+    conexion = connections[alias]
+    try:
+        if conexion.vendor == 'postgresql':
+            with conexion.cursor() as cursor:
+                cursor.execute(SQL_RETRASO_POSTGRESQL)
+                return float(cursor.fetchone()[0] or 0)
+        if conexion.vendor == 'sqlite' and not conexion.is_in_memory_db():
+            return retraso_sqlite(connections['default'].settings_dict['NAME'], conexion.settings_dict['NAME'])
+        return 0.0
+    except (DatabaseError, OSError, ValueError, KeyError):
+        return float('inf')
+
+
+class EstadoReplicas:
+    """Último retraso medido de cada réplica, compartido por los hilos del proceso."""
+
+    def __init__(self):
+        self._medidas = {}
+        self._cerrojo = threading.Lock()
+
+    def retraso(self, alias):
+        ahora = time.monotonic()
+        with self._cerrojo:
+            medida = self._medidas.get(alias)
+        if medida is not None and ahora - medida[0] < intervalo_comprobacion():
+            return medida[1]
+        retraso = medir_retraso(alias)
+        with self._cerrojo:
+            self._medidas[alias] = (ahora, retraso)
+        return retraso
+
+    def disponibles(self):
+        return [
+            alias for alias in alias_replicas(settings.DATABASES)
+            if self.retraso(alias) <= retraso_maximo()
+        ]
+
+    def olvidar(self):
+        with self._cerrojo:
+            self._medidas.clear()
+
+
+estado_replicas = EstadoReplicas()
+
+
+# ------------------------------
+# ENRUTADOR Y MIDDLEWARE
+# ------------------------------
+def _transaccion_abierta():
+    # Dentro de una transacción se lee lo que ella misma ha escrito
+    return connections['default'].in_atomic_block
+
+
+class EnrutadorReplicas:
+    """DATABASE_ROUTERS: decide en qué base lee cada consulta."""
+
+    def db_for_read(self, model, **hints):
+        if not _en_replica.get() or _escribio.get() or model._meta.app_label not in APPS_EN_REPLICA:
+            return None
+        if _transaccion_abierta():
+            return None
+        disponibles = estado_replicas.disponibles()
+        return random.choice(disponibles) if disponibles else None
+
+    def db_for_write(self, model, **hints):
+        _escribio.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaria y réplicas tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == 'default'
+
+
+@contextmanager
+def en_primaria():
+    """Las lecturas de dentro van a la primaria aunque la vista lea de una réplica."""
+    anterior = _en_replica.set(False)
+    try:
+        yield
+    finally:
+        _en_replica.reset(anterior)
+
+
+def _con_replica(contenido):
+    """Itera una respuesta en streaming con las lecturas en la réplica (se genera tras la vista)."""
+    iterador = iter(contenido)
+    while True:
+        anterior = _en_replica.set(True)
+        try:
+            parte = next(iterador)
+        except StopIteration:
+            return
+        finally:
+            _en_replica.reset(anterior)
+        yield parte
+
+
+class ReplicasMiddleware(MiddlewareMixin):
+    """Activa las lecturas en réplica para las vistas marcadas y fija la primaria tras escribir."""
+
+    def process_request(self, request):
+        _en_replica.set(False)
+        _escribio.set(False)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in METODOS_LECTURA or COOKIE_PRIMARIA in request.COOKIES:
+            return None
+        if getattr(view_func, 'lectura_en_replica', False) or _es_listado_api(view_func):
+            _en_replica.set(True)
+        return None
+
+    def process_response(self, request, response):
+        if _en_replica.get() and response.streaming and not response.is_async:
+            response.streaming_content = _con_replica(response.streaming_content)
+        if _escribio.get() or request.method not in METODOS_LECTURA:
+            response.set_cookie(COOKIE_PRIMARIA, '1', max_age=pegajoso_segundos(), httponly=True, samesite='Lax')
+        _en_replica.set(False)
+        _escribio.set(False)
+        return response
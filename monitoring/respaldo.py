@@ -0,0 +1,375 @@
+import gzip
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+
+from django.apps import apps # type: ignore
+from django.core.management.color import no_style # type: ignore
+from django.db import DEFAULT_DB_ALIAS, connections, transaction # type: ignore
+from django.db.migrations.recorder import MigrationRecorder # type: ignore
+from django.db.models import DateField, DateTimeField # type: ignore
+from django.utils import timezone # type: ignore
+
+from .busqueda import TABLA_FTS, asegurar_indice
+from .hospitales import MODELOS_GLOBALES, base_activa
+from .models import Zona, Secuencia
+from .versiones import incrementar_version
+
+
+# ------------------------------
+# RESPALDO Y RESTAURACIÓN
+# ------------------------------
+# Un respaldo es un directorio con un manifiesto y, por tabla, partes de
+# FILAS_POR_PARTE filas en JSON Lines comprimido (una lista de valores por
+# fila, columnas en el manifiesto). Fechas en ISO 8601: no depende del motor,
+# se puede volcar de PostgreSQL y cargar en SQLite o al revés.
+#
+# Volcado y carga usan un hilo (y una conexión) por tabla. La carga va por
+# oleadas: una tabla entra cuando ya están las tablas a las que apunta, y las
+# zonas se vuelcan por profundidad para que cada padre llegue antes que sus
+# hijas. Durante la carga se quitan los índices secundarios y los triggers de
+# búsqueda, y en SQLite se desactivan las claves foráneas; todo se rehace y
+# se comprueba una sola vez al final.
+#
+# Se trabaja sobre la base activa (la primaria o la del --hospital del
+# comando). Los hilos no heredan la variable de contexto: reciben el alias.
+
+FORMATO = 1
+FILAS_POR_PARTE = 50_000
+NIVEL_COMPRESION = 6
+MANIFIESTO = 'manifiesto.json'
+REGISTRO_RESTAURACIONES = 'restauraciones.jsonl'
+
+# Tablas que la migración ya deja con filas: no cuentan para "base vacía"
+CREADAS_POR_MIGRACION = (Secuencia,)
+
+
+# Con la base SQLite en memoria (la de los tests) las conexiones comparten
+# caché y un bloqueo no se espera: falla con "table is locked". Ahí las
+# tablas de una oleada se cargan por turnos.
+_TURNO_MEMORIA = threading.Lock()
+
+
+def _turno_carga(conexion):
+    en_memoria = conexion.vendor == 'sqlite' and conexion.is_in_memory_db()
+    return _TURNO_MEMORIA if en_memoria else nullcontext()
+
+
+class RespaldoInvalido(Exception):
+    """El respaldo no se puede restaurar en esta base; el mensaje explica el motivo."""
+
+
+def modelos_respaldo(alias=DEFAULT_DB_ALIAS):
+    # La secuencia de identificadores es global: solo se respalda con la primaria
+    return [
+        modelo for modelo in apps.get_app_config('monitoring').get_models()
+        if alias == DEFAULT_DB_ALIAS or modelo._meta.model_name not in MODELOS_GLOBALES
+    ]
+
+
+def _dependencias(modelo, modelos):
+    return {
+        campo.related_model
+        for campo in modelo._meta.concrete_fields
+        if campo.is_relation and campo.db_constraint
+        and campo.related_model is not modelo and campo.related_model in modelos
+    }
+
+
+def oleadas(modelos):
+    """Grupos de modelos que se cargan a la vez, cada uno después de los que necesita."""
+    pendientes, cargados, grupos = list(modelos), set(), []
+    while pendientes:
+        grupo = [m for m in pendientes if _dependencias(m, modelos) <= cargados]
+        if not grupo:
+            raise RespaldoInvalido("Dependencias circulares entre tablas.")
+        grupos.append(grupo)
+        cargados.update(grupo)
+        pendientes = [m for m in pendientes if m not in cargados]
+    return grupos
+
+
+def _partes(iterable, tamano):
+    iterador = iter(iterable)
+    while parte := list(islice(iterador, tamano)):
+        yield parte
+
+
+def _json(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def _migracion_actual(alias):
+    return (
+        MigrationRecorder(connections[alias]).migration_qs.filter(app='monitoring')
+        .order_by('-id').values_list('name', flat=True).first()
+    )
+
+
+# ------------------------------
+# VOLCADO
+# ------------------------------
+@contextmanager
+def _instantanea(alias):
+    """
+    En PostgreSQL, una transacción REPEATABLE READ cuya instantánea comparten
+    los hilos: todas las tablas se leen en el mismo punto. En SQLite cada
+    tabla es consistente por sí misma (conviene volcar sin escrituras).
+    """
+    conexion = connections[alias]
+    if conexion.vendor != 'postgresql':
+        yield None
+        return
+    with transaction.atomic(using=alias), conexion.cursor() as cursor:
+        cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        cursor.execute('SELECT pg_export_snapshot()')
+        yield cursor.fetchone()[0]
+
+
+def _volcar_tabla(modelo, destino, instantanea, alias):
+    conexion = connections[alias]
+    try:
+        with transaction.atomic(using=alias) if instantanea else nullcontext():
+            if instantanea:
+                with conexion.cursor() as cursor:
+                    cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+                    cursor.execute('SET TRANSACTION SNAPSHOT %s', [instantanea])
+            columnas = [campo.attname for campo in modelo._meta.concrete_fields]
+            orden = ('profundidad', 'id') if modelo is Zona else ('pk',)
+            filas = modelo._base_manager.using(alias).order_by(*orden).values_list(*columnas).iterator(chunk_size=2000)
+            partes, total = [], 0
+            for numero, parte in enumerate(_partes(filas, FILAS_POR_PARTE)):
+                nombre = f'{modelo._meta.model_name}-{numero:05d}.jsonl.gz'
+                with gzip.open(destino / nombre, 'wt', encoding='utf-8', compresslevel=NIVEL_COMPRESION) as archivo:
+                    for fila in parte:
+                        archivo.write(json.dumps(fila, ensure_ascii=False, separators=(',', ':'), default=_json))
+                        archivo.write('\n')
+                partes.append(nombre)
+                total += len(parte)
+            return {'columnas': columnas, 'filas': total, 'partes': partes}
+    finally:
+        # Cada hilo abre su propia conexión
+        conexion.close()
+
+
+def respaldar(destino, hilos=None):
+    """Vuelca las tablas de monitoring de la base activa en `destino` (que no debe tener un respaldo)."""
+    destino = Path(destino)
+    if (destino / MANIFIESTO).exists():
+        raise RespaldoInvalido(f"{destino} ya contiene un respaldo.")
+    destino.mkdir(parents=True, exist_ok=True)
+    alias = base_activa()
+    modelos = modelos_respaldo(alias)
+
+    inicio = time.perf_counter()
+    with _instantanea(alias) as instantanea:
+        with ThreadPoolExecutor(max_workers=hilos or len(modelos)) as ejecutor:
+            tablas = dict(zip(
+                (m._meta.label for m in modelos),
+                ejecutor.map(lambda m: _volcar_tabla(m, destino, instantanea, alias), modelos),
+            ))
+    manifiesto = {
+        'formato': FORMATO,
+        'creado': timezone.now().isoformat(),
+        'motor': connections[alias].vendor,
+        'base': alias,
+        'migracion': _migracion_actual(alias),
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'tablas': tablas,
+    }
+    # El manifiesto se escribe al final: sin él, el respaldo está incompleto
+    (destino / MANIFIESTO).write_text(json.dumps(manifiesto, indent=2), encoding='utf-8')
+    return manifiesto
+
+
+# ------------------------------
+# RESTAURACIÓN
+# ------------------------------
+def leer_manifiesto(origen):
+    try:
+        manifiesto = json.loads((Path(origen) / MANIFIESTO).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        raise RespaldoInvalido(f"{origen} no contiene un respaldo (falta {MANIFIESTO}).")
+    if manifiesto.get('formato') != FORMATO:
+        raise RespaldoInvalido(f"Formato de respaldo no soportado: {manifiesto.get('formato')}.")
+    return manifiesto
+
+
+def _modelos_del_manifiesto(manifiesto, alias):
+    modelos = []
+    for etiqueta, tabla in manifiesto['tablas'].items():
+        try:
+            modelo = apps.get_model(etiqueta)
+        except LookupError:
+            raise RespaldoInvalido(f"La tabla {etiqueta} del respaldo no existe en esta versión.")
+        columnas = [campo.attname for campo in modelo._meta.concrete_fields]
+        if sorted(tabla['columnas']) != sorted(columnas):
+            raise RespaldoInvalido(
+                f"Las columnas de {etiqueta} no coinciden: el respaldo es de la migración "
+                f"{manifiesto['migracion']} y la base está en {_migracion_actual(alias)}."
+            )
+        modelos.append(modelo)
+    return modelos
+
+
+def _indices_secundarios(conexion, tabla):
+    """[(nombre, CREATE INDEX ...)] de los índices no únicos de la tabla."""
+    with conexion.cursor() as cursor:
+        if conexion.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s "
+                "AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%%'",
+                [tabla],
+            )
+        elif conexion.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() "
+                "AND tablename = %s AND indexdef NOT LIKE 'CREATE UNIQUE%%'",
+                [tabla],
+            )
+        else:
+            return []
+        return cursor.fetchall()
+
+
+def _conversores(conexion, modelo, columnas):
+    """Por columna, la función que pasa el valor del JSON al de la base (None si va tal cual)."""
+    # Se resuelven una vez: por fila solo queda parsear la fecha y adaptarla al motor
+    ops = conexion.ops
+    conversores = []
+    for columna in columnas:
+        campo = next(c for c in modelo._meta.concrete_fields if c.attname == columna)
+        if isinstance(campo, DateTimeField):
+            conversores.append(lambda valor, adaptar=ops.adapt_datetimefield_value: adaptar(datetime.fromisoformat(valor)))
+        elif isinstance(campo, DateField):
+            conversores.append(lambda valor, adaptar=ops.adapt_datefield_value: adaptar(date.fromisoformat(valor)))
+        else:
+            conversores.append(None)
+    return conversores
+
+
+def _cargar_tabla(modelo, origen, tabla, alias):
+    """Carga las partes de una tabla sin índices secundarios y los rehace al terminar."""
+    conexion = connections[alias]
+    inicio = time.perf_counter()
+    try:
+        nombre_tabla = modelo._meta.db_table
+        columnas = tabla['columnas']
+        campos = {c.attname: c.column for c in modelo._meta.concrete_fields}
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            conexion.ops.quote_name(nombre_tabla),
+            ', '.join(conexion.ops.quote_name(campos[c]) for c in columnas),
+            ', '.join(['%s'] * len(columnas)),
+        )
+        conversores = _conversores(conexion, modelo, columnas)
+
+        with _turno_carga(conexion):
+            indices = _indices_secundarios(conexion, nombre_tabla)
+            with conexion.cursor() as cursor:
+                for nombre, _ in indices:
+                    cursor.execute(f'DROP INDEX {conexion.ops.quote_name(nombre)}')
+            try:
+                with conexion.constraint_checks_disabled():
+                    for parte in tabla['partes']:
+                        with gzip.open(Path(origen) / parte, 'rt', encoding='utf-8') as archivo:
+                            filas = [
+                                [valor if conversor is None or valor is None else conversor(valor)
+                                 for valor, conversor in zip(json.loads(linea), conversores)]
+                                for linea in archivo
+                            ]
+                        with transaction.atomic(using=alias), conexion.cursor() as cursor:
+                            cursor.executemany(sql, filas)
+            finally:
+                with conexion.cursor() as cursor:
+                    for _, crear in indices:
+                        cursor.execute(crear)
+        return time.perf_counter() - inicio
+    finally:
+        conexion.close()
+
+
+def _suspender_busqueda(conexion):
+    # En SQLite los triggers llenarían el índice FTS fila a fila; asegurar_indice()
+    # los vuelve a crear y reconstruye el índice de una vez
+    if conexion.vendor == 'sqlite':
+        with conexion.cursor() as cursor:
+            for sufijo in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {TABLA_FTS}_{sufijo}')
+
+
+def _vaciar(conexion, modelos):
+    sentencias = conexion.ops.sql_flush(no_style(), [m._meta.db_table for m in modelos])
+    with conexion.constraint_checks_disabled(), transaction.atomic(using=conexion.alias), conexion.cursor() as cursor:
+        for sentencia in sentencias:
+            cursor.execute(sentencia)
+
+
+def restaurar(origen, hilos=None, reemplazar=False, informar=None):
+    """
+    Carga el respaldo de `origen` en la base activa. Sin `reemplazar`, las
+    tablas deben estar vacías. `informar(etiqueta, filas, segundos)` se llama
+    al terminar cada tabla. Devuelve el resumen, que también se anota en REGISTRO_RESTAURACIONES.
+    """
+    manifiesto = leer_manifiesto(origen)
+    alias = base_activa()
+    conexion = connections[alias]
+    modelos = _modelos_del_manifiesto(manifiesto, alias)
+    if not reemplazar:
+        ocupadas = [
+            m._meta.label for m in modelos
+            if m not in CREADAS_POR_MIGRACION and m._base_manager.using(alias).exists()
+        ]
+        if ocupadas:
+            raise RespaldoInvalido(f"Las tablas {', '.join(ocupadas)} tienen datos (usa --reemplazar).")
+
+    inicio = time.perf_counter()
+    _suspender_busqueda(conexion)
+    _vaciar(conexion, modelos)
+    tablas = {}
+    for grupo in oleadas(modelos):
+        with ThreadPoolExecutor(max_workers=min(hilos or len(grupo), len(grupo))) as ejecutor:
+            segundos = ejecutor.map(
+                lambda m: _cargar_tabla(m, origen, manifiesto['tablas'][m._meta.label], alias), grupo
+            )
+            for modelo, duracion in zip(grupo, segundos):
+                filas = manifiesto['tablas'][modelo._meta.label]['filas']
+                tablas[modelo._meta.label] = {'filas': filas, 'segundos': round(duracion, 3)}
+                if informar:
+                    informar(modelo._meta.label, filas, duracion)
+
+    # Comprobaciones diferidas: claves foráneas, secuencias e índice de búsqueda
+    conexion.check_constraints(table_names=[m._meta.db_table for m in modelos])
+    with conexion.cursor() as cursor:
+        for sentencia in conexion.ops.sequence_reset_sql(no_style(), modelos):
+            cursor.execute(sentencia)
+    asegurar_indice(alias)
+    incrementar_version(*(m._meta.model_name for m in modelos))
+
+    resumen = {
+        'fecha': timezone.now().isoformat(),
+        'motor': conexion.vendor,
+        'base': alias,
+        'hilos': hilos,
+        'filas': sum(t['filas'] for t in tablas.values()),
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'tablas': tablas,
+    }
+    with open(Path(origen) / REGISTRO_RESTAURACIONES, 'a', encoding='utf-8') as registro:
+        registro.write(json.dumps(resumen) + '\n')
+    return resumen
+
+
+def restauraciones_anteriores(origen):
+    """Restauraciones anotadas para este respaldo, de la más antigua a la más reciente."""
+    try:
+        with open(Path(origen) / REGISTRO_RESTAURACIONES, encoding='utf-8') as registro:
+            return [json.loads(linea) for linea in registro if linea.strip()]
+    except FileNotFoundError:
+        return []
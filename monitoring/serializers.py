@@ -0,0 +1,99 @@
+from rest_framework import serializers # type: ignore
+from rest_framework.validators import UniqueValidator # type: ignore
+
+from .models import Zona, Cliente, Contacto, Empleado
+
+
+# ------------------------------
+# CAMPOS DISPERSOS (?fields=)
+# ------------------------------
+class CamposDinamicosMixin:
+    """
+    Con ?fields=a,b solo se serializan esos campos (y siempre el id).
+
+    En operaciones masivas (context['masivo']) se quitan las validaciones que
+    hacen una consulta por fila (unicidad y claves foráneas): la vista las
+    resuelve para todo el lote con una consulta por campo.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.context.get('masivo'):
+            self._modo_masivo()
+        request = self.context.get('request')
+        pedidos = request.query_params.get('fields') if request is not None else None
+        if not pedidos:
+            return
+        permitidos = {campo.strip() for campo in pedidos.split(',')} | {'id'}
+        for campo in set(self.fields) - permitidos:
+            self.fields.pop(campo)
+
+    def _modo_masivo(self):
+        for nombre, campo in list(self.fields.items()):
+            if isinstance(campo, serializers.PrimaryKeyRelatedField) and not campo.read_only:
+                self.fields[nombre] = serializers.IntegerField(
+                    source=f'{nombre}_id', required=campo.required, allow_null=campo.allow_null
+                )
+            else:
+                campo.validators = [v for v in campo.validators if not isinstance(v, UniqueValidator)]
+
+
+class ZonaResumenSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Zona
+        fields = ['id', 'identificador', 'nombre', 'tipo']
+
+
+class ZonaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Zona
+        fields = [
+            'id', 'identificador', 'nombre', 'tipo', 'zona_padre', 'bloqueada', 'critica',
+            'total_camas', 'camas_ocupadas', 'ruta', 'profundidad',
+            'total_camas_subarbol', 'camas_ocupadas_subarbol',
+        ]
+        # La ocupación solo la cambia el servicio de camas (camas.py)
+        read_only_fields = [
+            'camas_ocupadas', 'ruta', 'profundidad', 'total_camas_subarbol', 'camas_ocupadas_subarbol',
+        ]
+        extra_kwargs = {'identificador': {'required': False}}
+
+    def validate_total_camas(self, valor):
+        if self.instance is not None and valor < self.instance.camas_ocupadas:
+            raise serializers.ValidationError(
+                f"Hay {self.instance.camas_ocupadas} camas ocupadas: no puede haber menos camas."
+            )
+        return valor
+
+
+class ClienteSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    # La zona se escribe por id y se lee ya resuelta (viene en el mismo SELECT)
+    zona = ZonaResumenSerializer(source='zona_asignada', read_only=True)
+
+    class Meta:
+        model = Cliente
+        fields = [
+            'id', 'identificador', 'nombre', 'apellido1', 'apellido2', 'documento',
+            'tipo_documento', 'telefono', 'correo', 'fecha_nacimiento', 'alta',
+            'tipo_enfermedad', 'zona_asignada', 'zona',
+        ]
+        extra_kwargs = {'identificador': {'required': False}}
+
+
+class ContactoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Contacto
+        fields = [
+            'id', 'identificador', 'cliente', 'nombre', 'apellido1', 'apellido2',
+            'relacion', 'telefono', 'correo',
+        ]
+        extra_kwargs = {'identificador': {'required': False}}
+
+
+class EmpleadoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    zona = ZonaResumenSerializer(source='zona_asignada', read_only=True)
+
+    class Meta:
+        model = Empleado
+        fields = ['id', 'identificador', 'nombre', 'apellido1', 'cargo', 'activo', 'zona_asignada', 'zona']
+        extra_kwargs = {'identificador': {'required': False}}
@@ -0,0 +1,184 @@
+from datetime import timedelta
+
+from django.conf import settings # type: ignore
+from django.db.models import Count, Max, Min, Sum # type: ignore
+from django.db.models.functions import TruncDay, TruncHour # type: ignore
+from django.utils import timezone # type: ignore
+
+from .hospitales import atomica
+from .models import Zona, Cliente, MuestraSerie
+
+
+# ------------------------------
+# SERIES DE OCUPACIÓN
+# ------------------------------
+# Cada intervalo (SERIES_INTERVALO_SEGUNDOS) se toma una muestra de la
+# ocupación por zona y de los pacientes por enfermedad en el nivel MINUTO.
+# consolidar() resume los minutos en horas y las horas en días con un
+# GROUP BY, y purgar() borra lo que supera la retención de cada nivel.
+# Las gráficas leen solo el nivel que encaja con la ventana pedida, así un
+# año son unos cientos de filas aunque haya muestras cada minuto.
+#
+# Nombres de serie: 'hospital' (camas ocupadas en total), 'zona:<id>'
+# (camas ocupadas en el subárbol) y 'enfermedad:<tipo>' (pacientes).
+
+SERIE_HOSPITAL = 'hospital'
+PREFIJOS_SERIE = ('zona', 'enfermedad')
+
+# nivel -> (duración del intervalo, nivel del que se consolida, truncado SQL)
+DURACIONES = {
+    MuestraSerie.MINUTO: timedelta(minutes=1),
+    MuestraSerie.HORA: timedelta(hours=1),
+    MuestraSerie.DIA: timedelta(days=1),
+}
+CONSOLIDACIONES = (
+    (MuestraSerie.HORA, MuestraSerie.MINUTO, TruncHour),
+    (MuestraSerie.DIA, MuestraSerie.HORA, TruncDay),
+)
+NOMBRES_NIVEL = {MuestraSerie.MINUTO: 'minuto', MuestraSerie.HORA: 'hora', MuestraSerie.DIA: 'dia'}
+
+# Puntos como máximo por gráfica: se usa el nivel más fino que no los supere
+MAX_PUNTOS = 500
+
+CAMPOS_AGREGADOS = ['muestras', 'suma', 'minimo', 'maximo']
+
+
+def intervalo_segundos():
+    return getattr(settings, 'SERIES_INTERVALO_SEGUNDOS', 60)
+
+
+def profundidad_maxima():
+    # Con todas las camas y habitaciones las series crecerían con el hospital
+    return getattr(settings, 'SERIES_PROFUNDIDAD_MAXIMA', 2)
+
+
+def retencion(nivel):
+    """Cuánto se guarda cada nivel; None es para siempre."""
+    dias = getattr(settings, 'SERIES_RETENCION_DIAS', {}).get(NOMBRES_NIVEL[nivel])
+    return timedelta(days=dias) if dias else None
+
+
+def serie_valida(serie):
+    prefijo, _, clave = serie.partition(':')
+    return serie == SERIE_HOSPITAL or (prefijo in PREFIJOS_SERIE and bool(clave))
+
+
+def _guardar(muestras):
+    MuestraSerie.objects.bulk_create(
+        muestras,
+        update_conflicts=True,
+        unique_fields=['serie', 'nivel', 'instante'],
+        update_fields=CAMPOS_AGREGADOS,
+    )
+
+
+# ------------------------------
+# MUESTREO, CONSOLIDACIÓN Y PURGA
+# ------------------------------
+def valores_actuales():
+    """{serie: valor} del instante actual en dos consultas (zonas y GROUP BY de enfermedades)."""
+    valores = {}
+    hospital = 0
+    zonas = Zona.objects.filter(profundidad__lte=profundidad_maxima()).values_list(
+        'id', 'profundidad', 'camas_ocupadas_subarbol'
+    )
+    for zona_id, profundidad, ocupadas in zonas:
+        valores[f'zona:{zona_id}'] = ocupadas
+        if profundidad == 0:
+            hospital += ocupadas
+    valores[SERIE_HOSPITAL] = hospital
+    enfermedades = Cliente.objects.values_list('tipo_enfermedad').annotate(total=Count('id')).order_by()
+    for enfermedad, total in enfermedades:
+        valores[f'enfermedad:{enfermedad}'] = total
+    return valores
+
+
+def tomar_muestra(momento=None):
+    """Guarda el valor actual de cada serie en el minuto de `momento`. Devuelve cuántas."""
+    momento = momento or timezone.now()
+    instante = momento.replace(second=0, microsecond=0)
+    valores = valores_actuales()
+    _guardar([
+        MuestraSerie(serie=serie, nivel=MuestraSerie.MINUTO, instante=instante,
+                     muestras=1, suma=valor, minimo=valor, maximo=valor)
+        for serie, valor in valores.items()
+    ])
+    return len(valores)
+
+
+def consolidar():
+    """
+    Resume cada nivel en el siguiente desde el último intervalo ya
+    consolidado (que se rehace: pudo quedar a medias). Devuelve las filas
+    escritas por nivel.
+    """
+    escritas = {}
+    for nivel, origen, truncar in CONSOLIDACIONES:
+        ultimo = MuestraSerie.objects.filter(nivel=nivel).aggregate(ultimo=Max('instante'))['ultimo']
+        filas = MuestraSerie.objects.filter(nivel=origen)
+        if ultimo is not None:
+            filas = filas.filter(instante__gte=ultimo)
+        resumen = (
+            filas.annotate(intervalo=truncar('instante'))
+            .values('serie', 'intervalo')
+            .annotate(muestras_=Sum('muestras'), suma_=Sum('suma'), minimo_=Min('minimo'), maximo_=Max('maximo'))
+            .order_by()
+        )
+        muestras = [
+            MuestraSerie(serie=fila['serie'], nivel=nivel, instante=fila['intervalo'], muestras=fila['muestras_'],
+                         suma=fila['suma_'], minimo=fila['minimo_'], maximo=fila['maximo_'])
+            for fila in resumen
+        ]
+        _guardar(muestras)
+        escritas[NOMBRES_NIVEL[nivel]] = len(muestras)
+    return escritas
+
+
+def purgar(momento=None):
+    """Borra lo que supera la retención de cada nivel. Devuelve las filas borradas por nivel."""
+    momento = momento or timezone.now()
+    borradas = {}
+    for nivel in DURACIONES:
+        limite = retencion(nivel)
+        if limite is None:
+            continue
+        borradas[NOMBRES_NIVEL[nivel]], _ = MuestraSerie.objects.filter(
+            nivel=nivel, instante__lt=momento - limite
+        ).delete()
+    return borradas
+
+
+def ciclo(momento=None):
+    """Un paso del proceso de muestreo: muestra, consolidación y purga."""
+    momento = momento or timezone.now()
+    with atomica():
+        series = tomar_muestra(momento)
+        consolidar()
+    purgar(momento)
+    return series
+
+
+# ------------------------------
+# LECTURA
+# ------------------------------
+def elegir_nivel(desde, hasta, ahora=None):
+    """El nivel más fino que cubre la ventana con MAX_PUNTOS o menos y aún la conserva."""
+    ahora = ahora or timezone.now()
+    for nivel, duracion in DURACIONES.items():
+        limite = retencion(nivel)
+        if (hasta - desde) / duracion <= MAX_PUNTOS and (limite is None or desde >= ahora - limite):
+            return nivel
+    return MuestraSerie.DIA
+
+
+def tendencia(serie, desde, hasta):
+    """(nivel, [(instante, media, mínimo, máximo)]) de una serie en [desde, hasta]."""
+    nivel = elegir_nivel(desde, hasta)
+    # El intervalo que contiene `desde` también cuenta
+    filas = MuestraSerie.objects.filter(
+        serie=serie, nivel=nivel, instante__gt=desde - DURACIONES[nivel], instante__lte=hasta,
+    ).order_by('instante').values_list('instante', 'muestras', 'suma', 'minimo', 'maximo')
+    return nivel, [
+        (instante, suma / muestras, minimo, maximo)
+        for instante, muestras, suma, minimo, maximo in filas
+    ]
@@ -0,0 +1,95 @@
+from django.db import transaction # type: ignore
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete # type: ignore
+from django.dispatch import receiver # type: ignore
+
+from . import camas, jerarquia, movimientos
+from .eventos import difusor
+from .models import Zona, Cliente, Contacto, Empleado
+from .versiones import incrementar_version
+
+
+# ------------------------------
+# INVALIDACIÓN DE CACHÉ
+# ------------------------------
+# Las operaciones masivas (bulk_create, update, delete de querysets) no
+# disparan estas señales: quien las use debe llamar a incrementar_version().
+@receiver([post_save, post_delete], sender=Zona)
+@receiver([post_save, post_delete], sender=Cliente)
+@receiver([post_save, post_delete], sender=Contacto)
+@receiver([post_save, post_delete], sender=Empleado)
+def invalidar_version_modelo(sender, using, **kwargs):
+    modelo = sender._meta.model_name
+    incrementar_version(modelo)
+    # Segundo incremento tras el COMMIT (de la base donde se escribió): descarta
+    # lo que se haya calculado con datos previos mientras la transacción seguía abierta
+    transaction.on_commit(lambda: incrementar_version(modelo), using=using)
+
+
+# ------------------------------
+# OCUPACIÓN EN VIVO
+# ------------------------------
+# Los cambios de camas hechos con camas.mover_cliente() avisan por su cuenta;
+# aquí se cubren las ediciones directas (admin, formularios, API).
+@receiver([post_save, post_delete], sender=Cliente)
+@receiver([post_save, post_delete], sender=Empleado)
+def avisar_pantallas_asignacion(sender, instance, **kwargs):
+    difusor.notificar_al_confirmar(instance.zona_asignada_id)
+
+
+@receiver([post_save, post_delete], sender=Zona)
+def avisar_pantallas_zona(sender, instance, **kwargs):
+    # Tras eliminar una zona solo quedan sus ancestros (padre en adelante)
+    difusor.notificar_al_confirmar(instance.pk if kwargs['signal'] is post_save else instance.zona_padre_id)
+
+
+# ------------------------------
+# JERARQUÍA DE ZONAS
+# ------------------------------
+@receiver(pre_save, sender=Zona)
+def leer_zona_antes_de_guardar(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not jerarquia.CAMPOS_JERARQUIA & update_fields):
+        return
+    jerarquia.validar_padre(instance)
+    instance._jerarquia_anterior = jerarquia.estado_anterior(instance)
+
+
+@receiver(post_save, sender=Zona)
+def sincronizar_jerarquia(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not jerarquia.CAMPOS_JERARQUIA & update_fields):
+        return
+    jerarquia.sincronizar_zona(instance, getattr(instance, '_jerarquia_anterior', None))
+
+
+@receiver(pre_delete, sender=Zona)
+def leer_zona_antes_de_eliminar(sender, instance, **kwargs):
+    instance._jerarquia_anterior = jerarquia.estado_anterior(instance)
+
+
+@receiver(post_delete, sender=Zona)
+def desvincular_jerarquia(sender, instance, **kwargs):
+    jerarquia.desvincular_zona(getattr(instance, '_jerarquia_anterior', None))
+
+
+# ------------------------------
+# CAMAS
+# ------------------------------
+@receiver(post_delete, sender=Cliente)
+def liberar_cama_de_cliente_eliminado(sender, instance, **kwargs):
+    if instance.zona_asignada_id is not None:
+        camas.liberar_cama(instance.zona_asignada_id)
+
+
+# ------------------------------
+# HISTORIAL DE MOVIMIENTOS
+# ------------------------------
+# Los traslados se anotan en camas.mover_cliente(); aquí, las salidas que
+# ocurren al eliminar (todo dentro de la transacción del borrado).
+@receiver(post_delete, sender=Cliente)
+def anotar_salida_de_cliente_eliminado(sender, instance, **kwargs):
+    if instance.zona_asignada_id is not None:
+        movimientos.registrar_movimiento(instance.id, instance.zona_asignada_id, None, instance.en_zona_desde)
+
+
+@receiver(pre_delete, sender=Zona)
+def anotar_salidas_de_zona_eliminada(sender, instance, **kwargs):
+    movimientos.registrar_salidas_de_zona(instance.pk)
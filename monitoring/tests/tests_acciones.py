@@ -0,0 +1,155 @@
+from django.contrib.auth.models import User # type: ignore
+from django.contrib.messages import get_messages # type: ignore
+from django.db import connection # type: ignore
+from django.db.models.signals import post_delete # type: ignore
+from django.test import TestCase # type: ignore
+from django.test.utils import CaptureQueriesContext # type: ignore
+from django.urls import reverse # type: ignore
+from monitoring.acciones import aplicar_accion
+from monitoring.camas import SinCamasDisponibles, asignar_cliente
+from monitoring.models import Zona, Cliente, Contacto, Empleado, Movimiento, Notificacion
+from monitoring.tests.tests_camas import crear_planta, crear_clientes
+
+
+class AccionesClientesTest(TestCase):
+    """Pruebas de las acciones masivas sobre clientes"""
+
+    def setUp(self):
+        self.planta, (self.hab1, self.hab2, self.hab3) = crear_planta([3, 2, 5])
+        self.clientes = crear_clientes(4)
+        self.ids = [c.id for c in self.clientes]
+        # Los acumulados de los ancestros se suman tras el COMMIT
+        with self.captureOnCommitCallbacks(execute=True):
+            for cliente in self.clientes[:3]:
+                asignar_cliente(cliente.id, self.hab1.id)
+
+    def ocupadas(self, zona):
+        return Zona.objects.values_list('camas_ocupadas', 'camas_ocupadas_subarbol').get(pk=zona.pk)
+
+    def test_reasignar_zona_en_bloque(self):
+        self.hab3.critica = True
+        self.hab3.save()
+        # Zona por nombre, savepoints, bloqueo, zona destino, ocupación por cada
+        # lado, clientes, historial, avisos y, tras el COMMIT, los acumulados de
+        # cada lado: no depende del número de filas
+        with self.assertNumQueries(13), self.captureOnCommitCallbacks(execute=True):
+            resultado = aplicar_accion('clientes', 'zona', [str(i) for i in self.ids], zona=self.hab3.nombre)
+        self.assertEqual((resultado.seleccionados, resultado.afectados), (4, 4))
+        self.assertGreater(resultado.segundos, 0)
+        self.assertEqual(self.ocupadas(self.hab1), (0, 0))
+        self.assertEqual(self.ocupadas(self.hab3), (4, 4))
+        self.assertEqual(self.ocupadas(self.planta), (0, 4))
+        self.assertEqual(Cliente.objects.filter(zona_asignada=self.hab3, en_zona_desde__isnull=False).count(), 4)
+        self.assertEqual(Movimiento.objects.filter(zona_nueva=self.hab3).count(), 4)
+        self.assertEqual(Notificacion.objects.filter(evento='zona_critica').count(), 4)
+
+        # Los que ya están en la zona no cuentan
+        self.assertEqual(aplicar_accion('clientes', 'zona', self.ids, zona=self.hab3.nombre).afectados, 0)
+
+    def test_sin_camas_para_todos_no_mueve_ninguno(self):
+        with self.assertRaises(SinCamasDisponibles):
+            aplicar_accion('clientes', 'zona', self.ids, zona=self.hab2.nombre)
+        self.assertEqual(self.ocupadas(self.hab1), (3, 3))
+        self.assertEqual(self.ocupadas(self.hab2), (0, 0))
+        self.assertEqual(Movimiento.objects.filter(zona_nueva=self.hab2).count(), 0)
+
+    def test_dejar_sin_zona(self):
+        # Desde zonas con distinto número de camas a liberar
+        with self.captureOnCommitCallbacks(execute=True):
+            asignar_cliente(self.ids[3], self.hab2.id)
+            resultado = aplicar_accion('clientes', 'zona', self.ids, zona='')
+        self.assertEqual(resultado.afectados, 4)
+        self.assertEqual(self.ocupadas(self.hab1), (0, 0))
+        self.assertEqual(self.ocupadas(self.hab2), (0, 0))
+        self.assertEqual(self.ocupadas(self.planta), (0, 0))
+        self.assertEqual(Notificacion.objects.filter(evento='alta').count(), 4)
+
+    def test_cambiar_enfermedad(self):
+        Cliente.objects.filter(pk=self.ids[0]).update(tipo_enfermedad='cardiaca')
+        # Un UPDATE (y su savepoint) que salta las filas que ya tienen el valor
+        with self.assertNumQueries(3):
+            resultado = aplicar_accion('clientes', 'enfermedad', self.ids, tipo_enfermedad='cardiaca')
+        self.assertEqual(resultado.afectados, 3)
+        self.assertEqual(Cliente.objects.filter(tipo_enfermedad='cardiaca').count(), 4)
+        with self.assertRaises(ValueError):
+            aplicar_accion('clientes', 'enfermedad', self.ids, tipo_enfermedad='gripe')
+
+    def test_eliminar_devuelve_camas_y_cierra_estancias(self):
+        Contacto.objects.create(cliente=self.clientes[0], nombre="Ana", apellido1="X", identificador="k1")
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = aplicar_accion('clientes', 'eliminar', self.ids[:2] + [self.ids[3]])
+        self.assertEqual(resultado.afectados, 3)
+        self.assertEqual(list(Cliente.objects.values_list('id', flat=True)), [self.ids[2]])
+        self.assertEqual(Contacto.objects.count(), 0)
+        self.assertEqual(self.ocupadas(self.hab1), (1, 1))
+        self.assertEqual(Movimiento.objects.filter(zona_anterior=self.hab1, zona_nueva=None).count(), 2)
+
+    def test_eliminar_sin_senales_por_fila(self):
+        # Un DELETE por tabla y ninguna señal: las camas ya las libera la acción
+        senales = []
+        receptor = lambda sender, **kwargs: senales.append(sender)
+        post_delete.connect(receptor, weak=False)
+        self.addCleanup(post_delete.disconnect, receptor)
+        with CaptureQueriesContext(connection) as consultas:
+            aplicar_accion('clientes', 'eliminar', self.ids)
+        borrados = [c['sql'] for c in consultas if c['sql'].startswith('DELETE')]
+        self.assertEqual(len(borrados), 2)
+        self.assertIn('"monitoring_contacto"', borrados[0])
+        self.assertEqual(senales, [])
+        self.assertEqual(self.ocupadas(self.hab1)[0], 0)
+
+    def test_datos_no_validos(self):
+        for accion, ids, extra in [
+            ('desconocida', self.ids, {}),
+            ('eliminar', [], {}),
+            ('eliminar', ['x'], {}),
+            ('zona', self.ids, {'zona': 'No existe'}),
+        ]:
+            with self.subTest(accion=accion, ids=ids), self.assertRaises(ValueError):
+                aplicar_accion('clientes', accion, ids, **extra)
+        self.assertEqual(Cliente.objects.count(), 4)
+
+
+class AccionesEmpleadosTest(TestCase):
+    """Pruebas de las acciones masivas sobre empleados y de la vista del panel"""
+
+    def setUp(self):
+        self.zona = Zona.objects.create(nombre="Planta 1", tipo=2, identificador="p1")
+        self.empleados = [
+            Empleado.objects.create(nombre="E", apellido1="X", cargo="Celador/a", identificador=f"e{i}")
+            for i in range(3)
+        ]
+        self.ids = [e.id for e in self.empleados]
+        User.objects.create_superuser(username="admin", password="1234")
+        self.client.login(username="admin", password="1234")
+
+    def test_activar_desactivar_y_reasignar(self):
+        with self.assertNumQueries(4):
+            self.assertEqual(aplicar_accion('empleados', 'desactivar', self.ids[:2]).afectados, 2)
+        self.assertEqual(aplicar_accion('empleados', 'desactivar', self.ids).afectados, 1)
+        self.assertEqual(aplicar_accion('empleados', 'activar', self.ids).afectados, 3)
+        self.assertEqual(aplicar_accion('empleados', 'zona', self.ids, zona="Planta 1").afectados, 3)
+        self.assertEqual(Empleado.objects.filter(zona_asignada=self.zona, activo=True).count(), 3)
+
+    def test_vista(self):
+        url = reverse('acciones_masivas', args=['empleados'])
+        respuesta = self.client.post(url, {'accion': 'eliminar', 'ids': self.ids[:2]})
+        self.assertRedirects(respuesta, f"{reverse('admin_panel')}?seccion=empleados")
+        self.assertEqual(list(Empleado.objects.values_list('id', flat=True)), self.ids[2:])
+        mensaje = str(list(get_messages(respuesta.wsgi_request))[0])
+        self.assertIn("2 de 2 empleados", mensaje)
+        self.assertIn(" ms", mensaje)
+
+        respuesta = self.client.post(url, {'accion': 'activar'}, follow=True)
+        self.assertContains(respuesta, "No hay filas seleccionadas.")
+        self.assertEqual(self.client.post(reverse('acciones_masivas', args=['zonas'])).status_code, 404)
+
+        # El panel lleva las casillas y el formulario de la sección
+        panel = self.client.get(reverse('admin_panel'), {'seccion': 'empleados'})
+        self.assertContains(panel, 'id="masivo-empleados"')
+        self.assertContains(panel, f'value="{self.ids[2]}" form="masivo-empleados"')
+
+        User.objects.create_user(username="enfermera", password="1234")
+        self.client.login(username="enfermera", password="1234")
+        self.client.post(url, {'accion': 'eliminar', 'ids': self.ids})
+        self.assertEqual(Empleado.objects.count(), 1)
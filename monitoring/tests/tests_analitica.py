@@ -0,0 +1,108 @@
+from asgiref.sync import sync_to_async # type: ignore
+from django.test import TestCase, TransactionTestCase # type: ignore
+from django.urls import reverse # type: ignore
+from django.contrib.auth.models import User # type: ignore
+from django.core.cache import cache # type: ignore
+from monitoring.models import Zona, Cliente, Empleado
+from monitoring.analitica import (
+    obtener_resumen, calcular_resumen, estadisticas_cache, acalcular_resumen, aobtener_resumen,
+)
+
+
+class ResumenAnaliticaTest(TestCase):
+    """Pruebas del resumen en caché que alimenta main y analisis"""
+
+    def setUp(self):
+        cache.clear()
+        self.zona = Zona.objects.create(nombre="UCI", tipo=4, identificador="z1")
+        self.otra = Zona.objects.create(nombre="Pabellón", tipo=4, identificador="z2")
+        Cliente.objects.create(nombre="Ana", apellido1="Díaz", documento="1", identificador="c1",
+                               tipo_enfermedad="cardiaca", zona_asignada=self.zona)
+        Cliente.objects.create(nombre="Luis", apellido1="Mora", documento="2", identificador="c2",
+                               tipo_enfermedad="cardiaca", zona_asignada=self.otra)
+        Cliente.objects.create(nombre="Eva", apellido1="Paz", documento="3", identificador="c3",
+                               tipo_enfermedad="diabetes")
+        Empleado.objects.create(nombre="Rosa", apellido1="Vidal", cargo="Enfermera",
+                                identificador="e1", zona_asignada=self.zona)
+
+    def tearDown(self):
+        cache.clear()
+
+    def leer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return obtener_resumen()
+
+    def test_agrupaciones_correctas(self):
+        resumen = calcular_resumen()
+        self.assertEqual(resumen['total_zonas'], 2)
+        self.assertEqual(resumen['total_clientes'], 3)
+        self.assertEqual(resumen['total_empleados'], 1)
+        self.assertEqual(resumen['clientes_por_zona'], {'UCI': 1, 'Pabellón': 1, 'Sin zona': 1})
+        self.assertEqual(list(resumen['clientes_por_enfermedad']), ['cardiaca', 'diabetes'])
+        self.assertEqual(resumen['empleados_por_cargo'], {'Enfermera': 1})
+
+    def test_segunda_lectura_sin_consultas(self):
+        self.leer()
+        with self.assertNumQueries(0):
+            self.leer()
+        self.assertEqual(estadisticas_cache(), {'aciertos': 1, 'fallos': 1, 'tasa_aciertos': 0.5})
+
+    def test_escritura_invalida_el_resumen(self):
+        self.assertEqual(self.leer()['total_clientes'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Cliente.objects.create(nombre="Nuevo", apellido1="X", documento="4", identificador="c4")
+        self.assertEqual(self.leer()['total_clientes'], 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Empleado.objects.all().first().delete()
+        self.assertEqual(self.leer()['total_empleados'], 0)
+        self.assertEqual(estadisticas_cache()['fallos'], 3)
+
+    def test_endpoint_estadisticas(self):
+        User.objects.create_superuser(username="admin", password="1234", email="a@a.com")
+        self.client.login(username="admin", password="1234")
+        self.client.get(reverse('analisis'))
+        response = self.client.get(reverse('analisis_cache'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['fallos'], 1)
+
+
+class ResumenAsincronoTest(TransactionTestCase):
+    """Pruebas del resumen concurrente que usan las vistas asíncronas (ASGI)"""
+
+    def setUp(self):
+        cache.clear()
+        zona = Zona.objects.create(nombre="UCI", tipo=4, identificador="z1")
+        Cliente.objects.create(nombre="Ana", apellido1="Díaz", documento="1", identificador="c1",
+                               tipo_enfermedad="cardiaca", zona_asignada=zona)
+        Cliente.objects.create(nombre="Eva", apellido1="Paz", documento="2", identificador="c2")
+        Empleado.objects.create(nombre="Rosa", apellido1="Vidal", cargo="Enfermera", identificador="e1")
+
+    def tearDown(self):
+        cache.clear()
+
+    async def test_concurrente_igual_que_secuencial(self):
+        self.assertEqual(await acalcular_resumen(), await sync_to_async(calcular_resumen)())
+
+    async def test_cache_y_estadisticas(self):
+        primero = await aobtener_resumen()
+        segundo = await aobtener_resumen()
+        self.assertEqual(primero, segundo)
+        self.assertEqual(primero['total_clientes'], 2)
+        self.assertEqual(estadisticas_cache(), {'aciertos': 1, 'fallos': 1, 'tasa_aciertos': 0.5})
+
+        await Cliente.objects.acreate(nombre="Luis", apellido1="Mora", documento="3", identificador="c3")
+        self.assertEqual((await aobtener_resumen())['total_clientes'], 3)
+
+    async def test_vistas_asincronas(self):
+        usuario = await User.objects.acreate_user(username="enfermera", password="1234")
+        response = await self.async_client.get(reverse('main'))
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+
+        await self.async_client.aforce_login(usuario)
+        response = await self.async_client.get(reverse('main'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_clientes'], 2)
+        self.assertContains(response, "enfermera")
+        response = await self.async_client.get(reverse('analisis'))
+        self.assertEqual(response.context['clientes_por_enfermedad'], {'cardiaca': 1, 'ninguna': 1})
@@ -0,0 +1,191 @@
+from django.contrib.auth.models import User # type: ignore
+from django.core.cache import cache # type: ignore
+from django.db import connection # type: ignore
+from django.test import TestCase # type: ignore
+from django.test.utils import CaptureQueriesContext # type: ignore
+from monitoring.models import Zona, Cliente, Empleado
+
+
+class ApiRestTest(TestCase):
+    """Pruebas de la API REST"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username="admin", password="1234", email="a@a.com")
+        self.usuario = User.objects.create_user(username="usuario", password="1234")
+        self.client.force_login(self.admin)
+        self.zona = Zona.objects.create(nombre="Hab 1", tipo=4, identificador="z1", total_camas=1)
+        self.general = Zona.objects.create(nombre="General", tipo=7, identificador="z2")
+
+    def tearDown(self):
+        cache.clear()
+
+    def crear_clientes(self, cantidad, zona=None):
+        Cliente.objects.bulk_create([
+            Cliente(nombre=f"P{i}", apellido1="X", documento=f"d{i}", identificador=f"c{i}", zona_asignada=zona)
+            for i in range(cantidad)
+        ])
+
+    def consultas(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_paginacion_por_cursor(self):
+        self.crear_clientes(5, self.general)
+        response = self.client.get("/api/clientes/?page_size=2")
+        datos = response.json()
+        self.assertEqual(len(datos["results"]), 2)
+        self.assertEqual(datos["results"][0]["zona"]["nombre"], "General")
+
+        vistos = [c["id"] for c in datos["results"]]
+        while datos["next"]:
+            datos = self.client.get(datos["next"]).json()
+            vistos += [c["id"] for c in datos["results"]]
+        self.assertEqual(vistos, sorted(Cliente.objects.values_list("id", flat=True)))
+
+    def test_zona_en_la_misma_consulta(self):
+        self.crear_clientes(3, self.general)
+        pocas = self.consultas("/api/clientes/")
+        Cliente.objects.all().delete()
+        self.crear_clientes(40, self.general)
+        self.assertEqual(self.consultas("/api/clientes/"), pocas)
+
+    def test_campos_dispersos(self):
+        self.crear_clientes(1)
+        fila = self.client.get("/api/clientes/?fields=nombre,documento").json()["results"][0]
+        self.assertEqual(set(fila), {"id", "nombre", "documento"})
+
+    def test_etag_y_304(self):
+        self.crear_clientes(2)
+        etag = self.client.get("/api/clientes/")["ETag"]
+        response = self.client.get("/api/clientes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Cliente.objects.first().save()
+        response = self.client.get("/api/clientes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_alta_masiva_con_consultas_constantes(self):
+        filas = [{"nombre": f"N{i}", "apellido1": "X", "documento": f"m{i}", "zona_asignada": self.general.id}
+                 for i in range(30)]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/clientes/masivo/", filas[:10], content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        pocas = len(ctx.captured_queries)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/clientes/masivo/", filas[10:], content_type="application/json")
+        self.assertEqual(response.json()["creados"], 20)
+        # La asignación de zona va en bloque por zona de destino: no crece con las filas
+        self.assertEqual(len(ctx.captured_queries), pocas)
+        self.assertEqual(Cliente.objects.filter(zona_asignada=self.general).count(), 30)
+
+    def test_alta_masiva_rechaza_duplicados(self):
+        self.crear_clientes(1)
+        response = self.client.post("/api/clientes/masivo/", [
+            {"nombre": "A", "apellido1": "X", "documento": "d0"},
+        ], content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("documento", response.json())
+
+    def test_cambio_masivo(self):
+        Empleado.objects.bulk_create([
+            Empleado(nombre=f"E{i}", apellido1="X", cargo="Enfermera", identificador=f"e{i}") for i in range(3)
+        ])
+        ids = list(Empleado.objects.values_list("id", flat=True))
+        response = self.client.patch("/api/empleados/masivo/", [
+            {"id": i, "cargo": "Médico", "zona_asignada": self.general.id} for i in ids
+        ], content_type="application/json")
+        self.assertEqual(response.json()["actualizados"], 3)
+        self.assertEqual(Empleado.objects.filter(cargo="Médico", zona_asignada=self.general).count(), 3)
+
+    def test_traslado_masivo_por_zona(self):
+        otra = Zona.objects.create(nombre="Hab 2", tipo=4, identificador="z3", total_camas=3)
+        self.crear_clientes(5)
+        ids = list(Cliente.objects.values_list("id", flat=True))
+        destinos = [self.zona.id, otra.id, otra.id, otra.id, None]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch("/api/clientes/masivo/", [
+                {"id": i, "zona_asignada": zona} for i, zona in zip(ids, destinos)
+            ], content_type="application/json")
+        self.assertEqual(response.json()["actualizados"], 5)
+        self.assertEqual(
+            list(Cliente.objects.order_by("id").values_list("zona_asignada_id", flat=True)), destinos
+        )
+        self.assertEqual(Zona.objects.get(pk=otra.pk).camas_ocupadas, 3)
+        # Un traslado en bloque por zona de destino (tres), no uno por fila (cinco)
+        traslados = [q for q in ctx.captured_queries if 'en_zona_desde" AS' in q["sql"]]
+        self.assertEqual(len(traslados), 3)
+
+        response = self.client.patch("/api/clientes/masivo/", [
+            {"id": ids[4], "zona_asignada": self.zona.id},
+        ], content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+
+    def test_ocupacion_de_zona_solo_por_el_servicio(self):
+        planta = Zona.objects.create(nombre="Planta", tipo=2, identificador="p1")
+        self.zona.zona_padre = planta
+        self.zona.save()
+        self.crear_clientes(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/clientes/masivo/", [
+                {"nombre": "Ana", "apellido1": "X", "documento": "x1", "zona_asignada": self.zona.id},
+            ], content_type="application/json")
+
+        url = f"/api/zonas/{self.zona.id}/"
+        response = self.client.patch(url, {"camas_ocupadas": 0}, content_type="application/json")
+        self.assertEqual(response.json()["camas_ocupadas"], 1)
+        response = self.client.patch(url, {"total_camas": 0}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("total_camas", response.json())
+
+        # Más camas: suben a los ancestros por la vía de jerarquia.py
+        self.client.patch(url, {"total_camas": 4}, content_type="application/json")
+        planta.refresh_from_db()
+        self.assertEqual((planta.total_camas_subarbol, planta.camas_ocupadas_subarbol), (4, 1))
+
+    def test_cambio_masivo_de_zonas_rehace_solo_sus_arboles(self):
+        origen = Zona.objects.create(nombre="Edificio A", tipo=1, identificador="ea")
+        destino = Zona.objects.create(nombre="Edificio B", tipo=1, identificador="eb")
+        ajena = Zona.objects.create(nombre="Edificio C", tipo=1, identificador="ec", total_camas=2)
+        self.zona.zona_padre = origen
+        self.zona.save()
+        # Un acumulado erróneo fuera de los árboles afectados sigue igual
+        Zona.objects.filter(pk=ajena.pk).update(total_camas_subarbol=99)
+
+        response = self.client.patch("/api/zonas/masivo/", [
+            {"id": self.zona.id, "zona_padre": destino.id, "total_camas": 3},
+        ], content_type="application/json")
+        self.assertEqual(response.json()["actualizados"], 1)
+        totales = dict(Zona.objects.values_list("nombre", "total_camas_subarbol"))
+        self.assertEqual((totales["Edificio A"], totales["Edificio B"], totales["Edificio C"]), (0, 3, 99))
+        self.assertEqual(Zona.objects.get(pk=self.zona.pk).ruta, f"/{destino.id}/{self.zona.id}/")
+
+    def test_crear_cliente_ocupa_cama(self):
+        response = self.client.post("/api/clientes/", {
+            "nombre": "Ana", "apellido1": "Paz", "documento": "x1", "zona_asignada": self.zona.id,
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.zona.refresh_from_db()
+        self.assertEqual(self.zona.camas_ocupadas, 1)
+
+        response = self.client.post("/api/clientes/", {
+            "nombre": "Luis", "apellido1": "Paz", "documento": "x2", "zona_asignada": self.zona.id,
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Cliente.objects.filter(documento="x2").exists())
+
+        self.client.delete(f"/api/clientes/{Cliente.objects.get(documento='x1').id}/")
+        self.zona.refresh_from_db()
+        self.assertEqual(self.zona.camas_ocupadas, 0)
+
+    def test_permisos(self):
+        self.client.logout()
+        self.assertEqual(self.client.get("/api/zonas/").status_code, 403)
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get("/api/zonas/").status_code, 200)
+        response = self.client.post("/api/zonas/", {"nombre": "Nueva", "tipo": 1}, content_type="application/json")
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,133 @@
+from django.contrib.auth.models import User # type: ignore
+from django.core.cache import cache # type: ignore
+from django.test import TestCase # type: ignore
+from django.urls import reverse # type: ignore
+from monitoring.autocompletado import sugerir_zonas
+from monitoring.models import Zona, Cliente, Empleado
+
+
+class SugerirZonasTest(TestCase):
+    """Pruebas de la búsqueda de zonas por prefijo y por ruta"""
+
+    def setUp(self):
+        cache.clear()
+        self.edificio = Zona.objects.create(nombre="Edificio Norte", tipo=1, identificador="e1")
+        self.plantas = [
+            Zona.objects.create(nombre=f"Planta {i}", tipo=2, identificador=f"p{i}", zona_padre=self.edificio)
+            for i in (1, 2)
+        ]
+        self.habitaciones = [
+            Zona.objects.create(nombre=nombre, tipo=4, identificador=f"h{i}", zona_padre=planta, total_camas=2)
+            for i, (nombre, planta) in enumerate([
+                ("Hab 101", self.plantas[0]), ("Hab 102", self.plantas[0]), ("hab 201", self.plantas[1]),
+            ])
+        ]
+        Zona.objects.create(nombre="Habitaciones aisladas", tipo=3, identificador="x1")
+
+    def nombres(self, texto, limite=10):
+        return [zona['nombre'] for zona in sugerir_zonas(texto, limite)]
+
+    def test_prefijo_sin_mayusculas_y_en_orden(self):
+        self.assertEqual(self.nombres("HAB 1"), ["Hab 101", "Hab 102"])
+        self.assertEqual(self.nombres("hab"), ["Hab 101", "Hab 102", "hab 201", "Habitaciones aisladas"])
+        self.assertEqual(self.nombres("hab", limite=2), ["Hab 101", "Hab 102"])
+        self.assertEqual(self.nombres("zzz"), [])
+        self.assertEqual(self.nombres("  "), [])
+
+    def test_ruta_y_camas_libres(self):
+        Zona.objects.filter(pk=self.habitaciones[0].pk).update(camas_ocupadas=1)
+        primera = sugerir_zonas("hab 101")[0]
+        self.assertEqual(primera['ruta'], "Edificio Norte › Planta 1 › Hab 101")
+        self.assertEqual(primera['tipo'], "Habitación")
+        self.assertEqual(primera['camas_libres'], 1)
+        self.assertIsNone(sugerir_zonas("edificio")[0]['camas_libres'])
+
+    def test_busqueda_por_tramos(self):
+        self.assertEqual(self.nombres("planta 2 › hab"), ["hab 201"])
+        self.assertEqual(self.nombres("edif > planta 1 / h"), ["Hab 101", "Hab 102"])
+        # Un tramo final vacío lista las subzonas directas
+        self.assertEqual(self.nombres("edificio norte ›"), ["Planta 1", "Planta 2"])
+        self.assertEqual(self.nombres("no existe › hab"), [])
+
+    def test_consultas_constantes(self):
+        # Prefijo y nombres de los ancestros, sin importar cuántas zonas haya
+        with self.assertNumQueries(2):
+            sugerir_zonas("hab 1")
+        # Una consulta más por cada tramo anterior
+        with self.assertNumQueries(4):
+            sugerir_zonas("edificio › planta › hab")
+
+    def test_prefijos_cortos_en_cache(self):
+        self.assertEqual(len(sugerir_zonas("hab")), 4)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(sugerir_zonas("HAB")), 4)
+
+        # Un cambio en las zonas invalida lo guardado
+        with self.captureOnCommitCallbacks(execute=True):
+            Zona.objects.create(nombre="Hab 103", tipo=4, identificador="h9", zona_padre=self.plantas[0])
+        self.assertIn("Hab 103", self.nombres("hab"))
+
+
+class SelectorZonaTest(TestCase):
+    """Pruebas del endpoint de autocompletado y de los formularios que lo usan"""
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser(username="admin", password="1234")
+        self.client.login(username="admin", password="1234")
+        self.planta = Zona.objects.create(nombre="Planta 1", tipo=2, identificador="p1")
+        self.habitacion = Zona.objects.create(
+            nombre="Hab 1", tipo=4, identificador="h1", zona_padre=self.planta, total_camas=2
+        )
+
+    def test_endpoint(self):
+        url = reverse('autocompletar_zonas')
+        respuesta = self.client.get(url, {'q': 'planta 1 › h'})
+        self.assertEqual(respuesta.json()['resultados'][0]['id'], self.habitacion.id)
+        self.assertEqual(self.client.get(url, {'q': 'h', 'limite': 'x'}).status_code, 400)
+
+        self.client.logout()
+        self.assertRedirects(self.client.get(url, {'q': 'h'}), reverse('login'), fetch_redirect_response=False)
+
+    def test_formularios_no_cargan_las_zonas(self):
+        for i in range(20):
+            Zona.objects.create(nombre=f"Sala {i}", tipo=3, identificador=f"s{i}", zona_padre=self.planta)
+        cliente = Cliente.objects.create(
+            nombre="Ana", apellido1="García", documento="d1", identificador="c1", zona_asignada=self.habitacion
+        )
+        # Sesión, usuario, cliente con su zona y nombres de los ancestros
+        with self.assertNumQueries(4):
+            respuesta = self.client.get(reverse('editar_cliente', args=[cliente.id]))
+        self.assertContains(respuesta, 'value="Planta 1 › Hab 1"')
+        self.assertContains(respuesta, f'name="zona_asignada" id="zona-id" value="{self.habitacion.id}"')
+        self.assertNotContains(respuesta, "Sala 0")
+
+    def test_agregar_empleado_guarda_la_zona(self):
+        self.client.post(reverse('agregar_empleado'), {
+            'nombre': "Luis", 'apellido1': "Pérez", 'cargo': "Celador/a", 'zona_asignada': self.habitacion.id,
+        })
+        self.assertEqual(Empleado.objects.get().zona_asignada, self.habitacion)
+
+    def test_zona_inexistente_se_muestra_en_el_formulario(self):
+        datos = {'nombre': "Luis", 'apellido1': "Pérez", 'cargo': "Celador/a"}
+        for zona_id in (self.habitacion.id + 100, "abc"):
+            respuesta = self.client.post(reverse('agregar_empleado'), {**datos, 'zona_asignada': zona_id})
+            self.assertContains(respuesta, "La zona seleccionada no existe.")
+        self.assertFalse(Empleado.objects.exists())
+
+        empleado = Empleado.objects.create(identificador="e1", zona_asignada=self.habitacion, **datos)
+        respuesta = self.client.post(
+            reverse('editar_empleado', args=[empleado.id]), {**datos, 'cargo': "Otro", 'zona_asignada': 9999}
+        )
+        self.assertContains(respuesta, "La zona seleccionada no existe.")
+        empleado.refresh_from_db()
+        self.assertEqual((empleado.cargo, empleado.zona_asignada), ("Celador/a", self.habitacion))
+
+        cliente = Cliente.objects.create(nombre="Ana", apellido1="García", documento="d1", identificador="c1")
+        respuesta = self.client.post(reverse('editar_cliente', args=[cliente.id]), {
+            'nombre': "Ana", 'apellido1': "García", 'documento': "d1", 'tipo_documento': 'dni',
+            'zona_asignada': 9999,
+        })
+        self.assertContains(respuesta, "La zona seleccionada no existe.")
+        cliente.refresh_from_db()
+        self.assertIsNone(cliente.zona_asignada)
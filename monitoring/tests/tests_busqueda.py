@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User # type: ignore
+from django.db import connection # type: ignore
+from django.test import TestCase # type: ignore
+from django.urls import reverse # type: ignore
+from monitoring.models import Zona, Cliente
+from monitoring.busqueda import buscar_clientes, normalizar
+
+
+class BusquedaClientesTest(TestCase):
+    """Pruebas de la búsqueda indexada de pacientes"""
+
+    def setUp(self):
+        self.zona = Zona.objects.create(nombre="UCI", tipo=4, identificador="z1")
+        Cliente.objects.create(nombre="José", apellido1="Pérez", apellido2="González", documento="12.345.678-9",
+                               identificador="c1", zona_asignada=self.zona)
+        Cliente.objects.create(nombre="María", apellido1="Gonzalo", documento="98765432", identificador="c2")
+        # bulk_create no pasa por save(): el índice igual debe enterarse
+        Cliente.objects.bulk_create([
+            Cliente(nombre="Pedro", apellido1="Núñez", documento="555", identificador="c3"),
+        ])
+
+    def documentos(self, texto, **kwargs):
+        return [c.documento for c, _ in buscar_clientes(texto, **kwargs)]
+
+    def test_sin_acentos_y_prefijos(self):
+        self.assertEqual(self.documentos("perez"), ["12.345.678-9"])
+        self.assertEqual(self.documentos("NUÑEZ"), ["555"])
+        self.assertEqual(set(self.documentos("gonz")), {"12.345.678-9", "98765432"})
+        self.assertEqual(self.documentos("jose gonz"), ["12.345.678-9"])
+
+    def test_por_documento(self):
+        self.assertEqual(self.documentos("98765"), ["98765432"])
+        self.assertEqual(self.documentos("12.345"), ["12.345.678-9"])
+
+    def test_ranking_favorece_el_apellido(self):
+        Cliente.objects.create(nombre="Gonzalo", apellido1="Ruiz", documento="1", identificador="c4")
+        self.assertEqual(self.documentos("gonzalo")[0], "98765432")
+
+    def test_cambios_y_borrados_se_reflejan(self):
+        cliente = Cliente.objects.get(identificador="c2")
+        cliente.apellido1 = "Soto"
+        cliente.save()
+        self.assertEqual(self.documentos("gonzalo"), [])
+        self.assertEqual(self.documentos("soto"), ["98765432"])
+        Cliente.objects.filter(identificador="c3").delete()
+        self.assertEqual(self.documentos("nunez"), [])
+
+    def test_paginacion_y_texto_vacio(self):
+        self.assertEqual(len(self.documentos("gonz", limite=1)), 1)
+        self.assertEqual(len(self.documentos("gonz", limite=1, desplazamiento=1)), 1)
+        self.assertEqual(self.documentos("  ¿? "), [])
+        self.assertEqual(normalizar("Ñandú"), "nandu")
+
+    def test_endpoint(self):
+        User.objects.create_user(username="enfermera", password="1234")
+        self.client.login(username="enfermera", password="1234")
+        datos = self.client.get(reverse("buscar_clientes"), {"q": "perez"}).json()
+        self.assertEqual(datos["resultados"][0]["zona"], "UCI")
+        if connection.vendor == "sqlite":
+            self.assertGreater(datos["resultados"][0]["rango"], 0)
+
+    def test_endpoint_requiere_login(self):
+        response = self.client.get(reverse("buscar_clientes"), {"q": "perez"})
+        self.assertRedirects(response, reverse("login"))
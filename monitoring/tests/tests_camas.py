@@ -0,0 +1,147 @@
+import threading
+import time
+from unittest import mock
+
+from django.db import connection, OperationalError # type: ignore
+from django.test import TestCase, TransactionTestCase # type: ignore
+from monitoring.jerarquia import aplicar_ocupacion_pendiente
+from monitoring.models import Zona, Cliente
+from monitoring.camas import (
+    asignar_cliente, trasladar_cliente, liberar_cliente, asignar_cama_libre, SinCamasDisponibles
+)
+
+
+def crear_planta(camas_por_habitacion):
+    planta = Zona.objects.create(nombre="Planta 1", tipo=2, identificador="p1")
+    habitaciones = [
+        Zona.objects.create(nombre=f"Hab {i}", tipo=4, identificador=f"h{i}", zona_padre=planta, total_camas=camas)
+        for i, camas in enumerate(camas_por_habitacion)
+    ]
+    return planta, habitaciones
+
+
+def crear_clientes(cantidad):
+    return [
+        Cliente.objects.create(nombre=f"P{i}", apellido1="X", documento=f"d{i}", identificador=f"c{i}")
+        for i in range(cantidad)
+    ]
+
+
+class AsignacionCamasTest(TestCase):
+    """Pruebas del servicio de asignación de camas"""
+
+    def setUp(self):
+        self.planta, (self.hab1, self.hab2) = crear_planta([1, 2])
+        self.c1, self.c2, self.c3 = crear_clientes(3)
+
+    def ocupadas(self, zona):
+        zona.refresh_from_db()
+        return zona.camas_ocupadas
+
+    def test_asignar_y_liberar(self):
+        with self.captureOnCommitCallbacks() as al_confirmar:
+            asignar_cliente(self.c1.id, self.hab1.id)
+        self.assertEqual(self.ocupadas(self.hab1), 1)
+        # El acumulado de los ancestros se suma tras el COMMIT, fuera de la transacción
+        self.assertEqual(Zona.objects.get(pk=self.planta.pk).camas_ocupadas_subarbol, 0)
+        al_confirmar[0]()
+        self.assertEqual(Zona.objects.get(pk=self.planta.pk).camas_ocupadas_subarbol, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            liberar_cliente(self.c1.id)
+        self.c1.refresh_from_db()
+        self.assertIsNone(self.c1.zona_asignada)
+        self.assertEqual(self.ocupadas(self.hab1), 0)
+        self.assertEqual(Zona.objects.get(pk=self.planta.pk).camas_ocupadas_subarbol, 0)
+
+    def test_acumulado_fallido_se_reintenta(self):
+        with self.captureOnCommitCallbacks() as al_confirmar:
+            asignar_cliente(self.c1.id, self.hab1.id)
+        with mock.patch('monitoring.jerarquia._sumar_ocupacion', side_effect=OperationalError("locked")):
+            al_confirmar[0]()
+        self.assertEqual(Zona.objects.get(pk=self.planta.pk).camas_ocupadas_subarbol, 0)
+        # El ingreso ya estaba confirmado: el delta espera en la cola al siguiente intento
+        aplicar_ocupacion_pendiente()
+        self.assertEqual(Zona.objects.get(pk=self.planta.pk).camas_ocupadas_subarbol, 1)
+        self.assertEqual(Zona.objects.get(pk=self.hab1.pk).camas_ocupadas_subarbol, 1)
+
+    def test_no_sobreasigna(self):
+        asignar_cliente(self.c1.id, self.hab1.id)
+        with self.assertRaises(SinCamasDisponibles):
+            asignar_cliente(self.c2.id, self.hab1.id)
+        self.c2.refresh_from_db()
+        self.assertIsNone(self.c2.zona_asignada)
+        self.assertEqual(self.ocupadas(self.hab1), 1)
+
+    def test_traslado_mueve_la_ocupacion(self):
+        asignar_cliente(self.c1.id, self.hab1.id)
+        trasladar_cliente(self.c1.id, self.hab2.id)
+        self.assertEqual(self.ocupadas(self.hab1), 0)
+        self.assertEqual(self.ocupadas(self.hab2), 1)
+
+    def test_traslado_fallido_conserva_la_cama(self):
+        asignar_cliente(self.c1.id, self.hab1.id)
+        asignar_cliente(self.c2.id, self.hab2.id)
+        asignar_cliente(self.c3.id, self.hab2.id)
+        with self.assertRaises(SinCamasDisponibles):
+            trasladar_cliente(self.c1.id, self.hab2.id)
+        self.c1.refresh_from_db()
+        self.assertEqual(self.c1.zona_asignada_id, self.hab1.id)
+        self.assertEqual(self.ocupadas(self.hab1), 1)
+
+    def test_cama_libre_en_subarbol(self):
+        zonas = {asignar_cama_libre(c.id, self.planta.id) for c in (self.c1, self.c2, self.c3)}
+        self.assertEqual(zonas, {self.hab1.id, self.hab2.id})
+        otro, = Cliente.objects.bulk_create([Cliente(nombre="P9", apellido1="X", documento="d9", identificador="c9")])
+        with self.assertRaises(SinCamasDisponibles):
+            asignar_cama_libre(otro.id, self.planta.id)
+
+
+class AsignacionConcurrenteTest(TransactionTestCase):
+    """Muchos ingresos simultáneos no superan la capacidad"""
+
+    HILOS = 8
+    CLIENTES = 40
+
+    def test_estres_sin_sobreasignacion(self):
+        planta, habitaciones = crear_planta([3, 4, 5, 2, 6])
+        capacidad = sum(h.total_camas for h in habitaciones)
+        clientes = [c.id for c in crear_clientes(self.CLIENTES)]
+        asignados, rechazados = [], []
+        lock = threading.Lock()
+
+        def trabajador(ids):
+            try:
+                for cliente_id in ids:
+                    for _ in range(200):
+                        try:
+                            asignar_cama_libre(cliente_id, planta.id)
+                            resultado = asignados
+                        except SinCamasDisponibles:
+                            resultado = rechazados
+                        except OperationalError:
+                            # SQLite serializa escrituras: se reintenta
+                            time.sleep(0.005)
+                            continue
+                        with lock:
+                            resultado.append(cliente_id)
+                        break
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajador, args=(clientes[i::self.HILOS],)) for i in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        # El último intento de algún hilo pudo encontrar la base ocupada
+        aplicar_ocupacion_pendiente()
+
+        self.assertEqual(len(asignados), capacidad)
+        self.assertEqual(len(asignados) + len(rechazados), self.CLIENTES)
+        for habitacion in habitaciones:
+            habitacion.refresh_from_db()
+            self.assertLessEqual(habitacion.camas_ocupadas, habitacion.total_camas)
+            self.assertEqual(habitacion.camas_ocupadas, habitacion.clientes.count())
+        planta.refresh_from_db()
+        self.assertEqual(planta.camas_ocupadas_subarbol, capacidad)
@@ -0,0 +1,61 @@
+from pathlib import Path
+from unittest import skipUnless
+
+from django.contrib.auth.models import User # type: ignore
+from django.db import connection # type: ignore
+from django.test import TestCase # type: ignore
+from django.urls import reverse # type: ignore
+from Helpnex.basedatos import bases_de_datos
+from monitoring.conexiones import estado_conexiones
+
+
+class ConfiguracionBaseDatosTest(TestCase):
+    """Pruebas de la selección de base de datos por variables de entorno"""
+
+    def test_postgresql_por_defecto_con_conexiones_persistentes(self):
+        base = bases_de_datos({}, Path('/app'))['default']
+        self.assertEqual(base['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(base['NAME'], 'helpnex_db')
+        self.assertEqual(base['CONN_MAX_AGE'], 60)
+        self.assertTrue(base['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', base['OPTIONS'])
+
+    def test_pool_desactiva_conexiones_persistentes(self):
+        base = bases_de_datos({'HELPNEX_DB_POOL': '2,8', 'HELPNEX_DB_HOST': 'db'}, Path('/app'))['default']
+        self.assertEqual(base['HOST'], 'db')
+        self.assertEqual(base['CONN_MAX_AGE'], 0)
+        self.assertEqual(base['OPTIONS']['pool']['min_size'], 2)
+        self.assertEqual(base['OPTIONS']['pool']['max_size'], 8)
+
+    def test_perfil_sqlite(self):
+        base = bases_de_datos({'HELPNEX_DB': 'sqlite'}, Path('/app'))['default']
+        self.assertEqual(base['NAME'], Path('/app/db.sqlite3'))
+        self.assertIn('journal_mode=WAL', base['OPTIONS']['init_command'])
+        self.assertEqual(base['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        with self.assertRaises(ValueError):
+            bases_de_datos({'HELPNEX_DB': 'oracle'}, Path('/app'))
+
+
+class EstadoConexionesTest(TestCase):
+    """Pruebas del resumen de conexiones"""
+
+    def test_estado_de_la_conexion_actual(self):
+        estado = estado_conexiones()['default']
+        self.assertEqual(estado['motor'], connection.vendor)
+        self.assertTrue(estado['abierta'])
+
+    @skipUnless(connection.vendor == 'sqlite', "Solo con el perfil SQLite")
+    def test_pragmas_aplicados(self):
+        pragmas = estado_conexiones()['default']['pragmas']
+        self.assertEqual(pragmas['synchronous'], 1)  # NORMAL
+        self.assertEqual(pragmas['busy_timeout'], 5000)
+        self.assertEqual(pragmas['foreign_keys'], 1)
+
+    def test_endpoint_solo_superusuario(self):
+        User.objects.create_user(username="enfermera", password="1234")
+        self.client.login(username="enfermera", password="1234")
+        self.assertEqual(self.client.get(reverse("conexiones")).status_code, 302)
+
+        User.objects.create_superuser(username="admin", password="1234", email="admin@example.com")
+        self.client.login(username="admin", password="1234")
+        self.assertIn('default', self.client.get(reverse("conexiones")).json())
@@ -1,6 +1,10 @@
+from unittest import mock
+
+from django.shortcuts import get_object_or_404 # type: ignore
 from django.test import TestCase # type: ignore
 from django.urls import reverse # type: ignore
 from django.contrib.auth.models import User # type: ignore
+from monitoring.camas import asignar_cliente
 from monitoring.models import Zona, Cliente, Empleado
 
 class CRUDIntegrationTest(TestCase):
@@ -25,6 +29,27 @@ class CRUDIntegrationTest(TestCase):
         self.zona.refresh_from_db()
         self.assertEqual(self.zona.nombre, "Zona Editada")
 
+    def test_editar_zona_no_pisa_los_ingresos(self):
+        planta = Zona.objects.create(nombre="Planta", tipo=2, identificador="p1")
+        habitacion = Zona.objects.create(nombre="Hab", tipo=4, identificador="h1", zona_padre=planta, total_camas=2)
+        cliente = Cliente.objects.create(nombre="Ana", apellido1="García", documento="d1", identificador="c1")
+
+        def cargar_e_ingresar(*args, **kwargs):
+            # El ingreso llega después de que la vista lea la zona
+            zona = get_object_or_404(*args, **kwargs)
+            with self.captureOnCommitCallbacks(execute=True):
+                asignar_cliente(cliente.id, habitacion.id)
+            return zona
+
+        with mock.patch('monitoring.views.get_object_or_404', side_effect=cargar_e_ingresar):
+            respuesta = self.client.post(reverse("editar_zona", args=[habitacion.id]), {"nombre": "Hab 1", "tipo": "4"})
+        self.assertEqual(respuesta.status_code, 302)
+        for zona, ocupadas in ((habitacion, (1, 1)), (planta, (0, 1))):
+            self.assertEqual(
+                Zona.objects.values_list('camas_ocupadas', 'camas_ocupadas_subarbol').get(pk=zona.pk), ocupadas
+            )
+        self.assertEqual(Zona.objects.get(pk=habitacion.pk).nombre, "Hab 1")
+
     def test_eliminar_zona(self):
         response = self.client.get(reverse("eliminar_zona", args=[self.zona.id]))
         self.assertEqual(response.status_code, 302)
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User # type: ignore
+from django.test import TestCase # type: ignore
+from django.urls import reverse # type: ignore
+from monitoring.camas import asignar_cliente
+from monitoring.eventos import (
+    CAPACIDAD_COLA, Difusor, SuscripcionAsincrona, SuscripcionSincrona, diferencia_resumen, difusor,
+)
+from monitoring.models import Zona, Cliente
+
+
+def eventos(suscripcion):
+    """Vacía la cola de una suscripción síncrona: [(evento, datos)]."""
+    leidos = []
+    while not suscripcion.cola.empty():
+        evento, datos = suscripcion.cola.get_nowait().strip().split('\n')
+        leidos.append((evento.removeprefix('event: '), json.loads(datos.removeprefix('data: '))))
+    return leidos
+
+
+class DiferenciaResumenTest(TestCase):
+    """Pruebas del cálculo de cambios del resumen"""
+
+    def test_solo_lo_que_cambia(self):
+        anterior = {'total_clientes': 3, 'total_zonas': 2, 'clientes_por_zona': {'A': 2, 'B': 1}}
+        actual = {'total_clientes': 4, 'total_zonas': 2, 'clientes_por_zona': {'A': 3, 'C': 1}}
+        self.assertEqual(diferencia_resumen(anterior, actual), {
+            'total_clientes': 4,
+            'clientes_por_zona': {'A': 3, 'C': 1, 'B': None},
+        })
+        self.assertEqual(diferencia_resumen(actual, actual), {})
+        self.assertEqual(diferencia_resumen(None, actual), actual)
+
+
+class DifusorTest(TestCase):
+    """Pruebas del reparto de eventos entre pantallas"""
+
+    def setUp(self):
+        self.difusor = Difusor(espera=0.01)
+        self.planta = Zona.objects.create(nombre="Planta 1", tipo=2, identificador="p1")
+        self.hab = Zona.objects.create(nombre="Hab 1", tipo=4, identificador="h1",
+                                       zona_padre=self.planta, total_camas=2)
+        self.otra = Zona.objects.create(nombre="Planta 2", tipo=2, identificador="p2")
+        self.cliente = Cliente.objects.create(nombre="Ana", apellido1="X", documento="d1", identificador="c1")
+
+    def test_filtra_ocupacion_por_subarbol(self):
+        todo = self.difusor.suscribir(SuscripcionSincrona())
+        planta = self.difusor.suscribir(SuscripcionSincrona(self.planta.ruta))
+        otra = self.difusor.suscribir(SuscripcionSincrona(self.otra.ruta))
+        self.difusor.emitir({self.hab.id})
+
+        ids = [zona['id'] for evento, datos in eventos(todo) if evento == 'ocupacion' for zona in datos['zonas']]
+        self.assertEqual(ids, [self.planta.id, self.hab.id])
+        self.assertEqual(len(eventos(planta)), 3)  # dos zonas + resumen
+        self.assertEqual([evento for evento, _ in eventos(otra)], ['resumen'])
+
+    def test_resumen_solo_con_cambios(self):
+        suscripcion = self.difusor.suscribir(SuscripcionSincrona())
+        self.difusor.emitir(set())
+        self.assertEqual(eventos(suscripcion)[0][1]['total_clientes'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            asignar_cliente(self.cliente.id, self.hab.id)
+        self.difusor.emitir({self.hab.id})
+        leidos = dict(eventos(suscripcion)[-1:])
+        self.assertEqual(leidos['resumen']['camas_ocupadas'], 1)
+        self.assertNotIn('total_clientes', leidos['resumen'])
+
+        self.difusor.emitir(set())
+        self.assertEqual(eventos(suscripcion), [])
+
+    def test_agrupa_avisos_de_una_rafaga(self):
+        self.difusor.suscribir(SuscripcionSincrona())
+        emitido = threading.Event()
+        with mock.patch.object(self.difusor, 'emitir', side_effect=lambda ids: emitido.set()) as emitir:
+            self.difusor.notificar([self.hab.id])
+            self.difusor.notificar([self.planta.id, None])
+            self.assertTrue(emitido.wait(2))
+        emitir.assert_called_once_with({self.hab.id, self.planta.id})
+
+    def test_sin_suscriptores_no_hace_nada(self):
+        self.difusor.notificar([self.hab.id])
+        self.assertIsNone(self.difusor._temporizador)
+
+    def test_escrituras_avisan_tras_el_commit(self):
+        suscripcion = difusor.suscribir(SuscripcionSincrona())
+        try:
+            with mock.patch.object(difusor, 'notificar') as notificar:
+                with self.captureOnCommitCallbacks(execute=True):
+                    asignar_cliente(self.cliente.id, self.hab.id)
+                notificar.assert_any_call((None, self.hab.id), 'default')
+        finally:
+            difusor.desuscribir(suscripcion)
+
+    async def test_suscriptor_lento_se_corta(self):
+        suscripcion = SuscripcionAsincrona()
+        for _ in range(CAPACIDAD_COLA + 1):
+            suscripcion.entregar('event: x\n\n')
+        await asyncio.sleep(0)
+        self.assertTrue(suscripcion.cortada)
+        self.assertIsNone(await suscripcion.siguiente(1))
+
+
+class EventosVistaTest(TestCase):
+    """Pruebas del endpoint de eventos"""
+
+    def setUp(self):
+        User.objects.create_user(username="enfermera", password="1234")
+        self.planta = Zona.objects.create(nombre="Planta 1", tipo=2, identificador="p1")
+
+    def test_requiere_login(self):
+        self.assertEqual(self.client.get(reverse("eventos_ocupacion")).status_code, 302)
+
+    def test_estado_inicial_y_cierre(self):
+        self.client.login(username="enfermera", password="1234")
+        respuesta = self.client.get(reverse("eventos_ocupacion"), {'zona': self.planta.id})
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        self.assertEqual(respuesta['Cache-Control'], 'no-cache')
+
+        fragmentos = iter(respuesta.streaming_content)
+        self.assertTrue(next(fragmentos).startswith(b'retry:'))
+        self.assertIn(b'event: resumen', next(fragmentos))
+        self.assertIn(b'"Planta 1"', next(fragmentos))
+        self.assertEqual(difusor.suscriptores, 1)
+        respuesta.close()
+        self.assertEqual(difusor.suscriptores, 0)
+
+    def test_zona_invalida(self):
+        self.client.login(username="enfermera", password="1234")
+        self.assertEqual(self.client.get(reverse("eventos_ocupacion"), {'zona': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("eventos_ocupacion"), {'zona': 999999}).status_code, 400)
@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User # type: ignore
+from django.core.management import call_command # type: ignore
+from django.test import TestCase # type: ignore
+from django.urls import reverse # type: ignore
+from monitoring.models import Zona, Cliente, Contacto
+from monitoring.exportacion import filtrar_clientes, iterar_clientes
+
+
+class ExportacionClientesTest(TestCase):
+    """Pruebas de la exportación en streaming"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="1234", email="a@a.com")
+        self.client.login(username="admin", password="1234")
+        self.edificio = Zona.objects.create(nombre="Edificio A", tipo=1, identificador="e1")
+        self.hab = Zona.objects.create(nombre="Hab 1", tipo=4, identificador="h1", zona_padre=self.edificio)
+        self.otra = Zona.objects.create(nombre="Edificio B", tipo=1, identificador="e2")
+        for i in range(12):
+            cliente = Cliente.objects.create(
+                nombre=f"P{i}", apellido1="X", documento=f"d{i}", identificador=f"c{i}",
+                tipo_enfermedad="cardiaca" if i % 3 == 0 else "diabetes",
+                zona_asignada=self.hab if i < 8 else self.otra, alta=i % 2 == 0,
+            )
+            Contacto.objects.create(cliente=cliente, nombre=f"Fam{i}", apellido1="X",
+                                    identificador=f"k{i}", relacion=2, telefono="555")
+
+    def test_csv_en_streaming(self):
+        response = self.client.get(reverse("exportar_clientes"), {"formato": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        filas = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(len(filas), 12)
+        self.assertEqual(filas[0]["zona_nombre"], "Hab 1")
+        self.assertIn("Fam0 X (Hijo/a) 555", filas[0]["contactos"])
+
+    def test_filtros_en_sql_con_subarbol(self):
+        response = self.client.get(reverse("exportar_clientes"), {
+            "formato": "jsonl", "zona": self.edificio.id, "tipo_enfermedad": "diabetes", "alta": "1",
+        })
+        filas = [json.loads(l) for l in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual({f["documento"] for f in filas}, {"d2", "d4"})
+        self.assertEqual(filas[0]["contactos"][0]["relacion"], "Hijo/a")
+
+    def test_consultas_por_bloque_no_por_fila(self):
+        # Un solo cursor con JOIN a zona más un prefetch de contactos por bloque
+        with self.assertNumQueries(4):
+            filas = list(iterar_clientes(filtrar_clientes(), bloque=5))
+        self.assertEqual(len(filas), 12)
+
+    def test_formato_invalido(self):
+        response = self.client.get(reverse("exportar_clientes"), {"formato": "xml"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse("exportar_clientes"), {"zona": "abc"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_comando(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "clientes.jsonl")
+            salida = io.StringIO()
+            call_command("exportar_clientes", ruta, "--formato", "jsonl", "--alta", "no", stdout=salida)
+            with open(ruta, encoding="utf-8") as archivo:
+                self.assertEqual(len(archivo.readlines()), 6)
+        self.assertIn("Exportados 6", salida.getvalue())
+
+        # Con '-' las filas van a la salida del comando
+        salida = io.StringIO()
+        call_command("exportar_clientes", "--formato", "jsonl", "--alta", "si", stdout=salida)
+        self.assertEqual(len(salida.getvalue().splitlines()), 6)
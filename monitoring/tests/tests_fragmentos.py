@@ -0,0 +1,124 @@
+from django.contrib.auth.models import User # type: ignore
+from django.core.cache import cache # type: ignore
+from django.db import connection # type: ignore
+from django.test import TestCase, TransactionTestCase # type: ignore
+from django.test.utils import CaptureQueriesContext # type: ignore
+from django.urls import reverse # type: ignore
+from monitoring.models import Zona, Cliente, Empleado
+
+
+class FragmentosPanelTest(TestCase):
+    """Las secciones del panel admin se sirven desde caché hasta que cambian sus modelos"""
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser(username="admin", password="1234", email="admin@test.com")
+        self.client.login(username="admin", password="1234")
+        self.zona = Zona.objects.create(nombre="Sala A", tipo=4, identificador="z1")
+        Cliente.objects.create(nombre="Ana", apellido1="Díaz", documento="1", identificador="c1",
+                               zona_asignada=self.zona)
+        Empleado.objects.create(nombre="Rosa", apellido1="Vidal", cargo="Enfermera", identificador="e1")
+
+    def tearDown(self):
+        cache.clear()
+
+    def pedir(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("admin_panel"), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_segunda_visita_sin_consultas_de_datos(self):
+        _, primera = self.pedir()
+        response, segunda = self.pedir()
+        self.assertGreater(primera, segunda)
+        self.assertEqual(segunda, 2)  # sesión y usuario
+        self.assertContains(response, "Ana")
+
+    def test_escritura_invalida_solo_su_seccion(self):
+        self.pedir()
+        url = reverse("panel_seccion", args=["empleados"])
+        self.assertNotContains(self.client.get(url), "Marta")
+        Empleado.objects.create(nombre="Marta", apellido1="Soto", cargo="Médica", identificador="e2")
+        self.assertContains(self.client.get(url), "Marta")
+        # La sección de clientes no depende de empleados: sigue en caché
+        _, consultas = self.pedir()
+        self.assertEqual(consultas, 2)
+
+    def test_la_clave_incluye_los_parametros(self):
+        self.pedir()
+        Cliente.objects.bulk_create([  # sin señales: no cambia la versión
+            Cliente(nombre="Zoe", apellido1="X", documento="2", identificador="c2"),
+        ])
+        response, _ = self.pedir(clientes_orden="-nombre")
+        self.assertContains(response, "Zoe")
+
+
+class PaginaAnalisisTest(TransactionTestCase):
+    """La página de análisis completa se guarda por versiones del resumen"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username="enfermera", password="1234")
+        Zona.objects.create(nombre="UCI", tipo=4, identificador="z1")
+
+    def tearDown(self):
+        cache.clear()
+
+    async def test_pagina_en_cache_hasta_un_cambio(self):
+        await self.async_client.aforce_login(self.usuario)
+        primera = await self.async_client.get(reverse("analisis"))
+        segunda = await self.async_client.get(reverse("analisis"))
+        self.assertEqual(primera.content, segunda.content)
+        self.assertIsNone(segunda.context)  # no se volvió a renderizar
+
+        await Zona.objects.acreate(nombre="Pabellón", tipo=4, identificador="z2")
+        tercera = await self.async_client.get(reverse("analisis"))
+        self.assertIsNotNone(tercera.context)
+        self.assertEqual(tercera.context['total_zonas'], 2)
+
+
+class SeccionesPanelTest(TestCase):
+    """Cada sección del panel se pide por separado y llega por partes"""
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser(username="admin", password="1234", email="admin@test.com")
+        self.client.login(username="admin", password="1234")
+        Zona.objects.create(nombre="Sala A", tipo=4, identificador="z1")
+        Empleado.objects.create(nombre="Rosa", apellido1="Vidal", cargo="Enfermera", identificador="e1")
+        Cliente.objects.bulk_create([
+            Cliente(nombre=f"Paciente {i}", apellido1="X", documento=str(i), identificador=f"c{i}")
+            for i in range(120)
+        ])
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_pagina_solo_trae_la_seccion_activa(self):
+        response = self.client.get(reverse("admin_panel"))
+        self.assertContains(response, "Paciente 0")
+        self.assertNotContains(response, "Rosa")
+        self.assertContains(response, reverse("panel_seccion", args=["empleados"]))
+
+        response = self.client.get(reverse("admin_panel"), {"seccion": "empleados"})
+        self.assertContains(response, "Rosa")
+        self.assertNotContains(response, "Paciente 0")
+
+    def test_filas_por_lotes(self):
+        response = self.client.get(reverse("panel_seccion", args=["clientes"]), {"por_pagina": 120})
+        self.assertTrue(response.streaming)
+        partes = list(response.streaming_content)
+        # cabecera + 3 lotes de filas + pie
+        self.assertEqual(len(partes), 5)
+        self.assertIn(b"<thead>", partes[0])
+        self.assertIn(b"Paciente 119", b"".join(partes))
+
+        # Desde caché llega de una sola vez
+        response = self.client.get(reverse("panel_seccion", args=["clientes"]), {"por_pagina": 120})
+        self.assertEqual(len(list(response.streaming_content)), 1)
+
+    def test_seccion_vacia_y_desconocida(self):
+        response = self.client.get(reverse("panel_seccion", args=["zonas"]), {"zona": "No existe"})
+        self.assertIn(b"No hay zonas registradas.", b"".join(response.streaming_content))
+        self.assertEqual(self.client.get(reverse("panel_seccion", args=["camas"])).status_code, 404)
@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.core.management import call_command # type: ignore
+from django.core.management.base import CommandError # type: ignore
+from django.db.models import Sum # type: ignore
+from django.test import TestCase # type: ignore
+from monitoring.models import Zona, Cliente, Contacto, Empleado
+from monitoring.generacion import Generador
+
+
+class GeneracionDatosTest(TestCase):
+    """Pruebas del generador de hospitales sintéticos"""
+
+    def generar(self, **kwargs):
+        opciones = {'ramas': (2, 2, 3), 'pacientes': 40, 'empleados': 10, 'ocupacion': 0.5, 'lote': 7}
+        opciones.update(kwargs)
+        return Generador(**opciones).generar()
+
+    def huella(self, prefijo):
+        """Contenido generado, sin lo que depende del prefijo ni de los ids."""
+        clientes = Cliente.objects.filter(identificador__startswith=f'{prefijo}-').order_by('id')
+        return [
+            (c.nombre, c.apellido1, c.apellido2, c.fecha_nacimiento, c.tipo_enfermedad, c.telefono,
+             c.zona_asignada.identificador.split('-', 1)[1] if c.zona_asignada else None,
+             c.contactos.count())
+            for c in clientes.select_related('zona_asignada')
+        ]
+
+    def test_arbol_y_camas(self):
+        resultado = self.generar(semilla=3)
+        # 2 edificios, 4 plantas, 12 hojas (pasillos) con 4 camas cada una
+        self.assertEqual(resultado.zonas, 2 + 4 + 12)
+        self.assertEqual(resultado.camas, 48)
+        self.assertEqual(resultado.ingresados, 24)
+
+        edificios = Zona.objects.filter(tipo=1)
+        self.assertEqual(edificios.aggregate(t=Sum('total_camas_subarbol'))['t'], 48)
+        self.assertEqual(edificios.aggregate(o=Sum('camas_ocupadas_subarbol'))['o'], 24)
+        self.assertEqual(Cliente.objects.filter(zona_asignada__isnull=False, alta=False).count(), 24)
+        self.assertFalse(Zona.objects.filter(camas_ocupadas__gt=4).exists())
+        self.assertEqual(Zona.objects.get(identificador='g3-z1.2.3').ruta.count('/'), 4)
+        self.assertEqual(Empleado.objects.count(), 10)
+        self.assertEqual(Contacto.objects.count(), resultado.contactos)
+
+    def test_misma_semilla_mismos_datos(self):
+        self.generar(semilla=7, prefijo='a')
+        self.generar(semilla=7, prefijo='b')
+        self.generar(semilla=8, prefijo='c')
+        self.assertEqual(self.huella('a'), self.huella('b'))
+        self.assertNotEqual(self.huella('a'), self.huella('c'))
+
+    def test_arbol_hasta_cama(self):
+        resultado = self.generar(ramas=(1, 1, 1, 2, 2), pacientes=3, ocupacion=1)
+        self.assertEqual(resultado.camas, 4)
+        self.assertEqual(Zona.objects.filter(tipo=5, total_camas=1).count(), 4)
+        self.assertEqual(Cliente.objects.filter(zona_asignada__tipo=5).count(), 3)
+
+    def test_comando(self):
+        salida = StringIO()
+        call_command('generar_datos', '--ramas', '2,2', '--pacientes', '20', '--empleados', '3', stdout=salida)
+        self.assertIn("20 pacientes", salida.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('generar_datos', '--ramas', '2,2', '--pacientes', '5', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('generar_datos', '--ramas', '1,1,1,1,1,1', '--semilla', '2', stdout=StringIO())
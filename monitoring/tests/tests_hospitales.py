@@ -0,0 +1,280 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from asgiref.sync import async_to_sync # type: ignore
+from django.conf import settings # type: ignore
+from django.contrib.auth.models import User # type: ignore
+from django.core.cache import cache # type: ignore
+from django.core.management import call_command # type: ignore
+from django.core.management.base import CommandError # type: ignore
+from django.db import connections, router # type: ignore
+from django.test import TestCase, TransactionTestCase # type: ignore
+from django.urls import reverse # type: ignore
+from Helpnex.basedatos import alias_hospitales, alias_replicas, bases_de_datos
+from monitoring.analitica import aobtener_resumen_global, obtener_resumen
+from monitoring.camas import asignar_cliente
+from monitoring.eventos import Difusor, SuscripcionSincrona
+from monitoring.hospitales import COOKIE_HOSPITAL, HospitalDesconocido, atomica, en_hospital, hospital_activo
+from monitoring.identificadores import decodificar, nuevo_identificador
+from monitoring.models import Zona, Cliente, Contacto, Empleado, Movimiento, Secuencia
+from monitoring.respaldo import MANIFIESTO
+from monitoring.traspaso import traspasar_edificio
+
+
+CLAVES = ('norte', 'sur')
+
+
+def crear_edificio(nombre, camas=2):
+    """Edificio › Planta › Habitación con `camas` camas, en la base activa."""
+    edificio = Zona.objects.create(nombre=nombre, tipo=1, identificador=f"{nombre}-e")
+    planta = Zona.objects.create(nombre=f"{nombre} P1", tipo=2, identificador=f"{nombre}-p", zona_padre=edificio)
+    habitacion = Zona.objects.create(
+        nombre=f"{nombre} H1", tipo=4, identificador=f"{nombre}-h", zona_padre=planta, total_camas=camas
+    )
+    return edificio, planta, habitacion
+
+
+class ConfiguracionHospitalesTest(TestCase):
+    """Pruebas de la configuración de hospitales por variables de entorno"""
+
+    def test_hospitales_sqlite(self):
+        bases = bases_de_datos({
+            'HELPNEX_DB': 'sqlite',
+            'HELPNEX_SQLITE_HOSPITALES': 'norte=/tmp/n.sqlite3, sur = /tmp/s.sqlite3',
+            'HELPNEX_SQLITE_REPLICAS': '/tmp/r1.sqlite3',
+        }, Path('/app'))
+        self.assertEqual(alias_hospitales(bases), {'norte': 'hospital_norte', 'sur': 'hospital_sur'})
+        self.assertEqual(bases['hospital_sur']['NAME'], '/tmp/s.sqlite3')
+        self.assertEqual(bases['hospital_norte']['OPTIONS'], bases['default']['OPTIONS'])
+        # Cada hospital tiene su propia base de prueba, no es espejo de default
+        self.assertNotIn('TEST', bases['hospital_norte'])
+        self.assertEqual(alias_replicas(bases), ['replica1'])
+
+    def test_hospitales_postgresql(self):
+        bases = bases_de_datos({
+            'HELPNEX_DB_HOSPITALES': 'norte=helpnex_norte,sur=helpnex_sur@db2:6432',
+            'HELPNEX_DB_POOL': '2,8',
+        }, Path('/app'))
+        norte, sur = bases['hospital_norte'], bases['hospital_sur']
+        self.assertEqual((norte['NAME'], norte['HOST'], norte['PORT']), ('helpnex_norte', 'localhost', '5432'))
+        self.assertEqual((sur['NAME'], sur['HOST'], sur['PORT']), ('helpnex_sur', 'db2', '6432'))
+        self.assertEqual(sur['OPTIONS']['pool']['name'], 'helpnex-hospital_sur')
+        self.assertEqual(bases['default']['OPTIONS']['pool']['name'], 'helpnex')
+
+        with self.assertRaises(ValueError):
+            bases_de_datos({'HELPNEX_DB_HOSPITALES': 'norte'}, Path('/app'))
+
+
+class HospitalesTest(TransactionTestCase):
+    """
+    Dos hospitales en archivos SQLite temporales, añadidos a DATABASES solo
+    para estas pruebas y migrados como lo haría `migrate --database`
+    """
+
+    # Las bases de los hospitales no existen hasta setUpClass: '__all__' las
+    # incluye al vaciar tras cada prueba sin que el runner intente crearlas
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directorio = tempfile.mkdtemp()
+        entorno = {
+            'HELPNEX_DB': 'sqlite',
+            'HELPNEX_SQLITE_HOSPITALES': ','.join(f'{clave}={cls.directorio}/{clave}.sqlite3' for clave in CLAVES),
+        }
+        nuevas = {alias: base for alias, base in bases_de_datos(entorno, Path(cls.directorio)).items()
+                  if alias != 'default'}
+        # connections lee el mismo diccionario que settings.DATABASES
+        connections.configure_settings({'default': settings.DATABASES['default'], **nuevas})
+        settings.DATABASES.update(nuevas)
+        for alias in nuevas:
+            call_command('migrate', database=alias, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for clave in CLAVES:
+            alias = f'hospital_{clave}'
+            connections[alias].close()
+            del connections[alias]
+            del settings.DATABASES[alias]
+        shutil.rmtree(cls.directorio)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_consultas_y_transacciones_en_el_hospital_activo(self):
+        with en_hospital('norte'):
+            self.assertEqual(hospital_activo(), 'norte')
+            _, _, habitacion = crear_edificio("Norte")
+            cliente = Cliente.objects.create(nombre="Ana", apellido1="X", documento="d1", identificador="c1")
+            # select_for_update y la transacción van a la base del hospital
+            asignar_cliente(cliente.id, habitacion.id)
+
+        self.assertIsNone(hospital_activo())
+        self.assertEqual(Zona.objects.count(), 0)
+        self.assertEqual(Zona.objects.en_hospital('sur').count(), 0)
+        cliente = Cliente.objects.en_hospital('norte').get()
+        # Lo relacionado con una fila del hospital se lee del hospital
+        self.assertEqual(cliente.zona_asignada.camas_ocupadas, 1)
+        self.assertEqual(cliente.zona_asignada.zona_padre.zona_padre.camas_ocupadas_subarbol, 1)
+        self.assertEqual(Movimiento.objects.en_hospital('norte').count(), 1)
+
+        with self.assertRaises(HospitalDesconocido):
+            Zona.objects.en_hospital('este')
+        self.assertFalse(router.allow_migrate('hospital_norte', 'auth'))
+        self.assertTrue(router.allow_migrate('hospital_norte', 'monitoring'))
+
+    def test_secuencia_global(self):
+        def valores(alias):
+            return list(Secuencia.objects.using(alias).values_list('valor', flat=True))
+
+        en_norte = valores('hospital_norte')
+        with en_hospital('norte'), atomica():
+            identificador = nuevo_identificador()
+            self.assertIsNotNone(identificador)
+            Zona.objects.create(nombre="Norte", tipo=1, identificador=identificador)
+        # Los números salen de la primaria, con la transacción del hospital abierta o no
+        self.assertGreaterEqual(valores('default')[0], decodificar(identificador))
+        self.assertEqual(valores('hospital_norte'), en_norte)
+
+    def test_cache_separada_y_resumen_global(self):
+        for clave, zonas in (('norte', 1), ('sur', 2)):
+            with en_hospital(clave):
+                for numero in range(zonas):
+                    crear_edificio(f"{clave}{numero}")
+                cache.set('monitoring:prueba', clave)
+                Empleado.objects.create(nombre="E", apellido1="X", cargo="Auxiliar", identificador=f"{clave}-e")
+
+        with en_hospital('norte'):
+            self.assertEqual(cache.get('monitoring:prueba'), 'norte')
+            self.assertEqual(obtener_resumen()['total_zonas'], 3)
+        with en_hospital('sur'):
+            self.assertEqual(obtener_resumen()['total_zonas'], 6)
+        self.assertIsNone(cache.get('monitoring:prueba'))
+
+        resumen, por_base = async_to_sync(aobtener_resumen_global)()
+        self.assertEqual(list(por_base), ['default', 'hospital_norte', 'hospital_sur'])
+        self.assertEqual(resumen['total_zonas'], 9)
+        self.assertEqual(resumen['camas_totales'], 6)
+        self.assertEqual(resumen['total_empleados'], 2)
+        self.assertEqual(resumen['empleados_por_cargo'], {'Auxiliar': 2})
+
+    def test_ocupacion_en_vivo_por_hospital(self):
+        # Los ids de zona se repiten en las dos bases
+        with en_hospital('norte'):
+            _, _, habitacion = crear_edificio("Norte")
+        with en_hospital('sur'):
+            crear_edificio("Sur")
+        difusor = Difusor(espera=0.01)
+        norte = difusor.suscribir(SuscripcionSincrona(base='hospital_norte'))
+        sur = difusor.suscribir(SuscripcionSincrona(base='hospital_sur'))
+
+        # El temporizador emite en su hilo, sin el hospital activo de quien avisa
+        with en_hospital('norte'):
+            difusor.notificar([habitacion.id])
+        eventos = [norte.siguiente(2) for _ in range(4)]
+        self.assertEqual([texto.split('\n')[0] for texto in eventos], ['event: ocupacion'] * 3 + ['event: resumen'])
+        self.assertIn('"Norte H1"', eventos[2])
+        self.assertIn('"total_zonas": 3', eventos[3])
+        self.assertTrue(sur.cola.empty())
+        self.assertEqual(list(difusor._ultimo_resumen), ['hospital_norte'])
+
+    def test_vistas_por_hospital(self):
+        User.objects.create_superuser(username="admin", password="1234")
+        self.client.login(username="admin", password="1234")
+        with en_hospital('norte'):
+            crear_edificio("Norte")
+        with en_hospital('sur'):
+            crear_edificio("Sur")
+
+        inicio = self.client.get(reverse('main'))
+        self.assertContains(inicio, "Por hospital")
+        self.assertContains(inicio, 'href="?hospital=sur"')
+
+        respuesta = self.client.get(reverse('admin_panel'), {'hospital': 'sur', 'seccion': 'zonas'})
+        self.assertEqual(respuesta.cookies[COOKIE_HOSPITAL].value, 'sur')
+        contenido = b''.join(respuesta.streaming_content) if respuesta.streaming else respuesta.content
+        self.assertIn(b"Sur H1", contenido)
+        self.assertNotIn(b"Norte H1", contenido)
+
+        # La cookie recuerda el hospital; ?hospital= vuelve a la vista de todos
+        self.assertNotContains(self.client.get(reverse('main')), "Por hospital")
+        self.assertContains(self.client.get(reverse('main'), {'hospital': ''}), "Por hospital")
+
+    def test_traspaso_de_edificio(self):
+        edificio, _, habitacion = crear_edificio("Este")
+        otro, _, _ = crear_edificio("Oeste")
+        clientes = [
+            Cliente.objects.create(nombre="P", apellido1="X", documento=f"d{i}", identificador=f"c{i}")
+            for i in range(2)
+        ]
+        for cliente in clientes:
+            asignar_cliente(cliente.id, habitacion.id)
+        Contacto.objects.create(cliente=clientes[0], nombre="C", apellido1="X", identificador="k1")
+        Empleado.objects.create(nombre="E", apellido1="X", cargo="Auxiliar", identificador="e1", zona_asignada=habitacion)
+
+        resultado = traspasar_edificio(edificio.identificador, 'norte')
+        self.assertEqual(
+            (resultado.zonas, resultado.clientes, resultado.contactos, resultado.empleados, resultado.movimientos),
+            (3, 2, 1, 1, 2),
+        )
+        # En el origen solo quedan el otro edificio y el historial
+        self.assertEqual(list(Zona.objects.filter(zona_padre=None).values_list('id', flat=True)), [otro.id])
+        self.assertEqual((Cliente.objects.count(), Contacto.objects.count(), Empleado.objects.count()), (0, 0, 0))
+        self.assertEqual(Zona.objects.count(), 3)
+        self.assertEqual(Movimiento.objects.count(), 2)
+
+        with en_hospital('norte'):
+            habitacion = Zona.objects.get(nombre="Este H1")
+            planta = habitacion.zona_padre
+            self.assertEqual(habitacion.ruta, f'/{planta.zona_padre_id}/{planta.id}/{habitacion.id}/')
+            self.assertEqual((habitacion.camas_ocupadas, planta.camas_ocupadas_subarbol), (2, 2))
+            self.assertEqual(Cliente.objects.filter(zona_asignada=habitacion).count(), 2)
+            self.assertEqual(Contacto.objects.get().cliente.documento, "d0")
+            self.assertEqual(Empleado.objects.get().zona_asignada, habitacion)
+            self.assertEqual(set(Movimiento.objects.values_list('zona_nueva_id', flat=True)), {habitacion.id})
+
+        # De un hospital a otro, y sin repetir nombres en el destino
+        traspasar_edificio(edificio.identificador, 'sur', desde='norte')
+        self.assertEqual(Zona.objects.en_hospital('norte').count(), 0)
+        self.assertEqual(Cliente.objects.en_hospital('sur').count(), 2)
+        with en_hospital('sur'):
+            crear_edificio("Oeste2")
+        with self.assertRaises(Zona.DoesNotExist):
+            traspasar_edificio(edificio.identificador, 'sur')
+
+    def test_respaldo_de_un_hospital(self):
+        with en_hospital('norte'):
+            _, _, habitacion = crear_edificio("Norte")
+            cliente = Cliente.objects.create(nombre="Ana", apellido1="X", documento="d1", identificador="c1")
+            asignar_cliente(cliente.id, habitacion.id)
+        destino = Path(self.directorio) / 'respaldo-norte'
+
+        call_command('respaldar', str(destino), hospital='norte', stdout=StringIO())
+        manifiesto = json.loads((destino / MANIFIESTO).read_text(encoding='utf-8'))
+        self.assertEqual(manifiesto['base'], 'hospital_norte')
+        # La secuencia es global: no viaja con un hospital
+        self.assertNotIn('monitoring.Secuencia', manifiesto['tablas'])
+        self.assertEqual(manifiesto['tablas']['monitoring.Zona']['filas'], 3)
+
+        call_command('restaurar', str(destino), hospital='sur', stdout=StringIO())
+        self.assertEqual(
+            list(Zona.objects.en_hospital('sur').order_by('id').values_list('nombre', 'camas_ocupadas_subarbol')),
+            list(Zona.objects.en_hospital('norte').order_by('id').values_list('nombre', 'camas_ocupadas_subarbol')),
+        )
+        self.assertEqual(Cliente.objects.en_hospital('sur').get().zona_asignada.nombre, "Norte H1")
+        self.assertEqual(Zona.objects.count(), 0)
+
+    def test_comandos_con_hospital(self):
+        call_command('generar_datos', hospital='sur', ramas='1,2', pacientes=3, empleados=2, stdout=StringIO())
+        self.assertEqual(Zona.objects.en_hospital('sur').count(), 3)
+        self.assertEqual(Cliente.objects.en_hospital('sur').count(), 3)
+        self.assertEqual(Zona.objects.count(), 0)
+
+        with self.assertRaises(CommandError):
+            call_command('reconstruir_jerarquia', hospital='este')
@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.contrib.auth.models import User # type: ignore
+from django.db import connection, transaction # type: ignore
+from django.test import TestCase, TransactionTestCase # type: ignore
+from django.test.utils import CaptureQueriesContext # type: ignore
+from django.urls import reverse # type: ignore
+from monitoring.benchmarks import medir_identificadores
+from monitoring.identificadores import (
+    LONGITUD, Asignador, codificar, decodificar, completar_identificadores, nuevo_identificador,
+)
+from monitoring.importacion import importar
+from monitoring.models import Zona, Empleado, Secuencia
+
+
+class Revertir(Exception):
+    pass
+
+
+class CodificacionTest(TestCase):
+    """Pruebas del formato de los identificadores"""
+
+    def test_ancho_fijo_y_orden_de_texto(self):
+        numeros = [1, 31, 32, 1023, 1024, 10**9, 2**50 - 1]
+        textos = [codificar(n) for n in numeros]
+        self.assertTrue(all(len(t) == LONGITUD for t in textos))
+        self.assertEqual(textos, sorted(textos))
+        self.assertEqual([decodificar(t) for t in textos], numeros)
+        with self.assertRaises(ValueError):
+            codificar(2**50)
+
+
+class AsignadorTest(TransactionTestCase):
+    """Reserva de bloques fuera de transacciones (se confirman al momento)"""
+
+    def test_bloque_por_proceso(self):
+        asignador = Asignador('prueba', bloque=10)
+        with CaptureQueriesContext(connection) as ctx:
+            identificadores = [asignador.siguiente() for _ in range(25)]
+        self.assertEqual(len(set(identificadores)), 25)
+        self.assertEqual(identificadores, sorted(identificadores))
+        # Tres reservas de 10 (cada una: UPDATE + SELECT, más la creación de la fila la primera vez)
+        self.assertLessEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]), 4)
+        self.assertEqual(Secuencia.objects.get(nombre='prueba').valor, 30)
+
+    def test_dos_asignadores_no_se_pisan(self):
+        a, b = Asignador('prueba', bloque=5), Asignador('prueba', bloque=5)
+        identificadores = [x for _ in range(12) for x in (a.siguiente(), b.siguiente())]
+        self.assertEqual(len(set(identificadores)), 24)
+
+    def test_con_transaccion_abierta_reserva_en_otra_conexion(self):
+        # Lo que haría PostgreSQL (SQLite tiene un solo escritor y no puede):
+        # las reservas van a otra conexión y la transacción no toca la secuencia
+        asignador = Asignador('prueba', bloque=10)
+        aparte = mock.Mock(side_effect=[1, 11])
+        with mock.patch('monitoring.identificadores._conexion_aparte', return_value=True), \
+                mock.patch('monitoring.identificadores._reservar_aparte', aparte):
+            with self.assertRaises(Revertir), CaptureQueriesContext(connection) as ctx, transaction.atomic():
+                entregados = [asignador.siguiente() for _ in range(3)]
+                entregados += asignador.reservar(5)
+                raise Revertir
+            # El bloque sigue valiendo tras la reversión: quedan huecos, no repetidos
+            entregados.append(asignador.siguiente())
+        self.assertEqual([llamada.args for llamada in aparte.call_args_list], [(10, 'prueba'), (5, 'prueba')])
+        self.assertFalse([q for q in ctx.captured_queries if 'secuencia' in q['sql']])
+        self.assertEqual([decodificar(i) for i in entregados], [1, 2, 3, 11, 12, 13, 14, 15, 4])
+
+    def test_carga_masiva_en_una_reserva(self):
+        identificadores = Asignador('prueba').reservar(1000)
+        self.assertEqual(len(identificadores), 1000)
+        self.assertEqual(decodificar(identificadores[-1]) - decodificar(identificadores[0]), 999)
+        self.assertEqual(Asignador('prueba').reservar(0), [])
+
+
+class UsoDelAsignadorTest(TestCase):
+    """Todos los caminos de creación usan el asignador"""
+
+    def test_transaccion_revertida_no_deja_numeros_en_memoria(self):
+        asignador = Asignador('prueba', bloque=50)
+        asignador.siguiente()
+        self.assertEqual(asignador._limite, 0)  # dentro de TestCase siempre hay transacción abierta
+
+    def test_vistas_api_e_importacion(self):
+        User.objects.create_superuser(username="admin", password="1234", email="admin@test.com")
+        self.client.login(username="admin", password="1234")
+        self.client.post(reverse("agregar_zona"), {"nombre": "UCI", "tipo": "1"})
+        self.client.post(reverse("zona-list"), {"nombre": "Pabellón", "tipo": 1})
+        importar('empleados', ({"nombre": f"E{i}", "apellido1": "X", "cargo": "Enfermera"} for i in range(3)))
+
+        identificadores = list(Zona.objects.values_list('identificador', flat=True)) + list(
+            Empleado.objects.values_list('identificador', flat=True)
+        )
+        self.assertEqual(len(identificadores), 5)
+        self.assertTrue(all(len(i) == LONGITUD for i in identificadores))
+        self.assertEqual(len(set(identificadores)), 5)
+
+    def test_completar_respeta_los_existentes(self):
+        zonas = completar_identificadores([Zona(nombre="A"), Zona(nombre="B", identificador="propio")])
+        self.assertEqual(len(zonas[0].identificador), LONGITUD)
+        self.assertEqual(zonas[1].identificador, "propio")
+        self.assertGreater(nuevo_identificador(), zonas[0].identificador)
+
+
+class BenchmarkIdentificadoresTest(TestCase):
+    """El benchmark compara las estrategias sobre una tabla temporal"""
+
+    def test_secuencia_siempre_al_final_del_indice(self):
+        r = medir_identificadores('secuencia (ahora)', 300, lote=100)
+        self.assertEqual(r['al_final'], 1.0)
+        self.assertEqual(r['colisiones'], 0)
+        self.assertLess(medir_identificadores('uuid4().hex (antes)', 300)['al_final'], 0.5)
+        self.assertFalse(Secuencia.objects.filter(nombre='benchmark').exists())
@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command # type: ignore
+from django.test import TestCase # type: ignore
+from monitoring.camas import asignar_cliente
+from monitoring.identificadores import completar_identificadores
+from monitoring.models import Zona, Cliente, Empleado
+from monitoring import importacion
+from monitoring.importacion import importar
+
+
+class ImportacionMasivaTest(TestCase):
+    """Pruebas del comando de importación por lotes"""
+
+    def escribir(self, nombre, contenido):
+        ruta = os.path.join(self.directorio.name, nombre)
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        return ruta
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_zonas_con_padres_declarados_despues(self):
+        ruta = self.escribir("zonas.csv", (
+            "identificador,nombre,tipo,zona_padre,total_camas\n"
+            "h1,Hab 1,4,p1,2\n"
+            "p1,Planta 1,2,e1,0\n"
+            "e1,Edificio A,1,,0\n"
+            "h2,Hab 2,4,p1,3\n"
+        ))
+        call_command('importar', 'zonas', ruta, '--lote', '2', stdout=StringIO())
+
+        edificio = Zona.objects.get(identificador="e1")
+        self.assertEqual(Zona.objects.get(identificador="h1").zona_padre.identificador, "p1")
+        self.assertEqual(edificio.total_camas_subarbol, 5)
+        self.assertEqual(edificio.descendientes().count(), 3)
+
+    def test_clientes_jsonl_con_rechazos(self):
+        hab = Zona.objects.create(nombre="Hab 1", tipo=4, identificador="h1", total_camas=2)
+        Cliente.objects.create(nombre="Ya", apellido1="Existe", documento="D0", identificador="c0")
+        filas = [
+            {"nombre": "Ana", "apellido1": "Paz", "documento": "D1", "zona": "h1", "tipo_enfermedad": "cardiaca"},
+            {"nombre": "Luis", "apellido1": "Rey", "documento": "D2", "zona": "Hab 1"},
+            {"nombre": "Eva", "apellido1": "Sol", "documento": "D3", "zona": "h1"},
+            {"nombre": "Repetido", "apellido1": "X", "documento": "D0"},
+            {"nombre": "Otro", "apellido1": "X", "documento": "D1"},
+            {"nombre": "Sin", "apellido1": "Zona", "documento": "D4", "zona": "no-existe"},
+            {"apellido1": "SinNombre", "documento": "D5"},
+            {"nombre": "Mal", "apellido1": "X", "documento": "D6", "tipo_enfermedad": "gripe"},
+        ]
+        ruta = self.escribir("clientes.jsonl", "\n".join(json.dumps(f) for f in filas) + "\n{roto\n")
+        rechazos = os.path.join(self.directorio.name, "rechazos.csv")
+
+        salida = StringIO()
+        call_command('importar', 'clientes', ruta, '--lote', '3', '--rechazos', rechazos, stdout=salida)
+
+        self.assertEqual(set(Cliente.objects.values_list('documento', flat=True)), {"D0", "D1", "D2"})
+        hab.refresh_from_db()
+        self.assertEqual(hab.camas_ocupadas, 2)
+        self.assertEqual(hab.clientes.count(), 2)
+        with open(rechazos, encoding='utf-8') as archivo:
+            self.assertEqual(len(archivo.readlines()), 7)
+        self.assertIn("filas/s", salida.getvalue())
+
+    def test_ingresos_durante_la_importacion(self):
+        hab = Zona.objects.create(nombre="Hab 1", tipo=4, identificador="h1", total_camas=3)
+        ingresado = Cliente.objects.create(nombre="Ya", apellido1="Ingresado", documento="D0", identificador="c0")
+
+        def completar_e_ingresar(objetos):
+            # Un ingreso llega después de que la importación leyera las camas libres
+            completar_identificadores(objetos)
+            if not Cliente.objects.filter(zona_asignada=hab).exists():
+                asignar_cliente(ingresado.id, hab.id)
+
+        rechazos = []
+        with mock.patch.object(importacion, 'completar_identificadores', side_effect=completar_e_ingresar):
+            resultado = importar('clientes', (
+                {"nombre": f"P{i}", "apellido1": "X", "documento": f"D{i}", "zona": "h1"} for i in range(1, 4)
+            ), rechazar=lambda fila, motivo: rechazos.append((fila['documento'], motivo)))
+
+        self.assertEqual((resultado.insertadas, resultado.rechazadas), (2, 1))
+        self.assertEqual(rechazos, [("D3", "la zona no tiene camas libres")])
+        hab.refresh_from_db()
+        self.assertEqual((hab.camas_ocupadas, hab.clientes.count()), (3, 3))
+
+    def test_empleados_desde_iterable(self):
+        Zona.objects.create(nombre="UCI", tipo=7, identificador="z1")
+        resultado = importar('empleados', (
+            {"nombre": f"E{i}", "apellido1": "X", "cargo": "Enfermera", "zona": "UCI", "activo": "0"}
+            for i in range(25)
+        ), lote=10)
+        self.assertEqual(resultado.insertadas, 25)
+        self.assertEqual(Empleado.objects.filter(activo=False, zona_asignada__nombre="UCI").count(), 25)
@@ -0,0 +1,79 @@
+from django.core.exceptions import ValidationError # type: ignore
+from django.core.management import call_command # type: ignore
+from django.db import connection # type: ignore
+from django.test import TestCase # type: ignore
+from django.test.utils import CaptureQueriesContext # type: ignore
+from io import StringIO
+from monitoring.models import Zona
+
+
+class JerarquiaZonasTest(TestCase):
+    """Pruebas de la ruta materializada y los acumulados de camas"""
+
+    def setUp(self):
+        self.edificio = Zona.objects.create(nombre="Edificio A", tipo=1, identificador="z1")
+        self.planta = Zona.objects.create(nombre="Planta 1", tipo=2, identificador="z2", zona_padre=self.edificio)
+        self.hab1 = Zona.objects.create(nombre="Hab 1", tipo=4, identificador="z3", zona_padre=self.planta,
+                                        total_camas=4, camas_ocupadas=1)
+        self.hab2 = Zona.objects.create(nombre="Hab 2", tipo=4, identificador="z4", zona_padre=self.planta,
+                                        total_camas=2, camas_ocupadas=2)
+        self.otro = Zona.objects.create(nombre="Edificio B", tipo=1, identificador="z5")
+
+    def recargar(self, *zonas):
+        for zona in zonas:
+            zona.refresh_from_db()
+
+    def test_ruta_y_profundidad(self):
+        self.recargar(self.hab1)
+        self.assertEqual(self.hab1.ruta, f"/{self.edificio.id}/{self.planta.id}/{self.hab1.id}/")
+        self.assertEqual(self.hab1.profundidad, 2)
+        self.assertEqual(list(self.hab1.ancestros()), [self.edificio, self.planta])
+
+    def test_subarbol_en_una_consulta(self):
+        with CaptureQueriesContext(connection) as ctx:
+            nombres = set(self.edificio.descendientes().values_list('nombre', flat=True))
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(nombres, {"Planta 1", "Hab 1", "Hab 2"})
+
+    def test_acumulados_en_ancestros(self):
+        self.recargar(self.edificio, self.planta)
+        self.assertEqual(self.edificio.total_camas_subarbol, 6)
+        self.assertEqual(self.edificio.camas_ocupadas_subarbol, 3)
+        self.assertEqual(self.edificio.camas_libres_subarbol, 3)
+
+        self.hab1.camas_ocupadas = 4
+        self.hab1.save()
+        self.recargar(self.edificio, self.planta)
+        self.assertEqual(self.planta.camas_ocupadas_subarbol, 6)
+        self.assertEqual(self.edificio.camas_libres_subarbol, 0)
+
+    def test_reubicar_subarbol(self):
+        self.planta.zona_padre = self.otro
+        self.planta.save()
+        self.recargar(self.edificio, self.otro, self.hab2)
+
+        self.assertEqual(self.hab2.ruta, f"/{self.otro.id}/{self.planta.id}/{self.hab2.id}/")
+        self.assertEqual(self.edificio.total_camas_subarbol, 0)
+        self.assertEqual(self.otro.total_camas_subarbol, 6)
+        self.assertEqual(self.otro.camas_ocupadas_subarbol, 3)
+
+    def test_no_permite_ciclos(self):
+        self.edificio.zona_padre = self.hab1
+        with self.assertRaises(ValidationError):
+            self.edificio.save()
+
+    def test_eliminar_convierte_hijas_en_raices(self):
+        self.planta.delete()
+        self.recargar(self.edificio, self.hab1)
+        self.assertEqual(self.hab1.ruta, f"/{self.hab1.id}/")
+        self.assertEqual(self.hab1.profundidad, 0)
+        self.assertEqual(self.edificio.total_camas_subarbol, 0)
+
+    def test_reconstruir_coincide_con_incremental(self):
+        esperado = list(Zona.objects.order_by('id').values_list(
+            'ruta', 'profundidad', 'total_camas_subarbol', 'camas_ocupadas_subarbol'))
+        Zona.objects.update(ruta='', profundidad=0, total_camas_subarbol=0, camas_ocupadas_subarbol=0)
+        call_command('reconstruir_jerarquia', stdout=StringIO())
+        obtenido = list(Zona.objects.order_by('id').values_list(
+            'ruta', 'profundidad', 'total_camas_subarbol', 'camas_ocupadas_subarbol'))
+        self.assertEqual(obtenido, esperado)
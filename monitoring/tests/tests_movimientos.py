@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta, timezone as tz
+from unittest import mock
+
+from django.contrib.auth.models import User # type: ignore
+from django.test import TestCase # type: ignore
+from django.urls import reverse # type: ignore
+from monitoring.camas import asignar_cliente, trasladar_cliente, liberar_cliente
+from monitoring.importacion import importar
+from monitoring.models import Zona, Cliente, Movimiento
+from monitoring.movimientos import MAX_NIVEL, estancias, nivel_de, ocupacion_en
+from monitoring.tests.tests_camas import crear_planta, crear_clientes
+
+INICIO = datetime(2026, 3, 2, 8, 0, tzinfo=tz.utc)
+
+
+def a_las(horas):
+    return INICIO + timedelta(hours=horas)
+
+
+class NivelTest(TestCase):
+    """Pruebas del nivel de duración de una estancia"""
+
+    def test_la_duracion_cabe_en_su_nivel(self):
+        for minutos in (0, 1, 2, 3, 4, 5, 90, 60 * 24 * 400):
+            nivel = nivel_de(INICIO, INICIO + timedelta(minutes=minutos))
+            self.assertLessEqual(minutos, 2 ** nivel)
+            self.assertLessEqual(nivel, MAX_NIVEL)
+            if nivel:
+                self.assertGreater(minutos, 2 ** (nivel - 1))
+        self.assertEqual(nivel_de(None, INICIO), Movimiento.NIVEL_DESCONOCIDO)
+
+
+class MovimientosTest(TestCase):
+    """Pruebas del historial de movimientos y las consultas por instante y rango"""
+
+    def setUp(self):
+        self.planta, (self.hab1, self.hab2) = crear_planta([2, 2])
+        self.otra = Zona.objects.create(nombre="Planta 2", tipo=2, identificador="p2")
+        self.c1, self.c2 = crear_clientes(2)
+
+    def mover(self, horas, cliente, zona):
+        with mock.patch('django.utils.timezone.now', return_value=a_las(horas)):
+            trasladar_cliente(cliente.id, zona.id if zona else None)
+
+    def ids(self, resultado):
+        return [(e.cliente_id, e.zona_id) for e in resultado]
+
+    def test_cada_cambio_anota_un_movimiento(self):
+        self.mover(0, self.c1, self.hab1)
+        self.mover(5, self.c1, self.hab2)
+        self.mover(5, self.c1, self.hab2)  # sin cambio: sin fila
+        self.mover(9, self.c1, None)
+
+        filas = list(Movimiento.objects.order_by('id').values_list('zona_anterior', 'zona_nueva', 'desde', 'momento'))
+        self.assertEqual(filas, [
+            (None, self.hab1.id, None, a_las(0)),
+            (self.hab1.id, self.hab2.id, a_las(0), a_las(5)),
+            (self.hab2.id, None, a_las(5), a_las(9)),
+        ])
+        self.c1.refresh_from_db()
+        self.assertIsNone(self.c1.en_zona_desde)
+
+    def test_ocupacion_en_un_instante(self):
+        self.mover(0, self.c1, self.hab1)
+        self.mover(1, self.c2, self.hab2)
+        self.mover(24 * 30, self.c1, self.hab2)
+        self.mover(24 * 31, self.c2, self.otra)
+
+        self.assertEqual(self.ids(ocupacion_en(a_las(2), self.planta.ruta)), [(self.c1.id, self.hab1.id), (self.c2.id, self.hab2.id)])
+        self.assertEqual(self.ids(ocupacion_en(a_las(2), self.hab1.ruta)), [(self.c1.id, self.hab1.id)])
+        self.assertEqual(self.ids(ocupacion_en(a_las(0.5), self.planta.ruta)), [(self.c1.id, self.hab1.id)])
+        # La salida cierra la estancia: en ese instante ya está en la nueva zona
+        self.assertEqual(self.ids(ocupacion_en(a_las(24 * 30), self.hab1.ruta)), [])
+        self.assertEqual(self.ids(ocupacion_en(a_las(24 * 40), self.planta.ruta)), [(self.c1.id, self.hab2.id)])
+        self.assertEqual(self.ids(ocupacion_en(a_las(24 * 40), self.otra.ruta)), [(self.c2.id, self.otra.id)])
+        self.assertEqual(ocupacion_en(a_las(-1)), [])
+
+    def test_estancias_en_un_rango(self):
+        self.mover(0, self.c1, self.hab1)
+        self.mover(3, self.c1, self.hab2)
+        self.mover(10, self.c1, None)
+        self.mover(20, self.c2, self.hab1)
+
+        resultado = estancias(a_las(2), a_las(4), self.planta.ruta)
+        self.assertEqual(
+            [(e.zona_id, e.desde, e.hasta) for e in resultado],
+            [(self.hab1.id, a_las(0), a_las(3)), (self.hab2.id, a_las(3), a_las(10))],
+        )
+        self.assertEqual(self.ids(estancias(a_las(11), a_las(19))), [])
+        self.assertEqual(self.ids(estancias(a_las(11), a_las(21))), [(self.c2.id, self.hab1.id)])
+
+    def test_estancias_anteriores_al_registro(self):
+        # Asignado antes de que existiera el historial: se desconoce su entrada
+        Cliente.objects.filter(pk=self.c1.id).update(zona_asignada=self.hab1)
+        self.assertEqual(self.ids(ocupacion_en(a_las(-1000))), [(self.c1.id, self.hab1.id)])
+
+        self.mover(2, self.c1, self.hab2)
+        self.assertEqual(Movimiento.objects.get(zona_anterior=self.hab1).nivel, Movimiento.NIVEL_DESCONOCIDO)
+        self.assertEqual(self.ids(ocupacion_en(a_las(1))), [(self.c1.id, self.hab1.id)])
+        self.assertEqual(self.ids(ocupacion_en(a_las(3))), [(self.c1.id, self.hab2.id)])
+
+    def test_fallo_revierte_el_movimiento(self):
+        asignar_cliente(self.c1.id, self.hab1.id)
+        with self.assertRaises(Zona.DoesNotExist):
+            trasladar_cliente(self.c1.id, 999999)
+        self.assertEqual(Movimiento.objects.count(), 1)
+
+    def test_eliminar_cierra_estancias(self):
+        asignar_cliente(self.c1.id, self.hab1.id)
+        asignar_cliente(self.c2.id, self.hab2.id)
+        c1, hab2 = self.c1.id, self.hab2.id
+        Cliente.objects.get(pk=c1).delete()
+        self.hab2.delete()
+
+        salidas = Movimiento.objects.filter(zona_nueva__isnull=True).order_by('cliente_id')
+        self.assertEqual(list(salidas.values_list('cliente_id', 'zona_anterior_id')), [
+            (c1, self.hab1.id), (self.c2.id, hab2),
+        ])
+        self.assertEqual(ocupacion_en(a_las(24 * 365 * 10)), [])
+
+    def test_solo_inserciones(self):
+        liberar_cliente(self.c1.id)
+        asignar_cliente(self.c1.id, self.hab1.id)
+        movimiento = Movimiento.objects.get()
+        with self.assertRaises(TypeError):
+            movimiento.save()
+        with self.assertRaises(TypeError):
+            movimiento.delete()
+        with self.assertRaises(TypeError):
+            Movimiento.objects.update(zona_nueva=None)
+        with self.assertRaises(TypeError):
+            Movimiento.objects.all().delete()
+
+    def test_importacion_anota_ingresos(self):
+        importar('clientes', [{'nombre': 'Ana', 'apellido1': 'X', 'documento': 'i1', 'zona': self.hab1.identificador}])
+        cliente = Cliente.objects.get(documento='i1')
+        self.assertIsNotNone(cliente.en_zona_desde)
+        self.assertEqual(
+            list(Movimiento.objects.values_list('cliente_id', 'zona_nueva_id', 'momento')),
+            [(cliente.id, self.hab1.id, cliente.en_zona_desde)],
+        )
+
+
+class HistorialVistaTest(TestCase):
+    """Pruebas del endpoint de historial de ocupación"""
+
+    def setUp(self):
+        User.objects.create_user(username="enfermera", password="1234")
+        self.planta, (self.hab,) = crear_planta([1])
+        (self.cliente,) = crear_clientes(1)
+        with mock.patch('django.utils.timezone.now', return_value=a_las(0)):
+            asignar_cliente(self.cliente.id, self.hab.id)
+        with mock.patch('django.utils.timezone.now', return_value=a_las(4)):
+            liberar_cliente(self.cliente.id)
+
+    def test_requiere_login(self):
+        self.assertEqual(self.client.get(reverse("historial_zona")).status_code, 302)
+
+    def test_momento_y_rango(self):
+        self.client.login(username="enfermera", password="1234")
+        url = reverse("historial_zona")
+        datos = self.client.get(url, {'zona': self.planta.id, 'momento': a_las(1).isoformat()}).json()
+        self.assertEqual(datos['total'], 1)
+        self.assertEqual(datos['estancias'][0]['cliente'], self.cliente.id)
+
+        datos = self.client.get(url, {'desde': a_las(5).isoformat(), 'hasta': a_las(6).isoformat()}).json()
+        self.assertEqual(datos['total'], 0)
+        self.assertEqual(self.client.get(url).json()['total'], 0)
+
+    def test_parametros_invalidos(self):
+        self.client.login(username="enfermera", password="1234")
+        url = reverse("historial_zona")
+        self.assertEqual(self.client.get(url, {'momento': 'ayer'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'desde': a_las(2).isoformat()}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'desde': a_las(2).isoformat(), 'hasta': a_las(1).isoformat()}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'zona': 999999}).status_code, 400)
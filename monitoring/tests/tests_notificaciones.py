@@ -0,0 +1,163 @@
+import json
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as tz
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command # type: ignore
+from django.test import TestCase, override_settings # type: ignore
+from monitoring.camas import SinCamasDisponibles, asignar_cliente, trasladar_cliente, liberar_cliente
+from monitoring.importacion import importar
+from monitoring.models import Zona, Contacto, Notificacion
+from monitoring.notificaciones import LimiteTasa, Transporte, despachar_lote, espera_reintento
+from monitoring.tests.tests_camas import crear_planta, crear_clientes
+
+AHORA = datetime(2026, 3, 2, 12, 0, tzinfo=tz.utc)
+
+
+class TransporteDePrueba(Transporte):
+    """Guarda lo enviado; los canales de `caidos` fallan."""
+
+    def __init__(self, caidos=()):
+        self.caidos = set(caidos)
+        self.enviados = []
+        self._cerrojo = threading.Lock()
+
+    def enviar(self, mensaje):
+        if mensaje.canal in self.caidos:
+            raise ConnectionError("proveedor caído")
+        with self._cerrojo:
+            self.enviados.append(mensaje)
+
+
+def con_contactos(clientes):
+    for cliente in clientes:
+        Contacto.objects.create(
+            cliente=cliente, nombre="Ana", apellido1="X", identificador=f"k{cliente.id}",
+            correo=f"ana{cliente.id}@ejemplo.cl", telefono=f"+5690000{cliente.id}",
+        )
+
+
+class EncoladoTest(TestCase):
+    """Los cambios de zona encolan el aviso en su misma transacción"""
+
+    def setUp(self):
+        self.planta, (self.hab1, self.hab2) = crear_planta([1, 2])
+        self.uci = Zona.objects.create(nombre="UCI", tipo=4, identificador="uci", total_camas=1, critica=True)
+        self.c1, self.c2 = crear_clientes(2)
+
+    def eventos(self):
+        return list(Notificacion.objects.order_by('id').values_list('evento', 'zona_anterior', 'zona_nueva'))
+
+    def test_evento_por_cambio(self):
+        asignar_cliente(self.c1.id, self.hab1.id)  # ingreso normal: sin aviso
+        trasladar_cliente(self.c1.id, self.hab2.id)
+        trasladar_cliente(self.c1.id, self.uci.id)
+        liberar_cliente(self.c1.id)
+        self.assertEqual(self.eventos(), [
+            ('traslado', self.hab1.id, self.hab2.id),
+            ('zona_critica', self.hab2.id, self.uci.id),
+            ('alta', self.uci.id, None),
+        ])
+        self.assertEqual(set(Notificacion.objects.values_list('estado', flat=True)), {Notificacion.PENDIENTE})
+
+    def test_fallo_no_deja_aviso(self):
+        asignar_cliente(self.c1.id, self.uci.id)
+        with self.assertRaises(SinCamasDisponibles):
+            asignar_cliente(self.c2.id, self.uci.id)
+        self.assertEqual(Notificacion.objects.filter(cliente_id=self.c2.id).count(), 0)
+
+    def test_importacion_en_zona_critica(self):
+        importar('clientes', [
+            {'nombre': 'Eva', 'apellido1': 'X', 'documento': 'i1', 'zona': self.uci.identificador},
+            {'nombre': 'Luz', 'apellido1': 'X', 'documento': 'i2', 'zona': self.hab2.identificador},
+        ])
+        self.assertEqual(self.eventos(), [('zona_critica', None, self.uci.id)])
+
+
+class DespachoTest(TestCase):
+    """Pruebas del despacho por lotes, reintentos y límites por canal"""
+
+    def setUp(self):
+        self.planta, (self.hab1, self.hab2) = crear_planta([20, 20])
+        self.clientes = crear_clientes(20)
+        con_contactos(self.clientes)
+
+    def trasladar(self, clientes):
+        with mock.patch('django.utils.timezone.now', return_value=AHORA - timedelta(minutes=1)):
+            for cliente in clientes:
+                asignar_cliente(cliente.id, self.hab1.id)
+                trasladar_cliente(cliente.id, self.hab2.id)
+
+    def test_consultas_constantes_por_lote(self):
+        self.trasladar(self.clientes[:2])
+        with self.assertNumQueries(9):
+            self.assertEqual(despachar_lote(transporte=TransporteDePrueba()), (2, 0, 0))
+
+        self.trasladar(self.clientes[2:])
+        transporte = TransporteDePrueba()
+        with self.assertNumQueries(9):
+            self.assertEqual(despachar_lote(transporte=transporte), (18, 0, 0))
+        self.assertEqual(len(transporte.enviados), 36)
+        mensaje = next(m for m in transporte.enviados if m.canal == 'sms')
+        self.assertIn("P", mensaje.texto)
+        self.assertIn("Hab 0", mensaje.texto)
+        self.assertEqual(despachar_lote(transporte=transporte), (0, 0, 0))
+
+    def test_reintenta_solo_lo_pendiente(self):
+        self.trasladar(self.clientes[:1])
+        despachar_lote(transporte=TransporteDePrueba(caidos={'sms'}), momento=AHORA)
+        notificacion = Notificacion.objects.get()
+        self.assertEqual((notificacion.estado, notificacion.intentos), (Notificacion.PENDIENTE, 1))
+        self.assertEqual(notificacion.proximo_intento, AHORA + espera_reintento(1))
+        self.assertEqual([clave.split(':')[0] for clave in notificacion.entregados], ['correo'])
+        self.assertIn("proveedor caído", notificacion.error)
+
+        # Antes de la espera no se toma; después solo se repite el SMS
+        transporte = TransporteDePrueba()
+        self.assertEqual(despachar_lote(transporte=transporte, momento=AHORA + timedelta(seconds=1)), (0, 0, 0))
+        self.assertEqual(despachar_lote(transporte=transporte, momento=notificacion.proximo_intento), (1, 0, 0))
+        self.assertEqual([m.canal for m in transporte.enviados], ['sms'])
+        self.assertEqual(Notificacion.objects.get().estado, Notificacion.ENVIADA)
+
+    @override_settings(NOTIFICACIONES_INTENTOS=2)
+    def test_agota_los_intentos(self):
+        self.trasladar(self.clientes[:1])
+        caido = TransporteDePrueba(caidos={'correo', 'sms'})
+        momento = AHORA
+        for esperado in [(0, 1, 0), (0, 0, 1)]:
+            self.assertEqual(despachar_lote(transporte=caido, momento=momento), esperado)
+            momento += timedelta(days=1)
+        self.assertEqual(Notificacion.objects.get().estado, Notificacion.FALLIDA)
+        self.assertEqual(despachar_lote(transporte=caido, momento=momento), (0, 0, 0))
+
+    def test_retoma_envios_abandonados(self):
+        self.trasladar(self.clientes[:1])
+        Notificacion.objects.update(estado=Notificacion.EN_CURSO, proximo_intento=AHORA)
+        self.assertEqual(despachar_lote(transporte=TransporteDePrueba(), momento=AHORA), (1, 0, 0))
+
+    def test_limite_de_tasa(self):
+        esperas = []
+        with mock.patch('monitoring.notificaciones.time') as reloj:
+            reloj.monotonic.return_value = 100.0
+            reloj.sleep.side_effect = esperas.append
+            limite = LimiteTasa(2)
+            for _ in range(5):
+                limite.esperar()
+        # Dos fichas de inicio, luego una cada medio segundo
+        self.assertEqual(esperas, [0.5, 1.0, 1.5])
+
+    def test_transporte_archivo_y_comando(self):
+        self.trasladar(self.clientes[:3])
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = Path(directorio) / 'avisos.jsonl'
+            with override_settings(NOTIFICACIONES_TRANSPORTE='monitoring.notificaciones.TransporteArchivo',
+                                   NOTIFICACIONES_ARCHIVO=ruta):
+                salida = StringIO()
+                call_command('despachar_notificaciones', '--una-vez', '--lote', '2', stdout=salida)
+            lineas = [json.loads(linea) for linea in ruta.read_text(encoding='utf-8').splitlines()]
+        self.assertIn("Enviadas: 3.", salida.getvalue())
+        self.assertEqual(len(lineas), 6)
+        self.assertEqual({linea['canal'] for linea in lineas}, {'correo', 'sms'})
@@ -0,0 +1,125 @@
+from django.test import TestCase # type: ignore
+from django.urls import reverse # type: ignore
+from django.contrib.auth.models import User # type: ignore
+from django.core.cache import cache # type: ignore
+from django.db import connection # type: ignore
+from django.test.utils import CaptureQueriesContext # type: ignore
+from monitoring.models import Zona, Cliente, Empleado
+from monitoring.paginacion import paginar_keyset, codificar_cursor, decodificar_cursor
+
+
+def crear_clientes(zona, cantidad, inicio=0):
+    Cliente.objects.bulk_create([
+        Cliente(nombre=f"Nombre {i:03d}", apellido1=f"Apellido {i % 5}", documento=f"doc-{i}",
+                identificador=f"c-{i}", tipo_enfermedad="cardiaca" if i % 2 else "diabetes",
+                zona_asignada=zona)
+        for i in range(inicio, inicio + cantidad)
+    ])
+
+
+class PaginacionKeysetTest(TestCase):
+    """Pruebas del paginador por clave (keyset)"""
+
+    def setUp(self):
+        self.zona = Zona.objects.create(nombre="Sala A", tipo=4, identificador="z1")
+        crear_clientes(self.zona, 7)
+
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        vistos = []
+        cursor = None
+        while True:
+            pagina = paginar_keyset(Cliente.objects.all(), campo='apellido1', despues=cursor, por_pagina=3)
+            vistos.extend(c.id for c in pagina.filas)
+            if not pagina.hay_siguiente:
+                break
+            cursor = pagina.cursor_siguiente
+
+        esperado = list(Cliente.objects.order_by('apellido1', 'id').values_list('id', flat=True))
+        self.assertEqual(vistos, esperado)
+
+    def test_retroceder_devuelve_la_pagina_anterior(self):
+        primera = paginar_keyset(Cliente.objects.all(), campo='nombre', por_pagina=3)
+        segunda = paginar_keyset(Cliente.objects.all(), campo='nombre', despues=primera.cursor_siguiente, por_pagina=3)
+        anterior = paginar_keyset(Cliente.objects.all(), campo='nombre', antes=segunda.cursor_anterior, por_pagina=3)
+
+        self.assertFalse(primera.hay_anterior)
+        self.assertTrue(segunda.hay_anterior)
+        self.assertEqual([c.id for c in anterior.filas], [c.id for c in primera.filas])
+        self.assertFalse(anterior.hay_anterior)
+
+    def test_orden_descendente(self):
+        pagina = paginar_keyset(Cliente.objects.all(), campo='nombre', descendente=True, por_pagina=2)
+        self.assertEqual([c.nombre for c in pagina.filas], ["Nombre 006", "Nombre 005"])
+
+    def test_cursor_invalido_se_ignora(self):
+        self.assertIsNone(decodificar_cursor("no-es-un-cursor"))
+        self.assertEqual(decodificar_cursor(codificar_cursor("x", 4)), ("x", 4))
+        pagina = paginar_keyset(Cliente.objects.all(), despues="basura", por_pagina=3)
+        self.assertEqual(len(pagina.filas), 3)
+
+    def test_cursor_con_otro_tipo_se_ignora(self):
+        campo = Zona._meta.get_field('tipo')
+        self.assertEqual(decodificar_cursor(codificar_cursor("4", 1), campo), (4, 1))
+        for valor in ("abc", None, [1]):
+            with self.subTest(valor=valor):
+                self.assertIsNone(decodificar_cursor(codificar_cursor(valor, 1), campo))
+                pagina = paginar_keyset(Zona.objects.all(), campo='tipo', despues=codificar_cursor(valor, 1))
+                self.assertEqual([z.id for z in pagina.filas], [self.zona.id])
+
+
+class AdminPanelPaginadoTest(TestCase):
+    """El panel admin pagina en el servidor y no hace N+1 sobre zona_asignada"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="1234", email="admin@test.com")
+        self.client.login(username="admin", password="1234")
+        self.zona = Zona.objects.create(nombre="Sala A", tipo=4, identificador="z1")
+        self.otra = Zona.objects.create(nombre="Sala B", tipo=4, identificador="z2")
+
+    def consultas_panel(self, **params):
+        # Sin fragmentos en caché: se mide el renderizado completo
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("admin_panel"), params)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_consultas_constantes_con_mas_filas(self):
+        crear_clientes(self.zona, 3)
+        pocas = self.consultas_panel()
+        crear_clientes(self.zona, 40, inicio=3)
+        Empleado.objects.bulk_create([
+            Empleado(nombre=f"E{i}", apellido1="X", cargo="Enfermera", identificador=f"e-{i}", zona_asignada=self.zona)
+            for i in range(20)
+        ])
+        muchas = self.consultas_panel()
+        self.assertEqual(pocas, muchas)
+
+    def test_cursor_manipulado_no_rompe_el_panel(self):
+        respuesta = self.client.get(reverse("panel_seccion", args=["zonas"]), {
+            'zonas_orden': 'tipo', 'zonas_despues': codificar_cursor("abc", self.zona.id),
+        })
+        self.assertEqual(respuesta.status_code, 200)
+        contenido = b''.join(respuesta.streaming_content) if respuesta.streaming else respuesta.content
+        self.assertIn(b"Sala B", contenido)
+
+    def test_tamano_de_pagina_y_filtros(self):
+        crear_clientes(self.zona, 10)
+        crear_clientes(self.otra, 4, inicio=10)
+
+        response = self.client.get(reverse("admin_panel"), {"por_pagina": 4})
+        self.assertEqual(len(response.context["clientes"].filas), 4)
+        self.assertTrue(response.context["clientes"].hay_siguiente)
+
+        response = self.client.get(reverse("admin_panel"), {"zona": "Sala B"})
+        self.assertEqual(response.context["total_clientes"], 4)
+        self.assertTrue(all(c.zona_asignada_id == self.otra.id for c in response.context["clientes"].filas))
+
+        response = self.client.get(reverse("admin_panel"), {"tipo_enfermedad": "diabetes"})
+        self.assertTrue(all(c.tipo_enfermedad == "diabetes" for c in response.context["clientes"].filas))
+
+    def test_orden_invalido_usa_id(self):
+        crear_clientes(self.zona, 3)
+        response = self.client.get(reverse("admin_panel"), {"clientes_orden": "password"})
+        ids = [c.id for c in response.context["clientes"].filas]
+        self.assertEqual(ids, sorted(ids))
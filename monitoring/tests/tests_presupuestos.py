@@ -0,0 +1,125 @@
+from django.contrib.auth.models import User # type: ignore
+from django.core.cache import cache # type: ignore
+from django.test import TestCase # type: ignore
+from django.urls import URLResolver, reverse # type: ignore
+from monitoring import urls
+from monitoring.generacion import Generador
+from monitoring.instrumentacion import PresupuestoMixin, firma, medir_consultas
+from monitoring.models import Zona, Cliente, Contacto, Empleado
+
+
+def nombres_de_urls(patrones=urls.urlpatterns):
+    for patron in patrones:
+        if isinstance(patron, URLResolver):
+            yield from nombres_de_urls(patron.url_patterns)
+        elif patron.name:
+            yield patron.name
+
+
+# nombre de la URL -> (argumentos, método, datos, consultas, repetidas permitidas, ms)
+# Los argumentos son atributos del test (ids de objetos del hospital generado).
+# Incluyen sesión y usuario (2 consultas) y, en las escrituras, los savepoints.
+PRESUPUESTOS = {
+    # Lecturas
+    'login': ((), 'get', None, 0, 0, 200),
+    'register': ((), 'get', None, 0, 0, 200),
+    'main': ((), 'get', None, 5, 0, 200),
+    'analisis': ((), 'get', None, 5, 0, 200),
+    'eventos_ocupacion': ((), 'get', None, 6, 0, 200),
+    'historial_zona': ((), 'get', None, 4, 0, 300),
+    'tendencias': ((), 'get', None, 3, 0, 200),
+    'reparto_personal': ((), 'get', None, 5, 0, 300),
+    'analisis_cache': ((), 'get', None, 2, 0, 200),
+    'conexiones': ((), 'get', None, 2 + 6, 0, 200),
+    'admin_panel': ((), 'get', None, 6, 0, 300),
+    'panel_seccion': (('seccion',), 'get', None, 6, 0, 300),
+    'buscar_clientes': ((), 'get', {'q': 'garcia'}, 4, 0, 200),
+    'autocompletar_zonas': ((), 'get', {'q': 'planta 1 › hab'}, 5, 0, 200),
+    'exportar_clientes': ((), 'get', {'formato': 'jsonl'}, 4, 0, 1000),
+    'agregar_cliente': ((), 'get', None, 2, 0, 200),
+    'editar_cliente': (('cliente',), 'get', None, 4, 0, 200),
+    'agregar_zona': ((), 'get', None, 2, 0, 200),
+    'editar_zona': (('zona',), 'get', None, 3, 0, 200),
+    'agregar_empleado': ((), 'get', None, 2, 0, 200),
+    'editar_empleado': (('empleado',), 'get', None, 4, 0, 200),
+    'api-root': ((), 'get', None, 2, 0, 200),
+    'zona-list': ((), 'get', None, 3, 0, 300),
+    'zona-detail': (('zona',), 'get', None, 3, 0, 200),
+    'cliente-list': ((), 'get', None, 3, 0, 300),
+    'cliente-detail': (('cliente',), 'get', None, 3, 0, 200),
+    'contacto-list': ((), 'get', None, 3, 0, 300),
+    'contacto-detail': (('contacto',), 'get', None, 3, 0, 200),
+    'empleado-list': ((), 'get', None, 3, 0, 300),
+    'empleado-detail': (('empleado',), 'get', None, 3, 0, 200),
+    # Escrituras (al final: modifican los datos de las lecturas)
+    'zona-masivo': ((), 'patch', 'zonas', 10, 0, 1000),
+    'cliente-masivo': ((), 'patch', 'clientes', 6, 0, 1000),
+    'contacto-masivo': ((), 'patch', 'contactos', 6, 0, 1000),
+    'empleado-masivo': ((), 'patch', 'empleados', 6, 0, 1000),
+    'acciones_masivas': (('seccion',), 'post', {'accion': 'desactivar', 'ids': list(range(1, 51))}, 6, 0, 300),
+    'eliminar_cliente': (('cliente',), 'get', None, 12, 0, 300),
+    'eliminar_zona': (('zona',), 'get', None, 15, 0, 300),
+    'eliminar_empleado': (('empleado',), 'get', None, 4, 0, 200),
+    'logout': ((), 'get', None, 4, 0, 200),
+}
+
+# Flujos que no terminan: se mide hasta el estado inicial (retry, resumen, ocupación)
+FRAGMENTOS = {'eventos_ocupacion': 3}
+
+
+class PresupuestosVistasTest(PresupuestoMixin, TestCase):
+    """Número de consultas, consultas repetidas y tiempo de cada vista sobre un hospital generado"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Generador(semilla=10, ramas=(2, 3, 2, 5), pacientes=300, empleados=40, lote=500).generar()
+        User.objects.create_superuser(username="admin", password="1234", email="admin@example.com")
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username="admin", password="1234")
+        self.cliente = Cliente.objects.filter(zona_asignada__isnull=False).order_by('id').first().id
+        self.zona = Zona.objects.filter(tipo=4).order_by('id').first().id
+        self.empleado = Empleado.objects.order_by('id').first().id
+        self.contacto = Contacto.objects.order_by('id').first().id
+        self.seccion = 'empleados'
+
+    def datos_masivos(self, recurso):
+        modelos = {'zonas': Zona, 'clientes': Cliente, 'contactos': Contacto, 'empleados': Empleado}
+        ids = modelos[recurso].objects.order_by('id').values_list('id', flat=True)[:50]
+        campo = {'zonas': 'bloqueada', 'empleados': 'activo'}.get(recurso)
+        if campo:
+            return [{'id': i, campo: True} for i in ids]
+        return [{'id': i, 'telefono': f'600{i:06d}'} for i in ids]
+
+    def test_todas_las_vistas_tienen_presupuesto(self):
+        self.assertEqual(set(nombres_de_urls()) - set(PRESUPUESTOS), set())
+
+    def test_presupuestos(self):
+        for nombre, (argumentos, metodo, datos, consultas, duplicadas, ms) in PRESUPUESTOS.items():
+            with self.subTest(vista=nombre):
+                url = reverse(nombre, args=[getattr(self, a) for a in argumentos])
+                extra = {}
+                if isinstance(datos, str):
+                    datos = self.datos_masivos(datos)
+                    extra['content_type'] = 'application/json'
+                respuesta, _ = self.assertPresupuesto(
+                    url, consultas, ms, duplicadas=duplicadas, metodo=metodo, datos=datos,
+                    fragmentos=FRAGMENTOS.get(nombre), **extra
+                )
+                self.assertLess(respuesta.status_code, 400)
+
+    def test_detecta_n_mas_1(self):
+        with medir_consultas() as medicion:
+            for cliente in Cliente.objects.order_by('id')[:5]:
+                str(cliente.zona_asignada)
+        repetidas = dict(medicion.duplicadas())
+        self.assertEqual(len(repetidas), 1)
+        self.assertEqual(list(repetidas.values()), [5])
+        self.assertIn('"monitoring_zona"', next(iter(repetidas)))
+
+    def test_firma_ignora_literales_y_listas(self):
+        self.assertEqual(
+            firma("SELECT * FROM t WHERE id IN (%s, %s, %s) AND n = 'x'"),
+            firma("SELECT *  FROM t WHERE id IN (%s) AND n = 'y'"),
+        )
@@ -0,0 +1,100 @@
+from django.contrib.auth.models import User # type: ignore
+from django.test import TestCase, override_settings # type: ignore
+from django.urls import reverse # type: ignore
+from monitoring.models import Zona, Cliente, Empleado
+from monitoring.reparto import aplicar_reparto, calcular_reparto, objetivos, repartir
+
+
+class RepartoAritmeticaTest(TestCase):
+    """Pruebas del reparto proporcional y los objetivos por unidad"""
+
+    def test_repartir_por_mayores_restos(self):
+        self.assertEqual(list(repartir(10, [1, 1, 1])), [4, 3, 3])
+        self.assertEqual(list(repartir(5, [6, 3, 1])), [3, 2, 0])
+        self.assertEqual(list(repartir(3, [0, 0])), [0, 0])
+
+    def test_objetivos(self):
+        # Con personal de sobra, lo justo para el ratio; si falta, en proporción
+        self.assertEqual(list(objetivos([12, 13, 0], 6, 100)), [2, 3, 0])
+        self.assertEqual(list(objetivos([12, 13, 0], 6, 4)), [2, 2, 0])
+
+
+@override_settings(
+    REPARTO_PROFUNDIDAD=1,
+    REPARTO_PACIENTES_POR_EMPLEADO={'Enfermero/a': 5},
+    REPARTO_PESOS_ENFERMEDAD={'cardiaca': 2},
+)
+class RepartoTest(TestCase):
+    """Pruebas del plan de reparto de personal y su aplicación"""
+
+    def setUp(self):
+        edificio = Zona.objects.create(nombre="Edificio", tipo=1, identificador="e1")
+        self.planta_a = Zona.objects.create(nombre="Planta A", tipo=2, identificador="pa", zona_padre=edificio)
+        self.planta_b = Zona.objects.create(nombre="Planta B", tipo=2, identificador="pb", zona_padre=edificio)
+        hab_a = Zona.objects.create(nombre="Hab A", tipo=4, identificador="ha", zona_padre=self.planta_a)
+        hab_b = Zona.objects.create(nombre="Hab B", tipo=4, identificador="hb", zona_padre=self.planta_b)
+        # Planta A: carga 10 (2 enfermeros); planta B: 3 cardíacos, carga 6 (2 enfermeros)
+        for i in range(10):
+            Cliente.objects.create(nombre="P", apellido1="X", documento=f"a{i}", identificador=f"a{i}", zona_asignada=hab_a)
+        for i in range(3):
+            Cliente.objects.create(nombre="P", apellido1="X", documento=f"b{i}", identificador=f"b{i}",
+                                   zona_asignada=hab_b, tipo_enfermedad='cardiaca')
+        self.enfermeros = [self.empleado(f"n{i}", hab_a if i == 0 else self.planta_a) for i in range(4)]
+        self.supervisor = self.empleado("s", edificio)  # por encima de las unidades: no se mueve
+        self.celador = self.empleado("c", self.planta_a, cargo='Celador/a')  # cargo sin ratio
+
+    def empleado(self, identificador, zona, cargo='Enfermero/a'):
+        return Empleado.objects.create(nombre="E", apellido1="X", cargo=cargo, identificador=identificador,
+                                       zona_asignada=zona)
+
+    def test_mueve_solo_el_sobrante(self):
+        with self.assertNumQueries(3):
+            plan = calcular_reparto()
+        self.assertEqual([nombre for _, nombre in plan.unidades], ["Planta A", "Planta B"])
+        self.assertEqual(list(plan.pacientes), [10, 3])
+        self.assertEqual(list(plan.carga), [10.0, 6.0])
+        actuales, objetivo = plan.cargos['Enfermero/a']
+        self.assertEqual((list(actuales), list(objetivo)), ([4, 0], [2, 2]))
+        # Los de alta más reciente dejan la planta A
+        self.assertEqual(plan.movimientos, [
+            (self.enfermeros[3].id, self.planta_a.id, self.planta_b.id),
+            (self.enfermeros[2].id, self.planta_a.id, self.planta_b.id),
+        ])
+
+        self.assertEqual(aplicar_reparto(plan), 2)
+        self.assertEqual(Empleado.objects.filter(zona_asignada=self.planta_b).count(), 2)
+        self.assertEqual(calcular_reparto().movimientos, [])
+
+    def test_personal_libre_primero(self):
+        libre = self.empleado("n9", None)
+        plan = calcular_reparto()
+        self.assertEqual([m[0] for m in plan.movimientos], [libre.id, self.enfermeros[3].id])
+
+    def test_personal_escaso_se_reparte_en_proporcion(self):
+        Empleado.objects.filter(pk__in=[e.id for e in self.enfermeros[2:]]).update(activo=False)
+        plan = calcular_reparto()
+        self.assertEqual(list(plan.cargos['Enfermero/a'][1]), [1, 1])
+        self.assertEqual(plan.movimientos, [(self.enfermeros[1].id, self.planta_a.id, self.planta_b.id)])
+
+    def test_respeta_cambios_posteriores_al_calculo(self):
+        plan = calcular_reparto()
+        Empleado.objects.filter(pk=self.enfermeros[3].id).update(zona_asignada=None)
+        self.assertEqual(aplicar_reparto(plan), 1)
+        self.assertIsNone(Empleado.objects.get(pk=self.enfermeros[3].id).zona_asignada_id)
+
+    def test_vista(self):
+        User.objects.create_user(username="enfermera", password="1234")
+        User.objects.create_superuser(username="admin", password="1234")
+        url = reverse("reparto_personal")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.login(username="enfermera", password="1234")
+        datos = self.client.get(url, {'limite': 1}).json()
+        self.assertEqual(datos['traslados'], 2)
+        self.assertEqual(datos['totales'], {'Enfermero/a': {'actuales': 4, 'objetivo': 4}})
+        self.assertEqual(len(datos['detalle']), 1)
+        self.assertEqual(self.client.get(url, {'limite': 'x'}).status_code, 400)
+        self.assertEqual(self.client.post(url).status_code, 403)
+
+        self.client.login(username="admin", password="1234")
+        self.assertEqual(self.client.post(url).json(), {'aplicados': 2})
@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings # type: ignore
+from django.contrib.auth.models import User # type: ignore
+from django.core.cache import cache # type: ignore
+from django.db import transaction # type: ignore
+from django.test import TestCase # type: ignore
+from django.urls import reverse # type: ignore
+from Helpnex.basedatos import alias_replicas, bases_de_datos
+from monitoring import replicas
+from monitoring.models import Zona, Cliente
+from monitoring.replicas import COOKIE_PRIMARIA, EnrutadorReplicas, SUFIJO_SINCRONIZACION, retraso_sqlite
+
+
+class ConfiguracionReplicasTest(TestCase):
+    """Pruebas de la configuración de réplicas por variables de entorno"""
+
+    def test_replicas_sqlite(self):
+        bases = bases_de_datos(
+            {'HELPNEX_DB': 'sqlite', 'HELPNEX_SQLITE_REPLICAS': '/tmp/r1.sqlite3, /tmp/r2.sqlite3'}, Path('/app')
+        )
+        self.assertEqual(alias_replicas(bases), ['replica1', 'replica2'])
+        self.assertEqual(bases['replica2']['NAME'], '/tmp/r2.sqlite3')
+        self.assertEqual(bases['replica1']['TEST'], {'MIRROR': 'default'})
+        self.assertEqual(bases['replica1']['OPTIONS'], bases['default']['OPTIONS'])
+
+    def test_replicas_postgresql(self):
+        bases = bases_de_datos({'HELPNEX_DB_REPLICAS': 'r1,r2:6432', 'HELPNEX_DB_POOL': '2,8'}, Path('/app'))
+        self.assertEqual((bases['replica1']['HOST'], bases['replica1']['PORT']), ('r1', '5432'))
+        self.assertEqual((bases['replica2']['HOST'], bases['replica2']['PORT']), ('r2', '6432'))
+        self.assertEqual(bases['replica2']['OPTIONS']['pool']['name'], 'helpnex-replica2')
+        self.assertEqual(bases['default']['OPTIONS']['pool']['name'], 'helpnex')
+        self.assertEqual(alias_replicas(bases_de_datos({}, Path('/app'))), [])
+
+
+class RetrasoSqliteTest(TestCase):
+    """Pruebas del retraso de una copia SQLite"""
+
+    def test_retraso_segun_la_ultima_copia(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            primaria, replica = Path(directorio) / 'p.sqlite3', Path(directorio) / 'r.sqlite3'
+            primaria.write_bytes(b'')
+            self.assertEqual(retraso_sqlite(primaria, replica), float('inf'))
+
+            Path(f'{replica}{SUFIJO_SINCRONIZACION}').write_text(json.dumps({'inicio': 1000.0}))
+            os.utime(primaria, (900, 900))
+            self.assertEqual(retraso_sqlite(primaria, replica, ahora=1010.0), 0.0)
+            # Escrita tras la copia (en el -wal): la réplica va atrasada desde la copia
+            Path(f'{primaria}-wal').write_bytes(b'')
+            os.utime(f'{primaria}-wal', (1005, 1005))
+            self.assertEqual(retraso_sqlite(primaria, replica, ahora=1010.0), 10.0)
+
+
+class EnrutadorTest(TestCase):
+    """Pruebas de la elección de base para cada lectura"""
+
+    def setUp(self):
+        self.enrutador = EnrutadorReplicas()
+        parche = mock.patch.object(replicas.estado_replicas, 'disponibles', return_value=['replica1'])
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.addCleanup(replicas._en_replica.set, False)
+        self.addCleanup(replicas._escribio.set, False)
+
+    def leer(self, modelo=Cliente):
+        # TestCase abre una transacción en default: se simula estar fuera de ella
+        with mock.patch.object(replicas, '_transaccion_abierta', return_value=False):
+            return self.enrutador.db_for_read(modelo)
+
+    def test_solo_en_vistas_marcadas(self):
+        self.assertIsNone(self.leer())
+        replicas._en_replica.set(True)
+        self.assertEqual(self.leer(), 'replica1')
+        # Sesiones y usuarios siempre en la primaria
+        self.assertIsNone(self.leer(User))
+
+    def test_tras_escribir_lee_de_la_primaria(self):
+        replicas._en_replica.set(True)
+        self.assertEqual(self.enrutador.db_for_write(Cliente), 'default')
+        self.assertIsNone(self.leer())
+
+    def test_en_transaccion_lee_de_la_primaria(self):
+        replicas._en_replica.set(True)
+        with transaction.atomic():
+            self.assertIsNone(self.enrutador.db_for_read(Cliente))
+
+    def test_replicas_atrasadas_se_descartan(self):
+        estado = replicas.EstadoReplicas()
+        retrasos = {'replica1': 2.0, 'replica2': 60.0}
+        with mock.patch.object(replicas, 'alias_replicas', return_value=list(retrasos)), \
+                mock.patch.object(replicas, 'medir_retraso', side_effect=retrasos.get) as medir:
+            self.assertEqual(estado.disponibles(), ['replica1'])
+            self.assertEqual(estado.disponibles(), ['replica1'])
+        # El retraso se mide una vez por intervalo, no en cada lectura
+        self.assertEqual(medir.call_count, 2)
+
+
+class MiddlewareReplicasTest(TestCase):
+    """Qué peticiones leen de una réplica"""
+
+    def setUp(self):
+        User.objects.create_superuser(username="admin", password="1234")
+        self.client.login(username="admin", password="1234")
+        self.zona = Zona.objects.create(nombre="Planta 1", tipo=2, identificador="p1")
+        Cliente.objects.create(nombre="Ana", apellido1="García", documento="d1", identificador="c1")
+        # Sin réplicas disponibles se lee de la primaria: solo se comprueba si se intentó
+        parche = mock.patch.object(replicas.estado_replicas, 'disponibles', return_value=[])
+        self.disponibles = parche.start()
+        self.addCleanup(parche.stop)
+        self.addCleanup(replicas._en_replica.set, False)
+
+    def intento_replica(self, metodo, url, **datos):
+        # Con los fragmentos en caché no habría lecturas que enrutar
+        cache.clear()
+        self.disponibles.reset_mock()
+        with mock.patch.object(replicas, '_transaccion_abierta', return_value=False):
+            respuesta = getattr(self.client, metodo)(url, **datos)
+            if respuesta.streaming:
+                b''.join(respuesta.streaming_content)
+        return self.disponibles.called, respuesta
+
+    def test_vistas_de_lectura(self):
+        self.assertTrue(self.intento_replica('get', reverse('cliente-list'))[0])
+        self.assertTrue(self.intento_replica('get', reverse('exportar_clientes'), data={'formato': 'jsonl'})[0])
+        self.assertFalse(self.intento_replica('get', reverse('cliente-detail', args=[1]))[0])
+        self.assertFalse(self.intento_replica('get', reverse('editar_zona', args=[self.zona.id]))[0])
+        # El reparto se aplica con un POST sobre el plan leído: siempre en la primaria
+        self.assertFalse(self.intento_replica('get', reverse('reparto_personal'))[0])
+        self.assertFalse(replicas._en_replica.get())
+
+    def test_escritura_fija_la_primaria(self):
+        _, respuesta = self.intento_replica('post', reverse('editar_zona', args=[self.zona.id]),
+                                            data={'nombre': "Planta 1b", 'tipo': 2})
+        self.assertIn(COOKIE_PRIMARIA, respuesta.cookies)
+        self.assertEqual(respuesta.cookies[COOKIE_PRIMARIA]['max-age'], settings.REPLICAS_PEGAJOSO_SEGUNDOS)
+        self.assertFalse(self.intento_replica('get', reverse('cliente-list'))[0])
+
+        self.client.cookies.pop(COOKIE_PRIMARIA)
+        self.assertTrue(self.intento_replica('get', reverse('cliente-list'))[0])
+
+    def test_lo_que_va_a_cache_se_lee_de_la_primaria(self):
+        # El panel solo muestra fragmentos en caché: versión actual, datos de la primaria
+        self.assertFalse(self.intento_replica('get', reverse('admin_panel'))[0])
+        self.assertFalse(self.intento_replica('get', reverse('main'))[0])
+        self.assertFalse(self.intento_replica('get', reverse('autocompletar_zonas'), data={'q': 'pl'})[0])
+        # Un texto largo no se guarda: puede ir a la réplica
+        self.assertTrue(self.intento_replica('get', reverse('autocompletar_zonas'), data={'q': 'planta'})[0])
+
@@ -0,0 +1,115 @@
+import json
+import tempfile
+from datetime import date
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command # type: ignore
+from django.core.management.base import CommandError # type: ignore
+from django.db import connection # type: ignore
+from django.test import TransactionTestCase # type: ignore
+from monitoring.busqueda import buscar_clientes
+from monitoring.camas import asignar_cliente
+from monitoring.models import Zona, Cliente, Contacto, Empleado, Movimiento
+from monitoring.respaldo import (
+    MANIFIESTO, REGISTRO_RESTAURACIONES, RespaldoInvalido, modelos_respaldo, oleadas, respaldar, restaurar,
+)
+
+
+def contenido():
+    """Todas las filas de las tablas respaldadas, para comparar antes y después."""
+    return {
+        modelo._meta.label: list(modelo._base_manager.order_by('pk').values_list())
+        for modelo in modelos_respaldo()
+    }
+
+
+class RespaldoTest(TransactionTestCase):
+    """Pruebas del respaldo y la restauración por tablas en paralelo"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.destino = Path(self.directorio.name) / 'respaldo'
+        # La hija se crea antes que su padre: el volcado las ordena por profundidad
+        habitacion = Zona.objects.create(nombre="Hab 1", tipo=4, identificador="h1", total_camas=2)
+        planta = Zona.objects.create(nombre="Planta 1", tipo=2, identificador="p1")
+        habitacion.zona_padre = planta
+        habitacion.save()
+        self.cliente = Cliente.objects.create(
+            nombre="José", apellido1="García", documento="d1", identificador="c1",
+            fecha_nacimiento=date(1950, 5, 17), tipo_enfermedad='cardiaca',
+        )
+        asignar_cliente(self.cliente.id, habitacion.id)
+        Contacto.objects.create(cliente=self.cliente, nombre="Ana", apellido1="García", identificador="k1")
+        Empleado.objects.create(nombre="Luis", apellido1="Pérez", cargo="Enfermero/a", identificador="e1",
+                                zona_asignada=planta)
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_ida_y_vuelta(self):
+        antes = contenido()
+        manifiesto = respaldar(self.destino)
+        self.assertEqual(manifiesto['tablas']['monitoring.Cliente']['filas'], 1)
+
+        Cliente.objects.all().delete()
+        Zona.objects.create(nombre="Otra", tipo=7, identificador="z9")
+        resumen = restaurar(self.destino, reemplazar=True)
+
+        self.assertEqual(contenido(), antes)
+        self.assertEqual(resumen['filas'], sum(len(filas) for filas in antes.values()))
+        # El índice de búsqueda se reconstruye y las secuencias siguen tras los ids cargados
+        self.assertEqual([c.id for c, _ in buscar_clientes('garcia')], [self.cliente.id])
+        nuevo = Cliente.objects.create(nombre="Eva", apellido1="Ruiz", documento="d2", identificador="c2")
+        self.assertGreater(nuevo.id, self.cliente.id)
+
+    def test_recrea_indices_secundarios(self):
+        tabla = Cliente._meta.db_table
+        indices = lambda: sorted(connection.introspection.get_constraints(connection.cursor(), tabla))
+        antes = indices()
+        respaldar(self.destino)
+        restaurar(self.destino, reemplazar=True)
+        self.assertEqual(indices(), antes)
+
+    def test_exige_tablas_vacias(self):
+        respaldar(self.destino)
+        with self.assertRaises(RespaldoInvalido):
+            restaurar(self.destino)
+        with self.assertRaises(RespaldoInvalido):
+            respaldar(self.destino)
+
+    def test_rechaza_columnas_distintas(self):
+        respaldar(self.destino)
+        ruta = self.destino / MANIFIESTO
+        manifiesto = json.loads(ruta.read_text())
+        manifiesto['tablas']['monitoring.Cliente']['columnas'].append('columna_nueva')
+        ruta.write_text(json.dumps(manifiesto))
+        with self.assertRaises(RespaldoInvalido):
+            restaurar(self.destino, reemplazar=True)
+
+    def test_oleadas_respetan_claves_foraneas(self):
+        posicion = {
+            modelo: numero for numero, grupo in enumerate(oleadas(modelos_respaldo())) for modelo in grupo
+        }
+        self.assertLess(posicion[Zona], posicion[Cliente])
+        self.assertLess(posicion[Cliente], posicion[Contacto])
+        self.assertLess(posicion[Zona], posicion[Empleado])
+        # Movimiento no tiene restricciones: entra con la primera oleada
+        self.assertEqual(posicion[Movimiento], 0)
+
+    def test_comandos_informan_y_registran_el_tiempo(self):
+        salida = StringIO()
+        call_command('respaldar', str(self.destino), stdout=salida)
+        self.assertIn('monitoring.Cliente', salida.getvalue())
+
+        for _ in range(2):
+            salida = StringIO()
+            call_command('restaurar', str(self.destino), '--reemplazar', '--hilos', '2', stdout=salida)
+        self.assertIn('Restaurado:', salida.getvalue())
+        self.assertIn('Restauración anterior', salida.getvalue())
+        registro = (self.destino / REGISTRO_RESTAURACIONES).read_text().splitlines()
+        self.assertEqual(len(registro), 2)
+        self.assertEqual(json.loads(registro[0])['tablas']['monitoring.Cliente']['filas'], 1)
+
+        with self.assertRaises(CommandError):
+            call_command('restaurar', str(Path(self.directorio.name) / 'no_existe'), stdout=StringIO())
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta, timezone as tz
+
+from django.contrib.auth.models import User # type: ignore
+from django.test import TestCase, override_settings # type: ignore
+from django.urls import reverse # type: ignore
+from monitoring.models import Zona, Cliente, MuestraSerie
+from monitoring.series import (
+    MAX_PUNTOS, SERIE_HOSPITAL, ciclo, consolidar, elegir_nivel, purgar, tendencia, tomar_muestra,
+)
+from monitoring.tests.tests_camas import crear_planta
+
+AHORA = datetime(2026, 3, 2, 12, 0, tzinfo=tz.utc)
+
+
+def agregados(serie, nivel):
+    return list(
+        MuestraSerie.objects.filter(serie=serie, nivel=nivel).order_by('instante')
+        .values_list('instante', 'muestras', 'suma', 'minimo', 'maximo')
+    )
+
+
+class SeriesTest(TestCase):
+    """Pruebas del muestreo y la consolidación de series"""
+
+    def setUp(self):
+        self.planta, (self.hab,) = crear_planta([4])
+        Cliente.objects.create(nombre="Ana", apellido1="X", documento="d1", identificador="c1",
+                               tipo_enfermedad='cardiaca')
+
+    def ocupar(self, camas):
+        Zona.objects.filter(pk=self.planta.pk).update(camas_ocupadas_subarbol=camas)
+
+    def test_muestra_por_zona_y_enfermedad(self):
+        self.ocupar(3)
+        tomar_muestra(AHORA + timedelta(seconds=42))
+        valores = dict(MuestraSerie.objects.values_list('serie', 'suma'))
+        self.assertEqual(valores[SERIE_HOSPITAL], 3)
+        self.assertEqual(valores[f'zona:{self.planta.id}'], 3)
+        self.assertEqual(valores['enfermedad:cardiaca'], 1)
+        self.assertEqual(MuestraSerie.objects.values('instante').distinct().get()['instante'], AHORA)
+
+    @override_settings(SERIES_PROFUNDIDAD_MAXIMA=0)
+    def test_profundidad_maxima(self):
+        tomar_muestra(AHORA)
+        self.assertFalse(MuestraSerie.objects.filter(serie=f'zona:{self.hab.id}').exists())
+
+    def test_consolida_minutos_en_horas_y_dias(self):
+        for minuto, camas in enumerate([1, 3, 2]):
+            self.ocupar(camas)
+            tomar_muestra(AHORA + timedelta(minutes=minuto))
+        self.ocupar(4)
+        tomar_muestra(AHORA + timedelta(hours=1))
+        consolidar()
+
+        self.assertEqual(agregados(SERIE_HOSPITAL, MuestraSerie.HORA), [
+            (AHORA, 3, 6.0, 1.0, 3.0),
+            (AHORA + timedelta(hours=1), 1, 4.0, 4.0, 4.0),
+        ])
+        (dia,) = agregados(SERIE_HOSPITAL, MuestraSerie.DIA)
+        self.assertEqual(dia[1:], (4, 10.0, 1.0, 4.0))
+
+        # La última hora se rehace con las muestras nuevas, sin duplicar
+        tomar_muestra(AHORA + timedelta(hours=1, minutes=1))
+        consolidar()
+        self.assertEqual(agregados(SERIE_HOSPITAL, MuestraSerie.HORA)[-1][1:], (2, 8.0, 4.0, 4.0))
+        self.assertEqual(agregados(SERIE_HOSPITAL, MuestraSerie.DIA)[0][1:], (5, 14.0, 1.0, 4.0))
+
+    @override_settings(SERIES_RETENCION_DIAS={'minuto': 1, 'hora': 30})
+    def test_purga_por_nivel(self):
+        ciclo(AHORA - timedelta(days=2))
+        ciclo(AHORA)
+        por_nivel = lambda nivel: MuestraSerie.objects.filter(nivel=nivel, serie=SERIE_HOSPITAL).count()
+        self.assertEqual((por_nivel(MuestraSerie.MINUTO), por_nivel(MuestraSerie.HORA)), (1, 2))
+
+        borradas = purgar(AHORA + timedelta(days=40))
+        self.assertGreater(borradas['minuto'], 0)
+        self.assertGreater(borradas['hora'], 0)
+        self.assertNotIn('dia', borradas)  # sin retención: para siempre
+        self.assertEqual(por_nivel(MuestraSerie.DIA), 2)
+
+
+@override_settings(SERIES_RETENCION_DIAS={'minuto': 2, 'hora': 90})
+class TendenciaTest(TestCase):
+    """Pruebas de la lectura de tendencias por nivel"""
+
+    def test_elige_el_nivel_por_ventana_y_retencion(self):
+        casos = [
+            (timedelta(hours=6), MuestraSerie.MINUTO),
+            (timedelta(days=1), MuestraSerie.HORA),  # 1440 minutos > MAX_PUNTOS
+            (timedelta(days=20), MuestraSerie.HORA),
+            (timedelta(days=365), MuestraSerie.DIA),
+        ]
+        for ventana, nivel in casos:
+            self.assertEqual(elegir_nivel(AHORA - ventana, AHORA, AHORA), nivel, ventana)
+        # Una ventana corta pero antigua ya no está en minutos
+        self.assertEqual(elegir_nivel(AHORA - timedelta(days=10), AHORA - timedelta(days=10) + timedelta(hours=1), AHORA),
+                         MuestraSerie.HORA)
+
+    def test_un_anio_lee_un_punto_por_dia(self):
+        MuestraSerie.objects.bulk_create([
+            MuestraSerie(serie=SERIE_HOSPITAL, nivel=MuestraSerie.DIA, instante=AHORA - timedelta(days=d),
+                         muestras=1440, suma=1440.0 * d, minimo=0, maximo=2 * d)
+            for d in range(400)
+        ])
+        nivel, puntos = tendencia(SERIE_HOSPITAL, AHORA - timedelta(days=365), AHORA)
+        self.assertEqual(nivel, MuestraSerie.DIA)
+        self.assertLessEqual(len(puntos), MAX_PUNTOS)
+        self.assertEqual(len(puntos), 366)
+        self.assertEqual(puntos[-1][1:], (0.0, 0, 0))
+
+
+class TendenciasVistaTest(TestCase):
+    """Pruebas del endpoint de tendencias"""
+
+    def setUp(self):
+        User.objects.create_user(username="enfermera", password="1234")
+
+    def test_requiere_login(self):
+        self.assertEqual(self.client.get(reverse("tendencias")).status_code, 302)
+
+    def test_ultimas_24_horas(self):
+        self.client.login(username="enfermera", password="1234")
+        ciclo()
+        datos = self.client.get(reverse("tendencias")).json()
+        self.assertEqual(datos['serie'], SERIE_HOSPITAL)
+        self.assertEqual(datos['nivel'], 'hora')
+        self.assertEqual(len(datos['puntos']), 1)
+
+    def test_parametros_invalidos(self):
+        self.client.login(username="enfermera", password="1234")
+        url = reverse("tendencias")
+        self.assertEqual(self.client.get(url, {'serie': 'otra'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'serie': 'zona:'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'desde': 'ayer'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'desde': AHORA.isoformat(), 'hasta': AHORA.isoformat()}).status_code, 400)
@@ -0,0 +1,169 @@
+import time
+from dataclasses import dataclass
+from itertools import groupby
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction # type: ignore
+
+from .hospitales import alias_de, en_base
+from .jerarquia import ids_en_ruta
+from .models import Zona, Cliente, Contacto, Empleado, Movimiento, Notificacion
+from .versiones import incrementar_version
+
+
+# ------------------------------
+# TRASPASO DE EDIFICIOS ENTRE HOSPITALES
+# ------------------------------
+# Un edificio (zona raíz) se lleva con todo lo que cuelga de él de una base a
+# otra: su árbol de zonas, los pacientes de esas zonas con sus contactos, el
+# personal asignado, el historial de los pacientes y sus avisos. Las filas
+# reciben ids nuevos en el destino y las referencias se traducen; los
+# identificadores y documentos no cambian (la secuencia es global).
+#
+# Sin transacciones distribuidas, el destino confirma primero y el origen
+# después: el borrado en el origen va dentro de la transacción del destino,
+# así que un fallo antes de confirmar no deja nada a medias. Si fallara solo
+# el COMMIT del origen, el edificio quedaría en ambas bases, nunca en ninguna.
+#
+# El historial del origen se queda donde está (solo admite inserciones); en la
+# copia, las zonas de fuera del edificio pasan a None.
+
+LOTE_DEFECTO = 1000
+
+
+@dataclass
+class ResultadoTraspaso:
+    zonas: int = 0
+    clientes: int = 0
+    contactos: int = 0
+    empleados: int = 0
+    movimientos: int = 0
+    notificaciones: int = 0
+    segundos: float = 0.0
+
+
+def _copia(objeto, **cambios):
+    """Instancia nueva (sin pk) con los valores de `objeto` y los `cambios`."""
+    valores = {
+        campo.attname: getattr(objeto, campo.attname)
+        for campo in objeto._meta.concrete_fields if not campo.primary_key
+    }
+    valores.update(cambios)
+    return type(objeto)(**valores)
+
+
+def _insertar(alias, originales, copias, lote):
+    """bulk_create de `copias` en `alias`; devuelve {id original: id nuevo}."""
+    if not copias:
+        return {}
+    type(copias[0]).objects.using(alias).bulk_create(copias, batch_size=lote)
+    return {original.pk: copia.pk for original, copia in zip(originales, copias)}
+
+
+def _copiar_zonas(edificio, origen, destino, lote):
+    zonas = list(Zona.objects.using(origen).filter(ruta__startswith=edificio.ruta).order_by('profundidad', 'id'))
+    ids = {}
+    # Por niveles: cada padre tiene ya su id nuevo cuando se insertan sus hijas
+    for _, nivel in groupby(zonas, key=lambda zona: zona.profundidad):
+        nivel = list(nivel)
+        ids.update(_insertar(destino, nivel, [
+            _copia(zona, zona_padre_id=ids.get(zona.zona_padre_id), ruta='') for zona in nivel
+        ], lote))
+    # El subárbol llega entero: solo cambian los ids de la ruta, no profundidades ni acumulados
+    copias = [
+        Zona(pk=ids[zona.pk], ruta='/' + ''.join(f'{ids[i]}/' for i in ids_en_ruta(zona.ruta)))
+        for zona in zonas
+    ]
+    Zona.objects.using(destino).bulk_update(copias, ['ruta'], batch_size=lote)
+    return ids
+
+
+def _copiar_historial(filas, clientes, zonas, destino, lote):
+    copias = [
+        _copia(
+            fila,
+            cliente_id=clientes[fila.cliente_id],
+            zona_anterior_id=zonas.get(fila.zona_anterior_id),
+            zona_nueva_id=zonas.get(fila.zona_nueva_id),
+        )
+        for fila in filas
+    ]
+    return len(_insertar(destino, filas, copias, lote))
+
+
+def _borrar(queryset, alias):
+    """
+    DELETE ... WHERE id IN (<queryset>) en `alias`, sin cargar las filas ni
+    enviar señales (como acciones._borrar): las camas y el historial se van
+    con el edificio.
+    """
+    conexion = connections[alias]
+    nombre = conexion.ops.quote_name
+    subconsulta, parametros = queryset.values('pk').query.get_compiler(connection=conexion).as_sql()
+    modelo = queryset.model._meta
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {nombre(modelo.db_table)} WHERE {nombre(modelo.pk.column)} IN ({subconsulta})', parametros
+        )
+        return cursor.rowcount
+
+
+def traspasar_edificio(identificador, hospital, desde='', lote=LOTE_DEFECTO):
+    """
+    Lleva el edificio `identificador` (zona raíz) de la base de `desde` (vacío:
+    la primaria) a la del `hospital` (vacío: la primaria). Lanza
+    Zona.DoesNotExist si no es una raíz del origen, ValueError si origen y
+    destino coinciden e IntegrityError si algo ya existe en el destino
+    (nombres de zona, documentos o identificadores repetidos).
+    """
+    origen = alias_de(desde) or DEFAULT_DB_ALIAS
+    destino = alias_de(hospital) or DEFAULT_DB_ALIAS
+    if origen == destino:
+        raise ValueError("El edificio ya está en esa base.")
+    inicio = time.perf_counter()
+    resultado = ResultadoTraspaso()
+
+    with transaction.atomic(using=origen), transaction.atomic(using=destino):
+        edificio = Zona.objects.using(origen).select_for_update().get(
+            identificador=identificador, zona_padre__isnull=True
+        )
+        subarbol = {'zona_asignada__ruta__startswith': edificio.ruta}
+        de_clientes = {'cliente__zona_asignada__ruta__startswith': edificio.ruta}
+
+        zonas = _copiar_zonas(edificio, origen, destino, lote)
+
+        originales = list(Cliente.objects.using(origen).filter(**subarbol).order_by('id'))
+        clientes = _insertar(destino, originales, [
+            _copia(cliente, zona_asignada_id=zonas[cliente.zona_asignada_id]) for cliente in originales
+        ], lote)
+
+        originales = list(Contacto.objects.using(origen).filter(**de_clientes).order_by('id'))
+        contactos = _insertar(destino, originales, [
+            _copia(contacto, cliente_id=clientes[contacto.cliente_id]) for contacto in originales
+        ], lote)
+
+        originales = list(Empleado.objects.using(origen).filter(**subarbol).order_by('id'))
+        empleados = _insertar(destino, originales, [
+            _copia(empleado, zona_asignada_id=zonas[empleado.zona_asignada_id]) for empleado in originales
+        ], lote)
+
+        filas = list(Movimiento.objects.using(origen).filter(**de_clientes).order_by('id'))
+        resultado.movimientos = _copiar_historial(filas, clientes, zonas, destino, lote)
+        filas = list(Notificacion.objects.using(origen).filter(**de_clientes).order_by('id'))
+        resultado.notificaciones = _copiar_historial(filas, clientes, zonas, destino, lote)
+
+        # Del origen sale todo menos el historial de movimientos. Los filtros
+        # van por la ruta del edificio (subconsultas), no por listas de ids
+        _borrar(Notificacion.objects.using(origen).filter(**de_clientes), origen)
+        _borrar(Contacto.objects.using(origen).filter(**de_clientes), origen)
+        _borrar(Cliente.objects.using(origen).filter(**subarbol), origen)
+        _borrar(Empleado.objects.using(origen).filter(**subarbol), origen)
+        _borrar(Zona.objects.using(origen).filter(ruta__startswith=edificio.ruta), origen)
+
+    for alias in (origen, destino):
+        with en_base(alias):
+            incrementar_version('zona', 'cliente', 'contacto', 'empleado')
+
+    resultado.zonas, resultado.clientes = len(zonas), len(clientes)
+    resultado.contactos, resultado.empleados = len(contactos), len(empleados)
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
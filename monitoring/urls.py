@@ -1,20 +1,38 @@
-from django.urls import path # type: ignore
-from . import views
+from django.urls import path, include # type: ignore
+from rest_framework.routers import DefaultRouter # type: ignore
+from . import api, views
+
+router = DefaultRouter()
+router.register('zonas', api.ZonaViewSet)
+router.register('clientes', api.ClienteViewSet)
+router.register('contactos', api.ContactoViewSet)
+router.register('empleados', api.EmpleadoViewSet)
 
 urlpatterns = [
     path('', views.login_view, name='login'),
     path('register/', views.register_view, name='register'),
     path('main/', views.main_view, name='main'),
     path('analisis/', views.analisis_view, name='analisis'),
+    path('analisis/eventos/', views.eventos_ocupacion_view, name='eventos_ocupacion'),
+    path('analisis/historial/', views.historial_zona_view, name='historial_zona'),
+    path('analisis/tendencias/', views.tendencias_view, name='tendencias'),
+    path('analisis/reparto/', views.reparto_personal_view, name='reparto_personal'),
+    path('analisis/cache/', views.analisis_cache_view, name='analisis_cache'),
+    path('analisis/conexiones/', views.conexiones_view, name='conexiones'),
     path('logout/', views.logout_view, name='logout'),
 
     # --- PANEL ADMIN PERSONALIZADO ---
     path('panel/', views.admin_panel_view, name='admin_panel'),
+    path('panel/seccion/<str:seccion>/', views.panel_seccion_view, name='panel_seccion'),
+    path('panel/<str:seccion>/masivo/', views.acciones_masivas_view, name='acciones_masivas'),
 
     # --- CLIENTES ---
     path('panel/clientes/editar/<int:id>/', views.editar_cliente, name='editar_cliente'),
     path('panel/clientes/eliminar/<int:id>/', views.eliminar_cliente, name='eliminar_cliente'),
     path('panel/clientes/agregar/', views.agregar_cliente, name='agregar_cliente'),
+    path('panel/clientes/exportar/', views.exportar_clientes, name='exportar_clientes'),
+    path('clientes/buscar/', views.buscar_clientes_view, name='buscar_clientes'),
+    path('zonas/buscar/', views.zonas_autocompletar_view, name='autocompletar_zonas'),
 
     # --- ZONAS ---
     path('panel/zonas/editar/<int:id>/', views.editar_zona, name='editar_zona'),
@@ -25,4 +43,7 @@ urlpatterns = [
     path('panel/empleados/editar/<int:id>/', views.editar_empleado, name='editar_empleado'),
     path('panel/empleados/eliminar/<int:id>/', views.eliminar_empleado, name='eliminar_empleado'),
     path('panel/empleados/agregar/', views.agregar_empleado, name='agregar_empleado'),
+
+    # --- API REST ---
+    path('api/', include(router.urls)),
 ]
@@ -0,0 +1,53 @@
+import time
+
+from django.core.cache import cache # type: ignore
+
+
+# ------------------------------
+# VERSIONES POR MODELO
+# ------------------------------
+# Cada modelo tiene un contador en caché que se incrementa al guardar o
+# eliminar (ver signals.py). Las claves de caché que dependen de un modelo
+# incluyen su versión, así que un cambio las deja obsoletas sin borrarlas.
+
+PREFIJO = 'monitoring:version:'
+
+
+def _clave(modelo):
+    return f'{PREFIJO}{modelo}'
+
+
+def _version_inicial():
+    # Si el contador se pierde (expulsión de la caché) no se reutilizan versiones viejas
+    return time.time_ns()
+
+
+def obtener_versiones(*modelos):
+    """Devuelve {modelo: version} con una sola lectura de caché."""
+    claves = {_clave(m): m for m in modelos}
+    encontradas = cache.get_many(list(claves))
+    for clave in claves:
+        if clave not in encontradas:
+            cache.add(clave, _version_inicial(), timeout=None)
+            encontradas[clave] = cache.get(clave)
+    return {claves[clave]: version for clave, version in encontradas.items()}
+
+
+async def aobtener_versiones(*modelos):
+    """Como obtener_versiones(), con la API asíncrona de la caché."""
+    claves = {_clave(m): m for m in modelos}
+    encontradas = await cache.aget_many(list(claves))
+    for clave in claves:
+        if clave not in encontradas:
+            await cache.aadd(clave, _version_inicial(), timeout=None)
+            encontradas[clave] = await cache.aget(clave)
+    return {claves[clave]: version for clave, version in encontradas.items()}
+
+
+def incrementar_version(*modelos):
+    for modelo in modelos:
+        clave = _clave(modelo)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, _version_inicial(), timeout=None)
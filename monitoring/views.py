@@ -1,11 +1,38 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async # type: ignore
 from django.shortcuts import render, redirect, get_object_or_404 # type: ignore
 from django.contrib.auth import authenticate, login, logout # type: ignore
 from django.contrib.auth.models import User # type: ignore
 from django.contrib import messages # type: ignore
 from django.contrib.auth.decorators import user_passes_test # type: ignore
-from django.db.models import Count # type: ignore
+from django.core.handlers.asgi import ASGIRequest # type: ignore
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse, HttpResponseBadRequest, HttpResponseForbidden # type: ignore
+from django.template.loader import render_to_string # type: ignore
+from django.urls import reverse # type: ignore
+from django.utils import timezone # type: ignore
+from django.utils.dateparse import parse_datetime # type: ignore
+from django.utils.safestring import mark_safe # type: ignore
 from .models import Zona, Cliente, Empleado
-import uuid
+from .acciones import ACCIONES, aplicar_accion
+from .autocompletado import sugerir_zonas, ruta_de, LIMITE_DEFECTO as LIMITE_ZONAS
+from .analitica import (
+    obtener_resumen, aobtener_resumen, aobtener_resumen_global, estadisticas_cache, MODELOS_RESUMEN,
+    TOTALES_RESUMEN,
+)
+from .conexiones import estado_conexiones
+from .eventos import difusor
+from .fragmentos import apagina_en_cache, clave_seccion, fragmento_en_cache
+from .camas import asignar_cliente, trasladar_cliente, SinCamasDisponibles
+from .exportacion import filtrar_clientes, iterar_clientes, FORMATOS
+from .busqueda import buscar_clientes, LIMITE_DEFECTO
+from .paginacion import paginar_keyset, leer_por_pagina
+from .identificadores import nuevo_identificador
+from .movimientos import estancias
+from .series import NOMBRES_NIVEL, SERIE_HOSPITAL, serie_valida, tendencia
+from .reparto import aplicar_reparto, calcular_reparto
+from .replicas import lectura_en_replica
+from .hospitales import atomica, base_activa, hospitales, hospital_activo
 
 # ------------------------------
 # LOGIN
@@ -59,109 +86,381 @@ def register_view(request):
 # ------------------------------
 # MAIN
 # ------------------------------
-def main_view(request):
-    if not request.user.is_authenticated:
+# main y analisis son asíncronas: servidas por ASGI no ocupan un worker
+# mientras esperan la base, y en un fallo de caché las consultas del resumen
+# corren a la vez (ver aobtener_resumen). Con WSGI también funcionan.
+@lectura_en_replica
+async def main_view(request):
+    # auser() no llena request.user: se reutiliza para no consultarlo de nuevo al renderizar
+    request.user = user = await request.auser()
+    if not user.is_authenticated:
         return redirect('login')
 
-    # Totales generales
-    total_zonas = Zona.objects.count()
-    total_clientes = Cliente.objects.count()
-    total_empleados = Empleado.objects.count()
+    # Totales generales (desde el resumen en caché). Sin hospital elegido se
+    # suman los de todos, pedidos a la vez
+    por_hospital = []
+    if hospitales() and hospital_activo() is None:
+        resumen, por_base = await aobtener_resumen_global()
+        claves = {alias: clave for clave, alias in hospitales().items()}
+        por_hospital = [
+            {'clave': claves.get(alias), **{total: parcial[total] for total in TOTALES_RESUMEN}}
+            for alias, parcial in por_base.items()
+        ]
+    else:
+        resumen = await aobtener_resumen()
 
     context = {
-        'total_zonas': total_zonas,
-        'total_clientes': total_clientes,
-        'total_empleados': total_empleados,
+        'total_zonas': resumen['total_zonas'],
+        'total_clientes': resumen['total_clientes'],
+        'total_empleados': resumen['total_empleados'],
+        'hospitales': list(hospitales()),
+        'hospital': hospital_activo(),
+        'por_hospital': por_hospital,
     }
 
-    return render(request, 'monitoring/main.html', context)
+    # Los context processors (usuario, mensajes) leen la sesión de forma síncrona
+    return await sync_to_async(render)(request, 'monitoring/main.html', context)
     
 # ------------------------------
 # ANÁLISIS (MEJORADO)
 # ------------------------------
-def analisis_view(request):
+@lectura_en_replica
+async def analisis_view(request):
+    # auser() no llena request.user: se reutiliza para no consultarlo de nuevo al renderizar
+    request.user = user = await request.auser()
+    if not user.is_authenticated:
+        return redirect('login')
+
+    async def generar():
+        # Totales y agrupaciones: tres consultas concurrentes como máximo, y ninguna si el resumen está en caché
+        context = await aobtener_resumen()
+        respuesta = await sync_to_async(render)(request, 'monitoring/analisis.html', context)
+        return respuesta.content
+
+    # La página entera se guarda por versiones del resumen; solo el menú depende del usuario
+    contenido = await apagina_en_cache('analisis', MODELOS_RESUMEN, int(user.is_superuser), generar)
+    return HttpResponse(contenido)
+
+
+async def eventos_ocupacion_view(request):
+    """
+    Flujo SSE con los cambios de ocupación y del resumen. `?zona=<id>` limita
+    los eventos de ocupación al subárbol de esa zona.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return redirect('login')
+
+    ruta = ''
+    if request.GET.get('zona'):
+        try:
+            zona_id = int(request.GET['zona'])
+        except ValueError:
+            return HttpResponseBadRequest("zona debe ser un entero.")
+        ruta = await Zona.objects.filter(pk=zona_id).values_list('ruta', flat=True).afirst()
+        if ruta is None:
+            return HttpResponseBadRequest(f"No existe la zona {zona_id}.")
+
+    # Bajo WSGI un iterador asíncrono se consumiría entero antes de enviarse
+    if isinstance(request, ASGIRequest):
+        flujo = difusor.flujo_asincrono(ruta, base_activa())
+    else:
+        flujo = difusor.flujo_sincrono(ruta, base_activa())
+    response = StreamingHttpResponse(flujo, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx no debe acumular el flujo
+    return response
+
+
+@user_passes_test(lambda u: u.is_superuser)
+def analisis_cache_view(request):
+    return JsonResponse(estadisticas_cache())
+
+
+@user_passes_test(lambda u: u.is_superuser)
+def conexiones_view(request):
+    return JsonResponse(estado_conexiones())
+
+
+def _fecha_param(request, nombre):
+    """Fecha ISO 8601 de un parámetro GET (sin zona horaria: la del proyecto)."""
+    valor = parse_datetime(request.GET.get(nombre, ''))
+    if valor is None:
+        raise ValueError(f"{nombre} debe ser una fecha ISO 8601.")
+    return valor if timezone.is_aware(valor) else timezone.make_aware(valor)
+
+
+@lectura_en_replica
+def historial_zona_view(request):
+    """
+    Estancias en el subárbol de `?zona=<id>` (todo el hospital si falta):
+    las que cubren `?momento=` o las que se solapan con `?desde=&hasta=`.
+    Sin fechas, la ocupación actual.
+    """
+    if not request.user.is_authenticated:
+        return redirect('login')
+
+    try:
+        if 'desde' in request.GET or 'hasta' in request.GET:
+            inicio, fin = _fecha_param(request, 'desde'), _fecha_param(request, 'hasta')
+        elif 'momento' in request.GET:
+            inicio = fin = _fecha_param(request, 'momento')
+        else:
+            inicio = fin = timezone.now()
+        zona_id = int(request.GET['zona']) if request.GET.get('zona') else None
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    if fin < inicio:
+        return HttpResponseBadRequest("hasta no puede ser anterior a desde.")
+
+    ruta = ''
+    if zona_id is not None:
+        ruta = Zona.objects.filter(pk=zona_id).values_list('ruta', flat=True).first()
+        if ruta is None:
+            return HttpResponseBadRequest(f"No existe la zona {zona_id}.")
+
+    resultado = estancias(inicio, fin, ruta)
+    return JsonResponse({
+        'zona': zona_id,
+        'desde': inicio,
+        'hasta': fin,
+        'total': len(resultado),
+        'estancias': [
+            {'cliente': e.cliente_id, 'zona': e.zona_id, 'desde': e.desde, 'hasta': e.hasta}
+            for e in resultado
+        ],
+    })
+
+
+@lectura_en_replica
+def tendencias_view(request):
+    """
+    Evolución de una serie (`?serie=hospital`, `zona:<id>` o `enfermedad:<tipo>`)
+    entre `?desde=` y `?hasta=` (por defecto, las últimas 24 horas), leída del
+    nivel de resolución que encaja con la ventana.
+    """
     if not request.user.is_authenticated:
         return redirect('login')
 
-    # Totales generales
-    total_zonas = Zona.objects.count()
-    total_clientes = Cliente.objects.count()
-    total_empleados = Empleado.objects.count()
+    serie = request.GET.get('serie', SERIE_HOSPITAL)
+    if not serie_valida(serie):
+        return HttpResponseBadRequest("serie debe ser hospital, zona:<id> o enfermedad:<tipo>.")
+    try:
+        hasta = _fecha_param(request, 'hasta') if 'hasta' in request.GET else timezone.now()
+        desde = _fecha_param(request, 'desde') if 'desde' in request.GET else hasta - timedelta(days=1)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    if hasta <= desde:
+        return HttpResponseBadRequest("hasta debe ser posterior a desde.")
+
+    nivel, puntos = tendencia(serie, desde, hasta)
+    return JsonResponse({
+        'serie': serie,
+        'nivel': NOMBRES_NIVEL[nivel],
+        'desde': desde,
+        'hasta': hasta,
+        'puntos': [
+            {'instante': instante, 'media': round(media, 2), 'minimo': minimo, 'maximo': maximo}
+            for instante, media, minimo, maximo in puntos
+        ],
+    })
+
+
+REPARTO_LIMITE_DEFECTO = 50
+
+
+def reparto_personal_view(request):
+    """
+    Personal actual y objetivo por unidad y cargo según la carga de pacientes
+    (ver reparto.py), de las `?limite=` unidades más desequilibradas. Un POST
+    de un superusuario aplica los traslados propuestos (por eso no lleva
+    @lectura_en_replica: el plan que se aplica se calcula en la primaria).
+    """
+    if not request.user.is_authenticated:
+        return redirect('login')
+    if request.method == 'POST' and not request.user.is_superuser:
+        return HttpResponseForbidden("Solo un superusuario puede aplicar el reparto.")
+    try:
+        limite = int(request.GET.get('limite', REPARTO_LIMITE_DEFECTO))
+    except ValueError:
+        return HttpResponseBadRequest("limite debe ser un entero.")
+
+    plan = calcular_reparto()
+    if request.method == 'POST':
+        return JsonResponse({'aplicados': aplicar_reparto(plan)})
+    return JsonResponse({
+        'unidades': len(plan.unidades),
+        'traslados': len(plan.movimientos),
+        'totales': {
+            cargo: {'actuales': sum(actuales), 'objetivo': sum(objetivo)}
+            for cargo, (actuales, objetivo) in plan.cargos.items()
+        },
+        'detalle': plan.resumen(max(limite, 0)),
+    })
 
-    # ---- CLIENTES POR ZONA ----
-    clientes_por_zona = (
-        Cliente.objects.values('zona_asignada__nombre')
-        .annotate(total=Count('id'))
-        .order_by('-total')
-    )
-    clientes_por_zona_dict = {
-        c['zona_asignada__nombre'] or 'Sin zona': c['total'] for c in clientes_por_zona
-    }
 
-    # ---- CLIENTES POR ENFERMEDAD ----
-    clientes_por_enfermedad = (
-        Cliente.objects.values('tipo_enfermedad')
-        .annotate(total=Count('id'))
-        .order_by('-total')
+# ------------------------------
+# PANEL ADMIN
+# ------------------------------
+# Campos por los que se puede ordenar cada sección (todos NOT NULL e indexados junto a id)
+ORDEN_PANEL = {
+    'clientes': ('id', 'nombre', 'apellido1', 'documento', 'tipo_enfermedad'),
+    'zonas': ('id', 'nombre', 'tipo'),
+    'empleados': ('id', 'nombre', 'apellido1', 'cargo'),
+}
+FILTROS_PANEL = ('zona', 'tipo_enfermedad', 'cargo')
+LOTE_FILAS_PANEL = 50  # filas por parte enviada al navegador
+
+
+def _querysets_panel(params):
+    """Querysets filtrados del panel; la zona viaja en el mismo SELECT (sin N+1)."""
+    clientes = Cliente.objects.select_related('zona_asignada').only(
+        'nombre', 'apellido1', 'documento', 'tipo_enfermedad', 'zona_asignada__nombre'
     )
-    clientes_por_enfermedad_dict = {
-        c['tipo_enfermedad'] or 'No especificado': c['total'] for c in clientes_por_enfermedad
-    }
-
-    # ---- EMPLEADOS POR ZONA ----
-    empleados_por_zona = (
-        Empleado.objects.values('zona_asignada__nombre')
-        .annotate(total=Count('id'))
-        .order_by('-total')
+    zonas = Zona.objects.only('nombre', 'tipo')
+    empleados = Empleado.objects.select_related('zona_asignada').only(
+        'nombre', 'apellido1', 'cargo', 'activo', 'zona_asignada__nombre'
     )
-    empleados_por_zona_dict = {
-        e['zona_asignada__nombre'] or 'Sin zona': e['total'] for e in empleados_por_zona
-    }
 
-    # ---- EMPLEADOS POR CARGO ----
-    empleados_por_cargo = (
-        Empleado.objects.values('cargo')
-        .annotate(total=Count('id'))
-        .order_by('-total')
+    zona = params.get('zona')
+    if zona:
+        clientes = clientes.filter(zona_asignada__nombre=zona)
+        empleados = empleados.filter(zona_asignada__nombre=zona)
+        zonas = zonas.filter(zona_padre__nombre=zona)
+    if params.get('tipo_enfermedad'):
+        clientes = clientes.filter(tipo_enfermedad=params['tipo_enfermedad'])
+    if params.get('cargo'):
+        empleados = empleados.filter(cargo=params['cargo'])
+
+    return {'clientes': clientes, 'zonas': zonas, 'empleados': empleados}
+
+
+def _orden_seccion(params, seccion):
+    campo = params.get(f'{seccion}_orden', 'id')
+    if campo.lstrip('-') not in ORDEN_PANEL[seccion]:
+        campo = 'id'
+    return campo
+
+
+def _paginar_seccion(params, seccion, queryset):
+    orden = _orden_seccion(params, seccion)
+    return paginar_keyset(
+        queryset,
+        campo=orden.lstrip('-'),
+        descendente=orden.startswith('-'),
+        despues=params.get(f'{seccion}_despues'),
+        antes=params.get(f'{seccion}_antes'),
+        por_pagina=leer_por_pagina(params.get('por_pagina')),
     )
-    empleados_por_cargo_dict = {e['cargo']: e['total'] for e in empleados_por_cargo}
 
+
+def _enlaces_orden(params, seccion):
+    """Para cada columna, el valor de `<seccion>_orden` al hacer clic (alterna asc/desc)."""
+    actual = _orden_seccion(params, seccion)
+    return {campo: f'-{campo}' if actual == campo else campo for campo in ORDEN_PANEL[seccion]}
+
+
+def _total_seccion(params, seccion, queryset):
+    # Sin filtros el total sale del resumen en caché (sin COUNT sobre toda la tabla)
+    if any(params.get(clave) for clave in FILTROS_PANEL):
+        return queryset.count()
+    return obtener_resumen()[f'total_{seccion}']
+
+
+def _partes_seccion(request, seccion):
+    """Cabecera de la tabla, filas por lotes y pie con la paginación."""
+    queryset = _querysets_panel(request.GET)[seccion]
+    plantilla = f'monitoring/panel/{seccion}.html'
     context = {
-        'total_zonas': total_zonas,
-        'total_clientes': total_clientes,
-        'total_empleados': total_empleados,
-        'clientes_por_zona': clientes_por_zona_dict,
-        'clientes_por_enfermedad': clientes_por_enfermedad_dict,
-        'empleados_por_zona': empleados_por_zona_dict,
-        'empleados_por_cargo': empleados_por_cargo_dict,
+        f'total_{seccion}': _total_seccion(request.GET, seccion, queryset),
+        'ordenar': {seccion: _enlaces_orden(request.GET, seccion)},
     }
+    # La cabecera sale antes de consultar las filas
+    yield render_to_string(plantilla, {**context, 'parte': 'cabecera'}, request)
 
-    return render(request, 'monitoring/analisis.html', context)
+    pagina = _paginar_seccion(request.GET, seccion, queryset)
+    filas = f'monitoring/panel/{seccion}_filas.html'
+    # Sin filas se renderiza un lote vacío: muestra el mensaje de tabla vacía
+    for inicio in range(0, max(len(pagina.filas), 1), LOTE_FILAS_PANEL):
+        yield render_to_string(filas, {'filas': pagina.filas[inicio:inicio + LOTE_FILAS_PANEL]})
 
+    yield render_to_string(plantilla, {**context, seccion: pagina, 'parte': 'pie'}, request)
 
-# ------------------------------
-# PANEL ADMIN
-# ------------------------------
+
+def _seccion_panel(request, seccion):
+    """Partes de la sección, desde caché si sus modelos no cambiaron (ver fragmentos.py)."""
+    clave = clave_seccion(seccion, request.GET.urlencode())
+    return fragmento_en_cache(clave, lambda: _partes_seccion(request, seccion))
+
+
+@lectura_en_replica
 @user_passes_test(lambda u: u.is_superuser)
 def admin_panel_view(request):
-    clientes = Cliente.objects.all()
-    zonas = Zona.objects.all()
-    empleados = Empleado.objects.all()
-
+    # Solo la sección visible viaja con la página; las otras se piden al abrir su pestaña
+    seccion = request.GET.get('seccion')
+    seccion = seccion if seccion in ORDEN_PANEL else 'clientes'
     context = {
-        'clientes': clientes,
-        'zonas': zonas,
-        'empleados': empleados,
-        'total_clientes': clientes.count(),
-        'total_zonas': zonas.count(),
-        'total_empleados': empleados.count(),
+        'secciones': list(ORDEN_PANEL),
+        'seccion_activa': seccion,
+        'seccion_html': mark_safe(''.join(_seccion_panel(request, seccion))),
+        'filtros': {clave: request.GET.get(clave, '') for clave in FILTROS_PANEL},
+        'tipos_enfermedad': Cliente.TIPO_ENFERMEDAD,
+        'acciones': ACCIONES,
     }
     return render(request, 'monitoring/admin.html', context)
 
 
+@lectura_en_replica
+@user_passes_test(lambda u: u.is_superuser)
+def panel_seccion_view(request, seccion):
+    """Una sección del panel, enviada por partes a medida que se renderiza."""
+    if seccion not in ORDEN_PANEL:
+        raise Http404("Sección desconocida.")
+    return StreamingHttpResponse(_seccion_panel(request, seccion), content_type='text/html; charset=utf-8')
+
+
+@user_passes_test(lambda u: u.is_superuser)
+def acciones_masivas_view(request, seccion):
+    """Aplica una acción a las filas marcadas de una sección e informa cuántas cambió y en cuánto tiempo."""
+    if seccion not in ACCIONES:
+        raise Http404("Sección sin acciones masivas.")
+    panel = f"{reverse('admin_panel')}?seccion={seccion}"
+    if request.method != 'POST':
+        return redirect(panel)
+    try:
+        resultado = aplicar_accion(
+            seccion,
+            request.POST.get('accion'),
+            request.POST.getlist('ids'),
+            zona=request.POST.get('zona', '').strip(),
+            tipo_enfermedad=request.POST.get('tipo_enfermedad', ''),
+        )
+    except ValueError as error:
+        messages.error(request, str(error))
+    except SinCamasDisponibles:
+        messages.error(request, "La zona seleccionada no tiene camas libres para todos los clientes marcados.")
+    else:
+        messages.success(request, (
+            f"{ACCIONES[seccion][resultado.accion]}: {resultado.afectados} de {resultado.seleccionados} "
+            f"{seccion} modificados en {resultado.segundos * 1000:.0f} ms."
+        ))
+    return redirect(panel)
+
+
 # ------------------------------
 # CRUD CLIENTES
 # ------------------------------
+
+def _zona_del_formulario(request):
+    """Zona elegida en el selector (None si se dejó vacío); el id puede haber caducado."""
+    zona_id = request.POST.get('zona_asignada')
+    if not zona_id:
+        return None
+    zona = Zona.objects.filter(id=zona_id).first() if zona_id.isdigit() else None
+    if zona is None:
+        raise ValueError("La zona seleccionada no existe.")
+    return zona
+
 @user_passes_test(lambda u: u.is_superuser)
 def eliminar_cliente(request, id):
     cliente = get_object_or_404(Cliente, id=id)
@@ -172,8 +471,7 @@ def eliminar_cliente(request, id):
 
 @user_passes_test(lambda u: u.is_superuser)
 def editar_cliente(request, id):
-    cliente = get_object_or_404(Cliente, id=id)
-    zonas = Zona.objects.all()
+    cliente = get_object_or_404(Cliente.objects.select_related('zona_asignada'), id=id)
 
     if request.method == 'POST':
         cliente.nombre = request.POST.get('nombre')
@@ -183,19 +481,36 @@ def editar_cliente(request, id):
         tipo_doc = request.POST.get('tipo_documento')
         cliente.tipo_documento = 1 if tipo_doc == 'dni' else 2
         cliente.tipo_enfermedad = request.POST.get('tipo_enfermedad')
-        zona_id = request.POST.get('zona_asignada')
-        cliente.zona_asignada = Zona.objects.get(id=zona_id) if zona_id else None
-        cliente.save()
+
+        # La zona se cambia con el servicio de camas (ocupación atómica)
+        try:
+            zona = _zona_del_formulario(request)
+            with atomica():
+                cliente.save(update_fields=[
+                    'nombre', 'apellido1', 'documento', 'correo', 'tipo_documento', 'tipo_enfermedad'
+                ])
+                trasladar_cliente(cliente.id, zona.id if zona else None)
+        except (ValueError, Zona.DoesNotExist):
+            messages.error(request, "La zona seleccionada no existe.")
+            return render(request, 'monitoring/editar_cliente.html', {
+                'cliente': cliente, 'ruta_zona': ruta_de(cliente.zona_asignada)
+            })
+        except SinCamasDisponibles:
+            messages.error(request, "La zona seleccionada no tiene camas libres.")
+            return render(request, 'monitoring/editar_cliente.html', {
+                'cliente': cliente, 'ruta_zona': ruta_de(cliente.zona_asignada)
+            })
+
         messages.success(request, "Cliente actualizado correctamente.")
         return redirect('admin_panel')
 
-    return render(request, 'monitoring/editar_cliente.html', {'cliente': cliente, 'zonas': zonas})
+    return render(request, 'monitoring/editar_cliente.html', {
+        'cliente': cliente, 'ruta_zona': ruta_de(cliente.zona_asignada)
+    })
 
 
 @user_passes_test(lambda u: u.is_superuser)
 def agregar_cliente(request):
-    zonas = Zona.objects.all()
-
     if request.method == "POST":
         nombre = request.POST.get("nombre")
         apellido1 = request.POST.get("apellido1")
@@ -203,26 +518,104 @@ def agregar_cliente(request):
         correo = request.POST.get("correo")
         tipo_documento = request.POST.get("tipo_documento")
         tipo_enfermedad = request.POST.get("tipo_enfermedad")
-        zona_id = request.POST.get("zona_asignada")
-
-        identificador = str(uuid.uuid4())[:8]
-        zona = Zona.objects.get(id=zona_id) if zona_id else None
-
-        Cliente.objects.create(
-            nombre=nombre,
-            apellido1=apellido1,
-            documento=documento,
-            correo=correo,
-            tipo_documento=tipo_documento,
-            tipo_enfermedad=tipo_enfermedad,
-            zona_asignada=zona,
-            identificador=identificador
-        )
+
+        try:
+            zona = _zona_del_formulario(request)
+        except ValueError as error:
+            messages.error(request, str(error))
+            return render(request, "monitoring/agregar_cliente.html")
+
+        identificador = nuevo_identificador()
+
+        try:
+            with atomica():
+                cliente = Cliente.objects.create(
+                    nombre=nombre,
+                    apellido1=apellido1,
+                    documento=documento,
+                    correo=correo,
+                    tipo_documento=tipo_documento,
+                    tipo_enfermedad=tipo_enfermedad,
+                    identificador=identificador
+                )
+                if zona:
+                    asignar_cliente(cliente.id, zona.id)
+        except Zona.DoesNotExist:
+            messages.error(request, "La zona seleccionada no existe.")
+            return render(request, "monitoring/agregar_cliente.html")
+        except SinCamasDisponibles:
+            messages.error(request, "La zona seleccionada no tiene camas libres.")
+            return render(request, "monitoring/agregar_cliente.html")
 
         messages.success(request, "✅ Cliente agregado correctamente.")
         return redirect("admin_panel")
 
-    return render(request, "monitoring/agregar_cliente.html", {'zonas': zonas})
+    return render(request, "monitoring/agregar_cliente.html")
+
+
+@lectura_en_replica
+@user_passes_test(lambda u: u.is_superuser)
+def exportar_clientes(request):
+    formato = request.GET.get('formato', 'csv')
+    if formato not in FORMATOS:
+        return HttpResponseBadRequest("Formato no soportado (csv o jsonl).")
+    generar, tipo_contenido = FORMATOS[formato]
+    try:
+        zona = int(request.GET['zona']) if request.GET.get('zona') else None
+    except ValueError:
+        return HttpResponseBadRequest("zona debe ser un número.")
+
+    clientes = filtrar_clientes(
+        zona=zona,
+        tipo_enfermedad=request.GET.get('tipo_enfermedad'),
+        alta=request.GET.get('alta'),
+    )
+    respuesta = StreamingHttpResponse(generar(iterar_clientes(clientes)), content_type=tipo_contenido)
+    respuesta['Content-Disposition'] = f'attachment; filename="clientes.{formato}"'
+    return respuesta
+
+
+@lectura_en_replica
+def buscar_clientes_view(request):
+    if not request.user.is_authenticated:
+        return redirect('login')
+
+    try:
+        limite = int(request.GET.get('limite', LIMITE_DEFECTO))
+        desplazamiento = int(request.GET.get('desde', 0))
+    except ValueError:
+        return HttpResponseBadRequest("limite y desde deben ser números.")
+
+    resultados = buscar_clientes(request.GET.get('q', ''), limite=limite, desplazamiento=desplazamiento)
+    return JsonResponse({
+        'resultados': [
+            {
+                'id': cliente.id,
+                'nombre': cliente.nombre,
+                'apellido1': cliente.apellido1,
+                'apellido2': cliente.apellido2,
+                'documento': cliente.documento,
+                'zona': cliente.zona_asignada.nombre if cliente.zona_asignada else None,
+                'rango': round(rango, 4),
+            }
+            for cliente, rango in resultados
+        ],
+        'desde': desplazamiento,
+        'limite': limite,
+    })
+
+
+@lectura_en_replica
+def zonas_autocompletar_view(request):
+    if not request.user.is_authenticated:
+        return redirect('login')
+
+    try:
+        limite = int(request.GET.get('limite', LIMITE_ZONAS))
+    except ValueError:
+        return HttpResponseBadRequest("limite debe ser un número.")
+
+    return JsonResponse({'resultados': sugerir_zonas(request.GET.get('q', ''), limite)})
 
 
 # ------------------------------
@@ -237,12 +630,16 @@ def eliminar_zona(request, id):
 
 @user_passes_test(lambda u: u.is_superuser)
 def editar_zona(request, id):
-    zona = get_object_or_404(Zona, id=id)
     if request.method == 'POST':
-        zona.nombre = request.POST.get('nombre')
-        zona.tipo = request.POST.get('tipo')
-        zona.save()
+        # Ocupación y acumulados los cambian UPDATE condicionales (camas.py,
+        # jerarquia.py): solo se escriben los campos del formulario
+        with atomica():
+            zona = get_object_or_404(Zona.objects.select_for_update(), id=id)
+            zona.nombre = request.POST.get('nombre')
+            zona.tipo = request.POST.get('tipo')
+            zona.save(update_fields=['nombre', 'tipo'])
         return redirect('admin_panel')
+    zona = get_object_or_404(Zona, id=id)
     return render(request, 'monitoring/editar_zona.html', {'zona': zona})
 
 
@@ -253,7 +650,7 @@ def agregar_zona(request):
         tipo = request.POST.get('tipo')
 
         if nombre and tipo:
-            identificador = str(uuid.uuid4())[:8]  # 🔹 genera identificador único
+            identificador = nuevo_identificador()
             Zona.objects.create(nombre=nombre, tipo=tipo, identificador=identificador)
             messages.success(request, 'Zona agregada correctamente.')
             return redirect('admin_panel')
@@ -275,35 +672,43 @@ def eliminar_empleado(request, id):
 
 @user_passes_test(lambda u: u.is_superuser)
 def editar_empleado(request, id):
-    empleado = get_object_or_404(Empleado, id=id)
-    zonas = Zona.objects.all()
+    empleado = get_object_or_404(Empleado.objects.select_related('zona_asignada'), id=id)
 
     if request.method == 'POST':
         empleado.nombre = request.POST.get('nombre')
         empleado.apellido1 = request.POST.get('apellido1')
         empleado.cargo = request.POST.get('cargo')
-        zona_id = request.POST.get('zona_asignada')
-        empleado.zona_asignada = Zona.objects.get(id=zona_id) if zona_id else None
+        try:
+            empleado.zona_asignada = _zona_del_formulario(request)
+        except ValueError as error:
+            messages.error(request, str(error))
+            return render(request, 'monitoring/editar_empleado.html', {
+                'empleado': empleado, 'ruta_zona': ruta_de(empleado.zona_asignada)
+            })
         empleado.save()
         messages.success(request, "Empleado actualizado correctamente.")
         return redirect('admin_panel')
 
-    return render(request, 'monitoring/editar_empleado.html', {'empleado': empleado, 'zonas': zonas})
+    return render(request, 'monitoring/editar_empleado.html', {
+        'empleado': empleado, 'ruta_zona': ruta_de(empleado.zona_asignada)
+    })
 
 
 @user_passes_test(lambda u: u.is_superuser)
 def agregar_empleado(request):
-    zonas = Zona.objects.all()
-
     if request.method == 'POST':
         nombre = request.POST.get('nombre')
         apellido1 = request.POST.get('apellido1')
         cargo = request.POST.get('cargo')
-        zona_id = request.POST.get('zona_asignada')
+
+        try:
+            zona = _zona_del_formulario(request)
+        except ValueError as error:
+            messages.error(request, str(error))
+            return render(request, 'monitoring/agregar_empleado.html')
 
         if nombre and apellido1 and cargo:
-            identificador_unico = str(uuid.uuid4())[:8]
-            zona = Zona.objects.get(id=zona_id) if zona_id else None
+            identificador_unico = nuevo_identificador()
 
             Empleado.objects.create(
                 nombre=nombre,
@@ -318,4 +723,4 @@ def agregar_empleado(request):
         else:
             messages.error(request, 'Todos los campos son obligatorios.')
 
-    return render(request, 'monitoring/agregar_empleado.html', {'zonas': zonas})
+    return render(request, 'monitoring/agregar_empleado.html')